@@ -1,4 +1,4 @@
-import React, { useCallback, useEffect, useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 import './App.css';
 
@@ -18,40 +18,6 @@ function App() {
   const [board, setBoard] = useState(initialBoard);
   const [winner, setWinner] = useState(null);
 
-  /**
-   * Fetches the current board state from the server.
-   */
-  const fetchBoard = useCallback(() => {
-    console.log('Fetching board state from server...');
-    axios.get(`${URL}/board`)
-      .then(response => {
-        console.log('Board state fetched:', response.data.board);
-        setBoard(response.data.board);
-      })
-      .catch(error => {
-        console.error('Error fetching board:', error);
-      });
-  }, []);
-
-  /**
-   * Checks if there is a winner.
-   */
-  const checkWinner = useCallback(() => {
-    console.log('Checking for a winner...');
-    axios.get(`${URL}/check_winner`)
-      .then(response => {
-        if (response.data.winner) {
-          console.log(`Player ${response.data.winner} wins!`);
-          setWinner(response.data.winner);
-        } else {
-          console.log('No winner yet.');
-        }
-      })
-      .catch(error => {
-        console.error('Error checking winner:', error);
-      });
-  }, []);
-
   /**
    * Handles the click event for a cell.
    * @param {number} index - The index of the clicked cell.
@@ -73,8 +39,8 @@ function App() {
       .then(response => {
         console.log('Move made:', response.data.board);
         const newBoard = response.data.board;
+        // A winning move is reported by the board event that follows it
         setBoard(newBoard);
-        checkWinner();
       })
       .catch(error => {
         // Handle error response
@@ -91,10 +57,24 @@ function App() {
       });
   };
 
-  // Fetch the initial board state when the component mounts
+  // Subscribe to the board updates pushed by the server when the component mounts: the first
+  // event is the current board, then one comes after every move, the opponent's included
   useEffect(() => {
-    fetchBoard();
-  }, [fetchBoard]);
+    console.log('Subscribing to board updates...');
+    const events = new EventSource(`${URL}/events`);
+    events.addEventListener('board', (event) => {
+      const data = JSON.parse(event.data);
+      console.log('Board update received:', data);
+      setBoard(data.board);
+      if (data.winner) {
+        setWinner(data.winner);
+      }
+    });
+    events.onerror = (error) => {
+      console.error('Board updates interrupted:', error);
+    };
+    return () => events.close();
+  }, []);
 
   /**
    * Renders a cell of the Tic Tac Toe board.
@@ -1,7 +1,10 @@
 from flask import Flask, jsonify, make_response, request, Response
 from flask_cors import CORS
 
-from tictactoe.controller import get_board_state, get_winner, make_move
+from tictactoe.controller import (
+    game_events, get_board_state, get_winner, make_ai_move, make_move, new_game, poll, POLL_TIMEOUT, replay_games, STORE
+)
+from tictactoe.store import DEFAULT_GAME_ID
 from tictactoe.view import View
 
 app = Flask(__name__)
@@ -17,27 +20,66 @@ def health_check() -> Response:
     app.logger.info('Health check')
     return make_response(jsonify({"status": "OK"}), 200)
 
+@app.route("/tictactoe/games", methods=["POST"])
+def create_game() -> Response:
+    app.logger.info('Creating a game')
+    return new_game()
+
+@app.route("/tictactoe/replay", methods=["POST"])
+def replay() -> Response:
+    app.logger.info('Replaying a game log')
+    return replay_games(request.stream)
+
+@app.route("/tictactoe/games/stats", methods=["GET"])
+def game_stats() -> Response:
+    return make_response(jsonify(STORE.stats()), 200)
+
+# The routes without a game id play the default game, as the single-game service did
+
 @app.route("/tictactoe/board", methods=["GET"])
-def board_state() -> Response:
+@app.route("/tictactoe/<game_id>/board", methods=["GET"])
+def board_state(game_id: str = DEFAULT_GAME_ID) -> Response:
     app.logger.info('Get board state')
-    return get_board_state()
+    return get_board_state(game_id)
 
 @app.route("/tictactoe/check_winner", methods=["GET"])
-def check_winner() -> Response:
+@app.route("/tictactoe/<game_id>/check_winner", methods=["GET"])
+def check_winner(game_id: str = DEFAULT_GAME_ID) -> Response:
     app.logger.info('Checking for a winner')
-    return get_winner()
+    return get_winner(game_id)
 
 @app.route("/tictactoe/move", methods=["POST"])
-def move() -> Response:
+@app.route("/tictactoe/<game_id>/move", methods=["POST"])
+def move(game_id: str = DEFAULT_GAME_ID) -> Response:
     app.logger.info('Moving')
-    data = request.get_json()
-    app.logger.info(data)
-    index = data['index']
-    app.logger.info(index)
-    try:
-        return make_move(index)
-    except ValueError as e:
-        return VIEW.error(str(e))
+    data = request.get_json(silent=True) or {}
+    return make_move(data.get('index'), game_id)
+
+@app.route("/tictactoe/ai-move", methods=["POST"])
+@app.route("/tictactoe/<game_id>/ai-move", methods=["POST"])
+def ai_move(game_id: str = DEFAULT_GAME_ID) -> Response:
+    app.logger.info('Moving for the computer')
+    return make_ai_move(game_id)
+
+# Long-poll and server-sent events: a client waits for the next move instead of polling /board.
+# A waiting request sleeps on its game's condition. The Dockerfile serves the app with gunicorn's
+# gevent worker, which patches threading, so that it holds a greenlet, not a thread.
+
+@app.route("/tictactoe/poll", methods=["GET"])
+@app.route("/tictactoe/<game_id>/poll", methods=["GET"])
+def poll_game(game_id: str = DEFAULT_GAME_ID) -> Response:
+    since = request.args.get('since', -1, type=int)
+    timeout = request.args.get('timeout', POLL_TIMEOUT, type=float)
+    return poll(game_id, since, timeout)
+
+@app.route("/tictactoe/events", methods=["GET"])
+@app.route("/tictactoe/<game_id>/events", methods=["GET"])
+def events(game_id: str = DEFAULT_GAME_ID) -> Response:
+    app.logger.info('Streaming game events')
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', -1, type=int)
+    return game_events(game_id, since)
 
 if __name__ == '__main__':
     app.run(host="0.0.0.0", debug=True)
@@ -0,0 +1,80 @@
+"""Load benchmark of the GameStore: many games in progress at once, played by several threads.
+
+Creates the games, then has each thread play its share of them to a win move by move, the
+games interleaved as they would be on a busy server. Reports the memory per game, games
+created and moves made per second, and the time to evict them all once expired.
+
+Run from the service directory:
+
+    python -m benchmarks.bench_game_store --games 100000 --threads 8
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import time
+import tracemalloc
+
+from tictactoe.store import GameStore
+
+
+# X takes the top row while O plays the middle one
+MOVES = (0, 3, 1, 4, 2)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def play(store, game_ids):
+    for index in MOVES:
+        for game_id in game_ids:
+            with store.game(game_id) as model:
+                model.move(index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    clock = Clock()
+    store = GameStore(ttl=3600, clock=clock)
+
+    start = time.perf_counter()
+    game_ids = [store.create() for _ in range(args.games)]
+    create_seconds = time.perf_counter() - start
+
+    # Memory of a second store of as many games, created with the same ids so they are not counted
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    other = GameStore(ttl=3600)
+    for game_id in game_ids:
+        other.create(game_id)
+    per_game = (tracemalloc.get_traced_memory()[0] - before) / args.games
+    tracemalloc.stop()
+    del other
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(play, [store] * args.threads, [game_ids[i::args.threads] for i in range(args.threads)]))
+    move_seconds = time.perf_counter() - start
+
+    clock.now = 3601
+    start = time.perf_counter()
+    evicted = store.evict_expired()
+    evict_seconds = time.perf_counter() - start
+
+    moves = args.games * len(MOVES)
+    print(f"{args.games} games, {args.threads} threads")
+    print(f"memory:  {per_game:.0f} bytes per game")
+    print(f"create:  {args.games / create_seconds:,.0f} games/s")
+    print(f"moves:   {moves / move_seconds:,.0f} moves/s ({moves} moves in {move_seconds:.2f}s)")
+    print(f"evict:   {evicted} games in {evict_seconds * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark of tic-tac-toe moves: the bitboard Model against a list-scan implementation.
+
+Plays the same random games with both, checking for a winner after every move as
+Model.move does, and reports moves per second. Then times set_winner, the full-board
+check, on the final positions of those games.
+
+Run from the service directory:
+
+    python -m benchmarks.bench_moves --games 100000
+"""
+import argparse
+import random
+import time
+
+from tictactoe.model import BitBoard, Model, WIN_LINES
+
+
+class ListModel:
+    """
+    The same game on a list of squares: a square is checked by reading the list, and a win
+    by scanning every line after each move, as set_winner does.
+    """
+
+    def __init__(self):
+        self.squares = [""] * 9
+        self.player = "X"
+        self.winner = None
+
+    def change_player(self):
+        self.player = "O" if self.player == "X" else "X"
+
+    def set_winner(self):
+        for a, b, c in WIN_LINES:
+            if self.squares[a] and self.squares[a] == self.squares[b] == self.squares[c]:
+                self.winner = self.squares[a]
+                return
+
+    def move(self, index):
+        if self.squares[index]:
+            raise ValueError("Square already occupied")
+        self.squares[index] = self.player
+        self.set_winner()
+        self.change_player()
+
+
+def play(model_class, games):
+    moves = 0
+    winners = []
+    for order in games:
+        model = model_class()
+        for index in order:
+            model.move(index)
+            moves += 1
+            if model.winner is not None:
+                break
+        winners.append(model.winner)
+    return moves, winners
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-g', '--games', type=int, default=100000, help='number of random games to play')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    games = [rng.sample(range(9), 9) for _ in range(args.games)]
+
+    results = {}
+    for name, model_class in (("list scan", ListModel), ("bitboard", Model)):
+        start = time.perf_counter()
+        moves, winners = play(model_class, games)
+        results[name] = (moves, winners, time.perf_counter() - start)
+    assert results["list scan"][:2] == results["bitboard"][:2]
+
+    moves = results["bitboard"][0]
+    print(f"playing {args.games} random games ({moves} moves)")
+    base = results["list scan"][2]
+    for name, (_, _, elapsed) in results.items():
+        print(f"  {name:<10} {moves / elapsed:12,.0f} moves/s  x{base / elapsed:.2f}")
+
+    # Positions reached in play: each game cut off at a random move, or at its winning move
+    positions = []
+    for order in games:
+        model = Model()
+        for index in order[:rng.randrange(10)]:
+            model.move(index)
+            if model.winner is not None:
+                break
+        positions.append(model.board.squares)
+    list_models = []
+    for squares in positions:
+        model = ListModel()
+        model.squares = squares
+        list_models.append(model)
+    boards = [BitBoard(squares) for squares in positions]
+
+    start = time.perf_counter()
+    for model in list_models:
+        model.set_winner()
+    list_time = time.perf_counter() - start
+    start = time.perf_counter()
+    winners = [board.winner() for board in boards]
+    bit_time = time.perf_counter() - start
+    assert winners == [model.winner for model in list_models]
+
+    print(f"checking {len(positions)} positions for a winner")
+    print(f"  {'list scan':<10} {len(positions) / list_time:12,.0f} checks/s  x1.00")
+    print(f"  {'bitboard':<10} {len(positions) / bit_time:12,.0f} checks/s  x{list_time / bit_time:.2f}")
+
+
+if __name__ == "__main__":
+    main()
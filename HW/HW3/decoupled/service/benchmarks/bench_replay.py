@@ -0,0 +1,75 @@
+"""Benchmark of auditing a game log: the NDJSON replay against one request per move.
+
+Generates random games, some with an illegal move, and replays them two ways: through
+replay() in one pass, and through a Flask test client posting every move to
+/tictactoe/<game_id>/move of a new game, as a client of the move API has to. Reports games
+per second for both.
+
+Run from the service directory:
+
+    python -m benchmarks.bench_replay --games 20000
+"""
+import argparse
+import json
+import random
+import time
+
+from flask import Flask, request
+
+from tictactoe import controller
+from tictactoe.replay import replay
+
+
+def random_log(games, seed):
+    rng = random.Random(seed)
+    lines = []
+    for game in range(games):
+        moves = rng.sample(range(9), rng.randint(5, 9))
+        if rng.random() < 0.05:
+            moves.append(moves[0])
+        lines.append(json.dumps({"id": game, "moves": moves}).encode())
+    return lines
+
+
+def per_move_app():
+    app = Flask(__name__)
+    app.add_url_rule("/tictactoe/games", view_func=controller.new_game, methods=["POST"])
+    app.add_url_rule(
+        "/tictactoe/<game_id>/move",
+        view_func=lambda game_id: controller.make_move(request.get_json()["index"], game_id),
+        methods=["POST"],
+    )
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    lines = random_log(args.games, args.seed)
+
+    start = time.perf_counter()
+    reports = list(replay(lines))
+    replay_seconds = time.perf_counter() - start
+
+    # A tenth of the games is enough to time the per-move path
+    sample = lines[: max(1, args.games // 10)]
+    client = per_move_app().test_client()
+    start = time.perf_counter()
+    for line in sample:
+        game_id = client.post("/tictactoe/games").get_json()["game_id"]
+        for index in json.loads(line)["moves"]:
+            if client.post(f"/tictactoe/{game_id}/move", json={"index": index}).status_code != 200:
+                break
+    per_move_seconds = time.perf_counter() - start
+
+    print(json.loads(reports[-1])["summary"])
+    print(f"replay:    {args.games / replay_seconds:>10,.0f} games/s")
+    print(f"per move:  {len(sample) / per_move_seconds:>10,.0f} games/s")
+    print(f"speedup:   {(args.games / replay_seconds) / (len(sample) / per_move_seconds):>10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark of the minimax Solver on 3x3 and 4x4 boards, with and without symmetry reduction.
+
+For each board, solves the empty board and reports the time, the positions searched and the
+transposition table size. Then plays random games against the solver and times its moves:
+the first time each position is asked for, and again once every position is cached.
+
+Run from the service directory:
+
+    python -m benchmarks.bench_solver --games 200
+"""
+import argparse
+import random
+import time
+
+from tictactoe.ai import Solver
+
+
+BOARDS = ((3, 3), (4, 3), (4, 4))
+
+
+def positions(solver, games, seed):
+    """The positions the solver is to move in, over random games in which it plays 'O'."""
+    rng = random.Random(seed)
+    found = []
+    for _ in range(games):
+        x = o = 0
+        full = (1 << solver.size) - 1
+        while True:
+            empty = [i for i in range(solver.size) if not (x | o) >> i & 1]
+            x |= 1 << rng.choice(empty)
+            if solver._has_won(x) or x | o == full:
+                break
+            found.append((x, o))
+            o |= 1 << solver.best_move(x, o, "O")
+            if solver._has_won(o) or x | o == full:
+                break
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'board':<18}{'symmetry':<10}{'value':>6}{'solve s':>9}{'nodes':>10}{'table':>9}{'first ms':>10}{'cached us':>11}")
+    for n, k in BOARDS:
+        for use_symmetry in (False, True):
+            solver = Solver(n, k, use_symmetry=use_symmetry)
+            start = time.perf_counter()
+            value = solver.solve()
+            solve_seconds = time.perf_counter() - start
+            nodes, table = solver.nodes, len(solver._table)
+
+            start = time.perf_counter()
+            moves = positions(solver, args.games, args.seed)
+            first_ms = (time.perf_counter() - start) / len(moves) * 1000
+
+            start = time.perf_counter()
+            for x, o in moves:
+                solver.best_move(x, o, "O")
+            cached_us = (time.perf_counter() - start) / len(moves) * 1_000_000
+
+            print(f"{f'{n}x{n}, {k} in a row':<18}{'yes' if use_symmetry else 'no':<10}{value:>6}{solve_seconds:>9.2f}"
+                  f"{nodes:>10}{table:>9}{first_ms:>10.3f}{cached_us:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+from functools import lru_cache
+
+import pytest
+
+from tictactoe import GAME_OVER_ERROR_MSG
+from tictactoe.ai import Solver, symmetries, win_lines
+from tictactoe.model import IS_WIN, Model
+
+
+def masks(squares):
+    x = sum(1 << i for i, square in enumerate(squares) if square == "X")
+    o = sum(1 << i for i, square in enumerate(squares) if square == "O")
+    return x, o
+
+@lru_cache(maxsize=None)
+def plain_minimax(mover, opponent):
+    """Negamax over the whole 3x3 tree, without pruning, tables or symmetry."""
+    if IS_WIN[opponent]:
+        return -(9 - bin(mover | opponent).count("1") + 1)
+    empty = [i for i in range(9) if not (mover | opponent) >> i & 1]
+    if not empty:
+        return 0
+    return max(-plain_minimax(opponent, mover | 1 << i) for i in empty)
+
+def reachable(mover=0, opponent=0, seen=None):
+    """Every 3x3 position reachable in play with nobody having won, as (mover, opponent)."""
+    seen = set() if seen is None else seen
+    if (mover, opponent) in seen or IS_WIN[opponent]:
+        return seen
+    seen.add((mover, opponent))
+    for i in range(9):
+        if not (mover | opponent) >> i & 1:
+            reachable(opponent, mover | 1 << i, seen)
+    return seen
+
+
+def test_win_lines():
+    assert len(win_lines(3, 3)) == 8
+    assert len(win_lines(4, 4)) == 10
+    assert len(win_lines(4, 3)) == 24
+    assert sorted(win_lines(3, 3)) == sorted(sum(1 << i for i in line) for line in [
+        (0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)])
+
+def test_invalid_line_length():
+    with pytest.raises(ValueError, match="Invalid line length"):
+        Solver(3, 4)
+
+@pytest.mark.parametrize("n", [3, 4])
+def test_canonical_is_shared_by_symmetries(n):
+    """Test that the 8 images of a position have the same key and the key is one of them."""
+    solver = Solver(n)
+    mover, opponent = 0b1001, 0b100000
+    images = set()
+    for permutation in symmetries(n):
+        permute = lambda mask: sum(1 << permutation[i] for i in range(n * n) if mask >> i & 1)
+        images.add((permute(mover), permute(opponent)))
+
+    keys = {solver.canonical(*image) for image in images}
+
+    assert len(images) == 8
+    assert keys == {min(m << n * n | o for m, o in images)}
+
+def test_solve():
+    assert Solver(3).solve() == 0
+    assert Solver(4, 3).solve() > 0
+    assert Solver(3, 2).solve() == 7
+
+def test_values_match_plain_minimax():
+    """Test the value of every reachable 3x3 position against a search without pruning or tables."""
+    solver = Solver()
+    solver.solve()
+    for mover, opponent in reachable():
+        player = "X" if bin(mover).count("1") == bin(opponent).count("1") else "O"
+        x, o = (mover, opponent) if player == "X" else (opponent, mover)
+        if mover | opponent != (1 << 9) - 1:
+            assert solver.value(x, o, player) == plain_minimax(mover, opponent)
+
+def test_best_move_wins_and_blocks():
+    solver = Solver()
+    # X to play can win on square 2, and must otherwise block O on square 8
+    assert solver.best_move(*masks(["X", "X", "", "O", "", "", "O", "O", ""]), "X") == 2
+    assert solver.best_move(*masks(["X", "", "", "", "X", "", "O", "O", ""]), "X") == 8
+
+def test_best_move_is_cached():
+    solver = Solver()
+    solver.best_move(0, 0, "X")
+    nodes = solver.nodes
+
+    solver.best_move(0, 0, "X")
+
+    assert solver.nodes == nodes
+
+def test_best_move_game_over():
+    with pytest.raises(ValueError, match=GAME_OVER_ERROR_MSG):
+        Solver().best_move(*masks(["X", "X", "X", "O", "O", "", "", "", ""]), "O")
+
+@pytest.mark.parametrize("solver_player", ["X", "O"])
+def test_solver_never_loses(solver_player):
+    """Test the solver against every sequence of opponent moves."""
+    solver = Solver()
+
+    def play(model):
+        if model.get_winner() is not None or model.board.is_full():
+            assert model.get_winner() in (None, solver_player)
+            return
+        if model.get_current_player() == solver_player:
+            model.move(solver.best_move(model.board.x, model.board.o, solver_player))
+            play(model)
+            return
+        for index in range(9):
+            if model.board.is_free(index):
+                child = Model()
+                child.board.x, child.board.o, child.player = model.board.x, model.board.o, model.player
+                child.move(index)
+                play(child)
+
+    play(Model())
@@ -1,7 +1,13 @@
+import json
+import threading
+
 import pytest
 
-from tictactoe import INVALID_MOVE_ERROR_MSG
-from tictactoe.controller import validate_index
+from flask import Flask, request
+
+from tictactoe import controller, GAME_NOT_FOUND_ERROR_MSG, GAME_OVER_ERROR_MSG, INVALID_MOVE_ERROR_MSG, SQUARE_OCCUPIED_ERROR_MSG
+from tictactoe.controller import game_events, get_board_state, get_winner, make_ai_move, make_move, new_game, poll, replay_games, validate_index
+from tictactoe.store import DEFAULT_GAME_ID, GameStore
 
 
 def test_validate_index():
@@ -12,4 +18,160 @@ def test_validate_index():
     with pytest.raises(ValueError, match=INVALID_MOVE_ERROR_MSG):
         validate_index("zero")
     validate_index(0)
-    validate_index(8)
\ No newline at end of file
+    validate_index(8)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = GameStore()
+    monkeypatch.setattr(controller, "STORE", store)
+    with Flask(__name__).app_context():
+        yield store
+
+def test_games(store):
+    game_id = new_game().get_json()["game_id"]
+    other = new_game().get_json()["game_id"]
+
+    for index in (0, 3, 1, 4, 2):
+        response = make_move(index, game_id)
+        assert response.status_code == 200
+
+    assert response.get_json() == {"board": ["X", "X", "X", "O", "O", "", "", "", ""]}
+    assert get_winner(game_id).get_json() == {"winner": "X"}
+    assert get_board_state(other).get_json() == {"board": [""] * 9}
+    assert get_winner(other).get_json() == {"winner": None}
+
+def test_game_errors(store):
+    game_id = new_game().get_json()["game_id"]
+    make_move(4, game_id)
+
+    response = make_move(4, game_id)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": SQUARE_OCCUPIED_ERROR_MSG}
+    assert make_move(None, game_id).get_json() == {"error": INVALID_MOVE_ERROR_MSG}
+
+    for response in (get_board_state("missing"), get_winner("missing"), make_move(0, "missing")):
+        assert response.status_code == 404
+        assert response.get_json() == {"error": GAME_NOT_FOUND_ERROR_MSG}
+    assert len(store) == 1
+
+def test_no_moves_after_a_win(store):
+    game_id = new_game().get_json()["game_id"]
+    for index in (0, 3, 1, 4, 2):
+        make_move(index, game_id)
+
+    response = make_move(5, game_id)
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": GAME_OVER_ERROR_MSG}
+    assert get_board_state(game_id).get_json() == {"board": ["X", "X", "X", "O", "O", "", "", "", ""]}
+    assert poll(game_id).get_json()["version"] == 5
+
+def test_default_game(store):
+    assert get_board_state().get_json() == {"board": [""] * 9}
+
+    make_move(8)
+
+    assert get_board_state(DEFAULT_GAME_ID).get_json()["board"][8] == "X"
+
+def test_ai_move(store):
+    game_id = new_game().get_json()["game_id"]
+    for index in (0, 4):
+        make_move(index, game_id)
+    make_move(8, game_id)
+
+    # X holds opposite corners: O has to play an edge, as a corner lets X take the other and fork
+    response = make_ai_move(game_id)
+
+    assert response.status_code == 200
+    board = response.get_json()["board"]
+    assert board.count("O") == 2
+    assert [index for index in (1, 3, 5, 7) if board[index] == "O"]
+    assert make_ai_move("missing").status_code == 404
+
+def test_ai_plays_itself_to_a_draw(store):
+    game_id = new_game().get_json()["game_id"]
+    for _ in range(9):
+        assert make_ai_move(game_id).status_code == 200
+
+    response = make_ai_move(game_id)
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": GAME_OVER_ERROR_MSG}
+    assert get_winner(game_id).get_json() == {"winner": None}
+
+def test_poll(store):
+    game_id = new_game().get_json()["game_id"]
+    assert poll(game_id).get_json() == {"board": [""] * 9, "winner": None, "version": 0}
+    assert poll(game_id, since=0, timeout=0.05).get_json()["version"] == 0
+    assert poll("missing").status_code == 404
+
+    def move():
+        with store.game(game_id) as model:
+            model.move(4)
+
+    timer = threading.Timer(0.1, move)
+    timer.start()
+    response = poll(game_id, since=0, timeout=5)
+    timer.join()
+
+    assert response.get_json() == {"board": [""] * 4 + ["X"] + [""] * 4, "winner": None, "version": 1}
+
+def test_game_events(store):
+    """Test that the stream sends the state, then one event per move, and ends with the game."""
+    game_id = new_game().get_json()["game_id"]
+    response = game_events(game_id)
+    assert response.mimetype == "text/event-stream"
+    events = iter(response.response)
+
+    assert next(events).startswith("id: 0\nevent: board\n")
+    for index in (0, 3, 1, 4):
+        make_move(index, game_id)
+    assert '"version": 4' in next(events)
+    make_move(2, game_id)
+    last = next(events)
+
+    assert last.startswith("id: 5\n")
+    assert json.loads(last.split("data: ")[1]) == {
+        "board": ["X", "X", "X", "O", "O", "", "", "", ""], "winner": "X", "version": 5}
+    assert next(events, None) is None
+    assert game_events(game_id, since=5).status_code == 204
+    assert game_events("missing").status_code == 404
+
+def test_game_events_heartbeat(store, monkeypatch):
+    monkeypatch.setattr(controller, "EVENT_HEARTBEAT", 0.01)
+    game_id = new_game().get_json()["game_id"]
+
+    events = iter(game_events(game_id, since=0).response)
+
+    assert next(events) == ": heartbeat\n\n"
+
+def test_replay_games(store):
+    body = "\n".join(json.dumps({"id": i, "moves": [0, 3, 1, 4, 2]}) for i in range(1000))
+    app = Flask(__name__)
+
+    with app.test_request_context("/tictactoe/replay", method="POST", data=body):
+        response = replay_games(request.stream)
+        lines = [json.loads(line) for line in response.response]
+
+    assert response.mimetype == "application/x-ndjson"
+    assert len(lines) == 1001
+    assert lines[999] == {"id": 999, "result": "X", "winner": "X", "moves": 5, "error": None}
+    assert lines[-1]["summary"]["X"] == 1000
+    assert len(store) == 0
+
+def test_game_routes(monkeypatch):
+    pytest.importorskip("flask_cors")
+    from app import app
+    monkeypatch.setattr(controller, "STORE", GameStore())
+    client = app.test_client()
+
+    game_id = client.post("/tictactoe/games").get_json()["game_id"]
+    response = client.post(f"/tictactoe/{game_id}/move", json={"index": 4})
+    assert response.get_json()["board"][4] == "X"
+    assert client.get(f"/tictactoe/{game_id}/check_winner").get_json() == {"winner": None}
+    assert client.get("/tictactoe/missing/board").status_code == 404
+    assert client.post("/tictactoe/move", json={"index": 0}).get_json()["board"][0] == "X"
+    assert client.get("/tictactoe/board").get_json()["board"][0] == "X"
+    response = client.post("/tictactoe/replay", data=b"[0, 3, 1, 4, 2]\n[4, 4]\n")
+    assert [json.loads(line).get("result") for line in response.data.splitlines()[:2]] == ["X", "illegal"]
@@ -1,7 +1,7 @@
 import pytest
 
-from tictactoe import Board, SQUARE_OCCUPIED_ERROR_MSG
-from tictactoe.model import Model
+from tictactoe import Board, INVALID_MOVE_ERROR_MSG, SQUARE_OCCUPIED_ERROR_MSG
+from tictactoe.model import BitBoard, IS_WIN, Model, WIN_LINES
 
 
 @pytest.fixture
@@ -65,4 +65,42 @@ def test_move_occupied(model):
     model.board.squares = ["X", "O", "X", "O", "X", "O", "", "", ""]
     with pytest.raises(ValueError,
                        match=SQUARE_OCCUPIED_ERROR_MSG):
-        model.move(0)
\ No newline at end of file
+        model.move(0)
+
+@pytest.mark.parametrize("index", [-1, -9, 9])
+def test_move_off_the_board(model, index):
+    with pytest.raises(ValueError,
+                       match=INVALID_MOVE_ERROR_MSG):
+        model.move(index)
+    assert model.board.squares == [""] * 9
+    assert model.player == "X"
+
+def test_bitboard_masks(model):
+    model.move(0)
+    model.move(4)
+    model.move(8)
+    assert (model.board.x, model.board.o) == (0b100000001, 0b000010000)
+    assert model.board.is_free(1) and not model.board.is_free(4)
+
+def test_bitboard_has_no_dict():
+    assert not hasattr(BitBoard(), "__dict__")
+    assert not hasattr(Board([""] * 9), "__dict__")
+
+def test_bitboard_squares_are_a_copy(model):
+    squares = model.board.squares
+    squares[0] = "X"
+    assert model.board.is_free(0)
+    with pytest.raises(ValueError):
+        model.board.squares = ["X"] * 8
+
+def test_bitboard_winner_matches_line_scan():
+    # Every way of placing X and O, each square empty, X or O
+    for code in range(3 ** 9):
+        squares = []
+        for _ in range(9):
+            code, square = divmod(code, 3)
+            squares.append(("", "X", "O")[square])
+        board = BitBoard(squares)
+        lines = {squares[a] for a, b, c in WIN_LINES if squares[a] and squares[a] == squares[b] == squares[c]}
+        assert (board.winner() in lines) if lines else board.winner() is None
+        assert IS_WIN[board.x] == any(all(squares[i] == "X" for i in line) for line in WIN_LINES)
@@ -0,0 +1,65 @@
+import json
+import random
+
+import pytest
+
+from tictactoe import GAME_OVER_ERROR_MSG, INVALID_MOVE_ERROR_MSG, SQUARE_OCCUPIED_ERROR_MSG
+from tictactoe.model import Model
+from tictactoe.replay import INVALID_RECORD_ERROR_MSG, replay, replay_game
+
+
+@pytest.mark.parametrize("moves, result, winner", [
+    ([0, 3, 1, 4, 2], "X", "X"),
+    ([0, 3, 1, 4, 8, 5], "O", "O"),
+    ([0, 4, 8, 1, 7, 6, 2, 5, 3], "draw", None),
+    ([4, 0], "unfinished", None),
+    ([], "unfinished", None),
+])
+def test_replay_game(moves, result, winner):
+    assert replay_game(moves) == {"result": result, "winner": winner, "moves": len(moves), "error": None}
+
+@pytest.mark.parametrize("moves, turn, error", [
+    ([4, 4], 1, SQUARE_OCCUPIED_ERROR_MSG),
+    ([0, 9], 1, INVALID_MOVE_ERROR_MSG),
+    ([-1], 0, INVALID_MOVE_ERROR_MSG),
+    ([0, "1"], 1, INVALID_MOVE_ERROR_MSG),
+    ([True], 0, INVALID_MOVE_ERROR_MSG),
+    ([0, 3, 1, 4, 2, 5], 5, GAME_OVER_ERROR_MSG),
+])
+def test_replay_game_illegal_move(moves, turn, error):
+    report = replay_game(moves)
+    assert report["result"] == "illegal"
+    assert report["moves"] == turn
+    assert report["error"] == {"move": turn, "index": moves[turn], "error": error}
+
+def test_replay_game_matches_model():
+    """Test replayed winners against Model on random games, moves past a win included."""
+    rng = random.Random(0)
+    for _ in range(2000):
+        moves = rng.sample(range(9), rng.randint(0, 9))
+        model = Model()
+        for index in moves:
+            model.move(index)
+        report = replay_game(moves)
+        if report["result"] == "illegal":
+            assert report["error"]["error"] == GAME_OVER_ERROR_MSG
+            assert report["winner"] == model.get_winner() is not None
+        else:
+            assert report["winner"] == model.get_winner()
+
+def test_replay_log():
+    lines = [
+        b'{"id": "final", "moves": [0, 3, 1, 4, 2]}\n',
+        b"\n",
+        b"[4, 4]\n",
+        b"not json\n",
+        b'{"moves": "0,1"}\n',
+        b"[4, 0]",
+    ]
+
+    reports = [json.loads(line) for line in replay(lines)]
+
+    assert [report.get("id") for report in reports[:-1]] == ["final", 3, 4, 5, 6]
+    assert [report.get("result") for report in reports[:-1]] == ["X", "illegal", "illegal", "illegal", "unfinished"]
+    assert reports[2]["error"] == {"error": INVALID_RECORD_ERROR_MSG}
+    assert reports[-1] == {"summary": {"games": 5, "X": 1, "O": 0, "draw": 0, "unfinished": 1, "illegal": 3}}
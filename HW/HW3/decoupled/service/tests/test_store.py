@@ -0,0 +1,172 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+import pytest
+
+from tictactoe import GAME_NOT_FOUND_ERROR_MSG, SQUARE_OCCUPIED_ERROR_MSG
+from tictactoe.store import GameStore, version
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def store(clock):
+    return GameStore(ttl=60, clock=clock)
+
+
+def test_games_are_separate(store):
+    first, second = store.create(), store.create()
+    assert first != second
+
+    with store.game(first) as model:
+        model.move(0)
+    with store.game(second) as model:
+        model.move(4)
+
+    with store.game(first) as model:
+        assert model.get_board_state().squares == ["X"] + [""] * 8
+    with store.game(second) as model:
+        assert model.get_board_state().squares == [""] * 4 + ["X"] + [""] * 4
+
+def test_unknown_game(store):
+    with pytest.raises(KeyError, match=GAME_NOT_FOUND_ERROR_MSG):
+        with store.game("nope"):
+            pass
+    with store.game("nope", create=True) as model:
+        assert model.get_current_player() == "X"
+    assert len(store) == 1
+
+def test_create_existing_game(store):
+    store.create("abc")
+    with pytest.raises(ValueError, match="already exists"):
+        store.create("abc")
+
+def test_invalid_ttl():
+    with pytest.raises(ValueError, match="Invalid ttl"):
+        GameStore(ttl=0)
+
+def test_ttl_eviction(store, clock):
+    """Test that games left unplayed for ttl seconds are dropped and played ones are kept."""
+    idle, played = store.create(), store.create()
+
+    clock.now = 50
+    with store.game(played):
+        pass
+    clock.now = 61
+
+    with pytest.raises(KeyError):
+        with store.game(idle):
+            pass
+    with store.game(played):
+        pass
+    assert store.stats() == {"games": 1, "evicted": 1, "ttl": 60}
+
+def test_eviction_is_spread_over_requests(store, clock):
+    """Test that a request drops a bounded number of expired games and evict_expired drops the rest."""
+    for _ in range(100):
+        store.create()
+    clock.now = 100
+
+    store.create()
+    assert len(store) == 93
+
+    assert store.evict_expired() == 92
+    assert len(store) == 1
+
+def test_same_game_requests_are_serialized(store):
+    """Test that of many threads playing the same square of a game, exactly one gets it."""
+    game_id = store.create()
+    barrier = threading.Barrier(16)
+    errors = []
+
+    def play():
+        barrier.wait()
+        try:
+            with store.game(game_id) as model:
+                model.move(4)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=play) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == [SQUARE_OCCUPIED_ERROR_MSG] * 15
+    with store.game(game_id) as model:
+        assert model.get_current_player() == "O"
+
+def test_load_100k_games():
+    """Test 100k games in progress at once, each played to a win by threads sharing the store."""
+    store = GameStore(ttl=3600)
+    game_ids = [store.create() for _ in range(100_000)]
+
+    def play(game_ids):
+        # X takes the top row while O plays the middle one: five moves per game, interleaved
+        for index in (0, 3, 1, 4, 2):
+            for game_id in game_ids:
+                with store.game(game_id) as model:
+                    model.move(index)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(play, [game_ids[i::8] for i in range(8)]))
+
+    assert len(store) == 100_000
+    for game_id in game_ids[::997]:
+        with store.game(game_id) as model:
+            assert model.get_winner() == "X"
+            assert model.get_board_state().squares == ["X", "X", "X", "O", "O", "", "", "", ""]
+
+def test_wait_returns_at_once_when_past_version(store):
+    game_id = store.create()
+    with store.game(game_id) as model:
+        model.move(0)
+
+    start = time.perf_counter()
+    with store.wait(game_id, 0, timeout=5) as model:
+        assert version(model) == 1
+    assert time.perf_counter() - start < 1
+
+def test_wait_is_woken_by_moves_of_its_game_only(store):
+    """Test that a waiting request sleeps through another game's move and wakes on its own game's."""
+    game_id, other = store.create(), store.create()
+    seen = []
+
+    def waiter():
+        with store.wait(game_id, 0, timeout=5) as model:
+            seen.append((version(model), time.perf_counter()))
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.1)
+    with store.game(other) as model:
+        model.move(0)
+    time.sleep(0.1)
+    assert not seen
+    moved_at = time.perf_counter()
+    with store.game(game_id) as model:
+        model.move(4)
+    thread.join()
+
+    assert seen[0][0] == 1
+    assert seen[0][1] - moved_at < 1
+
+def test_wait_times_out(store):
+    game_id = store.create()
+    with store.wait(game_id, 0, timeout=0.05) as model:
+        assert version(model) == 0
+    with pytest.raises(KeyError, match=GAME_NOT_FOUND_ERROR_MSG):
+        with store.wait("nope", 0, timeout=0.05):
+            pass
@@ -8,10 +8,15 @@ from flask import current_app, has_request_context
 
 SQUARE_OCCUPIED_ERROR_MSG = "Square already occupied"
 INVALID_MOVE_ERROR_MSG = "Invalid move"
+GAME_NOT_FOUND_ERROR_MSG = "Game not found"
+GAME_OVER_ERROR_MSG = "Game is over"
 
 
 @dataclass
 class Board:
+    # Declared here too so that BitBoard, which only adds slots, has no per-instance dict
+    __slots__ = ("squares",)
+
     squares: List[str]
 
 
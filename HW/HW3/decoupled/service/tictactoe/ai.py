@@ -0,0 +1,331 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from tictactoe import GAME_OVER_ERROR_MSG
+
+logger = logging.getLogger(__name__)
+
+
+# Bounds of a value stored in the transposition table
+EXACT, LOWER, UPPER = 0, 1, 2
+# The bits of a board mask are permuted CHUNK_BITS at a time, with one table per chunk
+CHUNK_BITS = 8
+
+
+def symmetries(n: int) -> List[Tuple[int, ...]]:
+    """
+    Returns the 8 rotations and reflections of an n x n board, as square permutations.
+
+    Parameters
+    ----------
+    n : int
+        The width of the board.
+
+    Returns
+    -------
+    List[Tuple[int, ...]]
+        For each symmetry, the square every square is moved to, squares numbered row by row.
+    """
+    transforms = (
+        lambda r, c: (r, c),
+        lambda r, c: (c, n - 1 - r),
+        lambda r, c: (n - 1 - r, n - 1 - c),
+        lambda r, c: (n - 1 - c, r),
+        lambda r, c: (r, n - 1 - c),
+        lambda r, c: (n - 1 - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (n - 1 - c, n - 1 - r),
+    )
+    permutations = []
+    for transform in transforms:
+        permutation = []
+        for square in range(n * n):
+            r, c = transform(*divmod(square, n))
+            permutation.append(r * n + c)
+        permutations.append(tuple(permutation))
+    return permutations
+
+
+def win_lines(n: int, k: int) -> List[int]:
+    """
+    Returns every k in a row of an n x n board: rows, columns and both diagonals, as masks.
+
+    Parameters
+    ----------
+    n : int
+        The width of the board.
+    k : int
+        The number of squares in a line.
+
+    Returns
+    -------
+    List[int]
+        The masks of the lines, square i being bit i.
+    """
+    lines = []
+    for r in range(n):
+        for c in range(n):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                if 0 <= end_r < n and 0 <= end_c < n:
+                    lines.append(sum(1 << ((r + dr * i) * n + c + dc * i) for i in range(k)))
+    return lines
+
+
+class Solver:
+    """
+    Plays n x n tic-tac-toe with k in a row perfectly, by alpha-beta minimax.
+
+    Positions are searched from the side of the player to move (negamax), as the pair of masks
+    (their squares, the opponent's squares). A win is worth one more than the number of squares
+    still empty, so a faster win, or a slower loss, is preferred; a draw is 0.
+
+    Searched positions are kept in a transposition table keyed by their canonical form: the
+    smallest key of the 8 rotations and reflections of the position, so a position and its mirror
+    images are searched once. The table holds each position's value and whether it is exact or a
+    bound from a cut-off, and lasts as long as the solver, as do the best moves found, so a
+    position is only searched the first time a move is asked for it. Both are plain dicts shared by
+    the threads using the solver: two threads may search the same position, but every entry
+    stored is correct whichever thread stores it.
+
+    Attributes
+    ----------
+    n : int
+        The width of the board.
+    k : int
+        The number of squares in a line that wins.
+    nodes : int
+        The number of positions searched so far.
+
+    Methods
+    -------
+    canonical(mover: int, opponent: int) -> int:
+        Returns the transposition table key of a position.
+
+    value(x: int, o: int, player: str) -> int:
+        Returns the value of a position for the player to move.
+
+    best_move(x: int, o: int, player: str) -> int:
+        Returns the square the player to move should play.
+
+    solve() -> int:
+        Solves the empty board and returns its value.
+    """
+
+    def __init__(self, n: int = 3, k: Optional[int] = None, use_symmetry: bool = True):
+        """
+        Initializes a solver with an empty transposition table.
+
+        Parameters
+        ----------
+        n : int
+            The width of the board (default is 3).
+        k : int, optional
+            The number of squares in a line that wins (default is n).
+        use_symmetry : bool
+            Whether positions equal up to a rotation or reflection share a table entry (default is True).
+
+        Raises
+        ------
+        ValueError
+            If k is not between 1 and n.
+        """
+        k = n if k is None else k
+        if not 1 <= k <= n:
+            raise ValueError(f"Invalid line length: {k}. Must be between 1 and {n}.")
+        self.n = n
+        self.k = k
+        self.size = n * n
+        self.nodes = 0
+        self._table: Dict[int, Tuple[int, int]] = {}
+        self._best_moves: Dict[Tuple[int, int], int] = {}
+
+        self._lines = win_lines(n, k)
+        # The lines through each square: only these can be completed by a move there
+        self._lines_through = [tuple(line for line in self._lines if line >> square & 1) for square in range(self.size)]
+        # Squares on more lines are tried first, which makes cut-offs come sooner
+        self._order = sorted(range(self.size), key=lambda square: -len(self._lines_through[square]))
+
+        # For each symmetry, the permuted mask of every value of every chunk of bits
+        permutations = symmetries(n) if use_symmetry else symmetries(n)[:1]
+        self._chunk_tables = []
+        for permutation in permutations:
+            tables = []
+            for shift in range(0, self.size, CHUNK_BITS):
+                squares = range(shift, min(shift + CHUNK_BITS, self.size))
+                table = [0] * (1 << len(squares))
+                for value in range(len(table)):
+                    table[value] = sum(1 << permutation[square] for square in squares if value >> (square - shift) & 1)
+                tables.append((shift, table))
+            self._chunk_tables.append(tables)
+
+    def canonical(self, mover: int, opponent: int) -> int:
+        """
+        Returns the transposition table key of a position: the smallest key of its symmetries.
+
+        Parameters
+        ----------
+        mover : int
+            The squares of the player to move, as a mask.
+        opponent : int
+            The squares of the other player, as a mask.
+
+        Returns
+        -------
+        int
+            The key, mover and opponent masks side by side.
+        """
+        mask = (1 << CHUNK_BITS) - 1
+        size = self.size
+        best = None
+        for tables in self._chunk_tables:
+            permuted_mover = permuted_opponent = 0
+            for shift, table in tables:
+                permuted_mover |= table[mover >> shift & mask]
+                permuted_opponent |= table[opponent >> shift & mask]
+            key = permuted_mover << size | permuted_opponent
+            if best is None or key < best:
+                best = key
+        return best
+
+    def value(self, x: int, o: int, player: str) -> int:
+        """
+        Returns the value of a position for the player to move, with perfect play from both sides.
+
+        Parameters
+        ----------
+        x : int
+            The squares taken by 'X', as a mask.
+        o : int
+            The squares taken by 'O', as a mask.
+        player : str
+            The player to move, 'X' or 'O'.
+
+        Returns
+        -------
+        int
+            Positive if they win, negative if they lose, 0 for a draw.
+        """
+        mover, opponent = (x, o) if player == "X" else (o, x)
+        if self._has_won(opponent):
+            return -(self._empty(x | o) + 1)
+        return self._negamax(mover, opponent, self._empty(x | o), -self.size - 1, self.size + 1)
+
+    def best_move(self, x: int, o: int, player: str) -> int:
+        """
+        Returns the square the player to move should play, searching the position the first time only.
+
+        Of the moves with the best value, the first in the search order is played.
+
+        Parameters
+        ----------
+        x : int
+            The squares taken by 'X', as a mask.
+        o : int
+            The squares taken by 'O', as a mask.
+        player : str
+            The player to move, 'X' or 'O'.
+
+        Returns
+        -------
+        int
+            The square to play.
+
+        Raises
+        ------
+        ValueError
+            If the board is full or a player has already won.
+        """
+        mover, opponent = (x, o) if player == "X" else (o, x)
+        move = self._best_moves.get((mover, opponent))
+        if move is not None:
+            return move
+        empty = self._empty(x | o)
+        if empty == 0 or self._has_won(mover) or self._has_won(opponent):
+            raise ValueError(GAME_OVER_ERROR_MSG)
+
+        occupied = mover | opponent
+        best_value = alpha = -self.size - 1
+        beta = self.size + 1
+        for square in self._order:
+            bit = 1 << square
+            if occupied & bit:
+                continue
+            moved = mover | bit
+            if any(moved & line == line for line in self._lines_through[square]):
+                value = empty
+            else:
+                value = -self._negamax(opponent, moved, empty - 1, -beta, -alpha)
+            if value > best_value:
+                best_value, move = value, square
+                alpha = max(alpha, value)
+        self._best_moves[(mover, opponent)] = move
+        return move
+
+    def solve(self) -> int:
+        """
+        Solves the empty board, filling the transposition table, and returns its value for the first player.
+
+        Returns
+        -------
+        int
+            Positive if the first player wins, 0 for a draw.
+        """
+        value = self._negamax(0, 0, self.size, -self.size - 1, self.size + 1)
+        logger.info(f"Solved {self.n}x{self.n}, {self.k} in a row: value {value}, {len(self._table)} positions")
+        return value
+
+    def _empty(self, occupied: int) -> int:
+        return self.size - bin(occupied).count("1")
+
+    def _has_won(self, squares: int) -> bool:
+        return any(squares & line == line for line in self._lines)
+
+    def _negamax(self, mover: int, opponent: int, empty: int, alpha: int, beta: int) -> int:
+        # The value of a position in which nobody has won yet, for the player to move
+        self.nodes += 1
+        if empty == 0:
+            return 0
+        key = self.canonical(mover, opponent)
+        entry = self._table.get(key)
+        if entry is not None:
+            value, bound = entry
+            if bound == EXACT:
+                return value
+            if bound == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+        # No move can win more than an immediate win now
+        beta = min(beta, empty)
+
+        original_alpha = alpha
+        occupied = mover | opponent
+        best = -self.size - 1
+        for square in self._order:
+            bit = 1 << square
+            if occupied & bit:
+                continue
+            moved = mover | bit
+            for line in self._lines_through[square]:
+                if moved & line == line:
+                    value = empty
+                    break
+            else:
+                value = -self._negamax(opponent, moved, empty - 1, -beta, -alpha)
+            if value > best:
+                best = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best <= original_alpha:
+            self._table[key] = (best, UPPER)
+        elif best >= beta:
+            self._table[key] = (best, LOWER)
+        else:
+            self._table[key] = (best, EXACT)
+        return best
@@ -1,13 +1,24 @@
 import logging
+import os
+from typing import Iterable, Iterator
 
-from flask import Response
+from flask import Response, stream_with_context
 
-from tictactoe import Board, configure_logger, INVALID_MOVE_ERROR_MSG
-from tictactoe.model import Model
+from tictactoe import Board, configure_logger, GAME_NOT_FOUND_ERROR_MSG, GAME_OVER_ERROR_MSG, INVALID_MOVE_ERROR_MSG
+from tictactoe.ai import Solver
+from tictactoe.model import BOARD_SIZE
+from tictactoe.replay import replay
+from tictactoe.store import DEFAULT_GAME_ID, GameStore, version
 from tictactoe.view import View
 
 
-MODEL = Model()
+# The longest a long-poll request waits for a move, and an event stream between two messages
+POLL_TIMEOUT = float(os.getenv("POLL_TIMEOUT", 25))
+EVENT_HEARTBEAT = float(os.getenv("EVENT_HEARTBEAT", 15))
+
+STORE = GameStore()
+# Shared by every game: a position searched for one game is answered from the cache for the others
+SOLVER = Solver()
 VIEW = View()
 
 
@@ -15,27 +26,60 @@ logger = logging.getLogger(__name__)
 configure_logger()
 
 
-def get_board_state() -> Response:
+def new_game() -> Response:
+    """
+    Starts a new game.
+
+    Returns
+    -------
+    Response
+        A Flask response object containing the id of the game as JSON.
+    """
+    game_id = STORE.create()
+    logger.info(f"Started game {game_id}")
+    return VIEW.game_created(game_id)
+
+def get_board_state(game_id: str = DEFAULT_GAME_ID) -> Response:
     """
     Retrieves the current state of the board.
 
+    Parameters
+    ----------
+    game_id : str, optional
+        The id of the game (default is the game of the routes without one).
+
     Returns
     -------
     Response
         A Flask response object containing the board state as JSON.
     """
-    pass
+    try:
+        with STORE.game(game_id, create=game_id == DEFAULT_GAME_ID) as model:
+            board: Board = model.get_board_state()
+    except KeyError:
+        return VIEW.error(GAME_NOT_FOUND_ERROR_MSG, 404)
+    return VIEW.board_state(board)
 
-def get_winner() -> Response:
+def get_winner(game_id: str = DEFAULT_GAME_ID) -> Response:
     """
     Retrieves the winner of the game, if there is one.
 
+    Parameters
+    ----------
+    game_id : str, optional
+        The id of the game (default is the game of the routes without one).
+
     Returns
     -------
     Response
         A Flask response object containing the winner as JSON.
     """
-    pass
+    try:
+        with STORE.game(game_id, create=game_id == DEFAULT_GAME_ID) as model:
+            winner = model.get_winner()
+    except KeyError:
+        return VIEW.error(GAME_NOT_FOUND_ERROR_MSG, 404)
+    return VIEW.get_winner(winner)
 
 def validate_index(index: str) -> int:
     """
@@ -56,9 +100,15 @@ def validate_index(index: str) -> int:
     ValueError
         If the index is not a valid integer or is out of bounds.
     """
-    pass
+    try:
+        index = int(index)
+    except (TypeError, ValueError):
+        raise ValueError(INVALID_MOVE_ERROR_MSG)
+    if not 0 <= index < BOARD_SIZE:
+        raise ValueError(INVALID_MOVE_ERROR_MSG)
+    return index
 
-def make_move(index: str) -> Response:
+def make_move(index: str, game_id: str = DEFAULT_GAME_ID) -> Response:
     """
     Makes a move at the specified index.
 
@@ -66,6 +116,8 @@ def make_move(index: str) -> Response:
     ----------
     index : str
         The index at which to make the move.
+    game_id : str, optional
+        The id of the game (default is the game of the routes without one).
 
     Returns
     -------
@@ -73,7 +125,139 @@ def make_move(index: str) -> Response:
         A Flask response object indicating success or failure.
     """
     try:
-        pass
+        index = validate_index(index)
+        with STORE.game(game_id, create=game_id == DEFAULT_GAME_ID) as model:
+            if model.get_winner() is not None:
+                raise ValueError(GAME_OVER_ERROR_MSG)
+            model.move(index)
+            board = model.get_board_state()
+        return VIEW.board_state(board)
+    except KeyError:
+        return VIEW.error(GAME_NOT_FOUND_ERROR_MSG, 404)
     except ValueError as e:
         logger.error(f"Error making move: {e}")
-        return VIEW.error(str(e), 400)
\ No newline at end of file
+        return VIEW.error(str(e), 400)
+
+def make_ai_move(game_id: str = DEFAULT_GAME_ID) -> Response:
+    """
+    Makes the best move for the current player, as found by the solver.
+
+    Parameters
+    ----------
+    game_id : str, optional
+        The id of the game (default is the game of the routes without one).
+
+    Returns
+    -------
+    Response
+        A Flask response object containing the board state after the move, or an error.
+    """
+    try:
+        with STORE.game(game_id, create=game_id == DEFAULT_GAME_ID) as model:
+            if model.get_winner() is not None or model.board.is_full():
+                raise ValueError(GAME_OVER_ERROR_MSG)
+            model.move(SOLVER.best_move(model.board.x, model.board.o, model.get_current_player()))
+            board = model.get_board_state()
+        return VIEW.board_state(board)
+    except KeyError:
+        return VIEW.error(GAME_NOT_FOUND_ERROR_MSG, 404)
+    except ValueError as e:
+        logger.error(f"Error making AI move: {e}")
+        return VIEW.error(str(e), 400)
+
+def poll(game_id: str = DEFAULT_GAME_ID, since: int = -1, timeout: float = POLL_TIMEOUT) -> Response:
+    """
+    Returns the game's state once its version is past since, waiting up to timeout seconds for a move.
+
+    A client passes the version of the last state it got, and sends the next request as soon as
+    this one returns; it is answered as soon as a move is made in the game.
+
+    Parameters
+    ----------
+    game_id : str, optional
+        The id of the game (default is the game of the routes without one).
+    since : int, optional
+        The version the client has (default is -1, for an answer at once).
+    timeout : float, optional
+        The longest to wait, in seconds, at most POLL_TIMEOUT.
+
+    Returns
+    -------
+    Response
+        A Flask response object containing the board, the winner and the version, changed or not.
+    """
+    timeout = min(max(timeout, 0), POLL_TIMEOUT)
+    try:
+        with STORE.wait(game_id, since, timeout, create=game_id == DEFAULT_GAME_ID) as model:
+            board, winner, current = model.get_board_state(), model.get_winner(), version(model)
+    except KeyError:
+        return VIEW.error(GAME_NOT_FOUND_ERROR_MSG, 404)
+    return VIEW.game_state(board, winner, current)
+
+def game_events(game_id: str = DEFAULT_GAME_ID, since: int = -1) -> Response:
+    """
+    Streams the game's state as server-sent events: one now, then one after every move.
+
+    The stream ends once the game is over. A client reconnecting with the version of the last
+    event it got, as EventSource does in Last-Event-ID, is sent the events it missed; if that was
+    the last one of a finished game, the answer is 204, which stops EventSource reconnecting.
+
+    Parameters
+    ----------
+    game_id : str, optional
+        The id of the game (default is the game of the routes without one).
+    since : int, optional
+        The version of the last event the client got (default is -1, for none).
+
+    Returns
+    -------
+    Response
+        A Flask response object streaming the events.
+    """
+    create = game_id == DEFAULT_GAME_ID
+    try:
+        with STORE.game(game_id, create=create) as model:
+            over = model.get_winner() is not None or model.board.is_full()
+            if over and version(model) <= since:
+                return VIEW.no_content()
+    except KeyError:
+        return VIEW.error(GAME_NOT_FOUND_ERROR_MSG, 404)
+
+    def events(since: int) -> Iterator[str]:
+        while True:
+            try:
+                # Nothing is held between two events but this generator
+                with STORE.wait(game_id, since, EVENT_HEARTBEAT, create=create) as model:
+                    board, winner, current = model.get_board_state(), model.get_winner(), version(model)
+                    over = winner is not None or model.board.is_full()
+            except KeyError:
+                return
+            if current <= since:
+                yield VIEW.heartbeat()
+                continue
+            since = current
+            yield VIEW.event(board, winner, current)
+            if over:
+                return
+
+    return VIEW.event_stream(events(since))
+
+def replay_games(lines: Iterable[bytes]) -> Response:
+    """
+    Replays recorded games, one per NDJSON line, and streams back a report per game and a summary.
+
+    The games are played on the bit masks directly, not through the store, so replaying does not
+    touch the games in progress. The input is read as the output is sent, so the log is never
+    held in memory whole.
+
+    Parameters
+    ----------
+    lines : Iterable[bytes]
+        The lines of the log, such as the request body stream.
+
+    Returns
+    -------
+    Response
+        A Flask response object streaming the reports as NDJSON.
+    """
+    return VIEW.ndjson_stream(stream_with_context(replay(lines)))
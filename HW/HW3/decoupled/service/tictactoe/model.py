@@ -1,17 +1,139 @@
 import logging
-from typing import Optional
+from typing import List, Optional
 
-from tictactoe import Board, SQUARE_OCCUPIED_ERROR_MSG
+from tictactoe import Board, INVALID_MOVE_ERROR_MSG, SQUARE_OCCUPIED_ERROR_MSG
 
 logger = logging.getLogger(__name__)
 
+
+BOARD_SIZE = 9
+EMPTY_SQUARES = ("",) * BOARD_SIZE
+
+# Square i is bit i of a player's mask, squares numbered row by row from the top left
+SQUARE_BITS = tuple(1 << index for index in range(BOARD_SIZE))
+FULL_BOARD = (1 << BOARD_SIZE) - 1
+
+# The three rows, three columns and two diagonals, as masks
+WIN_LINES = (
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),
+    (0, 4, 8), (2, 4, 6),
+)
+WIN_MASKS = tuple(sum(SQUARE_BITS[index] for index in line) for line in WIN_LINES)
+# Whether a player's mask contains a line, for all 512 masks: a win check is one lookup
+IS_WIN = tuple(any(squares & mask == mask for mask in WIN_MASKS) for squares in range(FULL_BOARD + 1))
+
+
+class BitBoard(Board):
+    """
+    A Board that stores each player's squares as a 9-bit integer.
+
+    Checking a square is a single AND, and a player has won when one of the WIN_MASKS is
+    contained in their mask, which IS_WIN holds for every mask. The squares list is built from the masks when it is read,
+    and assigning a list sets the masks from it; the list read is a copy, so changing one
+    of its items does not change the board.
+
+    Attributes
+    ----------
+    x : int
+        The squares taken by 'X', as a mask.
+    o : int
+        The squares taken by 'O', as a mask.
+    """
+
+    __slots__ = ("x", "o")
+
+    def __init__(self, squares: Optional[List[str]] = None):
+        """
+        Initializes the board, empty unless squares are given.
+
+        Parameters
+        ----------
+        squares : List[str], optional
+            The 9 squares, each 'X', 'O' or ''.
+        """
+        self.x = 0
+        self.o = 0
+        super().__init__(list(squares) if squares is not None else list(EMPTY_SQUARES))
+
+    @property
+    def squares(self) -> List[str]:
+        x, o = self.x, self.o
+        return ["X" if x & bit else "O" if o & bit else "" for bit in SQUARE_BITS]
+
+    @squares.setter
+    def squares(self, squares: List[str]) -> None:
+        if len(squares) != BOARD_SIZE:
+            raise ValueError(f"A board has {BOARD_SIZE} squares, got {len(squares)}")
+        self.x = sum(bit for bit, square in zip(SQUARE_BITS, squares) if square == "X")
+        self.o = sum(bit for bit, square in zip(SQUARE_BITS, squares) if square == "O")
+
+    def is_free(self, index: int) -> bool:
+        """
+        Returns whether nobody has played the square at index.
+
+        Parameters
+        ----------
+        index : int
+            The square, 0 to 8.
+
+        Returns
+        -------
+        bool
+            True if the square is empty.
+        """
+        return not (self.x | self.o) & SQUARE_BITS[index]
+
+    def is_full(self) -> bool:
+        """
+        Returns whether every square has been played.
+
+        Returns
+        -------
+        bool
+            True if the board is full.
+        """
+        return self.x | self.o == FULL_BOARD
+
+    def place(self, index: int, player: str) -> None:
+        """
+        Marks the square at index as the player's. The square is not checked.
+
+        Parameters
+        ----------
+        index : int
+            The square, 0 to 8.
+        player : str
+            'X' or 'O'.
+        """
+        if player == "X":
+            self.x |= SQUARE_BITS[index]
+        else:
+            self.o |= SQUARE_BITS[index]
+
+    def winner(self) -> Optional[str]:
+        """
+        Returns the player with three in a line, if any.
+
+        Returns
+        -------
+        Optional[str]
+            'X' or 'O', or None if neither has a line.
+        """
+        if IS_WIN[self.x]:
+            return "X"
+        if IS_WIN[self.o]:
+            return "O"
+        return None
+
+
 class Model:
     """
     A class to represent the model for the Tic Tac Toe game.
 
     Attributes
     ----------
-    board : Board
+    board : BitBoard
         The current state of the Tic Tac Toe board.
     player : str
         The current player ('X' or 'O').
@@ -32,18 +154,23 @@ class Model:
     get_winner() -> Optional[str]:
         Returns the winner of the game (if any).
 
-    get_board_state() -> list[str]:
+    get_board_state() -> Board:
         Returns a copy of the current board state.
 
     move(index: int) -> None:
         Makes a move at the specified index, changes the player, and checks for a winner.
     """
 
+    # A server keeps one Model per game in progress, so no per-instance dict
+    __slots__ = ("board", "player", "winner")
+
     def __init__(self):
         """
         Initializes the Model with an empty board and sets the starting player to 'X'.
         """
-        pass
+        self.board = BitBoard()
+        self.player = "X"
+        self.winner: Optional[str] = None
 
     def get_current_player(self) -> str:
         """
@@ -54,19 +181,21 @@ class Model:
         str
             The current player ('X' or 'O').
         """
-        pass
+        return self.player
 
     def change_player(self) -> None:
         """
         Switches the current player from 'X' to 'O' or from 'O' to 'X'.
         """
-        pass
+        self.player = "O" if self.player == "X" else "X"
 
     def set_winner(self) -> None:
         """
         Checks for a winner and sets the winner attribute if there is one.
         """
-        pass
+        winner = self.board.winner()
+        if winner is not None:
+            self.winner = winner
 
     def get_winner(self) -> Optional[str]:
         """
@@ -77,35 +206,54 @@ class Model:
         Optional[str]
             The winner of the game, or None if there is no winner yet.
         """
-        pass
+        return self.winner
 
-    def get_board_state(self) -> list[str]:
+    def get_board_state(self) -> Board:
         """
         Returns a copy of the current board state.
 
+        The squares are only converted from the bit masks here, when they are asked for.
+
         Returns
         -------
-        list[str]
-            A copy of the current board state.
+        Board
+            A copy of the current board state, as a list of squares.
         """
-        pass
+        return Board(self.board.squares)
 
     def move(self, index: int) -> None:
         """
         Makes a move at the specified index, changes the player, and checks for a winner.
 
+        The square is checked with one AND and the win with one lookup in IS_WIN.
+
         Parameters
         ----------
         index : int
-            The index at which to make the move.
+            The index at which to make the move, 0 to 8.
 
         Raises
         ------
         ValueError
-            If the specified index is already occupied.
+            If the index is not a square of the board or the square is already occupied.
         """
-        if True:
-            pass
+        # A negative index would otherwise pick a square from the end of SQUARE_BITS
+        if not 0 <= index < BOARD_SIZE:
+            logger.error(f'Move failed at index {index} - not a square of the board')
+            raise ValueError(INVALID_MOVE_ERROR_MSG)
+        board = self.board
+        bit = SQUARE_BITS[index]
+        if not (board.x | board.o) & bit:
+            # BitBoard.place and the win check, inlined: this is the hot path of every game
+            if self.player == "X":
+                board.x |= bit
+                squares = board.x
+            else:
+                board.o |= bit
+                squares = board.o
+            if IS_WIN[squares] and self.winner is None:
+                self.winner = self.player
+            self.player = "O" if self.player == "X" else "X"
         else:
             logger.error(f'Move failed at index {index} - square already occupied')
             raise ValueError(SQUARE_OCCUPIED_ERROR_MSG)
@@ -0,0 +1,100 @@
+import json
+import logging
+from typing import Any, Iterable, Iterator, Union
+
+from tictactoe import GAME_OVER_ERROR_MSG, INVALID_MOVE_ERROR_MSG, SQUARE_OCCUPIED_ERROR_MSG
+from tictactoe.model import BOARD_SIZE, FULL_BOARD, IS_WIN, SQUARE_BITS
+
+logger = logging.getLogger(__name__)
+
+
+INVALID_RECORD_ERROR_MSG = "Invalid game record"
+
+
+def replay_game(moves: Any) -> dict:
+    """
+    Plays a recorded game, 'X' first, and returns its outcome, stopping at the first illegal move.
+
+    The game is played on two bit masks as Model.move does, without building a Model.
+
+    Parameters
+    ----------
+    moves : Any
+        The squares played, in order; anything but a list of ints 0 to 8 is reported.
+
+    Returns
+    -------
+    dict
+        result: 'X' or 'O' for a win, 'draw' for a full board, 'unfinished', or 'illegal';
+        winner: the winner, if any; moves: the number of legal moves played;
+        error: for an illegal move, its position in the list, the square and the reason.
+    """
+    if not isinstance(moves, list):
+        return {"result": "illegal", "winner": None, "moves": 0, "error": {"error": INVALID_RECORD_ERROR_MSG}}
+    x = o = 0
+    winner = None
+    for turn, index in enumerate(moves):
+        if winner is not None or x | o == FULL_BOARD:
+            error = GAME_OVER_ERROR_MSG
+        elif type(index) is not int or not 0 <= index < BOARD_SIZE:
+            error = INVALID_MOVE_ERROR_MSG
+        elif (x | o) & SQUARE_BITS[index]:
+            error = SQUARE_OCCUPIED_ERROR_MSG
+        else:
+            if turn & 1:
+                o |= SQUARE_BITS[index]
+                if IS_WIN[o]:
+                    winner = "O"
+            else:
+                x |= SQUARE_BITS[index]
+                if IS_WIN[x]:
+                    winner = "X"
+            continue
+        return {"result": "illegal", "winner": winner, "moves": turn,
+                "error": {"move": turn, "index": index, "error": error}}
+    if winner is not None:
+        result = winner
+    elif x | o == FULL_BOARD:
+        result = "draw"
+    else:
+        result = "unfinished"
+    return {"result": result, "winner": winner, "moves": len(moves), "error": None}
+
+
+def replay(lines: Iterable[Union[bytes, str]]) -> Iterator[str]:
+    """
+    Replays an NDJSON game log and yields one NDJSON report line per game, then a summary line.
+
+    Each input line is a game: either the list of squares played, or an object with the list
+    under "moves" and the game's "id", which is copied to its report. Games without an id are
+    numbered by their line, from 1. Blank lines are skipped. Lines are read and reported one at a
+    time, so a log of any length is replayed in constant memory.
+
+    Parameters
+    ----------
+    lines : Iterable[Union[bytes, str]]
+        The lines of the log.
+
+    Yields
+    ------
+    str
+        A JSON report per game, then {"summary": ...} with the count of every result.
+    """
+    summary = {"games": 0, "X": 0, "O": 0, "draw": 0, "unfinished": 0, "illegal": 0}
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        game_id = number
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if isinstance(record, dict):
+            game_id = record.get("id", number)
+            record = record.get("moves")
+        report = replay_game(record)
+        summary["games"] += 1
+        summary[report["result"]] += 1
+        yield json.dumps({"id": game_id, **report}) + "\n"
+    logger.info(f"Replayed {summary['games']} games, {summary['illegal']} with an illegal move")
+    yield json.dumps({"summary": summary}) + "\n"
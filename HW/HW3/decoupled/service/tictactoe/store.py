@@ -0,0 +1,266 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+import logging
+import os
+import threading
+import time
+from typing import Callable, Iterator, Optional
+import uuid
+
+from tictactoe import GAME_NOT_FOUND_ERROR_MSG
+from tictactoe.model import Model
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds a game is kept after its last request
+GAME_TTL = float(os.getenv("GAME_TTL", 3600))
+# The game the routes without a game id play, created on first use
+DEFAULT_GAME_ID = "default"
+
+
+def version(model: Model) -> int:
+    """
+    Returns the version of a game's board: the number of moves made, as a move is the only change.
+
+    Parameters
+    ----------
+    model : Model
+        The game's model.
+
+    Returns
+    -------
+    int
+        The number of squares played.
+    """
+    return bin(model.board.x | model.board.o).count("1")
+
+
+class Game:
+    """
+    A stored game: the model, the lock that serializes requests to it, and when it expires.
+
+    changed is the condition, on the game's lock, that requests waiting for a move wait on.
+    It is only created once a request waits, so games nobody watches do not pay for it.
+    """
+
+    __slots__ = ("model", "lock", "expires_at", "changed")
+
+    def __init__(self, expires_at: float):
+        self.model = Model()
+        self.lock = threading.Lock()
+        self.expires_at = expires_at
+        self.changed: Optional[threading.Condition] = None
+
+
+class GameStore:
+    """
+    Holds the games in progress by id, in memory, and drops the ones left unplayed for ttl seconds.
+
+    The games are kept in an OrderedDict from the least to the most recently played: every
+    request moves its game to the end, so the expired games are always at the front and are
+    popped from there, a few at a time, by the requests that come in. The store lock is only
+    held for these dict operations; a request then runs under its own game's lock, so requests
+    to different games never wait for each other and requests to the same game run one at a time.
+
+    Attributes
+    ----------
+    ttl : float
+        The seconds a game is kept after its last request.
+
+    Methods
+    -------
+    create(game_id: Optional[str] = None) -> str:
+        Starts a new game and returns its id.
+
+    game(game_id: str, create: bool = False) -> Iterator[Model]:
+        Holds the game's lock and yields its model.
+
+    wait(game_id: str, since: int, timeout: float, create: bool = False) -> Iterator[Model]:
+        Waits for a move past a version, then holds the game's lock and yields its model.
+
+    evict_expired() -> int:
+        Drops every expired game.
+    """
+
+    def __init__(self, ttl: float = GAME_TTL, clock: Callable[[], float] = time.monotonic):
+        """
+        Initializes an empty store.
+
+        Parameters
+        ----------
+        ttl : float
+            The seconds a game is kept after its last request.
+        clock : Callable[[], float]
+            The time source, in seconds.
+
+        Raises
+        ------
+        ValueError
+            If the ttl is not positive.
+        """
+        if ttl <= 0:
+            raise ValueError(f"Invalid ttl: {ttl}. Must be a positive number.")
+        self.ttl = ttl
+        self._clock = clock
+        self._games: "OrderedDict[str, Game]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def create(self, game_id: Optional[str] = None) -> str:
+        """
+        Starts a new game.
+
+        Parameters
+        ----------
+        game_id : str, optional
+            The id to use; a random one is generated if not given.
+
+        Returns
+        -------
+        str
+            The id of the new game.
+
+        Raises
+        ------
+        ValueError
+            If a game with that id is already in progress.
+        """
+        game_id = game_id or uuid.uuid4().hex
+        with self._lock:
+            now = self._clock()
+            self._evict(now)
+            if game_id in self._games:
+                raise ValueError(f"Game {game_id} already exists")
+            self._games[game_id] = Game(now + self.ttl)
+        return game_id
+
+    @contextmanager
+    def game(self, game_id: str, create: bool = False) -> Iterator[Model]:
+        """
+        Yields the game's model with the game's lock held, and keeps the game for another ttl seconds.
+
+        If the board changed in the with block, the requests waiting on the game are woken up.
+
+        Parameters
+        ----------
+        game_id : str
+            The id of the game.
+        create : bool
+            Whether to start the game if it is not in progress.
+
+        Yields
+        ------
+        Model
+            The game's model, for the duration of the with block.
+
+        Raises
+        ------
+        KeyError
+            If the game is not in progress and create is False.
+        """
+        game = self._get(game_id, create)
+        with game.lock:
+            # Waiters only create the condition with the lock held, so it cannot appear in the block
+            changed = game.changed
+            if changed is None:
+                yield game.model
+                return
+            before = version(game.model)
+            yield game.model
+            if version(game.model) != before:
+                changed.notify_all()
+
+    @contextmanager
+    def wait(self, game_id: str, since: int, timeout: float, create: bool = False) -> Iterator[Model]:
+        """
+        Waits until the game's version is past since, or for timeout seconds, then yields its model with its lock held.
+
+        Only the moves of this game wake the request up. The game's lock is released while waiting.
+
+        Parameters
+        ----------
+        game_id : str
+            The id of the game.
+        since : int
+            The version the caller has; returns at once if the game is already past it.
+        timeout : float
+            The longest to wait, in seconds.
+        create : bool
+            Whether to start the game if it is not in progress.
+
+        Yields
+        ------
+        Model
+            The game's model, for the duration of the with block, changed or not.
+
+        Raises
+        ------
+        KeyError
+            If the game is not in progress and create is False.
+        """
+        game = self._get(game_id, create)
+        with game.lock:
+            if game.changed is None:
+                game.changed = threading.Condition(game.lock)
+            game.changed.wait_for(lambda: version(game.model) > since, timeout)
+            yield game.model
+
+    def evict_expired(self) -> int:
+        """
+        Drops every expired game.
+
+        Requests already drop the expired games they come across, so this only matters to free
+        the memory of a store that is no longer getting any.
+
+        Returns
+        -------
+        int
+            The number of games dropped.
+        """
+        with self._lock:
+            evicted = self._evict(self._clock(), limit=None)
+        logger.info(f"Evicted {evicted} expired games")
+        return evicted
+
+    def stats(self) -> dict:
+        """
+        Returns the number of games in progress and dropped so far, and the ttl.
+
+        Returns
+        -------
+        dict
+            The store's counters.
+        """
+        with self._lock:
+            return {"games": len(self._games), "evicted": self._evicted, "ttl": self.ttl}
+
+    def _get(self, game_id: str, create: bool) -> Game:
+        with self._lock:
+            now = self._clock()
+            self._evict(now)
+            game = self._games.get(game_id)
+            if game is None:
+                if not create:
+                    raise KeyError(GAME_NOT_FOUND_ERROR_MSG)
+                game = self._games[game_id] = Game(now)
+            game.expires_at = now + self.ttl
+            self._games.move_to_end(game_id)
+        return game
+
+    def _evict(self, now: float, limit: Optional[int] = 8) -> int:
+        # Called with the store lock held. Drops up to limit expired games from the front,
+        # so the cost of a backlog of expired games is spread over the next requests.
+        games = self._games
+        evicted = 0
+        while games and (limit is None or evicted < limit):
+            game_id, game = next(iter(games.items()))
+            if game.expires_at > now:
+                break
+            del games[game_id]
+            evicted += 1
+        self._evicted += evicted
+        return evicted
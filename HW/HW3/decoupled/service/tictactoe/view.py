@@ -1,4 +1,6 @@
+import json
 import logging
+from typing import Iterator, Optional
 
 from flask import jsonify, make_response, Response
 from tictactoe import Board
@@ -17,7 +19,28 @@ class View:
     get_winner(winner: str = None) -> Response:
         Returns the winner of the game as a JSON response.
 
-    error(error: str) -> Response:
+    game_created(game_id: str) -> Response:
+        Returns the id of a new game as a JSON response.
+
+    game_state(board: Board, winner: Optional[str], version: int) -> Response:
+        Returns the board, the winner and the version of a game as a JSON response.
+
+    event(board: Board, winner: Optional[str], version: int) -> str:
+        Returns the state of a game as a server-sent event.
+
+    heartbeat() -> str:
+        Returns a server-sent comment that keeps an idle stream open.
+
+    event_stream(events: Iterator[str]) -> Response:
+        Returns a streaming response of server-sent events.
+
+    no_content() -> Response:
+        Returns an empty 204 response.
+
+    ndjson_stream(lines: Iterator[str]) -> Response:
+        Returns a streaming response of JSON lines.
+
+    error(error: str, status: int = 400) -> Response:
         Returns an error message as a JSON response.
     """
 
@@ -35,7 +58,7 @@ class View:
         Response
             A Flask response object containing the board state.
         """
-        pass
+        return make_response(jsonify({"board": board.squares}), 200)
 
     def get_winner(self, winner: str = None) -> Response:
         """
@@ -51,9 +74,123 @@ class View:
         Response
             A Flask response object containing the winner.
         """
-        pass
+        return make_response(jsonify({"winner": winner}), 200)
+
+    def game_created(self, game_id: str) -> Response:
+        """
+        Returns the id of a new game as a JSON response.
+
+        Parameters
+        ----------
+        game_id : str
+            The id of the game, used in the game's routes.
+
+        Returns
+        -------
+        Response
+            A Flask response object containing the game id.
+        """
+        return make_response(jsonify({"game_id": game_id}), 201)
+
+    def game_state(self, board: Board, winner: Optional[str], version: int) -> Response:
+        """
+        Returns the board, the winner and the version of a game as a JSON response.
+
+        Parameters
+        ----------
+        board : Board
+            The current state of the Tic Tac Toe board.
+        winner : Optional[str]
+            The winner of the game, if any.
+        version : int
+            The version of the board, which grows with every move.
+
+        Returns
+        -------
+        Response
+            A Flask response object containing the game state.
+        """
+        return make_response(jsonify({"board": board.squares, "winner": winner, "version": version}), 200)
+
+    def event(self, board: Board, winner: Optional[str], version: int) -> str:
+        """
+        Returns the state of a game as a server-sent event, with the version as its id.
+
+        Parameters
+        ----------
+        board : Board
+            The current state of the Tic Tac Toe board.
+        winner : Optional[str]
+            The winner of the game, if any.
+        version : int
+            The version of the board.
+
+        Returns
+        -------
+        str
+            The event, in the text/event-stream format.
+        """
+        data = json.dumps({"board": board.squares, "winner": winner, "version": version})
+        return f"id: {version}\nevent: board\ndata: {data}\n\n"
+
+    def heartbeat(self) -> str:
+        """
+        Returns a server-sent comment, ignored by clients, that keeps an idle stream from timing out.
+
+        Returns
+        -------
+        str
+            The comment, in the text/event-stream format.
+        """
+        return ": heartbeat\n\n"
+
+    def event_stream(self, events: Iterator[str]) -> Response:
+        """
+        Returns a streaming response of server-sent events.
+
+        Parameters
+        ----------
+        events : Iterator[str]
+            The events, sent as they are produced.
+
+        Returns
+        -------
+        Response
+            A Flask response object streaming the events, uncached and unbuffered.
+        """
+        return Response(events, mimetype="text/event-stream", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        })
+
+    def no_content(self) -> Response:
+        """
+        Returns an empty 204 response.
+
+        Returns
+        -------
+        Response
+            A Flask response object with no body.
+        """
+        return make_response("", 204)
+
+    def ndjson_stream(self, lines: Iterator[str]) -> Response:
+        """
+        Returns a streaming response of newline-delimited JSON.
+
+        Parameters
+        ----------
+        lines : Iterator[str]
+            The JSON lines, each ending with a newline, sent as they are produced.
+
+        Returns
+        -------
+        Response
+            A Flask response object streaming the lines.
+        """
+        return Response(lines, mimetype="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
 
-    def error(self, error: str) -> Response:
+    def error(self, error: str, status: int = 400) -> Response:
         """
         Returns an error message as a JSON response.
 
@@ -61,10 +198,12 @@ class View:
         ----------
         error : str
             The error message to return.
+        status : int, optional
+            The HTTP status code (default is 400).
 
         Returns
         -------
         Response
             A Flask response object containing the error message.
         """
-        pass
+        return make_response(jsonify({"error": error}), status)
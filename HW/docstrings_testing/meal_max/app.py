@@ -1,10 +1,17 @@
+import io
+
 from dotenv import load_dotenv
-from flask import Flask, jsonify, make_response, Response, request
+from flask import Flask, jsonify, make_response, Response, request, stream_with_context
 # from flask_cors import CORS
 
-from meal_max.models import kitchen_model
+from meal_max.models import catalog_model, kitchen_model, rating_model, simulation_model
 from meal_max.models.battle_model import BattleModel
-from meal_max.utils.sql_utils import check_database_connection, check_table_exists
+from meal_max.models.combatant_store import make_combatant_store
+from meal_max.models.tournament_model import TournamentModel
+from meal_max.utils.json_utils import RowEncoder, json_rows_response, prefetch
+from meal_max.utils.random_utils import get_random_provider
+from meal_max.utils.sql_utils import apply_migrations, check_database_connection, check_table_exists, get_pool_stats
+from meal_max.utils.worker_utils import PeriodicWorker
 
 
 # Load environment variables from .env file
@@ -16,8 +23,30 @@ app = Flask(__name__)
 # uncomment this
 # CORS(app)
 
-# Initialize the BattleModel
-battle_model = BattleModel()
+# Bring the schema up to date. Failures are only logged, so the healthchecks can still
+# report a missing or broken database.
+try:
+    if "008_meal_ratings.sql" in apply_migrations():
+        # Rate the battles fought before ratings existed
+        rating_model.recompute_ratings()
+except Exception as e:
+    app.logger.error("Error applying migrations: %s", e)
+
+# Archive deleted meals in the background; the job takes the write lock one batch at a
+# time, so it can run in every worker process.
+compaction_worker = None
+if kitchen_model.COMPACTION_INTERVAL > 0:
+    compaction_worker = PeriodicWorker("meal-compaction", kitchen_model.compact_meals, kitchen_model.COMPACTION_INTERVAL)
+    compaction_worker.start()
+
+# Initialize the BattleModel. With COMBATANT_STORE=sqlite the combatants live in the
+# database, so every worker process behind the load balancer sees the same ones.
+# The Dockerfile sets it; outside the container the default 'memory' store is used.
+battle_model = BattleModel(store=make_combatant_store())
+tournament_model = TournamentModel()
+
+# Leaderboard rows are encoded straight from the database tuples
+leaderboard_encoder = RowEncoder(kitchen_model.LEADERBOARD_COLUMNS)
 
 ####################################################
 #
@@ -58,6 +87,39 @@ def db_check() -> Response:
     except Exception as e:
         return make_response(jsonify({'error': str(e)}), 404)
 
+@app.route('/api/db-pool-stats', methods=['GET'])
+def db_pool_stats() -> Response:
+    """
+    Route to report the database connection pool metrics.
+
+    Returns:
+        JSON response with the pool settings and connection counters.
+    """
+    app.logger.info('Reporting connection pool stats')
+    return make_response(jsonify({'status': 'success', 'pool': get_pool_stats()}), 200)
+
+@app.route('/api/meal-cache-stats', methods=['GET'])
+def meal_cache_stats() -> Response:
+    """
+    Route to report the meal lookup cache metrics.
+
+    Returns:
+        JSON response with the cache size, catalog version stamp and hit rate.
+    """
+    app.logger.info('Reporting meal cache stats')
+    return make_response(jsonify({'status': 'success', 'cache': kitchen_model.get_meal_cache_stats()}), 200)
+
+@app.route('/api/random-stats', methods=['GET'])
+def random_stats() -> Response:
+    """
+    Route to report the metrics of the random number provider used by battles.
+
+    Returns:
+        JSON response with the provider name, pool size and refill and failover counters.
+    """
+    app.logger.info('Reporting random provider stats')
+    return make_response(jsonify({'status': 'success', 'random': get_random_provider().stats()}), 200)
+
 
 ##########################################################
 #
@@ -131,6 +193,81 @@ def clear_catalog() -> Response:
         app.logger.error(f"Error clearing catalog: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/import-meals', methods=['POST'])
+def import_meals() -> Response:
+    """
+    Route to bulk import meals from a CSV or NDJSON request body.
+
+    The body is read as a stream and inserted in chunks, so large catalogs are never held
+    in memory. Invalid rows and meals that already exist are skipped and reported.
+
+    Query Parameters:
+        - format (str, optional): 'csv' or 'ndjson'. Defaults to the request's content type,
+          then to 'csv'.
+        - chunk_size (int, optional): The number of rows inserted per transaction.
+
+    Returns:
+        JSON response with the number of meals imported and rejected, and the row errors.
+    Raises:
+        400 error if the format or chunk size is invalid.
+        500 error if there is an issue importing the meals.
+    """
+    try:
+        fmt = request.args.get('format')
+        if fmt is None:
+            fmt = 'ndjson' if 'json' in (request.mimetype or '') else 'csv'
+        if fmt not in catalog_model.CATALOG_FORMATS:
+            return make_response(jsonify({'error': f'format must be one of {", ".join(catalog_model.CATALOG_FORMATS)}'}), 400)
+        try:
+            chunk_size = int(request.args.get('chunk_size', catalog_model.IMPORT_CHUNK_SIZE))
+            if chunk_size <= 0:
+                raise ValueError
+        except ValueError:
+            return make_response(jsonify({'error': 'chunk_size must be a positive integer'}), 400)
+
+        app.logger.info("Importing meals as %s", fmt)
+        lines = io.TextIOWrapper(request.stream, encoding='utf-8', newline='')
+        result = catalog_model.import_meals(catalog_model.read_records(lines, fmt), chunk_size)
+        return make_response(jsonify({'status': 'success', **result}), 200)
+    except Exception as e:
+        app.logger.error(f"Error importing meals: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/export-meals', methods=['GET'])
+def export_meals() -> Response:
+    """
+    Route to export the meal catalog, with battle stats, as CSV or NDJSON.
+
+    The response body is streamed as the rows are read.
+
+    Query Parameters:
+        - format (str, optional): 'csv' or 'ndjson'. Default is 'csv'.
+        - include_deleted (bool, optional): If true, meals marked as deleted are exported too.
+
+    Returns:
+        A streamed CSV or NDJSON response.
+    Raises:
+        400 error if the format is invalid.
+        500 error if there is an issue reading the meals.
+    """
+    try:
+        fmt = request.args.get('format', 'csv')
+        include_deleted = request.args.get('include_deleted', 'false').lower() == 'true'
+        try:
+            chunks = catalog_model.export_meals(fmt, include_deleted)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+
+        app.logger.info("Exporting meals as %s", fmt)
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        # The first chunk runs the query, so a database error is still a 500 here
+        response = Response(stream_with_context(prefetch(chunks)), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename=meals.{fmt}'
+        return response
+    except Exception as e:
+        app.logger.error(f"Error exporting meals: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 @app.route('/api/delete-meal/<int:meal_id>', methods=['DELETE'])
 def delete_meal(meal_id: int) -> Response:
     """
@@ -151,6 +288,114 @@ def delete_meal(meal_id: int) -> Response:
         app.logger.error(f"Error deleting meal: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/compact-meals', methods=['POST'])
+def compact_meals() -> Response:
+    """
+    Route to archive the meals marked as deleted and free their disk space now.
+
+    The same job runs in the background every COMPACTION_INTERVAL seconds.
+
+    Returns:
+        JSON response with the number of meals archived and of pages freed.
+    Raises:
+        500 error if there is an issue compacting the meals.
+    """
+    try:
+        app.logger.info("Compacting deleted meals")
+        if compaction_worker is not None:
+            result = compaction_worker.run_once()
+        else:
+            result = kitchen_model.compact_meals()
+        return make_response(jsonify({'status': 'success', **result}), 200)
+    except Exception as e:
+        app.logger.error(f"Error compacting meals: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/compaction-stats', methods=['GET'])
+def compaction_stats() -> Response:
+    """
+    Route to report the metrics of the background compaction job.
+
+    Returns:
+        JSON response with the job's run and failure counts and last result, or null if it is off.
+    """
+    app.logger.info('Reporting compaction stats')
+    stats = compaction_worker.stats() if compaction_worker is not None else None
+    return make_response(jsonify({'status': 'success', 'compaction': stats}), 200)
+
+@app.route('/api/meals', methods=['GET'])
+def list_meals() -> Response:
+    """
+    Route to list meals matching optional filters, one page at a time.
+
+    Query Parameters:
+        - cuisine (str, optional): Only meals of this cuisine.
+        - difficulty (str, optional): Only meals of this difficulty (HIGH, MED, LOW).
+        - min_price (float, optional): Only meals costing at least this much.
+        - max_price (float, optional): Only meals costing at most this much.
+        - min_battles (int, optional): Only meals with at least this many battles.
+        - sort (str, optional): 'id', 'price' or 'battles'. Default is 'id'.
+        - cursor (str, optional): The next_cursor of the previous page.
+        - limit (int, optional): The page size. Default is 50.
+
+    Returns:
+        JSON response with the page of meals and the cursor of the next page.
+    Raises:
+        400 error if a filter, the sort, the cursor or the limit is invalid.
+        500 error if there is an issue listing the meals.
+    """
+    try:
+        args = request.args
+        try:
+            filters = {
+                'cuisine': args.get('cuisine'),
+                'difficulty': args.get('difficulty'),
+                'min_price': float(args['min_price']) if 'min_price' in args else None,
+                'max_price': float(args['max_price']) if 'max_price' in args else None,
+                'min_battles': int(args['min_battles']) if 'min_battles' in args else None,
+            }
+            limit = int(args.get('limit', kitchen_model.DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return make_response(jsonify({'error': 'min_price and max_price must be numbers, min_battles and limit integers'}), 400)
+
+        app.logger.info("Listing meals with filters %s", filters)
+        try:
+            page = kitchen_model.list_meals(**filters, sort=args.get('sort', 'id'), cursor=args.get('cursor'), limit=limit)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        return make_response(jsonify({'status': 'success', **page}), 200)
+    except Exception as e:
+        app.logger.error(f"Error listing meals: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/search-meals', methods=['GET'])
+def search_meals() -> Response:
+    """
+    Route to search meals by name.
+
+    Query Parameters:
+        - q (str): The words to search for; each must start a word of the meal's name.
+        - limit (int, optional): The maximum number of meals returned. Default is 20.
+
+    Returns:
+        JSON response with the matching meals, best match first.
+    Raises:
+        400 error if the query or limit is invalid.
+        500 error if there is an issue searching the meals.
+    """
+    try:
+        query = request.args.get('q', '')
+        try:
+            limit = int(request.args.get('limit', 20))
+            app.logger.info("Searching meals for: %s", query)
+            meals = kitchen_model.search_meals(query, limit)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        return make_response(jsonify({'status': 'success', 'meals': meals}), 200)
+    except Exception as e:
+        app.logger.error(f"Error searching meals: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
 @app.route('/api/get-meal-by-id/<int:meal_id>', methods=['GET'])
 def get_meal_by_id(meal_id: int) -> Response:
     """
@@ -165,7 +410,7 @@ def get_meal_by_id(meal_id: int) -> Response:
     try:
         app.logger.info(f"Retrieving meal by ID: {meal_id}")
 
-        meal = kitchen_model.get_meal_by_id(meal_id)
+        meal = kitchen_model.get_meal_by_id_cached(meal_id)
         return make_response(jsonify({'status': 'success', 'meal': meal}), 200)
     except Exception as e:
         app.logger.error(f"Error retrieving meal by ID: {e}")
@@ -188,7 +433,7 @@ def get_meal_by_name(meal_name: str) -> Response:
         if not meal_name:
             return make_response(jsonify({'error': 'Meal name is required'}), 400)
 
-        meal = kitchen_model.get_meal_by_name(meal_name)
+        meal = kitchen_model.get_meal_by_name_cached(meal_name)
         return make_response(jsonify({'status': 'success', 'meal': meal}), 200)
     except Exception as e:
         app.logger.error(f"Error retrieving meal by name: {e}")
@@ -279,7 +524,7 @@ def prep_combatant() -> Response:
             return make_response(jsonify({'error': 'You must name a combatant'}), 400)
 
         try:
-            meal = kitchen_model.get_meal_by_name(meal)
+            meal = kitchen_model.get_meal_by_name_cached(meal)
             battle_model.prep_combatant(meal)
             combatants = battle_model.get_combatants()
         except Exception as e:
@@ -292,6 +537,125 @@ def prep_combatant() -> Response:
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+@app.route('/api/tournament', methods=['POST'])
+def run_tournament() -> Response:
+    """
+    Route to run a tournament between many meals and record every battle.
+
+    Expected JSON Input:
+        - meals (list[str]): The names of the meals taking part, best seed first.
+        - format (str, optional): 'single_elimination' (default) or 'round_robin'.
+
+    Returns:
+        JSON response with the bracket and the final standings.
+    Raises:
+        400 error if the meals are not given as a list of names.
+        500 error if there is an issue running the tournament.
+    """
+    try:
+        data = request.get_json()
+        meals = data.get('meals')
+        tournament_format = data.get('format', 'single_elimination')
+
+        if not isinstance(meals, list) or not all(isinstance(meal, str) for meal in meals):
+            return make_response(jsonify({'error': 'meals must be a list of meal names'}), 400)
+
+        app.logger.info("Running %s tournament with %d meals", tournament_format, len(meals))
+        tournament = tournament_model.run(meals, tournament_format)
+
+        return make_response(jsonify({'status': 'tournament complete', 'tournament': tournament}), 200)
+    except Exception as e:
+        app.logger.error(f"Tournament error: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
+############################################################
+#
+# Simulation
+#
+############################################################
+
+
+@app.route('/api/predict-battle', methods=['GET'])
+def predict_battle() -> Response:
+    """
+    Route to predict the outcome of a battle between two meals without fighting it.
+
+    Query Parameters:
+        - meal_1 (str): The name of combatant 1.
+        - meal_2 (str): The name of combatant 2.
+        - simulations (int, optional): The number of battles to simulate. Default is 100000.
+        - seed (int, optional): A seed for repeatable simulations.
+
+    Returns:
+        JSON response with both battle scores, the exact chance that meal_1 wins and the simulated one.
+    Raises:
+        400 error if the meals are missing or simulations or seed are not integers.
+        500 error if a meal is not found or the prediction fails.
+    """
+    try:
+        meal_1 = request.args.get('meal_1')
+        meal_2 = request.args.get('meal_2')
+        if not meal_1 or not meal_2:
+            return make_response(jsonify({'error': 'meal_1 and meal_2 are required'}), 400)
+        try:
+            simulations = int(request.args.get('simulations', 100000))
+            seed = request.args.get('seed')
+            seed = int(seed) if seed is not None else None
+        except ValueError:
+            return make_response(jsonify({'error': 'simulations and seed must be integers'}), 400)
+
+        app.logger.info("Predicting battle between %s and %s", meal_1, meal_2)
+        meal_scores = simulation_model.score_meals(kitchen_model.get_meals_by_names([meal_1, meal_2]))
+        score_1, score_2 = (float(score) for score in meal_scores.scores)
+
+        prediction = {
+            'meal_1': meal_1,
+            'meal_2': meal_2,
+            'score_1': score_1,
+            'score_2': score_2,
+            'win_probability_1': simulation_model.win_probability(score_1, score_2),
+            'simulations': simulations,
+            'simulated_win_probability_1': simulation_model.simulate_pair(score_1, score_2, simulations, seed),
+        }
+        return make_response(jsonify({'status': 'success', 'prediction': prediction}), 200)
+    except Exception as e:
+        app.logger.error(f"Error predicting battle: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/simulate', methods=['GET'])
+def simulate() -> Response:
+    """
+    Route to simulate random battles between all meals and return the expected leaderboard.
+
+    The stored battle stats are not changed.
+
+    Query Parameters:
+        - battles (int, optional): The number of battles to simulate. Default is 1000000.
+        - seed (int, optional): A seed for repeatable simulations.
+
+    Returns:
+        JSON response with the simulated leaderboard.
+    Raises:
+        400 error if battles or seed are not integers.
+        500 error if there are not enough meals or the simulation fails.
+    """
+    try:
+        try:
+            battles = int(request.args.get('battles', 1000000))
+            seed = request.args.get('seed')
+            seed = int(seed) if seed is not None else None
+        except ValueError:
+            return make_response(jsonify({'error': 'battles and seed must be integers'}), 400)
+
+        app.logger.info("Simulating %d battles", battles)
+        leaderboard = simulation_model.simulate_leaderboard(battles, seed)
+        return make_response(jsonify({'status': 'success', 'battles': battles, 'leaderboard': leaderboard}), 200)
+    except Exception as e:
+        app.logger.error(f"Error simulating battles: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+
 ############################################################
 #
 # Leaderboard
@@ -305,24 +669,120 @@ def get_leaderboard() -> Response:
     Route to get the leaderboard of meals sorted by wins, battles, or win percentage.
 
     Query Parameters:
-        - sort (str): The field to sort by ('wins', 'battles', or 'win_pct'). Default is 'wins'.
+        - sort (str): The field to sort by ('wins', 'win_pct' or 'rating'). Default is 'wins'.
+        - limit (int, optional): The maximum number of meals to return (top-K). Default is all.
+        - offset (int, optional): The number of top meals to skip, for pagination. Default is 0.
+          Deep pages are cheaper from /api/leaderboard/page.
+        - window (str, optional): Only count battles from the last hours or days, e.g. '24h' or '7d'.
+          Default is all battles.
+        - stream (bool, optional): If true, the response body is streamed as the rows are read.
 
     Returns:
         JSON response with a sorted leaderboard of meals.
     Raises:
+        400 error if limit or offset are not integers, or the window is invalid.
         500 error if there is an issue generating the leaderboard.
     """
     try:
         sort_by = request.args.get('sort', 'wins')  # Default sort by wins
-        app.logger.info("Generating leaderboard sorted by %s", sort_by)
+        stream = request.args.get('stream', 'false').lower() == 'true'
+        try:
+            limit = request.args.get('limit')
+            limit = int(limit) if limit is not None else None
+            offset = int(request.args.get('offset', 0))
+        except ValueError:
+            return make_response(jsonify({'error': 'limit and offset must be integers'}), 400)
+        window = request.args.get('window')
+        if window is not None:
+            try:
+                kitchen_model.parse_window(window)
+            except ValueError as e:
+                return make_response(jsonify({'error': str(e)}), 400)
+        app.logger.info("Generating leaderboard sorted by %s (limit=%s, offset=%s, window=%s)", sort_by, limit, offset, window)
+
+        rows = kitchen_model.iter_leaderboard_rows(sort_by, limit, offset, window=window)
+        return json_rows_response({'status': 'success'}, 'leaderboard', leaderboard_encoder, rows, 200, stream=stream)
+    except Exception as e:
+        app.logger.error(f"Error generating leaderboard: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/leaderboard/page', methods=['GET'])
+def get_leaderboard_page() -> Response:
+    """
+    Route to get the leaderboard one page at a time, from a cursor instead of an offset.
+
+    Query Parameters:
+        - sort (str): The field to sort by ('wins', 'win_pct' or 'rating'). Default is 'wins'.
+        - cursor (str, optional): The next_cursor of the previous page.
+        - limit (int, optional): The page size. Default is 50.
 
-        leaderboard_data = kitchen_model.get_leaderboard(sort_by)
+    Returns:
+        JSON response with the page of the leaderboard and the cursor of the next page.
+    Raises:
+        400 error if the sort, the cursor or the limit is invalid.
+        500 error if there is an issue generating the leaderboard.
+    """
+    try:
+        sort_by = request.args.get('sort', 'wins')
+        try:
+            limit = int(request.args.get('limit', kitchen_model.DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return make_response(jsonify({'error': 'limit must be an integer'}), 400)
 
-        return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+        app.logger.info("Generating leaderboard page sorted by %s", sort_by)
+        try:
+            page = kitchen_model.get_leaderboard_page(sort_by, request.args.get('cursor'), limit)
+        except ValueError as e:
+            return make_response(jsonify({'error': str(e)}), 400)
+        return make_response(jsonify({'status': 'success', **page}), 200)
     except Exception as e:
-        app.logger.error(f"Error generating leaderboard: {e}")
+        app.logger.error(f"Error generating leaderboard page: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
 
+@app.route('/api/leaderboard/rank/<int:meal_id>', methods=['GET'])
+def get_meal_rank(meal_id: int) -> Response:
+    """
+    Route to get a meal's position on the leaderboard.
+
+    Path Parameter:
+        - meal_id (int): The ID of the meal.
+
+    Query Parameters:
+        - sort (str): The field to rank by ('wins', 'win_pct' or 'rating'). Default is 'wins'.
+
+    Returns:
+        JSON response with the meal's 1-based rank.
+    Raises:
+        500 error if the meal is not on the leaderboard or the rank cannot be computed.
+    """
+    try:
+        sort_by = request.args.get('sort', 'wins')
+        app.logger.info("Retrieving rank of meal %s by %s", meal_id, sort_by)
+        rank = kitchen_model.get_meal_rank(meal_id, sort_by)
+        return make_response(jsonify({'status': 'success', 'meal_id': meal_id, 'sort': sort_by, 'rank': rank}), 200)
+    except Exception as e:
+        app.logger.error(f"Error retrieving meal rank: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/recompute-ratings', methods=['POST'])
+def recompute_ratings() -> Response:
+    """
+    Route to recompute every meal's rating by replaying the battle log.
+
+    Ratings are kept up to date by every battle; this rebuilds them, e.g. after changing ELO_K.
+
+    Returns:
+        JSON response with the number of battles replayed.
+    Raises:
+        500 error if there is an issue recomputing the ratings.
+    """
+    try:
+        app.logger.info("Recomputing meal ratings")
+        battles = rating_model.recompute_ratings()
+        return make_response(jsonify({'status': 'success', 'battles': battles}), 200)
+    except Exception as e:
+        app.logger.error(f"Error recomputing ratings: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
 
 
 if __name__ == '__main__':
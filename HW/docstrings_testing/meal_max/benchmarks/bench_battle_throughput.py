@@ -0,0 +1,79 @@
+"""Benchmark of battles per second against a real SQLite file.
+
+Each battle records both meals' stats through kitchen_model. The same workload runs with
+the old connection profile (a new connection per call, rollback journal, synchronous=FULL)
+and with the pooled WAL profile. random.org is replaced by a local generator so only the
+database work is measured.
+
+Run from the meal_max directory:
+
+    python -m benchmarks.bench_battle_throughput --battles 2000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from meal_max.models import kitchen_model
+from meal_max.models.battle_model import BattleModel
+from meal_max.utils import sql_utils
+from meal_max.utils.random_utils import LocalRandomProvider
+from meal_max.utils.sql_utils import ConnectionPool
+
+
+PROFILES = {
+    'per-call connection, DELETE, FULL': dict(max_size=0, journal_mode='DELETE', synchronous='FULL'),
+    'pooled, DELETE, FULL': dict(max_size=8, journal_mode='DELETE', synchronous='FULL'),
+    'pooled, WAL, NORMAL': dict(max_size=8, journal_mode='WAL', synchronous='NORMAL'),
+}
+
+
+def run(db_path, battles, profile):
+    sql_dir = os.path.join(os.path.dirname(__file__), '..', 'sql')
+    with open(os.path.join(sql_dir, 'create_meal_table.sql')) as fh:
+        script = fh.read()
+    pool = ConnectionPool(db_path, **profile)
+    sql_utils.DB_PATH = db_path
+    sql_utils.set_pool(pool)
+    with sql_utils.get_db_connection() as conn:
+        conn.executescript(script)
+        conn.commit()
+    sql_utils.apply_migrations(os.path.join(sql_dir, 'migrations'))
+    kitchen_model.create_meal('Spaghetti', 'Italian', 12.5, 'MED')
+    kitchen_model.create_meal('Sushi', 'Japanese', 15.0, 'HIGH')
+    meals = [kitchen_model.get_meal_by_name('Spaghetti'), kitchen_model.get_meal_by_name('Sushi')]
+
+    model = BattleModel(random_provider=LocalRandomProvider())
+    start = time.perf_counter()
+    for _ in range(battles):
+        model.clear_combatants()
+        for meal in meals:
+            model.prep_combatant(meal)
+        model.battle()
+    elapsed = time.perf_counter() - start
+    stats = pool.stats()
+    sql_utils.set_pool(None)
+    return elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--battles', type=int, default=2000, help='number of battles per profile')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    print(f"{args.battles} battles per profile")
+    baseline = None
+    for name, profile in PROFILES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            elapsed, stats = run(os.path.join(tmp, 'meal_max.db'), args.battles, profile)
+        rate = args.battles / elapsed
+        baseline = baseline or rate
+        print(f"  {name:<36} {rate:10,.0f} battles/s  x{rate / baseline:5.2f}  "
+              f"connections created={stats['created']} reused={stats['reused']}")
+
+
+if __name__ == "__main__":
+    main()
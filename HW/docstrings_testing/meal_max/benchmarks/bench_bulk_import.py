@@ -0,0 +1,92 @@
+"""Benchmark of bulk meal import and export against a real SQLite file.
+
+Generates a synthetic CSV catalog, imports it through catalog_model in chunked
+executemany transactions, then streams it back out as CSV and NDJSON. For comparison a
+subset of the rows is inserted one at a time with kitchen_model.create_meal, and the
+per-row time is extrapolated to the full catalog.
+
+Run from the meal_max directory:
+
+    python -m benchmarks.bench_bulk_import --meals 1000000
+"""
+import argparse
+import io
+import logging
+import os
+import tempfile
+import time
+
+from meal_max.models import catalog_model, kitchen_model
+from meal_max.utils import sql_utils
+
+
+CUISINES = ['Thai', 'Italian', 'Mexican', 'Japanese', 'French', 'Ethiopian']
+DIFFICULTIES = ['LOW', 'MED', 'HIGH']
+
+
+def make_csv(count):
+    buffer = io.StringIO()
+    buffer.write("meal,cuisine,price,difficulty\n")
+    for i in range(count):
+        buffer.write(f"Meal {i},{CUISINES[i % len(CUISINES)]},{5 + i % 40}.5,{DIFFICULTIES[i % 3]}\n")
+    buffer.seek(0)
+    return buffer
+
+
+def fresh_database(db_path):
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    sql_utils.DB_PATH = db_path
+    sql_utils.set_pool(None)
+    sql_dir = os.path.join(os.path.dirname(__file__), '..', 'sql')
+    with open(os.path.join(sql_dir, 'create_meal_table.sql')) as fh:
+        script = fh.read()
+    with sql_utils.get_db_connection() as conn:
+        conn.executescript(script)
+        conn.commit()
+    sql_utils.apply_migrations(os.path.join(sql_dir, 'migrations'))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-m', '--meals', type=int, default=1000000, help='number of meals to import')
+    parser.add_argument('-s', '--single', type=int, default=5000, help='number of meals inserted with create_meal')
+    parser.add_argument('-c', '--chunk-size', type=int, default=catalog_model.IMPORT_CHUNK_SIZE,
+                        help='rows per import transaction')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'meal_max.db')
+
+        fresh_database(db_path)
+        start = time.perf_counter()
+        for i in range(args.single):
+            kitchen_model.create_meal(f"Meal {i}", CUISINES[i % len(CUISINES)], 5 + i % 40 + 0.5, DIFFICULTIES[i % 3])
+        single_time = time.perf_counter() - start
+
+        fresh_database(db_path)
+        source = make_csv(args.meals)
+        start = time.perf_counter()
+        result = catalog_model.import_meals(catalog_model.read_records(source, 'csv'), args.chunk_size)
+        import_time = time.perf_counter() - start
+        assert result['imported'] == args.meals, result
+
+        print(f"importing {args.meals} meals")
+        print(f"  create_meal per row        {single_time / args.single * 1e6:9.1f} us/row"
+              f"  (~{single_time / args.single * args.meals:.1f} s extrapolated)")
+        print(f"  import_meals, chunks of {args.chunk_size:<5}"
+              f"{import_time / args.meals * 1e6:6.1f} us/row  {import_time:8.1f} s  "
+              f"{args.meals / import_time:,.0f} rows/s  x{single_time / args.single * args.meals / import_time:.0f}")
+
+        for fmt in catalog_model.CATALOG_FORMATS:
+            start = time.perf_counter()
+            size = sum(len(chunk) for chunk in catalog_model.export_meals(fmt))
+            elapsed = time.perf_counter() - start
+            print(f"exporting as {fmt:<6}          {elapsed:8.1f} s  {args.meals / elapsed:,.0f} rows/s  {size / 2 ** 20:.0f} MiB")
+
+        sql_utils.set_pool(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Benchmark of replaying a battle history into Elo ratings.
+
+Replays a synthetic history one battle at a time with elo_update and with
+rating_model.replay_ratings, which rates each step of non-overlapping battles in one
+NumPy operation, and checks both give the same ratings.
+
+Run from the meal_max directory:
+
+    python -m benchmarks.bench_rating_replay --meals 1000 --battles 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from meal_max.models import rating_model
+from meal_max.models.rating_model import elo_update, replay_ratings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-m', '--meals', type=int, default=1000, help='number of meals')
+    parser.add_argument('-b', '--battles', type=int, default=1000000, help='number of battles to replay')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    winners = rng.integers(0, args.meals, size=args.battles)
+    losers = (winners + rng.integers(1, args.meals, size=args.battles)) % args.meals
+
+    start = time.perf_counter()
+    ratings = [rating_model.INITIAL_RATING] * args.meals
+    for winner, loser in zip(winners.tolist(), losers.tolist()):
+        ratings[winner], ratings[loser] = elo_update(ratings[winner], ratings[loser])
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    replayed = replay_ratings(winners, losers, args.meals)
+    vector_time = time.perf_counter() - start
+    assert np.allclose(replayed, ratings, rtol=0, atol=1e-6)
+
+    steps = int(rating_model.replay_steps(winners, losers, args.meals).max()) + 1
+    print(f"replaying {args.battles} battles between {args.meals} meals ({steps} steps)")
+    print(f"  elo_update per battle      {scalar_time:8.2f} s")
+    print(f"  replay_ratings             {vector_time:8.2f} s  x{scalar_time / vector_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark of scoring meals and simulating battles with NumPy.
+
+Scores a synthetic catalog with BattleModel.get_battle_score one meal at a time (with its
+log lines silenced) and with simulation_model.score_meals in one pass. It then simulates
+random battles and reports how many battles per second the vectorized engine sustains.
+
+Run from the meal_max directory:
+
+    python -m benchmarks.bench_simulation --meals 100000 --battles 10000000
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.kitchen_model import Meal
+from meal_max.models.simulation_model import score_meals, simulate_battles
+
+
+CUISINES = ['Thai', 'Italian', 'Mexican', 'Japanese', 'French', 'Ethiopian']
+DIFFICULTIES = ['LOW', 'MED', 'HIGH']
+
+
+def make_meals(count):
+    return [Meal(id=i, meal=f"Meal {i}", cuisine=CUISINES[i % len(CUISINES)], price=5.0 + i % 40,
+                 difficulty=DIFFICULTIES[i % 3]) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-m', '--meals', type=int, default=100000, help='number of meals to score')
+    parser.add_argument('-b', '--battles', type=int, default=10000000, help='number of battles to simulate')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    meals = make_meals(args.meals)
+    battle_model = BattleModel()
+
+    start = time.perf_counter()
+    scalar = [battle_model.get_battle_score(meal) for meal in meals]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    meal_scores = score_meals(meals)
+    vector_time = time.perf_counter() - start
+    assert np.array_equal(meal_scores.scores, np.array(scalar))
+
+    print(f"scoring {args.meals} meals")
+    print(f"  get_battle_score per meal   {scalar_time * 1000:9.1f} ms")
+    print(f"  score_meals (NumPy)         {vector_time * 1000:9.1f} ms  x{scalar_time / vector_time:.1f}")
+
+    start = time.perf_counter()
+    simulate_battles(meal_scores, args.battles, seed=0)
+    elapsed = time.perf_counter() - start
+    print(f"simulating {args.battles} battles: {elapsed:.2f} s, {args.battles / elapsed:,.0f} battles/s")
+
+
+if __name__ == "__main__":
+    main()
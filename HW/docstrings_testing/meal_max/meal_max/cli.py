@@ -0,0 +1,90 @@
+"""Command line tools for the meal catalog.
+
+Run from the meal_max directory, with DB_PATH pointing at the database:
+
+    python -m meal_max.cli import meals.csv
+    python -m meal_max.cli export --format ndjson meals.ndjson
+    python -m meal_max.cli export - > meals.csv
+"""
+import argparse
+import json
+import os
+import sys
+from typing import List, Optional
+
+from meal_max.models import catalog_model
+
+
+# File extensions the format is inferred from when --format is not given
+FORMAT_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def infer_format(path: str, fmt: Optional[str]) -> str:
+    """
+    Returns the given format, or the one matching the file's extension.
+
+    Raises:
+        ValueError: If no format is given and the extension is not recognized.
+    """
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Cannot infer the format of {path}; use --format csv or --format ndjson.")
+    return FORMAT_EXTENSIONS[extension]
+
+
+def import_command(args: argparse.Namespace) -> int:
+    fmt = infer_format(args.path, args.format) if args.path != "-" else (args.format or "csv")
+    if args.path == "-":
+        result = catalog_model.import_meals(catalog_model.read_records(sys.stdin, fmt), args.chunk_size)
+    else:
+        with open(args.path, "r", encoding="utf-8", newline="") as fh:
+            result = catalog_model.import_meals(catalog_model.read_records(fh, fmt), args.chunk_size)
+    json.dump(result, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 1 if result["rejected"] and args.strict else 0
+
+
+def export_command(args: argparse.Namespace) -> int:
+    fmt = infer_format(args.path, args.format) if args.path != "-" else (args.format or "csv")
+    chunks = catalog_model.export_meals(fmt, args.include_deleted)
+    if args.path == "-":
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+    else:
+        with open(args.path, "w", encoding="utf-8", newline="") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m meal_max.cli", description="Import and export the meal catalog.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="import meals from a CSV or NDJSON file")
+    import_parser.add_argument("path", help="the file to read, or - for stdin")
+    import_parser.add_argument("-f", "--format", choices=catalog_model.CATALOG_FORMATS,
+                               help="the file format; inferred from the extension by default")
+    import_parser.add_argument("--chunk-size", type=int, default=catalog_model.IMPORT_CHUNK_SIZE,
+                               help="rows inserted per transaction")
+    import_parser.add_argument("--strict", action="store_true", help="exit with status 1 if any row is rejected")
+    import_parser.set_defaults(handler=import_command)
+
+    export_parser = commands.add_parser("export", help="export meals and their stats to a CSV or NDJSON file")
+    export_parser.add_argument("path", help="the file to write, or - for stdout")
+    export_parser.add_argument("-f", "--format", choices=catalog_model.CATALOG_FORMATS,
+                               help="the file format; inferred from the extension by default")
+    export_parser.add_argument("--include-deleted", action="store_true", help="also export meals marked as deleted")
+    export_parser.set_defaults(handler=export_command)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
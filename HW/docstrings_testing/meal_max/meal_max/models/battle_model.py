@@ -1,28 +1,61 @@
 import logging
-from typing import List
+from typing import List, Optional
 
-from meal_max.models.kitchen_model import Meal, update_meal_stats
+from meal_max.models.combatant_store import CombatantStore, MemoryCombatantStore
+from meal_max.models.kitchen_model import Meal
 from meal_max.utils.logger import configure_logger
-from meal_max.utils.random_utils import get_random
+from meal_max.utils.random_utils import RandomProvider, get_random_provider
 
 
 logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+DIFFICULTY_MODIFIER = {"HIGH": 1, "MED": 2, "LOW": 3}
+# How many times a battle is refought if the combatants change before it commits
+BATTLE_MAX_ATTEMPTS = 5
+
+
+def compute_battle_score(combatant: Meal) -> float:
+    """
+    Computes a combatant's battle score without logging, for scoring many meals at once.
+
+    Args:
+        combatant (Meal): The meal to score.
+
+    Returns:
+        float: The price times the length of the cuisine, minus the difficulty modifier.
+    """
+    return (combatant.price * len(combatant.cuisine)) - DIFFICULTY_MODIFIER[combatant.difficulty]
+
+
 class BattleModel:
     """
     A class to manage a battle of meals.
 
     Attributes:
         playlist (List[Meal]): The list of meals in the battle.
+        random_provider (Optional[RandomProvider]): The source of the battles' random numbers;
+            the process-wide provider from random_utils is used if None.
+        store (CombatantStore): Where the combatants are kept; share a SQLiteCombatantStore
+            between workers so they all see the same combatants.
 
     """
-    def __init__(self):
+    def __init__(self, random_provider: Optional[RandomProvider] = None, store: Optional[CombatantStore] = None):
         """
         Initializes the BattleModel with an empty list of meals.
+
+        Args:
+            random_provider (Optional[RandomProvider]): The source of random numbers, if not the process-wide one.
+            store (Optional[CombatantStore]): The combatant store. Defaults to a MemoryCombatantStore.
         """
-        self.combatants: List[Meal] = []
+        self.random_provider = random_provider
+        self.store = store if store is not None else MemoryCombatantStore()
+
+    @property
+    def combatants(self) -> List[Meal]:
+        """The current combatants, read from the store."""
+        return self.store.get_combatants()
 
     def battle(self) -> str:
         """
@@ -34,15 +67,39 @@ class BattleModel:
         Raises:
             TypeError: If the meal is not a valid meal instance.
             ValueError: If not enough combatants in battle.
+            RuntimeError: If the combatants keep changing while the battle is fought.
         """
         logger.info("Two meals enter, one meal leaves!")
 
-        if len(self.combatants) < 2:
+        for attempt in range(1, BATTLE_MAX_ATTEMPTS + 1):
+            version, combatants = self.store.snapshot()
+            winner, loser = self._fight(combatants)
+
+            # Update stats and remove the loser in one step, unless another battle or prep got there first
+            if self.store.commit_battle(version, winner, loser):
+                return winner.meal
+
+            logger.info("Combatants changed during the battle, fighting again (attempt %d)", attempt)
+
+        logger.error("Battle could not be committed after %d attempts", BATTLE_MAX_ATTEMPTS)
+        raise RuntimeError(f"Battle could not be committed after {BATTLE_MAX_ATTEMPTS} attempts, the combatants kept changing.")
+
+    def _fight(self, combatants: List[Meal]) -> tuple[Meal, Meal]:
+        """
+        Decides the winner between the first two combatants.
+
+        Returns:
+            tuple[Meal, Meal]: The winner and the loser.
+
+        Raises:
+            ValueError: If not enough combatants in battle.
+        """
+        if len(combatants) < 2:
             logger.error("Not enough combatants to start a battle.")
             raise ValueError("Two combatants must be prepped for a battle.")
 
-        combatant_1 = self.combatants[0]
-        combatant_2 = self.combatants[1]
+        combatant_1 = combatants[0]
+        combatant_2 = combatants[1]
 
         # Log the start of the battle
         logger.info("Battle started between %s and %s", combatant_1.meal, combatant_2.meal)
@@ -61,11 +118,12 @@ class BattleModel:
         # Log the delta and normalized delta
         logger.info("Delta between scores: %.3f", delta)
 
-        # Get random number from random.org
-        random_number = get_random()
+        # Get random number from the provider (prefetched from random.org by default)
+        provider = self.random_provider if self.random_provider is not None else get_random_provider()
+        random_number = provider.get_random()
 
         # Log the random number
-        logger.info("Random number from random.org: %.3f", random_number)
+        logger.info("Random number from %s: %.3f", provider.name, random_number)
 
         # Determine the winner based on the normalized delta
         if delta > random_number:
@@ -78,21 +136,14 @@ class BattleModel:
         # Log the winner
         logger.info("The winner is: %s", winner.meal)
 
-        # Update stats for both combatants
-        update_meal_stats(winner.id, 'win')
-        update_meal_stats(loser.id, 'loss')
-
-        # Remove the losing combatant from combatants
-        self.combatants.remove(loser)
-
-        return winner.meal
+        return winner, loser
 
     def clear_combatants(self):
         """
         Removes the meals from the battle
         """
         logger.info("Clearing the combatants list.")
-        self.combatants.clear()
+        self.store.clear()
 
     def get_battle_score(self, combatant: Meal) -> float:
         """
@@ -104,14 +155,12 @@ class BattleModel:
         Raises:
             ValueError: If the combantant is empty or not found.
         """
-        difficulty_modifier = {"HIGH": 1, "MED": 2, "LOW": 3}
-
         # Log the calculation process
         logger.info("Calculating battle score for %s: price=%.3f, cuisine=%s, difficulty=%s",
                     combatant.meal, combatant.price, combatant.cuisine, combatant.difficulty)
 
         # Calculate score
-        score = (combatant.price * len(combatant.cuisine)) - difficulty_modifier[combatant.difficulty]
+        score = compute_battle_score(combatant)
 
         # Log the calculated score
         logger.info("Battle score for %s: %.3f", combatant.meal, score)
@@ -133,16 +182,17 @@ class BattleModel:
             combatant_data (Meal): the combantant to add to the list
 
         Raises:
-            ValueError: If the list is full or the combatant_data is invalid.
+            ValueError: If the list is full, the meal is already a combatant or the combatant_data is invalid.
         """
-        if len(self.combatants) >= 2:
-            logger.error("Attempted to add combatant '%s' but combatants list is full", combatant_data.meal)
-            raise ValueError("Combatant list is full, cannot add more combatants.")
-
         # Log the addition of the combatant
         logger.info("Adding combatant '%s' to combatants list", combatant_data.meal)
 
-        self.combatants.append(combatant_data)
+        # The store checks for room and adds the combatant atomically
+        try:
+            self.store.prep(combatant_data)
+        except ValueError as e:
+            logger.error("Attempted to add combatant '%s': %s", combatant_data.meal, e)
+            raise
 
         # Log the current state of combatants
         logger.info("Current combatants list: %s", [combatant.meal for combatant in self.combatants])
@@ -0,0 +1,318 @@
+import csv
+import io
+import json
+import logging
+import math
+import sqlite3
+from itertools import islice
+from typing import Any, Iterable, Iterator
+
+from meal_max.models.kitchen_model import SQL_BATCH_SIZE, meal_cache
+from meal_max.utils.json_utils import RowEncoder
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+CATALOG_FORMATS = ("csv", "ndjson")
+# Column order of exported rows; imports read the same columns (id is ignored, stats are optional)
+EXPORT_COLUMNS = ("id", "meal", "cuisine", "price", "difficulty", "battles", "wins")
+_ndjson_encoder = RowEncoder(EXPORT_COLUMNS)
+IMPORT_CHUNK_SIZE = 5000
+EXPORT_BATCH_SIZE = 5000
+_DIFFICULTIES = frozenset(("LOW", "MED", "HIGH"))
+# Only this many row errors are listed in an import result; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+def _count(record: dict, column: str) -> int:
+    value = record.get(column)
+    if value is None or value == "":
+        return 0
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {column}: {value}. Must be a non-negative integer.")
+    if count < 0 or count != float(value):
+        raise ValueError(f"Invalid {column}: {value}. Must be a non-negative integer.")
+    return count
+
+
+def validate_record(record: dict) -> tuple[str, str, float, str, int, int]:
+    """
+    Validates one imported meal and converts it to the values inserted into meals.
+
+    Prices and difficulties are held to the same rules as create_meal, with the same errors.
+
+    Args:
+        record (dict): The meal, with meal, cuisine, price, difficulty and optionally battles and wins.
+
+    Returns:
+        tuple[str, str, float, str, int, int]: The meal, cuisine, price, difficulty, battles and wins.
+
+    Raises:
+        ValueError: If the record is not a valid meal.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Each meal must be an object.")
+    meal = record.get("meal")
+    cuisine = record.get("cuisine")
+    if not isinstance(meal, str) or not meal.strip():
+        raise ValueError("Meal name is required.")
+    if not isinstance(cuisine, str) or not cuisine.strip():
+        raise ValueError("Cuisine is required.")
+    try:
+        price = float(record.get("price"))
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid price: {record.get('price')}. Price must be a number.")
+
+    # Also rejects NaN, which fails every comparison
+    if not 0 < price < math.inf:
+        raise ValueError(f"Invalid price: {record.get('price')}. Price must be a positive number.")
+    difficulty = record.get("difficulty")
+    if difficulty not in _DIFFICULTIES:
+        raise ValueError(f"Invalid difficulty level: {difficulty}. Must be 'LOW', 'MED', or 'HIGH'.")
+
+    battles = _count(record, "battles")
+    wins = _count(record, "wins")
+    if wins > battles:
+        raise ValueError(f"Invalid wins: {wins}. Cannot be more than battles ({battles}).")
+
+    return meal, cuisine, price, difficulty, battles, wins
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[tuple[int, Any]]:
+    """
+    Reads meals from CSV lines with a header row.
+
+    Args:
+        lines (Iterable[str]): The lines of the file.
+
+    Yields:
+        tuple[int, Any]: The line number and the record as a dict.
+    """
+    reader = csv.DictReader(lines)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def read_ndjson(lines: Iterable[str]) -> Iterator[tuple[int, Any]]:
+    """
+    Reads meals from newline-delimited JSON, one object per line. Blank lines are skipped.
+
+    Args:
+        lines (Iterable[str]): The lines of the file.
+
+    Yields:
+        tuple[int, Any]: The line number and the decoded record, or the ValueError if the line is not JSON.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e}")
+
+
+def read_records(lines: Iterable[str], fmt: str) -> Iterator[tuple[int, Any]]:
+    """
+    Reads meals in the given format.
+
+    Raises:
+        ValueError: If the format is not csv or ndjson.
+    """
+    if fmt == "csv":
+        return read_csv(lines)
+    if fmt == "ndjson":
+        return read_ndjson(lines)
+    raise ValueError(f"Invalid format: {fmt}. Must be one of {', '.join(CATALOG_FORMATS)}.")
+
+
+def import_meals(records: Iterable[tuple[int, Any]], chunk_size: int = IMPORT_CHUNK_SIZE) -> dict[str, Any]:
+    """
+    Imports meals in chunks, one transaction and one executemany per chunk.
+
+    Invalid rows and meals whose name already exists are skipped and reported with their
+    line number; every other row is inserted. A chunk is committed as a whole, so if the
+    import stops on a database error, the chunks before it stay imported.
+
+    Args:
+        records (Iterable[tuple[int, Any]]): (line number, record) pairs, as from read_records.
+        chunk_size (int): The number of rows inserted per transaction.
+
+    Returns:
+        dict[str, Any]: The number of rows 'imported' and 'rejected', and the first
+        MAX_REPORTED_ERRORS 'errors' as {'line': ..., 'error': ...}.
+
+    Raises:
+        ValueError: If the chunk size is not positive.
+        sqlite3.Error: If any database error occurs.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"Invalid chunk size: {chunk_size}. Must be a positive integer.")
+
+    result: dict[str, Any] = {"imported": 0, "rejected": 0, "errors": []}
+
+    def reject(line_number: int, error: str) -> None:
+        result["rejected"] += 1
+        if len(result["errors"]) < MAX_REPORTED_ERRORS:
+            result["errors"].append({"line": line_number, "error": error})
+
+    # Names in the current chunk; earlier chunks are committed, so the IN query finds those
+    seen = set()
+    chunk: list[tuple[int, tuple]] = []
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+
+            def flush() -> None:
+                cursor.execute("BEGIN IMMEDIATE")
+                names = [row[0] for _, row in chunk]
+                existing = set()
+                for start in range(0, len(names), SQL_BATCH_SIZE):
+                    batch = names[start:start + SQL_BATCH_SIZE]
+                    placeholders = ", ".join("?" * len(batch))
+                    # Archived names stay taken; inserting one would fail the whole chunk
+                    cursor.execute(f"""
+                        SELECT meal FROM meals WHERE meal IN ({placeholders})
+                        UNION ALL SELECT meal FROM meals_archive WHERE meal IN ({placeholders})
+                    """, batch + batch)
+                    existing.update(row[0] for row in cursor.fetchall())
+
+                rows = []
+                for line_number, row in chunk:
+                    if row[0] in existing:
+                        reject(line_number, f"Meal with name '{row[0]}' already exists")
+                    else:
+                        rows.append(row)
+                cursor.executemany("""
+                    INSERT INTO meals (meal, cuisine, price, difficulty, battles, wins)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, rows)
+                conn.commit()
+                result["imported"] += len(rows)
+                chunk.clear()
+                seen.clear()
+
+            for line_number, record in records:
+                if isinstance(record, Exception):
+                    reject(line_number, str(record))
+                    continue
+                try:
+                    row = validate_record(record)
+                except ValueError as e:
+                    reject(line_number, str(e))
+                    continue
+                if row[0] in seen:
+                    reject(line_number, f"Meal with name '{row[0]}' already exists")
+                    continue
+                seen.add(row[0])
+                chunk.append((line_number, row))
+                if len(chunk) >= chunk_size:
+                    flush()
+            if chunk:
+                flush()
+
+    except sqlite3.Error as e:
+        logger.error("Database error during import: %s", str(e))
+        raise e
+    finally:
+        if result["imported"]:
+            meal_cache.clear()
+
+    logger.info("Imported %d meals, rejected %d", result["imported"], result["rejected"])
+    return result
+
+
+def iter_meal_rows(include_deleted: bool = False, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[tuple]:
+    """
+    Yields every meal with its stats, in id order, as tuples in EXPORT_COLUMNS order.
+
+    Args:
+        include_deleted (bool): Whether to include meals marked as deleted, archived ones included.
+        batch_size (int): The number of rows fetched from the cursor at a time.
+
+    Yields:
+        tuple: One row per meal.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    columns = ", ".join(EXPORT_COLUMNS)
+    if include_deleted:
+        query = f"SELECT {columns} FROM meals UNION ALL SELECT {columns} FROM meals_archive ORDER BY id"
+    else:
+        query = f"SELECT {columns} FROM meals WHERE deleted = FALSE ORDER BY id"
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+
+    except sqlite3.Error as e:
+        logger.error("Database error during export: %s", str(e))
+        raise e
+
+
+def export_meals(fmt: str = "csv", include_deleted: bool = False,
+                 batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """
+    Streams the meals table as CSV (with a header row) or NDJSON.
+
+    Rows are read and written batch_size at a time, so the export never holds more than
+    one batch in memory.
+
+    Args:
+        fmt (str): 'csv' or 'ndjson'.
+        include_deleted (bool): Whether to include meals marked as deleted, archived ones included.
+        batch_size (int): The number of rows per yielded chunk.
+
+    Yields:
+        str: Consecutive pieces of the file.
+
+    Raises:
+        ValueError: If the format is not csv or ndjson.
+        sqlite3.Error: If any database error occurs.
+    """
+    if fmt not in CATALOG_FORMATS:
+        raise ValueError(f"Invalid format: {fmt}. Must be one of {', '.join(CATALOG_FORMATS)}.")
+    return _export(fmt, include_deleted, batch_size)
+
+
+def _export(fmt: str, include_deleted: bool, batch_size: int) -> Iterator[str]:
+    rows = iter_meal_rows(include_deleted, batch_size)
+    count = 0
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(EXPORT_COLUMNS)
+        while True:
+            batch = list(islice(rows, batch_size))
+            writer.writerows(batch)
+            count += len(batch)
+            if buffer.tell():
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if len(batch) < batch_size:
+                break
+    else:
+        encode = _ndjson_encoder.encode
+        while True:
+            batch = list(islice(rows, batch_size))
+            count += len(batch)
+            if batch:
+                yield "\n".join([encode(row) for row in batch]) + "\n"
+            if len(batch) < batch_size:
+                break
+    logger.info("Exported %d meals as %s", count, fmt)
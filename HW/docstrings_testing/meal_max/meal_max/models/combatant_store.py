@@ -0,0 +1,209 @@
+from abc import ABC, abstractmethod
+import logging
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+
+from meal_max.models.kitchen_model import Meal, record_battle_result, write_battle_result
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# 'memory' keeps the combatants in the process; 'sqlite' shares them between workers through the database
+COMBATANT_STORE = os.getenv("COMBATANT_STORE", "memory")
+MAX_COMBATANTS = 2
+
+
+class CombatantStore(ABC):
+    """
+    Holds the combatants prepped for the next battle.
+
+    Every change bumps a version number. A battle reads the combatants with their version
+    and is only committed if the version is still the same, so two battles can never be
+    fought over the same pair (optimistic concurrency).
+    """
+
+    @abstractmethod
+    def snapshot(self) -> tuple[int, List[Meal]]:
+        """Returns the current version and combatants, in prep order."""
+
+    def get_combatants(self) -> List[Meal]:
+        """Returns the current combatants, in prep order."""
+        return self.snapshot()[1]
+
+    @abstractmethod
+    def prep(self, meal: Meal) -> None:
+        """
+        Adds a combatant, atomically checking that there is room for it.
+
+        A meal cannot battle itself, so it can only be prepped once at a time.
+
+        Raises:
+            ValueError: If two combatants are already prepped or the meal is one of them.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Removes every combatant."""
+
+    @abstractmethod
+    def commit_battle(self, version: int, winner: Meal, loser: Meal) -> bool:
+        """
+        Records a battle and removes the loser, if the combatants are still at the given version.
+
+        Returns:
+            bool: True if the battle was committed, False if the combatants changed since the snapshot.
+
+        Raises:
+            ValueError: If either meal is not found or is marked as deleted.
+            sqlite3.Error: If any database error occurs.
+        """
+
+
+class MemoryCombatantStore(CombatantStore):
+    """
+    Keeps the combatants in a list guarded by a lock.
+
+    Safe for threads in one process; each worker process gets its own combatants.
+    """
+
+    def __init__(self):
+        self._combatants: List[Meal] = []
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> tuple[int, List[Meal]]:
+        with self._lock:
+            return self._version, list(self._combatants)
+
+    def prep(self, meal: Meal) -> None:
+        with self._lock:
+            if len(self._combatants) >= MAX_COMBATANTS:
+                raise ValueError("Combatant list is full, cannot add more combatants.")
+            if any(combatant.id == meal.id for combatant in self._combatants):
+                raise ValueError(f"Meal with ID {meal.id} is already a combatant.")
+            self._combatants.append(meal)
+            self._version += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._combatants.clear()
+            self._version += 1
+
+    def commit_battle(self, version: int, winner: Meal, loser: Meal) -> bool:
+        with self._lock:
+            if version != self._version:
+                return False
+            record_battle_result(winner.id, loser.id)
+            self._combatants.remove(loser)
+            self._version += 1
+            return True
+
+
+class SQLiteCombatantStore(CombatantStore):
+    """
+    Keeps the combatants in the battle_combatants table so every worker sees the same ones.
+
+    The version lives in battle_state. Preps take the write lock and check the count in the
+    same transaction. A battle commits its stats, its battle_log entry and the removal of the
+    loser in one transaction, and only if battle_state still has the version it read.
+    """
+
+    def snapshot(self) -> tuple[int, List[Meal]]:
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                # One read transaction, so the version and the combatants match
+                cursor.execute("BEGIN")
+                cursor.execute("SELECT version FROM battle_state WHERE id = 1")
+                version = cursor.fetchone()[0]
+                cursor.execute("""
+                    SELECT meals.id, meals.meal, meals.cuisine, meals.price, meals.difficulty
+                    FROM battle_combatants JOIN meals ON meals.id = battle_combatants.meal_id
+                    ORDER BY battle_combatants.id
+                """)
+                combatants = [Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
+                              for row in cursor.fetchall()]
+                conn.commit()
+                return version, combatants
+
+        except sqlite3.Error as e:
+            logger.error("Database error: %s", str(e))
+            raise e
+
+    def prep(self, meal: Meal) -> None:
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("SELECT meal_id FROM battle_combatants")
+                meal_ids = [row[0] for row in cursor.fetchall()]
+                if len(meal_ids) >= MAX_COMBATANTS:
+                    raise ValueError("Combatant list is full, cannot add more combatants.")
+                if meal.id in meal_ids:
+                    raise ValueError(f"Meal with ID {meal.id} is already a combatant.")
+                cursor.execute("INSERT INTO battle_combatants (meal_id) VALUES (?)", (meal.id,))
+                cursor.execute("UPDATE battle_state SET version = version + 1 WHERE id = 1")
+                conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error("Database error: %s", str(e))
+            raise e
+
+    def clear(self) -> None:
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("DELETE FROM battle_combatants")
+                cursor.execute("UPDATE battle_state SET version = version + 1 WHERE id = 1")
+                conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error("Database error: %s", str(e))
+            raise e
+
+    def commit_battle(self, version: int, winner: Meal, loser: Meal) -> bool:
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("UPDATE battle_state SET version = version + 1 WHERE id = 1 AND version = ?", (version,))
+                if cursor.rowcount == 0:
+                    conn.rollback()
+                    return False
+
+                write_battle_result(cursor, winner.id, loser.id)
+                cursor.execute("DELETE FROM battle_combatants WHERE meal_id = ?", (loser.id,))
+                conn.commit()
+                return True
+
+        except sqlite3.Error as e:
+            logger.error("Database error: %s", str(e))
+            raise e
+
+
+def make_combatant_store(kind: Optional[str] = None) -> CombatantStore:
+    """
+    Builds the combatant store named by kind, or by the COMBATANT_STORE setting.
+
+    Args:
+        kind (Optional[str]): 'memory' or 'sqlite'. Defaults to COMBATANT_STORE.
+
+    Returns:
+        CombatantStore: A new store.
+
+    Raises:
+        ValueError: If the kind is unknown.
+    """
+    kind = kind or COMBATANT_STORE
+    if kind == "memory":
+        return MemoryCombatantStore()
+    if kind == "sqlite":
+        return SQLiteCombatantStore()
+    raise ValueError(f"Invalid combatant store: {kind}. Must be 'memory' or 'sqlite'.")
@@ -1,10 +1,14 @@
 from dataclasses import dataclass
 import logging
 import os
+import re
 import sqlite3
-from typing import Any
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Optional
 
-from meal_max.utils.sql_utils import get_db_connection
+from meal_max.models.rating_model import elo_update
+from meal_max.utils.cache_utils import LRUCache
+from meal_max.utils.sql_utils import apply_migrations, get_db_connection, read_stamp
 from meal_max.utils.logger import configure_logger
 
 
@@ -12,6 +16,38 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Column order of the rows yielded by iter_leaderboard_rows
+LEADERBOARD_COLUMNS = ("id", "meal", "cuisine", "price", "difficulty", "battles", "wins", "win_pct", "rating")
+
+# Leaderboard windows are whole hours or days, e.g. '24h' or '7d'; see parse_window
+WINDOW_UNITS = {"h": 3600, "d": 86400}
+HOUR = WINDOW_UNITS["h"]
+DAY = WINDOW_UNITS["d"]
+
+# Column order of the rows returned by list_meals and search_meals
+MEAL_LIST_COLUMNS = ("id", "meal", "cuisine", "price", "difficulty", "battles", "wins")
+# Sort keys of list_meals; each has an index in sql/migrations that returns rows in that order
+MEAL_LIST_SORTS = ("id", "price", "battles")
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Keeps every IN (...) list well under SQLite's host parameter limit
+SQL_BATCH_SIZE = 500
+
+# Meals looked up through get_meal_by_name_cached / get_meal_by_id_cached are kept for
+# MEAL_CACHE_TTL seconds, at most MEAL_CACHE_SIZE of them (keyed by name and by id)
+MEAL_CACHE_SIZE = int(os.getenv("MEAL_CACHE_SIZE", "1024"))
+MEAL_CACHE_TTL = float(os.getenv("MEAL_CACHE_TTL", "300"))
+meal_cache = LRUCache(MEAL_CACHE_SIZE, MEAL_CACHE_TTL)
+
+# Deleted meals are moved to meals_archive by compact_meals, COMPACTION_BATCH_SIZE per
+# transaction, every COMPACTION_INTERVAL seconds (0 turns the background job off). Each
+# pass then gives back at most COMPACTION_VACUUM_PAGES free pages to the file system.
+COMPACTION_INTERVAL = float(os.getenv("COMPACTION_INTERVAL", "3600"))
+COMPACTION_BATCH_SIZE = int(os.getenv("COMPACTION_BATCH_SIZE", "500"))
+COMPACTION_VACUUM_PAGES = int(os.getenv("COMPACTION_VACUUM_PAGES", "2000"))
+
+
 @dataclass
 class Meal:
     id: int
@@ -57,6 +93,7 @@ def create_meal(meal: str, cuisine: str, price: float, difficulty: str) -> None:
             conn.commit()
 
             logger.info("Meal successfully added to the database: %s", meal)
+            meal_cache.clear()
 
     except sqlite3.IntegrityError:
         logger.error("Duplicate meal name: %s", meal)
@@ -74,14 +111,18 @@ def clear_meals() -> None:
         sqlite3.Error: If any database error occurs.
     """
     try:
-        with open(os.getenv("SQL_CREATE_TABLE_PATH", "/app/sql/create_meal_table.sql"), "r") as fh:
+        create_table_path = os.getenv("SQL_CREATE_TABLE_PATH", "/app/sql/create_meal_table.sql")
+        with open(create_table_path, "r") as fh:
             create_table_script = fh.read()
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.executescript(create_table_script)
             conn.commit()
 
-            logger.info("Meals cleared successfully.")
+        # The create script drops the indexes and triggers the migrations added to meals
+        apply_migrations(os.getenv("SQL_MIGRATIONS_PATH") or os.path.join(os.path.dirname(create_table_path), "migrations"))
+        logger.info("Meals cleared successfully.")
+        meal_cache.clear()
 
     except sqlite3.Error as e:
         logger.error("Database error while clearing meals: %s", str(e))
@@ -109,73 +150,579 @@ def delete_meal(meal_id: int) -> None:
                     logger.info("Meal with ID %s has already been deleted", meal_id)
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
             except TypeError:
-                logger.info("Meal with ID %s not found", meal_id)
-                raise ValueError(f"Meal with ID {meal_id} not found")
+                raise _missing_meal_error(cursor, meal_id)
 
             cursor.execute("UPDATE meals SET deleted = TRUE WHERE id = ?", (meal_id,))
             conn.commit()
 
             logger.info("Meal with ID %s marked as deleted.", meal_id)
+            meal_cache.clear()
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
 
-def get_leaderboard(sort_by: str="wins") -> dict[str, Any]:
+
+def _missing_meal_error(cursor: sqlite3.Cursor, meal_id: int) -> ValueError:
+    """Returns the error for a meal id that is not in meals: deleted if compact_meals archived it, else not found."""
+    cursor.execute("SELECT 1 FROM meals_archive WHERE id = ?", (meal_id,))
+    if cursor.fetchone():
+        logger.info("Meal with ID %s has been deleted", meal_id)
+        return ValueError(f"Meal with ID {meal_id} has been deleted")
+    logger.info("Meal with ID %s not found", meal_id)
+    return ValueError(f"Meal with ID {meal_id} not found")
+
+
+def _missing_meal_name_error(cursor: sqlite3.Cursor, meal_name: str) -> ValueError:
+    """Returns the error for a meal name that is not in meals: deleted if compact_meals archived it, else not found."""
+    cursor.execute("SELECT 1 FROM meals_archive WHERE meal = ?", (meal_name,))
+    if cursor.fetchone():
+        logger.info("Meal with name %s has been deleted", meal_name)
+        return ValueError(f"Meal with name {meal_name} has been deleted")
+    logger.info("Meal with name %s not found", meal_name)
+    return ValueError(f"Meal with name {meal_name} not found")
+
+
+# The next deleted meals to archive, read off idx_meals_deleted
+_COMPACTION_QUERY = """
+    SELECT id FROM meals
+    WHERE deleted = TRUE AND id NOT IN (SELECT meal_id FROM battle_combatants)
+    ORDER BY id LIMIT ?
+"""
+
+def compact_meals(batch_size: int = COMPACTION_BATCH_SIZE, vacuum_pages: int = COMPACTION_VACUUM_PAGES) -> dict[str, int]:
+    """
+    Moves the meals marked as deleted from meals to meals_archive, then frees disk space.
+
+    Meals are moved batch_size at a time, each batch in a short write transaction of its
+    own, so battles and other writes are only held up for one batch. Meals still waiting
+    in battle_combatants are left for a later pass. Archived meals keep their id and name,
+    so lookups keep reporting them as deleted.
+
+    Deleting rows leaves free pages in the file; at most vacuum_pages of them are given
+    back per call with an incremental vacuum. apply_migrations has already put the database
+    in incremental auto-vacuum mode, so no call runs a full VACUUM.
+
+    Args:
+        batch_size (int): The number of meals archived per transaction.
+        vacuum_pages (int): The most free pages released by this call; 0 skips the vacuum.
+
+    Returns:
+        dict[str, int]: The number of meals 'archived' and of 'freed_pages'.
+
+    Raises:
+        ValueError: If the batch size is not positive.
+        sqlite3.Error: If any database error occurs.
+    """
+    if batch_size <= 0:
+        raise ValueError(f"Invalid batch size: {batch_size}. Must be a positive integer.")
+
+    archived = 0
+    freed_pages = 0
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            while True:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute(_COMPACTION_QUERY, (batch_size,))
+                meal_ids = [row[0] for row in cursor.fetchall()]
+                if not meal_ids:
+                    conn.commit()
+                    break
+
+                placeholders = ", ".join("?" * len(meal_ids))
+                cursor.execute(f"""
+                    INSERT INTO meals_archive (id, meal, cuisine, price, difficulty, battles, wins, rating)
+                    SELECT id, meal, cuisine, price, difficulty, battles, wins, rating
+                    FROM meals WHERE id IN ({placeholders})
+                """, meal_ids)
+                cursor.execute(f"DELETE FROM meals WHERE id IN ({placeholders})", meal_ids)
+                conn.commit()
+                archived += len(meal_ids)
+
+            if vacuum_pages > 0:
+                pages_before = cursor.execute("PRAGMA page_count").fetchone()[0]
+                # executescript steps the pragma to the end; execute would free a single page
+                conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+                freed_pages = pages_before - cursor.execute("PRAGMA page_count").fetchone()[0]
+
+    except sqlite3.Error as e:
+        logger.error("Database error while compacting meals: %s", str(e))
+        raise e
+
+    if archived:
+        meal_cache.clear()
+    logger.info("Archived %d deleted meals and freed %d pages", archived, freed_pages)
+    return {"archived": archived, "freed_pages": freed_pages}
+
+def _leaderboard_column(sort_by: str) -> str:
+    """Returns the meals column a leaderboard sort key orders by."""
+    if sort_by not in ("wins", "win_pct", "rating"):
+        logger.error("Invalid sort_by parameter: %s", sort_by)
+        raise ValueError("Invalid sort_by parameter: %s" % sort_by)
+    return sort_by
+
+def _leaderboard_query(sort_by: str, limit: Optional[int] = None, offset: int = 0) -> tuple[str, tuple]:
+    """
+    Builds the leaderboard query for the given sort key and page, with win_pct as a percentage.
+
+    The WHERE and ORDER BY clauses match the partial leaderboard indexes on meals, so a
+    page is read straight off the index instead of sorting the table. The offset still
+    steps over every meal it skips; get_leaderboard_page goes to deep pages directly.
+    """
+    column = _leaderboard_column(sort_by)
+    if limit is not None and (not isinstance(limit, int) or limit < 0):
+        raise ValueError(f"Invalid limit: {limit}. Must be a non-negative integer.")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError(f"Invalid offset: {offset}. Must be a non-negative integer.")
+
+    query = f"""
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, ROUND(win_pct * 100, 1) AS win_pct,
+               ROUND(rating, 1) AS rating
+        FROM meals WHERE deleted = FALSE AND battles > 0
+        ORDER BY meals.{column} DESC, id
+    """
+    params: tuple = ()
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params = (limit, offset)
+    elif offset:
+        query += " LIMIT -1 OFFSET ?"
+        params = (offset,)
+
+    return query, params
+
+def _leaderboard_page_query(sort_by: str = "wins", cursor: Optional[str] = None,
+                            limit: int = DEFAULT_PAGE_SIZE) -> tuple[str, tuple]:
+    """
+    Builds the query for one page of get_leaderboard_page.
+
+    Pages are keyset paginated: the cursor is the sort key and id of the last meal of the
+    previous page, and the next page is read from the leaderboard index starting right
+    after it, so a page costs the same however deep it is (plus the meals that tie with
+    the last one). The raw sort key is selected last, for the next cursor. One row more
+    than the limit is fetched, to tell whether there is a next page.
+    """
+    column = _leaderboard_column(sort_by)
+    if not isinstance(limit, int) or not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Invalid limit: {limit}. Must be between 1 and {MAX_PAGE_SIZE}.")
+
+    conditions = ["deleted = FALSE", "battles > 0"]
+    params: list = []
+    if cursor is not None:
+        value, meal_id = _parse_cursor(cursor, sort_by)
+        # The first condition is a range on the index; the second only skips the ties already sent
+        conditions.append(f"{column} <= ? AND ({column} < ? OR id > ?)")
+        params.extend((value, value, meal_id))
+
+    query = f"""
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, ROUND(win_pct * 100, 1) AS win_pct,
+               ROUND(rating, 1) AS rating, {column}
+        FROM meals WHERE {' AND '.join(conditions)}
+        ORDER BY meals.{column} DESC, id LIMIT ?
+    """
+    params.append(limit + 1)
+    return query, tuple(params)
+
+def get_leaderboard_page(sort_by: str = "wins", cursor: Optional[str] = None,
+                         limit: int = DEFAULT_PAGE_SIZE) -> dict[str, Any]:
+    """
+    Retrieves one page of the leaderboard, in O(log n + limit) however deep the page is.
+
+    Args:
+        sort_by (str): The leaderboard key, wins, win_pct or rating.
+        cursor (Optional[str]): The next_cursor of the previous page, or None for the first page.
+        limit (int): The maximum number of meals per page, at most MAX_PAGE_SIZE.
+
+    Returns:
+        dict[str, Any]: The 'leaderboard' page as dicts, as from get_leaderboard, and the
+        'next_cursor' to pass for the following page (None on the last page).
+
+    Raises:
+        ValueError: If the sort_by, the cursor or the limit is invalid.
+        sqlite3.Error: If any database error occurs.
+    """
+    query, params = _leaderboard_page_query(sort_by, cursor, limit)
+
+    try:
+        with get_db_connection() as conn:
+            db_cursor = conn.cursor()
+            db_cursor.execute(query, params)
+            rows = db_cursor.fetchall()
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    next_cursor = f"{rows[limit - 1][-1]!r},{rows[limit - 1][0]}" if len(rows) > limit else None
+    logger.info("Leaderboard page of %d meals retrieved successfully", min(len(rows), limit))
+    return {
+        "leaderboard": [dict(zip(LEADERBOARD_COLUMNS, row)) for row in rows[:limit]],
+        "next_cursor": next_cursor,
+    }
+
+def parse_window(window: str) -> int:
+    """
+    Converts a leaderboard window such as '24h' or '7d' to seconds.
+
+    Raises:
+        ValueError: If the window is not a positive whole number of hours or days.
+    """
+    match = re.fullmatch(r"([1-9][0-9]*)([hd])", window or "")
+    if not match:
+        raise ValueError(f"Invalid window: {window}. Must be a number of hours or days, e.g. '24h' or '7d'.")
+    return int(match.group(1)) * WINDOW_UNITS[match.group(2)]
+
+def _window_buckets(window_seconds: int, now: int) -> list[tuple[str, int, int]]:
+    """
+    Splits the window ending at now into ranges of rollup buckets.
+
+    The window is widened to start at the beginning of its first hour. Whole days are read
+    from meal_stats_daily and the partial days at either end from meal_stats_hourly, so at
+    most 48 hourly buckets are read per meal however long the window is.
+
+    Returns:
+        The (table, first bucket, end bucket) ranges; the end bucket is excluded.
+    """
+    start = (now - window_seconds) // HOUR * HOUR
+    end = now // HOUR * HOUR + HOUR
+    first_day = -(-start // DAY) * DAY
+    last_day = end // DAY * DAY
+    if first_day >= last_day:
+        return [("meal_stats_hourly", start, end)]
+    ranges = [("meal_stats_hourly", start, first_day), ("meal_stats_daily", first_day, last_day),
+              ("meal_stats_hourly", last_day, end)]
+    return [bucket_range for bucket_range in ranges if bucket_range[1] < bucket_range[2]]
+
+def _windowed_leaderboard_query(sort_by: str, window_seconds: int, now: int, limit: Optional[int] = None,
+                                offset: int = 0) -> tuple[str, tuple]:
+    """
+    Builds the leaderboard query over the battles fought in a time window.
+
+    The stats are summed from the hourly and daily rollups instead of battle_log, so the
+    cost depends on the number of buckets in the window, not the number of battles.
+    """
+    column = _leaderboard_column(sort_by)
+    if limit is not None and (not isinstance(limit, int) or limit < 0):
+        raise ValueError(f"Invalid limit: {limit}. Must be a non-negative integer.")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError(f"Invalid offset: {offset}. Must be a non-negative integer.")
+
+    # Ratings are not windowed: sorting by rating ranks the meals active in the window by their current rating
+    order = "meals.rating" if column == "rating" else f"window_stats.{column}"
+    ranges = _window_buckets(window_seconds, now)
+    bucket_selects = " UNION ALL ".join(
+        f"SELECT meal_id, battles, wins FROM {table} WHERE bucket >= ? AND bucket < ?" for table, _, _ in ranges
+    )
+    query = f"""
+        WITH window_stats AS (
+            SELECT meal_id, SUM(battles) AS battles, SUM(wins) AS wins, SUM(wins) * 1.0 / SUM(battles) AS win_pct
+            FROM ({bucket_selects}) GROUP BY meal_id
+        )
+        SELECT meals.id, meals.meal, meals.cuisine, meals.price, meals.difficulty,
+               window_stats.battles, window_stats.wins, ROUND(window_stats.win_pct * 100, 1) AS win_pct,
+               ROUND(meals.rating, 1) AS rating
+        FROM window_stats JOIN meals ON meals.id = window_stats.meal_id
+        WHERE meals.deleted = FALSE
+        ORDER BY {order} DESC, meals.id
+    """
+    params: tuple = tuple(bucket for _, first, end in ranges for bucket in (first, end))
+    if limit is not None:
+        query += " LIMIT ? OFFSET ?"
+        params += (limit, offset)
+    elif offset:
+        query += " LIMIT -1 OFFSET ?"
+        params += (offset,)
+
+    return query, params
+
+def get_leaderboard(sort_by: str="wins", limit: Optional[int] = None, offset: int = 0,
+                    window: Optional[str] = None, now: Optional[int] = None) -> dict[str, Any]:
     """
     Retrieves a leaderboard with the statistics for each combatant
 
     Args:
         sort_by (str): what the leaderboard key should be, default value is wins
+        limit (Optional[int]): the maximum number of meals to return, default is all of them
+        offset (int): the number of top meals to skip, for pagination
+        window (Optional[str]): only count battles from this long ago until now, e.g. '24h'
+            or '7d', default is all battles
+        now (Optional[int]): the unix time the window ends at, default is the current time
 
     Returns:
         dict[str, Any]: dictionary with sort_by attribute as key and Any as value
 
     Raises:
-        ValueError: If the sort_by is not win_pct or wins
+        ValueError: If the sort_by is not wins, win_pct or rating, the limit or offset is negative, or
+            the window is invalid
         Sqlite3.Error: If any database error occurs
 
     """
-    query = """
-        SELECT id, meal, cuisine, price, difficulty, battles, wins, (wins * 1.0 / battles) AS win_pct
-        FROM meals WHERE deleted = false AND battles > 0
+    rows = iter_leaderboard_rows(sort_by, limit, offset, window=window, now=now)
+    leaderboard = [dict(zip(LEADERBOARD_COLUMNS, row)) for row in rows]
+    logger.info("Leaderboard retrieved successfully")
+    return leaderboard
+
+def iter_leaderboard_rows(sort_by: str="wins", limit: Optional[int] = None, offset: int = 0,
+                          batch_size: int = 1000, window: Optional[str] = None,
+                          now: Optional[int] = None) -> Iterator[tuple]:
     """
+    Returns an iterator over the leaderboard as raw row tuples in LEADERBOARD_COLUMNS order.
 
-    if sort_by == "win_pct":
-        query += " ORDER BY win_pct DESC"
-    elif sort_by == "wins":
-        query += " ORDER BY wins DESC"
+    The rows are not converted to dicts, so they can be serialized or streamed directly.
+    The arguments are validated before the iterator is returned.
+
+    Args:
+        sort_by (str): what the leaderboard key should be, default value is wins
+        limit (Optional[int]): the maximum number of meals to return, default is all of them
+        offset (int): the number of top meals to skip, for pagination
+        batch_size (int): the number of rows fetched from the cursor at a time
+        window (Optional[str]): only count battles from this long ago until now, e.g. '24h'
+            or '7d', default is all battles
+        now (Optional[int]): the unix time the window ends at, default is the current time
+
+    Returns:
+        Iterator[tuple]: one row per meal, with win_pct as a percentage and the rating rounded to one decimal
+
+    Raises:
+        ValueError: If the sort_by is not wins, win_pct or rating, the limit or offset is negative, or
+            the window is invalid
+        Sqlite3.Error: If any database error occurs
+    """
+    if window is None:
+        query, params = _leaderboard_query(sort_by, limit, offset)
     else:
-        logger.error("Invalid sort_by parameter: %s", sort_by)
-        raise ValueError("Invalid sort_by parameter: %s" % sort_by)
+        now = int(time.time()) if now is None else now
+        query, params = _windowed_leaderboard_query(sort_by, parse_window(window), now, limit, offset)
+    return _iter_rows(query, params, batch_size)
+
+def _iter_rows(query: str, params: tuple, batch_size: int) -> Iterator[tuple]:
+    """Yields the rows of a query in batches, keeping the connection open until exhausted."""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+def get_meal_rank(meal_id: int, sort_by: str="wins") -> int:
+    """
+    Retrieves a meal's position on the leaderboard.
+
+    Meals that tie on the sort key share a rank (1 + the number of meals strictly ahead).
+    The count is answered from the leaderboard index without reading the table rows, but
+    it still steps over every index entry ahead of the meal, so it costs O(rank).
+
+    Args:
+        meal_id (int): The ID of the meal.
+        sort_by (str): The leaderboard key, wins, win_pct or rating.
+
+    Returns:
+        int: The 1-based rank of the meal.
+
+    Raises:
+        ValueError: If the sort_by is invalid, or the meal is not found, deleted or has no battles.
+        sqlite3.Error: If any database error occurs.
+    """
+    column = _leaderboard_column(sort_by)
 
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(query)
-            rows = cursor.fetchall()
-
-        leaderboard = []
-        for row in rows:
-            meal = {
-                'id': row[0],
-                'meal': row[1],
-                'cuisine': row[2],
-                'price': row[3],
-                'difficulty': row[4],
-                'battles': row[5],
-                'wins': row[6],
-                'win_pct': round(row[7] * 100, 1)  # Convert to percentage
-            }
-            leaderboard.append(meal)
-
-        logger.info("Leaderboard retrieved successfully")
-        return leaderboard
+            cursor.execute(f"SELECT {column}, battles, deleted FROM meals WHERE id = ?", (meal_id,))
+            row = cursor.fetchone()
+
+            if not row:
+                raise _missing_meal_error(cursor, meal_id)
+            if row[2]:
+                logger.info("Meal with ID %s has been deleted", meal_id)
+                raise ValueError(f"Meal with ID {meal_id} has been deleted")
+            if not row[1]:
+                logger.info("Meal with ID %s has no battles", meal_id)
+                raise ValueError(f"Meal with ID {meal_id} has no battles and is not on the leaderboard")
+
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM meals
+                WHERE deleted = FALSE AND battles > 0 AND {column} > ?
+            """, (row[0],))
+            rank = cursor.fetchone()[0] + 1
+
+            logger.info("Meal with ID %s is ranked %d by %s", meal_id, rank, sort_by)
+            return rank
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
 
+def _list_meals_query(cuisine: Optional[str] = None, difficulty: Optional[str] = None,
+                      min_price: Optional[float] = None, max_price: Optional[float] = None,
+                      min_battles: Optional[int] = None, sort: str = "id", cursor: Optional[str] = None,
+                      limit: int = DEFAULT_PAGE_SIZE) -> tuple[str, tuple]:
+    """
+    Builds the query for one page of list_meals.
+
+    Pages are keyset paginated: the cursor is the sort key and id of the last meal of the
+    previous page, and the next page starts right after it, so a page costs the same
+    however deep it is. Filters on cuisine and difficulty match an index in id order; the
+    price and battles indexes are used for ranges when the listing is sorted by that column.
+    One row more than the limit is fetched, to tell whether there is a next page.
+    """
+    if sort not in MEAL_LIST_SORTS:
+        raise ValueError(f"Invalid sort: {sort}. Must be one of {', '.join(MEAL_LIST_SORTS)}.")
+    if difficulty is not None and difficulty not in ("LOW", "MED", "HIGH"):
+        raise ValueError(f"Invalid difficulty level: {difficulty}. Must be 'LOW', 'MED', or 'HIGH'.")
+    if not isinstance(limit, int) or not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Invalid limit: {limit}. Must be between 1 and {MAX_PAGE_SIZE}.")
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise ValueError(f"Invalid price range: {min_price} to {max_price}.")
+
+    conditions = ["deleted = FALSE"]
+    params: list = []
+    for condition, value in (("cuisine = ?", cuisine), ("difficulty = ?", difficulty),
+                             ("price >= ?", min_price), ("price <= ?", max_price),
+                             ("battles >= ?", min_battles)):
+        if value is not None:
+            conditions.append(condition)
+            params.append(value)
+
+    if cursor is not None:
+        if sort == "id":
+            conditions.append("id > ?")
+            params.append(_parse_cursor(cursor, sort)[1])
+        else:
+            conditions.append(f"({sort}, id) > (?, ?)")
+            params.extend(_parse_cursor(cursor, sort))
+
+    order = "id" if sort == "id" else f"{sort}, id"
+    query = f"""
+        SELECT {', '.join(MEAL_LIST_COLUMNS)} FROM meals
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {order} LIMIT ?
+    """
+    params.append(limit + 1)
+    return query, tuple(params)
+
+def _parse_cursor(cursor: str, sort: str) -> tuple[Any, int]:
+    """Splits a list_meals or get_leaderboard_page cursor into the sort value and id of the last meal of a page."""
+    try:
+        if sort == "id":
+            return None, int(cursor)
+        value, meal_id = cursor.rsplit(",", 1)
+        return (float(value) if sort in ("price", "win_pct", "rating") else int(value)), int(meal_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def _make_cursor(row: tuple, sort: str) -> str:
+    """Returns the cursor of the page that follows the given row."""
+    if sort == "id":
+        return str(row[0])
+    return f"{row[MEAL_LIST_COLUMNS.index(sort)]!r},{row[0]}"
+
+def list_meals(cuisine: Optional[str] = None, difficulty: Optional[str] = None,
+               min_price: Optional[float] = None, max_price: Optional[float] = None,
+               min_battles: Optional[int] = None, sort: str = "id", cursor: Optional[str] = None,
+               limit: int = DEFAULT_PAGE_SIZE) -> dict[str, Any]:
+    """
+    Lists the meals that are not deleted and match every given filter, one page at a time.
+
+    Args:
+        cuisine (Optional[str]): Only meals of this cuisine.
+        difficulty (Optional[str]): Only meals of this difficulty ('LOW', 'MED' or 'HIGH').
+        min_price (Optional[float]): Only meals costing at least this much.
+        max_price (Optional[float]): Only meals costing at most this much.
+        min_battles (Optional[int]): Only meals with at least this many battles.
+        sort (str): The order of the listing: 'id', 'price' or 'battles' (ties broken by id).
+        cursor (Optional[str]): The next_cursor of the previous page, or None for the first page.
+        limit (int): The maximum number of meals per page, at most MAX_PAGE_SIZE.
+
+    Returns:
+        dict[str, Any]: The 'meals' of the page as dicts with their stats, and the
+        'next_cursor' to pass for the following page (None on the last page).
+
+    Raises:
+        ValueError: If a filter, the sort, the cursor or the limit is invalid.
+        sqlite3.Error: If any database error occurs.
+    """
+    query, params = _list_meals_query(cuisine, difficulty, min_price, max_price, min_battles, sort, cursor, limit)
+
+    try:
+        with get_db_connection() as conn:
+            db_cursor = conn.cursor()
+            db_cursor.execute(query, params)
+            rows = db_cursor.fetchall()
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    next_cursor = _make_cursor(rows[limit - 1], sort) if len(rows) > limit else None
+    logger.info("Listed %d meals", min(len(rows), limit))
+    return {
+        "meals": [dict(zip(MEAL_LIST_COLUMNS, row)) for row in rows[:limit]],
+        "next_cursor": next_cursor,
+    }
+
+# Meals matching an FTS5 expression, best match (lowest bm25 rank) first
+_SEARCH_MEALS_QUERY = f"""
+    SELECT {', '.join('meals.' + column for column in MEAL_LIST_COLUMNS)}
+    FROM meals_fts JOIN meals ON meals.id = meals_fts.rowid
+    WHERE meals_fts MATCH ? AND meals.deleted = FALSE
+    ORDER BY meals_fts.rank, meals.id LIMIT ?
+"""
+
+def _search_match(query: str) -> str:
+    """
+    Turns free text into an FTS5 match expression: every word, as a prefix, in any order.
+
+    Words are quoted, so FTS5 operators and punctuation in the text are never interpreted.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        raise ValueError("Search query must contain at least one letter or digit.")
+    return " ".join(f'"{word}"*' for word in words)
+
+def search_meals(query: str, limit: int = 20) -> List[dict[str, Any]]:
+    """
+    Searches the names of the meals that are not deleted, best match first.
+
+    Every word of the query must appear in the name, matched case-insensitively as the
+    start of a word ('spag bol' finds 'Spaghetti Bolognese').
+
+    Args:
+        query (str): The words to search for.
+        limit (int): The maximum number of meals returned, at most MAX_PAGE_SIZE.
+
+    Returns:
+        List[dict[str, Any]]: The matching meals with their stats.
+
+    Raises:
+        ValueError: If the query has no words or the limit is invalid.
+        sqlite3.Error: If any database error occurs.
+    """
+    if not isinstance(limit, int) or not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Invalid limit: {limit}. Must be between 1 and {MAX_PAGE_SIZE}.")
+    match = _search_match(query)
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SEARCH_MEALS_QUERY, (match, limit))
+            meals = [dict(zip(MEAL_LIST_COLUMNS, row)) for row in cursor.fetchall()]
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    logger.info("Search for %r matched %d meals", query, len(meals))
+    return meals
+
 def get_meal_by_id(meal_id: int) -> Meal:
     """
     Retrieves a meal from the catalog by its meal ID.
@@ -202,8 +749,7 @@ def get_meal_by_id(meal_id: int) -> Meal:
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
                 return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
             else:
-                logger.info("Meal with ID %s not found", meal_id)
-                raise ValueError(f"Meal with ID {meal_id} not found")
+                raise _missing_meal_error(cursor, meal_id)
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
@@ -236,13 +782,145 @@ def get_meal_by_name(meal_name: str) -> Meal:
                     raise ValueError(f"Meal with name {meal_name} has been deleted")
                 return Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4])
             else:
-                logger.info("Meal with name %s not found", meal_name)
-                raise ValueError(f"Meal with name {meal_name} not found")
+                raise _missing_meal_name_error(cursor, meal_name)
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def get_catalog_version() -> int:
+    """
+    Retrieves the catalog version stamp, which changes whenever a meal is added, removed or edited.
+
+    The stamp is read on the connection pool's dedicated version-check connection.
+
+    Returns:
+        int: The current version.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    try:
+        return read_stamp("SELECT version FROM catalog_meta WHERE id = 1")
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def _get_meal_cached(key: tuple, lookup: Callable[[], Meal]) -> Meal:
+    """
+    Serves a meal from meal_cache, looking it up and caching it under both keys on a miss.
+
+    The version stamp is read before the meal, so a meal read just before a change is
+    cached under the old stamp and dropped on the next lookup.
+    """
+    version = get_catalog_version()
+    meal_cache.sync(version)
+    meal = meal_cache.get(key)
+    if meal is None:
+        meal = lookup()
+        meal_cache.put(("id", meal.id), meal, version)
+        meal_cache.put(("name", meal.meal), meal, version)
+    return meal
+
+
+def get_meal_by_id_cached(meal_id: int) -> Meal:
+    """
+    Retrieves a meal by its ID through the meal cache.
+
+    The cache is checked against the catalog version on every call, so a meal deleted or
+    edited by another worker is never served. Misses (including errors) are not cached.
+    The returned Meal is shared with the cache and must not be modified.
+
+    Args:
+        meal_id (int): The ID of the meal to retrieve.
+
+    Returns:
+        Meal: The Meal object corresponding to the meal_id.
+
+    Raises:
+        ValueError: If the meal is not found or is marked as deleted.
+        sqlite3.Error: If any database error occurs.
+    """
+    return _get_meal_cached(("id", meal_id), lambda: get_meal_by_id(meal_id))
+
+
+def get_meal_by_name_cached(meal_name: str) -> Meal:
+    """
+    Retrieves a meal by its name through the meal cache.
+
+    The cache is checked against the catalog version on every call, so a meal deleted or
+    edited by another worker is never served. Misses (including errors) are not cached.
+    The returned Meal is shared with the cache and must not be modified.
+
+    Args:
+        meal_name (str): The name of the meal.
+
+    Returns:
+        Meal: The Meal object corresponding to the meal name.
+
+    Raises:
+        ValueError: If the meal name is not found or is marked as deleted.
+        sqlite3.Error: If any database error occurs.
+    """
+    return _get_meal_cached(("name", meal_name), lambda: get_meal_by_name(meal_name))
+
+
+def get_meal_cache_stats() -> dict:
+    """Returns the size and hit-rate metrics of the meal cache."""
+    return meal_cache.stats()
+
+
+def get_meals_by_names(meal_names: List[str]) -> List[Meal]:
+    """
+    Retrieves several meals from the catalog by name, in the order the names are given.
+
+    The names are looked up in batches of SQL_BATCH_SIZE with one query per batch.
+
+    Args:
+        meal_names (List[str]): The names of the meals.
+
+    Returns:
+        List[Meal]: The Meal objects, in the same order as meal_names.
+
+    Raises:
+        ValueError: If a meal name is not found or is marked as deleted.
+        sqlite3.Error: If any database error occurs.
+    """
+    rows_by_name = {}
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            unique_names = list(dict.fromkeys(meal_names))
+            for start in range(0, len(unique_names), SQL_BATCH_SIZE):
+                batch = unique_names[start:start + SQL_BATCH_SIZE]
+                cursor.execute(f"""
+                    SELECT id, meal, cuisine, price, difficulty, deleted FROM meals
+                    WHERE meal IN ({", ".join("?" * len(batch))})
+                """, batch)
+                rows_by_name.update((row[1], row) for row in cursor.fetchall())
+
+            missing_name = next((name for name in meal_names if name not in rows_by_name), None)
+            if missing_name is not None:
+                raise _missing_meal_name_error(cursor, missing_name)
 
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
 
+    meals = []
+    for meal_name in meal_names:
+        row = rows_by_name[meal_name]
+        if row[5]:
+            logger.info("Meal with name %s has been deleted", meal_name)
+            raise ValueError(f"Meal with name {meal_name} has been deleted")
+        meals.append(Meal(id=row[0], meal=row[1], cuisine=row[2], price=row[3], difficulty=row[4]))
+
+    logger.info("Retrieved %d meals by name", len(meals))
+    return meals
+
 
 def update_meal_stats(meal_id: int, result: str) -> None:
     """
@@ -266,8 +944,7 @@ def update_meal_stats(meal_id: int, result: str) -> None:
                     logger.info("Meal with ID %s has been deleted", meal_id)
                     raise ValueError(f"Meal with ID {meal_id} has been deleted")
             except TypeError:
-                logger.info("Meal with ID %s not found", meal_id)
-                raise ValueError(f"Meal with ID {meal_id} not found")
+                raise _missing_meal_error(cursor, meal_id)
 
             if result == 'win':
                 cursor.execute("UPDATE meals SET battles = battles + 1, wins = wins + 1 WHERE id = ?", (meal_id,))
@@ -281,3 +958,144 @@ def update_meal_stats(meal_id: int, result: str) -> None:
     except sqlite3.Error as e:
         logger.error("Database error: %s", str(e))
         raise e
+
+
+def record_battle_result(winner_id: int, loser_id: int) -> None:
+    """
+    Records the outcome of a battle: one win for the winner, one loss for the loser
+    and a battle_log entry, all in a single transaction.
+
+    Both meals are validated inside the transaction, so either every change is
+    committed or none is.
+
+    Args:
+        winner_id (int): The id of the winning meal.
+        loser_id (int): The id of the losing meal.
+
+    Raises:
+        ValueError: If the winner and loser are the same meal, or either meal is not found or is marked as deleted.
+        sqlite3.Error: If any database error occurs.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            # Take the write lock up front so the validation and the updates see the same rows
+            cursor.execute("BEGIN IMMEDIATE")
+            write_battle_result(cursor, winner_id, loser_id)
+            conn.commit()
+
+            logger.info("Battle result recorded: meal %s beat meal %s", winner_id, loser_id)
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+
+def _check_opponents(winner_id: int, loser_id: int) -> None:
+    """Rejects a battle of a meal against itself, which would count as both a win and a loss."""
+    if winner_id == loser_id:
+        logger.error("Meal with ID %s cannot battle itself", winner_id)
+        raise ValueError(f"Invalid battle: meal with ID {winner_id} cannot battle itself.")
+
+
+def write_battle_result(cursor: sqlite3.Cursor, winner_id: int, loser_id: int) -> None:
+    """
+    Validates both meals and writes a battle's stats, ratings and battle_log entry on an open transaction.
+
+    The caller owns the transaction; this lets other writes commit atomically with the result.
+
+    Args:
+        cursor (sqlite3.Cursor): A cursor inside a write transaction.
+        winner_id (int): The id of the winning meal.
+        loser_id (int): The id of the losing meal.
+
+    Raises:
+        ValueError: If the winner and loser are the same meal, or either meal is not found or is marked as deleted.
+    """
+    _check_opponents(winner_id, loser_id)
+    cursor.execute("SELECT id, deleted, rating FROM meals WHERE id IN (?, ?)", (winner_id, loser_id))
+    rows_by_id = {row[0]: row for row in cursor.fetchall()}
+
+    for meal_id in (winner_id, loser_id):
+        if meal_id not in rows_by_id:
+            raise _missing_meal_error(cursor, meal_id)
+        if rows_by_id[meal_id][1]:
+            logger.info("Meal with ID %s has been deleted", meal_id)
+            raise ValueError(f"Meal with ID {meal_id} has been deleted")
+
+    winner_rating, loser_rating = elo_update(rows_by_id[winner_id][2], rows_by_id[loser_id][2])
+    cursor.execute("UPDATE meals SET battles = battles + 1, wins = wins + 1, rating = ? WHERE id = ?",
+                   (winner_rating, winner_id))
+    cursor.execute("UPDATE meals SET battles = battles + 1, rating = ? WHERE id = ?", (loser_rating, loser_id))
+    cursor.execute("INSERT INTO battle_log (winner_id, loser_id) VALUES (?, ?)", (winner_id, loser_id))
+
+
+def record_battle_results(results: Iterable[tuple[int, int]]) -> int:
+    """
+    Records the outcomes of many battles in a single transaction.
+
+    The wins and battles of each meal are added up and its rating carried through its
+    battles in order first, so every meal is updated once however many battles it fought;
+    each battle still gets its battle_log entry.
+
+    Args:
+        results (Iterable[tuple[int, int]]): (winner_id, loser_id) pairs, one per battle.
+
+    Returns:
+        int: The number of battles recorded.
+
+    Raises:
+        ValueError: If a meal battles itself, or any meal is not found or is marked as deleted.
+        sqlite3.Error: If any database error occurs.
+    """
+    results = list(results)
+    if not results:
+        return 0
+
+    battles: dict[int, int] = {}
+    wins: dict[int, int] = {}
+    for winner_id, loser_id in results:
+        _check_opponents(winner_id, loser_id)
+        battles[winner_id] = battles.get(winner_id, 0) + 1
+        battles[loser_id] = battles.get(loser_id, 0) + 1
+        wins[winner_id] = wins.get(winner_id, 0) + 1
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+
+            meal_ids = list(battles)
+            deleted_by_id = {}
+            ratings = {}
+            for start in range(0, len(meal_ids), SQL_BATCH_SIZE):
+                batch = meal_ids[start:start + SQL_BATCH_SIZE]
+                cursor.execute(f"SELECT id, deleted, rating FROM meals WHERE id IN ({', '.join('?' * len(batch))})", batch)
+                for meal_id, deleted, rating in cursor.fetchall():
+                    deleted_by_id[meal_id] = deleted
+                    ratings[meal_id] = rating
+
+            for meal_id in meal_ids:
+                if meal_id not in deleted_by_id:
+                    raise _missing_meal_error(cursor, meal_id)
+                if deleted_by_id[meal_id]:
+                    logger.info("Meal with ID %s has been deleted", meal_id)
+                    raise ValueError(f"Meal with ID {meal_id} has been deleted")
+
+            # Ratings depend on the order of the battles, so they are applied one by one
+            for winner_id, loser_id in results:
+                ratings[winner_id], ratings[loser_id] = elo_update(ratings[winner_id], ratings[loser_id])
+
+            cursor.executemany(
+                "UPDATE meals SET battles = battles + ?, wins = wins + ?, rating = ? WHERE id = ?",
+                [(count, wins.get(meal_id, 0), ratings[meal_id], meal_id) for meal_id, count in battles.items()]
+            )
+            cursor.executemany("INSERT INTO battle_log (winner_id, loser_id) VALUES (?, ?)", results)
+            conn.commit()
+
+            logger.info("Recorded %d battle results for %d meals", len(results), len(meal_ids))
+            return len(results)
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
@@ -0,0 +1,173 @@
+import logging
+import os
+import sqlite3
+from typing import TYPE_CHECKING
+
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import get_db_connection
+
+
+# NumPy is only needed to replay battle_log, so the replay functions import it themselves:
+# kitchen_model imports elo_update for every battle, and must load without NumPy
+if TYPE_CHECKING:
+    import numpy as np
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+INITIAL_RATING = 1500.0
+# How far one battle can move a rating; 32 is the usual value for a young rating pool
+ELO_K = float(os.getenv("ELO_K", "32"))
+# Below this many battles per replay step on average, replaying one battle at a time is faster
+MIN_VECTOR_STEP = 16
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    """
+    Returns the probability the Elo model gives a meal of beating its opponent.
+
+    Args:
+        rating (float): The meal's rating.
+        opponent_rating (float): The opponent's rating.
+
+    Returns:
+        float: The expected score, between 0 and 1.
+    """
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def elo_update(winner_rating: float, loser_rating: float) -> tuple[float, float]:
+    """
+    Computes both meals' ratings after a battle.
+
+    The winner gains what the loser loses: K times the loser's expected score, so an upset
+    moves the ratings much more than an expected win.
+
+    Args:
+        winner_rating (float): The winner's rating before the battle.
+        loser_rating (float): The loser's rating before the battle.
+
+    Returns:
+        tuple[float, float]: The winner's and the loser's new ratings.
+    """
+    delta = ELO_K * (1 - expected_score(winner_rating, loser_rating))
+    return winner_rating + delta, loser_rating - delta
+
+
+def replay_steps(winners: "np.ndarray", losers: "np.ndarray", meal_count: int) -> "np.ndarray":
+    """
+    Assigns each battle to the earliest replay step after every earlier battle of both its meals.
+
+    Battles in the same step share no meal, so they can be rated all at once, and every
+    battle still sees both ratings exactly as a one-by-one replay would.
+
+    Args:
+        winners (np.ndarray): The winner of each battle, as an index into the ratings, in battle order.
+        losers (np.ndarray): The loser of each battle, in the same form.
+        meal_count (int): The number of meals.
+
+    Returns:
+        np.ndarray: The step of each battle, starting at 0.
+    """
+    import numpy as np
+
+    # Plain lists and no max() call: this loop is most of the cost of a replay
+    last_step = [-1] * meal_count
+    steps = []
+    for winner, loser in zip(winners.tolist(), losers.tolist()):
+        winner_step = last_step[winner]
+        loser_step = last_step[loser]
+        step = (winner_step if winner_step > loser_step else loser_step) + 1
+        last_step[winner] = last_step[loser] = step
+        steps.append(step)
+    return np.array(steps, dtype=np.int64)
+
+
+def replay_ratings(winners: "np.ndarray", losers: "np.ndarray", meal_count: int) -> "np.ndarray":
+    """
+    Replays a battle history from the initial ratings.
+
+    Battles are grouped into replay steps of battles with no meal in common, and each step
+    is rated in one NumPy operation. When the steps are too small for that to pay off (a
+    handful of meals battling each other over and over), the battles are rated one by one.
+    Both give the ratings a one-by-one replay of elo_update would.
+
+    Args:
+        winners (np.ndarray): The winner of each battle, as an index into the ratings, in battle order.
+        losers (np.ndarray): The loser of each battle, in the same form.
+        meal_count (int): The number of meals.
+
+    Returns:
+        np.ndarray: The rating of each meal.
+    """
+    import numpy as np
+
+    ratings = np.full(meal_count, INITIAL_RATING, dtype=np.float64)
+    if len(winners) == 0:
+        return ratings
+
+    steps = replay_steps(winners, losers, meal_count)
+    step_count = int(steps.max()) + 1
+    if len(winners) / step_count < MIN_VECTOR_STEP:
+        values = ratings.tolist()
+        for winner, loser in zip(winners.tolist(), losers.tolist()):
+            values[winner], values[loser] = elo_update(values[winner], values[loser])
+        return np.array(values, dtype=np.float64)
+
+    order = np.argsort(steps, kind="stable")
+    bounds = np.searchsorted(steps[order], np.arange(step_count + 1))
+    for step in range(step_count):
+        battles = order[bounds[step]:bounds[step + 1]]
+        step_winners = winners[battles]
+        step_losers = losers[battles]
+        winner_ratings = ratings[step_winners]
+        loser_ratings = ratings[step_losers]
+        delta = ELO_K * (1 - 1 / (1 + 10 ** ((loser_ratings - winner_ratings) / 400)))
+        ratings[step_winners] = winner_ratings + delta
+        ratings[step_losers] = loser_ratings - delta
+    return ratings
+
+
+def recompute_ratings() -> int:
+    """
+    Recomputes every meal's rating by replaying battle_log from the start.
+
+    The log is read and the ratings written in one write transaction, so no battle can be
+    recorded in between. Meals without battles are reset to INITIAL_RATING. The ratings of
+    meals archived by kitchen_model.compact_meals are left as they were archived.
+
+    Returns:
+        int: The number of battles replayed.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    import numpy as np
+
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            # Archived meals are replayed too: their battles moved the ratings of live meals
+            cursor.execute("SELECT id FROM meals UNION ALL SELECT id FROM meals_archive ORDER BY id")
+            meal_ids = np.array([row[0] for row in cursor.fetchall()], dtype=np.int64)
+            cursor.execute("SELECT winner_id, loser_id FROM battle_log ORDER BY id")
+            battles = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 2)
+
+            # Battle log ids to positions in the ratings array
+            winners = np.searchsorted(meal_ids, battles[:, 0])
+            losers = np.searchsorted(meal_ids, battles[:, 1])
+            ratings = replay_ratings(winners, losers, len(meal_ids))
+
+            cursor.executemany("UPDATE meals SET rating = ? WHERE id = ?",
+                               zip(ratings.tolist(), meal_ids.tolist()))
+            conn.commit()
+
+    except sqlite3.Error as e:
+        logger.error("Database error while recomputing ratings: %s", str(e))
+        raise e
+
+    logger.info("Recomputed the ratings of %d meals from %d battles", len(meal_ids), len(battles))
+    return len(battles)
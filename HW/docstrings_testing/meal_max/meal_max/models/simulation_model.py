@@ -0,0 +1,297 @@
+from dataclasses import dataclass
+import logging
+import sqlite3
+from typing import Any, List, Optional
+
+import numpy as np
+
+from meal_max.models.battle_model import DIFFICULTY_MODIFIER
+from meal_max.models.kitchen_model import Meal
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.sql_utils import get_db_connection
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# random.org is asked for two decimal places, so a battle's random number is one of 0.00 .. 0.99
+RANDOM_THRESHOLDS = np.arange(100) / 100
+# Battles are simulated in chunks of this size to bound the memory of the random arrays
+SIMULATION_CHUNK_SIZE = 1_000_000
+MAX_SIMULATED_BATTLES = 50_000_000
+# Rows of the pairwise probability matrix computed at a time by combatant_1_win_pct
+PAIRWISE_CHUNK_ROWS = 1024
+
+
+@dataclass
+class MealScores:
+    """
+    The battle scores of a set of meals, held as NumPy arrays.
+
+    Attributes:
+        ids (np.ndarray): The meal ids.
+        meals (List[str]): The meal names, in the same order.
+        scores (np.ndarray): The battle scores, in the same order.
+    """
+    ids: np.ndarray
+    meals: List[str]
+    scores: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.meals)
+
+
+def score_arrays(prices: np.ndarray, cuisine_lengths: np.ndarray, difficulties: List[str]) -> np.ndarray:
+    """
+    Computes battle scores for many meals at once.
+
+    Gives the same result as BattleModel.get_battle_score for each meal.
+
+    Args:
+        prices (np.ndarray): The meal prices.
+        cuisine_lengths (np.ndarray): The lengths of the cuisine names.
+        difficulties (List[str]): The difficulty levels ('LOW', 'MED' or 'HIGH').
+
+    Returns:
+        np.ndarray: The battle scores as float64.
+
+    Raises:
+        ValueError: If a difficulty level is invalid.
+    """
+    try:
+        modifiers = np.fromiter((DIFFICULTY_MODIFIER[difficulty] for difficulty in difficulties),
+                                dtype=np.float64, count=len(difficulties))
+    except KeyError as e:
+        raise ValueError(f"Invalid difficulty level: {e.args[0]}. Must be 'LOW', 'MED', or 'HIGH'.")
+    return np.asarray(prices, dtype=np.float64) * np.asarray(cuisine_lengths, dtype=np.float64) - modifiers
+
+
+def score_meals(meals: List[Meal]) -> MealScores:
+    """
+    Scores a list of Meal objects in one pass.
+
+    Args:
+        meals (List[Meal]): The meals to score.
+
+    Returns:
+        MealScores: The ids, names and battle scores of the meals.
+    """
+    return MealScores(
+        ids=np.array([meal.id for meal in meals], dtype=np.int64),
+        meals=[meal.meal for meal in meals],
+        scores=score_arrays(np.array([meal.price for meal in meals], dtype=np.float64),
+                            np.array([len(meal.cuisine) for meal in meals], dtype=np.int64),
+                            [meal.difficulty for meal in meals]),
+    )
+
+
+def load_meal_scores() -> MealScores:
+    """
+    Scores every meal in the catalog that is not deleted, with a single query.
+
+    Returns:
+        MealScores: The ids, names and battle scores of the meals, ordered by id.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, meal, price, LENGTH(cuisine), difficulty FROM meals
+                WHERE deleted = FALSE ORDER BY id
+            """)
+            rows = cursor.fetchall()
+
+    except sqlite3.Error as e:
+        logger.error("Database error: %s", str(e))
+        raise e
+
+    if not rows:
+        return MealScores(ids=np.empty(0, dtype=np.int64), meals=[], scores=np.empty(0, dtype=np.float64))
+
+    ids, meals, prices, cuisine_lengths, difficulties = zip(*rows)
+    meal_scores = MealScores(
+        ids=np.array(ids, dtype=np.int64),
+        meals=list(meals),
+        scores=score_arrays(np.array(prices, dtype=np.float64), np.array(cuisine_lengths, dtype=np.int64), difficulties),
+    )
+    logger.info("Scored %d meals", len(meal_scores))
+    return meal_scores
+
+
+def win_probability(score_1: Any, score_2: Any) -> Any:
+    """
+    Computes the exact probability that combatant 1 wins a battle.
+
+    Combatant 1 wins when abs(score_1 - score_2) / 100 is greater than the random number,
+    which is one of the 100 values 0.00 .. 0.99. The probability is the fraction of
+    those values below the delta. Works elementwise on arrays.
+
+    Args:
+        score_1 (float or np.ndarray): The battle score(s) of combatant 1.
+        score_2 (float or np.ndarray): The battle score(s) of combatant 2.
+
+    Returns:
+        float or np.ndarray: The probability that combatant 1 wins.
+    """
+    delta = np.abs(np.asarray(score_1, dtype=np.float64) - np.asarray(score_2, dtype=np.float64)) / 100
+    probability = np.searchsorted(RANDOM_THRESHOLDS, delta, side="left") / len(RANDOM_THRESHOLDS)
+    return float(probability) if np.ndim(probability) == 0 else probability
+
+
+def _random_numbers(rng: np.random.Generator, size: int) -> np.ndarray:
+    """Draws random numbers distributed like the ones fetched from random.org."""
+    return rng.integers(0, len(RANDOM_THRESHOLDS), size=size) / 100
+
+
+def simulate_pair(score_1: float, score_2: float, simulations: int,
+                  seed: Optional[int] = None) -> float:
+    """
+    Estimates the probability that combatant 1 wins by simulating many battles.
+
+    Args:
+        score_1 (float): The battle score of combatant 1.
+        score_2 (float): The battle score of combatant 2.
+        simulations (int): The number of battles to simulate.
+        seed (Optional[int]): A seed for the random number generator, for repeatable results.
+
+    Returns:
+        float: The fraction of simulated battles combatant 1 won.
+
+    Raises:
+        ValueError: If the number of simulations is not between 1 and MAX_SIMULATED_BATTLES.
+    """
+    _check_battle_count(simulations)
+    rng = np.random.default_rng(seed)
+    delta = abs(score_1 - score_2) / 100
+
+    wins = 0
+    for start in range(0, simulations, SIMULATION_CHUNK_SIZE):
+        size = min(SIMULATION_CHUNK_SIZE, simulations - start)
+        wins += int(np.count_nonzero(delta > _random_numbers(rng, size)))
+    return wins / simulations
+
+
+def simulate_battles(meal_scores: MealScores, battles: int, seed: Optional[int] = None) -> dict[str, np.ndarray]:
+    """
+    Simulates battles between randomly drawn pairs of meals.
+
+    Each battle picks two different meals uniformly at random; the first one drawn is
+    combatant 1. Nothing is written to the database.
+
+    Args:
+        meal_scores (MealScores): The meals taking part.
+        battles (int): The number of battles to simulate.
+        seed (Optional[int]): A seed for the random number generator, for repeatable results.
+
+    Returns:
+        dict[str, np.ndarray]: The simulated 'battles' and 'wins' of each meal.
+
+    Raises:
+        ValueError: If fewer than two meals are given, or the number of battles is not
+            between 1 and MAX_SIMULATED_BATTLES.
+    """
+    n = len(meal_scores)
+    if n < 2:
+        raise ValueError("At least two meals are needed to simulate battles.")
+    _check_battle_count(battles)
+
+    rng = np.random.default_rng(seed)
+    scores = meal_scores.scores
+    battle_counts = np.zeros(n, dtype=np.int64)
+    win_counts = np.zeros(n, dtype=np.int64)
+
+    for start in range(0, battles, SIMULATION_CHUNK_SIZE):
+        size = min(SIMULATION_CHUNK_SIZE, battles - start)
+        first = rng.integers(0, n, size=size)
+        # Draw from the other n - 1 meals so nobody battles themselves
+        second = rng.integers(0, n - 1, size=size)
+        second += second >= first
+
+        first_wins = np.abs(scores[first] - scores[second]) / 100 > _random_numbers(rng, size)
+        winners = np.where(first_wins, first, second)
+
+        battle_counts += np.bincount(first, minlength=n) + np.bincount(second, minlength=n)
+        win_counts += np.bincount(winners, minlength=n)
+
+    return {"battles": battle_counts, "wins": win_counts}
+
+
+def combatant_1_win_pct(meal_scores: MealScores) -> np.ndarray:
+    """
+    Computes each meal's exact win rate as combatant 1 against a uniformly drawn opponent.
+
+    The battle rule only looks at the gap between the scores, and combatant 1 takes the
+    win with that probability. A meal whose score sits far from the others therefore does
+    well when prepped first and badly when prepped second. With the order drawn at random
+    every meal's overall expectation is 50%, so this is the figure that tells meals apart.
+    The pairwise matrix is built PAIRWISE_CHUNK_ROWS rows at a time.
+
+    Args:
+        meal_scores (MealScores): The meals taking part.
+
+    Returns:
+        np.ndarray: The win rate of each meal as combatant 1, between 0 and 1.
+    """
+    n = len(meal_scores)
+    if n < 2:
+        return np.zeros(n, dtype=np.float64)
+
+    scores = meal_scores.scores
+    win_pct = np.empty(n, dtype=np.float64)
+    for start in range(0, n, PAIRWISE_CHUNK_ROWS):
+        rows = slice(start, min(start + PAIRWISE_CHUNK_ROWS, n))
+        # The diagonal (a meal against itself) has a delta of 0 and so adds nothing
+        win_pct[rows] = win_probability(scores[rows, None], scores[None, :]).sum(axis=1) / (n - 1)
+    return win_pct
+
+
+def simulate_leaderboard(battles: int, seed: Optional[int] = None) -> list[dict[str, Any]]:
+    """
+    Builds the leaderboard the catalog would have after a number of random battles.
+
+    The stored stats are not read or changed.
+
+    Args:
+        battles (int): The number of battles to simulate.
+        seed (Optional[int]): A seed for the random number generator, for repeatable results.
+
+    Returns:
+        list[dict[str, Any]]: One row per meal, sorted by simulated wins, with the simulated
+        battles, wins and win_pct and the exact combatant_1_win_pct (both as percentages).
+
+    Raises:
+        ValueError: If the catalog has fewer than two meals or the number of battles is invalid.
+        sqlite3.Error: If any database error occurs.
+    """
+    meal_scores = load_meal_scores()
+    results = simulate_battles(meal_scores, battles, seed)
+    as_combatant_1 = combatant_1_win_pct(meal_scores)
+
+    win_pct = np.divide(results["wins"], results["battles"],
+                        out=np.zeros(len(meal_scores), dtype=np.float64), where=results["battles"] > 0)
+    order = np.lexsort((meal_scores.ids, -results["wins"]))
+
+    leaderboard = [
+        {
+            "id": int(meal_scores.ids[i]),
+            "meal": meal_scores.meals[i],
+            "score": round(float(meal_scores.scores[i]), 3),
+            "battles": int(results["battles"][i]),
+            "wins": int(results["wins"][i]),
+            "win_pct": round(float(win_pct[i]) * 100, 1),
+            "combatant_1_win_pct": round(float(as_combatant_1[i]) * 100, 1),
+        }
+        for i in order
+    ]
+    logger.info("Simulated %d battles between %d meals", battles, len(meal_scores))
+    return leaderboard
+
+
+def _check_battle_count(battles: int) -> None:
+    if not isinstance(battles, int) or not 0 < battles <= MAX_SIMULATED_BATTLES:
+        logger.error("Invalid number of battles to simulate: %s", battles)
+        raise ValueError(f"Invalid number of battles: {battles}. Must be between 1 and {MAX_SIMULATED_BATTLES}.")
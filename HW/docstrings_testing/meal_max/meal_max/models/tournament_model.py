@@ -0,0 +1,203 @@
+import logging
+from typing import Any, List, Optional
+
+from meal_max.models.battle_model import compute_battle_score
+from meal_max.models.kitchen_model import Meal, get_meals_by_names, record_battle_results
+from meal_max.utils.logger import configure_logger
+from meal_max.utils.random_utils import RandomProvider, get_random_provider
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+TOURNAMENT_FORMATS = ("single_elimination", "round_robin")
+
+
+def combatant_1_wins(score_1: float, score_2: float, random_number: float) -> bool:
+    """
+    Decides a battle the same way BattleModel.battle does.
+
+    Args:
+        score_1 (float): The battle score of the first combatant.
+        score_2 (float): The battle score of the second combatant.
+        random_number (float): A random number between 0 and 1.
+
+    Returns:
+        bool: True if the first combatant wins, False if the second one does.
+    """
+    return abs(score_1 - score_2) / 100 > random_number
+
+
+class TournamentModel:
+    """
+    A class to run tournaments between many meals in one go.
+
+    All the battles of a tournament are decided in-process. The random numbers for
+    every battle are fetched in one batch up front, and the results are written in
+    one transaction at the end, so a failed tournament leaves the stats untouched.
+
+    Attributes:
+        random_provider (Optional[RandomProvider]): The source of the battles' random numbers;
+            the process-wide provider from random_utils is used if None.
+    """
+
+    def __init__(self, random_provider: Optional[RandomProvider] = None):
+        """
+        Initializes the TournamentModel.
+
+        Args:
+            random_provider (Optional[RandomProvider]): The source of random numbers, if not the process-wide one.
+        """
+        self.random_provider = random_provider
+
+    def run(self, meal_names: List[str], tournament_format: str = "single_elimination") -> dict[str, Any]:
+        """
+        Runs a tournament between the named meals and records every battle.
+
+        Meals are seeded in the order their names are given.
+
+        Args:
+            meal_names (List[str]): The names of the meals taking part, best seed first.
+            tournament_format (str): 'single_elimination' or 'round_robin'.
+
+        Returns:
+            dict[str, Any]: The format, the champion, the number of battles, the standings and,
+            for single elimination, the bracket round by round. Round-robin results are not
+            listed match by match since there are n * (n - 1) / 2 of them; they are in battle_log.
+
+        Raises:
+            ValueError: If the format is invalid, fewer than two or duplicate meals are given,
+                or a meal is not found or is marked as deleted.
+            RuntimeError: If the random numbers cannot be fetched.
+            sqlite3.Error: If any database error occurs.
+        """
+        if tournament_format not in TOURNAMENT_FORMATS:
+            logger.error("Invalid tournament format: %s", tournament_format)
+            raise ValueError(f"Invalid tournament format: {tournament_format}. Must be one of {', '.join(TOURNAMENT_FORMATS)}.")
+        if len(meal_names) < 2:
+            logger.error("Not enough meals for a tournament: %d", len(meal_names))
+            raise ValueError("A tournament needs at least two meals.")
+        if len(set(meal_names)) != len(meal_names):
+            logger.error("Duplicate meals in tournament")
+            raise ValueError("Each meal can only enter a tournament once.")
+
+        logger.info("Starting %s tournament with %d meals", tournament_format, len(meal_names))
+        meals = get_meals_by_names(meal_names)
+        scores = [compute_battle_score(meal) for meal in meals]
+
+        if tournament_format == "single_elimination":
+            battle_count = len(meals) - 1
+        else:
+            battle_count = len(meals) * (len(meals) - 1) // 2
+        provider = self.random_provider if self.random_provider is not None else get_random_provider()
+        random_numbers = provider.get_random_batch(battle_count)
+        if len(random_numbers) != battle_count:
+            raise RuntimeError(f"Expected {battle_count} random numbers, got {len(random_numbers)}")
+
+        if tournament_format == "single_elimination":
+            results, rounds = self._single_elimination(meals, scores, random_numbers)
+        else:
+            results, rounds = self._round_robin(scores, random_numbers), None
+
+        record_battle_results((meals[winner].id, meals[loser].id) for winner, loser in results)
+
+        standings = self._standings(meals, results)
+        tournament = {
+            "format": tournament_format,
+            "champion": standings[0]["meal"],
+            "battles": len(results),
+            "standings": standings,
+        }
+        if rounds is not None:
+            tournament["rounds"] = rounds
+
+        logger.info("Tournament complete after %d battles, the champion is: %s", len(results), tournament["champion"])
+        return tournament
+
+    def _single_elimination(self, meals: List[Meal], scores: List[float],
+                            random_numbers: List[float]) -> tuple[list[tuple[int, int]], list[dict]]:
+        """
+        Plays a single-elimination bracket.
+
+        When the field is not a power of two, the top seeds get a bye in the first round.
+        Every round pairs the best remaining seed with the worst one, so the first seed
+        meets the last in round one and the two top seeds can only meet in the final.
+
+        Returns:
+            The (winner, loser) index pairs of every battle, and the bracket round by round.
+        """
+        field = list(range(len(meals)))
+        byes = (1 << (len(field) - 1).bit_length()) - len(field)
+        random_iter = iter(random_numbers)
+        results = []
+        rounds = []
+
+        while len(field) > 1:
+            advancing, playing = field[:byes], field[byes:]
+            matches = []
+            winners = []
+            for i in range(len(playing) // 2):
+                seed_1, seed_2 = playing[i], playing[-1 - i]
+                if combatant_1_wins(scores[seed_1], scores[seed_2], next(random_iter)):
+                    winner, loser = seed_1, seed_2
+                else:
+                    winner, loser = seed_2, seed_1
+                results.append((winner, loser))
+                winners.append(winner)
+                matches.append({"meal_1": meals[seed_1].meal, "meal_2": meals[seed_2].meal, "winner": meals[winner].meal})
+
+            rounds.append({
+                "round": len(rounds) + 1,
+                "byes": [meals[seed].meal for seed in advancing],
+                "matches": matches,
+            })
+            field = sorted(advancing + winners)
+            byes = 0
+
+        return results, rounds
+
+    def _round_robin(self, scores: List[float], random_numbers: List[float]) -> list[tuple[int, int]]:
+        """
+        Plays every meal against every other meal once, the better seed as combatant 1.
+
+        Returns:
+            The (winner, loser) index pairs of every battle.
+        """
+        random_iter = iter(random_numbers)
+        results = []
+        for i, score_1 in enumerate(scores):
+            for j in range(i + 1, len(scores)):
+                # combatant_1_wins, inlined since this runs n * (n - 1) / 2 times
+                if abs(score_1 - scores[j]) / 100 > next(random_iter):
+                    results.append((i, j))
+                else:
+                    results.append((j, i))
+        return results
+
+    def _standings(self, meals: List[Meal], results: list[tuple[int, int]]) -> list[dict[str, Any]]:
+        """
+        Ranks the meals by tournament wins, then seed. Meals with as many wins share a rank.
+        """
+        wins = [0] * len(meals)
+        losses = [0] * len(meals)
+        for winner, loser in results:
+            wins[winner] += 1
+            losses[loser] += 1
+
+        order = sorted(range(len(meals)), key=lambda seed: (-wins[seed], seed))
+        standings = []
+        for position, seed in enumerate(order):
+            if position and wins[seed] == wins[order[position - 1]]:
+                rank = standings[-1]["rank"]
+            else:
+                rank = position + 1
+            standings.append({
+                "rank": rank,
+                "id": meals[seed].id,
+                "meal": meals[seed].meal,
+                "seed": seed + 1,
+                "wins": wins[seed],
+                "losses": losses[seed],
+            })
+        return standings
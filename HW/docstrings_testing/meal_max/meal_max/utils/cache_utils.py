@@ -0,0 +1,113 @@
+from collections import OrderedDict
+import logging
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+from meal_max.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe LRU cache whose entries expire after a TTL and belong to a stamp.
+
+    The stamp is a version of the data the entries were read from (e.g. a counter kept in
+    the database). sync() drops every entry when the stamp changes, and put() refuses
+    values read under an older stamp, so a value read before a change can never be
+    served after it.
+
+    Attributes:
+        max_entries (int): The maximum number of entries kept.
+        ttl (float): How many seconds an entry is served for; 0 or less means forever.
+        stamp (Any): The stamp of the current entries, None until the first sync.
+    """
+
+    def __init__(self, max_entries: int, ttl: float = 0):
+        """
+        Initializes an empty LRUCache.
+
+        Args:
+            max_entries (int): The maximum number of entries kept; 0 disables the cache.
+            ttl (float): How many seconds an entry is served for; 0 or less means forever.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stamp: Any = None
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def sync(self, stamp: Any) -> None:
+        """Drops every entry if the stamp differs from the one they were read under."""
+        with self._lock:
+            if stamp != self.stamp:
+                if self._entries:
+                    self._invalidations += 1
+                    logger.info("Cache stamp changed from %s to %s, dropping %d entries", self.stamp, stamp, len(self._entries))
+                self._entries.clear()
+                self.stamp = stamp
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the value cached for key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, stamp: Any) -> None:
+        """
+        Caches a value read under the given stamp, evicting the least recently used entry if full.
+
+        The value is not cached if the stamp is not the current one.
+        """
+        if self.max_entries <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl > 0 else float("inf")
+        with self._lock:
+            if stamp != self.stamp:
+                return
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Removes every entry, keeping the counters."""
+        with self._lock:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the size, stamp and hit, miss, eviction, expiry and invalidation counters."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "stamp": self.stamp,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
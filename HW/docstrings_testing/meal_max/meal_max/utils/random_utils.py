@@ -1,4 +1,13 @@
+from abc import ABC, abstractmethod
+from collections import deque
 import logging
+import os
+import random
+import secrets
+import threading
+import time
+from typing import Callable, List, Optional
+
 import requests
 
 from meal_max.utils.logger import configure_logger
@@ -7,6 +16,21 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# random.org serves at most this many decimal fractions per request
+RANDOM_ORG_MAX_BATCH = 10000
+
+# Provider settings. RANDOM_PROVIDER is 'random.org' (prefetched, with local failover) or 'local'.
+# The random.org pool fetches RANDOM_BATCH_SIZE fractions at a time and refills in the background
+# once RANDOM_LOW_WATER or fewer are left; a battle waits at most RANDOM_WAIT_TIMEOUT seconds
+# for a refill before using the local generator, and failed refills are retried after
+# RANDOM_RETRY_AFTER seconds.
+RANDOM_PROVIDER = os.getenv("RANDOM_PROVIDER", "random.org")
+RANDOM_BATCH_SIZE = int(os.getenv("RANDOM_BATCH_SIZE", "500"))
+RANDOM_LOW_WATER = int(os.getenv("RANDOM_LOW_WATER", "100"))
+RANDOM_WAIT_TIMEOUT = float(os.getenv("RANDOM_WAIT_TIMEOUT", "0.25"))
+RANDOM_RETRY_AFTER = float(os.getenv("RANDOM_RETRY_AFTER", "30"))
+
+
 def get_random() -> float:
     """
     Fetches a random dec from random.org.
@@ -46,3 +70,317 @@ def get_random() -> float:
     except requests.exceptions.RequestException as e:
         logger.error("Request to random.org failed: %s", e)
         raise RuntimeError("Request to random.org failed: %s" % e)
+
+
+def get_random_batch(count: int) -> List[float]:
+    """
+    Fetches many random decimals from random.org in as few requests as possible.
+
+    Each request asks for up to RANDOM_ORG_MAX_BATCH numbers, so a whole tournament
+    costs one round trip per ten thousand battles instead of one per battle.
+
+    Args:
+        count (int): The number of random numbers to fetch.
+
+    Returns:
+        List[float]: The random numbers fetched from random.org.
+
+    Raises:
+        RuntimeError: If a request to random.org fails or returns too few numbers.
+        ValueError: If the count is negative or the response contains something that is not a float.
+    """
+    if count < 0:
+        raise ValueError(f"Invalid count: {count}. Must be a non-negative integer.")
+
+    numbers: List[float] = []
+    while len(numbers) < count:
+        num = min(RANDOM_ORG_MAX_BATCH, count - len(numbers))
+        url = f"https://www.random.org/decimal-fractions/?num={num}&dec=2&col=1&format=plain&rnd=new"
+
+        try:
+            logger.info("Fetching %d random numbers from %s", num, url)
+
+            response = requests.get(url, timeout=5)
+            response.raise_for_status()
+
+        except requests.exceptions.Timeout:
+            logger.error("Request to random.org timed out.")
+            raise RuntimeError("Request to random.org timed out.")
+
+        except requests.exceptions.RequestException as e:
+            logger.error("Request to random.org failed: %s", e)
+            raise RuntimeError("Request to random.org failed: %s" % e)
+
+        lines = response.text.split()
+        if len(lines) != num:
+            raise RuntimeError(f"Expected {num} numbers from random.org, got {len(lines)}")
+        try:
+            numbers.extend(float(line) for line in lines)
+        except ValueError:
+            raise ValueError("Invalid response from random.org: %s" % response.text.strip()[:100])
+
+    logger.info("Received %d random numbers", len(numbers))
+    return numbers
+
+
+class RandomProvider(ABC):
+    """
+    A source of random two-decimal fractions between 0.00 and 0.99 for battles.
+
+    Subclasses implement _draw; get_random and get_random_batch count what they serve.
+
+    Attributes:
+        name (str): A short name for the source, used in logs and stats.
+    """
+    name = "base"
+
+    def __init__(self):
+        self._served = 0
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _draw(self, count: int) -> List[float]:
+        """Returns count random fractions, without counting them."""
+
+    def get_random(self) -> float:
+        """Returns one random fraction."""
+        return self.get_random_batch(1)[0]
+
+    def get_random_batch(self, count: int) -> List[float]:
+        """
+        Returns several random fractions.
+
+        Args:
+            count (int): The number of fractions wanted.
+
+        Returns:
+            List[float]: The random fractions.
+
+        Raises:
+            ValueError: If the count is negative.
+        """
+        if count < 0:
+            raise ValueError(f"Invalid count: {count}. Must be a non-negative integer.")
+        numbers = self._draw(count)
+        with self._lock:
+            self._served += len(numbers)
+        return numbers
+
+    def stats(self) -> dict:
+        """Returns the name of the provider and how many numbers it has served."""
+        with self._lock:
+            return {"provider": self.name, "served": self._served}
+
+
+class LocalRandomProvider(RandomProvider):
+    """
+    Draws fractions from the operating system's CSPRNG, with no network access.
+
+    The fractions have the same two-decimal distribution as the ones from random.org.
+    """
+    name = "local"
+
+    def _draw(self, count: int) -> List[float]:
+        return [secrets.randbelow(100) / 100 for _ in range(count)]
+
+
+class SeededRandomProvider(RandomProvider):
+    """
+    Draws a repeatable sequence of fractions from a seeded generator, for tests.
+
+    Attributes:
+        seed (int): The seed of the sequence.
+    """
+    name = "seeded"
+
+    def __init__(self, seed: int = 0):
+        """
+        Initializes the provider at the start of the sequence for the given seed.
+
+        Args:
+            seed (int): The seed of the sequence.
+        """
+        super().__init__()
+        self.seed = seed
+        self._random = random.Random(seed)
+
+    def _draw(self, count: int) -> List[float]:
+        with self._lock:
+            return [self._random.randrange(100) / 100 for _ in range(count)]
+
+
+class RandomOrgProvider(RandomProvider):
+    """
+    Serves fractions from random.org out of a prefetched pool.
+
+    The pool is filled with one request of batch_size numbers and refilled by a background
+    thread whenever low_water or fewer are left, so a battle normally takes its number
+    without a network round trip. If the pool is empty and no refill lands within
+    wait_timeout seconds, or random.org is failing, numbers come from the fallback provider
+    until a refill succeeds.
+
+    Attributes:
+        batch_size (int): The number of fractions fetched per refill.
+        low_water (int): The pool size at or below which a refill starts.
+        wait_timeout (float): How long a caller waits on an empty pool before failing over.
+        retry_after (float): How long to wait after a failed refill before trying again.
+        fallback (RandomProvider): The provider used while random.org is unavailable.
+    """
+    name = "random.org"
+
+    def __init__(self, batch_size: int = RANDOM_BATCH_SIZE, low_water: int = RANDOM_LOW_WATER,
+                 wait_timeout: float = RANDOM_WAIT_TIMEOUT, retry_after: float = RANDOM_RETRY_AFTER,
+                 fallback: Optional[RandomProvider] = None,
+                 fetch: Optional[Callable[[int], List[float]]] = None, prefetch: bool = True):
+        """
+        Initializes the provider and, unless prefetch is False, starts filling the pool.
+
+        Args:
+            batch_size (int): The number of fractions fetched per refill, at most RANDOM_ORG_MAX_BATCH.
+            low_water (int): The pool size at or below which a refill starts.
+            wait_timeout (float): How long a caller waits on an empty pool before failing over.
+            retry_after (float): How long to wait after a failed refill before trying again.
+            fallback (Optional[RandomProvider]): The failover provider. Defaults to a LocalRandomProvider.
+            fetch (Optional[Callable[[int], List[float]]]): The function fetching a batch. Defaults to get_random_batch.
+            prefetch (bool): Whether to start the first refill right away.
+        """
+        super().__init__()
+        if not 0 < batch_size <= RANDOM_ORG_MAX_BATCH:
+            raise ValueError(f"Invalid batch size: {batch_size}. Must be between 1 and {RANDOM_ORG_MAX_BATCH}.")
+        self.batch_size = batch_size
+        self.low_water = low_water
+        self.wait_timeout = wait_timeout
+        self.retry_after = retry_after
+        self.fallback = fallback if fallback is not None else LocalRandomProvider()
+        self.pid = os.getpid()
+        self._fetch = fetch if fetch is not None else get_random_batch
+        self._pool: deque = deque()
+        self._cond = threading.Condition(self._lock)
+        self._refilling = False
+        self._retry_at = 0.0
+        self._fallback_served = 0
+        self._failovers = 0
+        self._refills = 0
+        self._refill_failures = 0
+        self._last_refill_ms: Optional[float] = None
+
+        if prefetch:
+            with self._cond:
+                self._start_refill()
+
+    def _start_refill(self) -> None:
+        """Starts a background refill if the pool is low and none is running. Call with the lock held."""
+        if self._refilling or len(self._pool) > self.low_water or time.monotonic() < self._retry_at:
+            return
+        self._refilling = True
+        threading.Thread(target=self._refill, name="random-org-refill", daemon=True).start()
+
+    def _refill(self) -> None:
+        start = time.perf_counter()
+        try:
+            numbers = self._fetch(self.batch_size)
+        except (RuntimeError, ValueError) as e:
+            logger.error("Refilling the random.org pool failed, using the %s provider: %s", self.fallback.name, e)
+            with self._cond:
+                self._refill_failures += 1
+                self._retry_at = time.monotonic() + self.retry_after
+                self._refilling = False
+                self._cond.notify_all()
+            return
+
+        with self._cond:
+            self._pool.extend(numbers)
+            self._refills += 1
+            self._last_refill_ms = round((time.perf_counter() - start) * 1000, 1)
+            self._refilling = False
+            self._cond.notify_all()
+        logger.info("Refilled the random.org pool with %d numbers in %.1f ms", len(numbers), self._last_refill_ms)
+
+    def _draw(self, count: int) -> List[float]:
+        with self._cond:
+            if len(self._pool) < count:
+                self._start_refill()
+                # Waiting only helps if one refill can cover the request
+                if self._refilling and count <= self.batch_size:
+                    self._cond.wait_for(lambda: len(self._pool) >= count or not self._refilling, self.wait_timeout)
+            numbers = [self._pool.popleft() for _ in range(min(count, len(self._pool)))]
+            self._start_refill()
+
+        missing = count - len(numbers)
+        if missing:
+            # Large batches (tournaments) are fetched directly rather than through the pool
+            if missing > self.batch_size and time.monotonic() >= self._retry_at:
+                try:
+                    numbers += self._fetch(missing)
+                    missing = 0
+                except (RuntimeError, ValueError) as e:
+                    logger.error("Fetching %d numbers from random.org failed: %s", missing, e)
+                    with self._cond:
+                        self._refill_failures += 1
+                        self._retry_at = time.monotonic() + self.retry_after
+
+        if missing:
+            logger.warning("random.org pool is empty, drawing %d numbers from the %s provider", missing, self.fallback.name)
+            numbers += self.fallback.get_random_batch(missing)
+            with self._cond:
+                self._failovers += 1
+                self._fallback_served += missing
+        return numbers
+
+    def stats(self) -> dict:
+        """Returns the pool size and the refill, failover and served counters."""
+        with self._cond:
+            return {
+                "provider": self.name,
+                "served": self._served,
+                "served_by_fallback": self._fallback_served,
+                "pooled": len(self._pool),
+                "batch_size": self.batch_size,
+                "low_water": self.low_water,
+                "refilling": self._refilling,
+                "refills": self._refills,
+                "refill_failures": self._refill_failures,
+                "failovers": self._failovers,
+                "last_refill_ms": self._last_refill_ms,
+                "fallback": self.fallback.name,
+            }
+
+
+_provider: Optional[RandomProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_random_provider() -> RandomProvider:
+    """
+    Returns the process-wide random provider, creating it from RANDOM_PROVIDER on first use.
+
+    A random.org provider is rebuilt after a fork, since its refill thread does not survive it.
+
+    Returns:
+        RandomProvider: The provider battles draw their random numbers from.
+
+    Raises:
+        ValueError: If RANDOM_PROVIDER names an unknown provider.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None or getattr(_provider, "pid", os.getpid()) != os.getpid():
+            if RANDOM_PROVIDER == "random.org":
+                _provider = RandomOrgProvider()
+            elif RANDOM_PROVIDER == "local":
+                _provider = LocalRandomProvider()
+            else:
+                raise ValueError(f"Invalid RANDOM_PROVIDER: {RANDOM_PROVIDER}. Must be 'random.org' or 'local'.")
+            logger.info("Using the %s random provider", _provider.name)
+        return _provider
+
+def set_random_provider(provider: Optional[RandomProvider]) -> None:
+    """
+    Replaces the process-wide random provider.
+
+    Args:
+        provider (Optional[RandomProvider]): The new provider, or None to build one from the settings on next use.
+    """
+    global _provider
+    with _provider_lock:
+        _provider = provider
@@ -2,6 +2,8 @@ from contextlib import contextmanager
 import logging
 import os
 import sqlite3
+import threading
+from typing import Any, Optional
 
 from meal_max.utils.logger import configure_logger
 
@@ -13,6 +15,221 @@ configure_logger(logger)
 # load the db path from the environment with a default value
 DB_PATH = os.getenv("DB_PATH", "/app/sql/meal_max.db")
 
+# Connection pool and SQLite tuning. WAL lets readers run alongside the writer, and
+# synchronous=NORMAL only fsyncs at checkpoints, which is still crash-safe under WAL.
+# DB_POOL_SIZE=0 turns pooling off (a new connection per get_db_connection call).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL")
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Schema changes applied on top of the create script, as numbered .sql files run in name order
+SQL_MIGRATIONS_PATH = os.getenv("SQL_MIGRATIONS_PATH", "/app/sql/migrations")
+
+
+class ConnectionPool:
+    """
+    A pool of reusable SQLite connections to one database file.
+
+    Connections are created on demand and kept for reuse when released, up to max_size
+    idle connections; any more are closed. Every connection is opened with the pool's
+    journal mode, synchronous level and busy timeout.
+
+    Attributes:
+        db_path (str): The database file the connections are opened on.
+        max_size (int): The maximum number of idle connections kept for reuse.
+        journal_mode (str): The journal_mode pragma applied to the database.
+        synchronous (str): The synchronous pragma applied to each connection.
+        busy_timeout_ms (int): How long a connection waits on a locked database.
+        pid (int): The process that created the pool; connections are not shared across forks.
+    """
+
+    def __init__(self, db_path: str, max_size: int = DB_POOL_SIZE, journal_mode: str = DB_JOURNAL_MODE,
+                 synchronous: str = DB_SYNCHRONOUS, busy_timeout_ms: int = DB_BUSY_TIMEOUT_MS):
+        """
+        Initializes an empty ConnectionPool.
+
+        Args:
+            db_path (str): The database file to connect to.
+            max_size (int): The maximum number of idle connections kept for reuse.
+            journal_mode (str): The journal_mode pragma, e.g. WAL or DELETE.
+            synchronous (str): The synchronous pragma, e.g. NORMAL or FULL.
+            busy_timeout_ms (int): The busy timeout in milliseconds.
+        """
+        self.db_path = db_path
+        self.max_size = max_size
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self.pid = os.getpid()
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._created = 0
+        self._reused = 0
+        self._closed = 0
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._stamp_conn: Optional[sqlite3.Connection] = None
+        self._stamp_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Takes an idle connection from the pool, or opens a new one.
+
+        Returns:
+            sqlite3.Connection: A connection that must be given back with release().
+
+        Raises:
+            sqlite3.Error: If a new connection cannot be opened.
+        """
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            if conn is not None:
+                self._reused += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+        if conn is None:
+            try:
+                conn = self._connect()
+            except sqlite3.Error:
+                with self._lock:
+                    self._in_use -= 1
+                raise
+            with self._lock:
+                self._created += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """
+        Gives a connection back to the pool, rolling back anything left uncommitted.
+
+        The connection is closed instead if the pool is full or the connection is broken.
+
+        Args:
+            conn (sqlite3.Connection): A connection obtained from acquire().
+        """
+        keep = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            keep = False
+        with self._lock:
+            self._in_use -= 1
+            if keep and len(self._idle) < self.max_size:
+                self._idle.append(conn)
+                return
+            self._closed += 1
+        conn.close()
+
+    def read_stamp(self, query: str) -> Any:
+        """
+        Runs a single-value query on a dedicated connection kept for version checks.
+
+        Version stamps are read on every cached lookup, so this skips acquiring and
+        releasing a pooled connection. The query must be a read.
+
+        Args:
+            query (str): A query returning one row with one column.
+
+        Returns:
+            Any: The value, or None if the query returned no row.
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        with self._stamp_lock:
+            if self._stamp_conn is None:
+                self._stamp_conn = self._connect()
+            row = self._stamp_conn.execute(query).fetchone()
+        return row[0] if row else None
+
+    def close_all(self) -> None:
+        """Closes every idle connection. Connections in use are closed when released."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._closed += len(idle)
+        with self._stamp_lock:
+            if self._stamp_conn is not None:
+                idle.append(self._stamp_conn)
+                self._stamp_conn = None
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> dict:
+        """
+        Returns the pool's metrics.
+
+        Returns:
+            dict: created, reused, closed, in_use, peak_in_use and idle connection counts,
+                the reuse ratio of all acquisitions, and the pool settings.
+        """
+        with self._lock:
+            acquired = self._created + self._reused
+            return {
+                "db_path": self.db_path,
+                "max_size": self.max_size,
+                "journal_mode": self.journal_mode,
+                "synchronous": self.synchronous,
+                "busy_timeout_ms": self.busy_timeout_ms,
+                "created": self._created,
+                "reused": self._reused,
+                "closed": self._closed,
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "idle": len(self._idle),
+                "reuse_ratio": round(self._reused / acquired, 4) if acquired else 0.0,
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Returns the process-wide connection pool, creating it on first use.
+
+    A new pool is created if DB_PATH has changed or the process has forked since the
+    current pool was built.
+
+    Returns:
+        ConnectionPool: The pool used by get_db_connection.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.db_path != DB_PATH or _pool.pid != os.getpid():
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+def set_pool(pool: Optional[ConnectionPool]) -> None:
+    """
+    Replaces the process-wide connection pool, closing the idle connections of the old one.
+
+    Args:
+        pool (Optional[ConnectionPool]): The new pool, or None to build one from the settings on next use.
+    """
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, pool
+    if old is not None and old is not pool:
+        old.close_all()
+
+def get_pool_stats() -> dict:
+    """Returns the metrics of the process-wide connection pool."""
+    return get_pool().stats()
+
+def read_stamp(query: str) -> Any:
+    """Runs a single-value version query on the process-wide pool's dedicated connection."""
+    return get_pool().read_stamp(query)
+
 
 def check_database_connection():
     """Example function with PEP 484 type annotations.
@@ -65,24 +282,112 @@ def check_table_exists(tablename: str):
 ###################################################
 @contextmanager
 def get_db_connection():
-    """Example function with PEP 484 type annotations.
-
-    Args:
-        param1: The first parameter.
-        param2: The second parameter.
+    """
+    Context manager that borrows a connection from the connection pool.
 
-    Returns:
-        The return value. True for success, False otherwise.
+    The connection is given back to the pool on exit, with any uncommitted transaction
+    rolled back, so callers must commit their writes as before.
 
+    Yields:
+        sqlite3.Connection: The SQLite connection object.
     """
+    pool = get_pool()
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = pool.acquire()
         yield conn
     except sqlite3.Error as e:
         logger.error("Database connection error: %s", str(e))
         raise e
     finally:
         if conn:
-            conn.close()
-            logger.info("Database connection closed.")
+            pool.release(conn)
+            logger.info("Database connection released.")
+
+
+def _split_statements(script: str) -> list[str]:
+    """Splits a SQL script into its statements, keeping trigger bodies whole."""
+    statements = []
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            statements.append(statement)
+            statement = ""
+    return statements
+
+def apply_migrations(migrations_path: Optional[str] = None) -> list[str]:
+    """
+    Applies the migrations that have not been applied to the database yet.
+
+    Each .sql file in the directory is one migration, applied in file name order, in a
+    transaction of its own together with its row in schema_migrations. The transaction
+    takes the write lock before checking schema_migrations, so when several workers start
+    at once each migration is still applied exactly once. A database made before
+    incremental auto-vacuum was used is then switched to it (see enable_incremental_vacuum).
+
+    Args:
+        migrations_path (Optional[str]): The directory of migrations. Defaults to SQL_MIGRATIONS_PATH.
+
+    Returns:
+        list[str]: The names of the migrations applied by this call.
+
+    Raises:
+        FileNotFoundError: If the directory does not exist.
+        sqlite3.Error: If any database error occurs.
+    """
+    migrations_path = migrations_path or SQL_MIGRATIONS_PATH
+    names = sorted(name for name in os.listdir(migrations_path) if name.endswith(".sql"))
+
+    applied = []
+    with get_db_connection() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+            )
+        """)
+        conn.commit()
+
+        for name in names:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM schema_migrations WHERE name = ?", (name,)).fetchone():
+                conn.rollback()
+                continue
+            with open(os.path.join(migrations_path, name), "r") as fh:
+                statements = _split_statements(fh.read())
+            logger.info("Applying migration %s", name)
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute("INSERT INTO schema_migrations (name) VALUES (?)", (name,))
+            conn.commit()
+            applied.append(name)
+
+        enable_incremental_vacuum(conn)
+
+    return applied
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection) -> bool:
+    """
+    Switches the database to incremental auto-vacuum, if it is not using it already.
+
+    Compaction then only has to run PRAGMA incremental_vacuum. A database created by
+    create_meal_table.sql starts in this mode; an older one needs a full VACUUM, which
+    rewrites the whole file, so it is done once here at startup rather than by compaction.
+
+    Args:
+        conn (sqlite3.Connection): A connection with no transaction open.
+
+    Returns:
+        bool: True if the database was switched by this call.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    logger.info("Switching the database to incremental auto-vacuum")
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    return True
@@ -1,4 +1,12 @@
+-- Lets compaction give free pages back with PRAGMA incremental_vacuum; it only takes
+-- effect on a new file, and apply_migrations switches an existing one
+PRAGMA auto_vacuum = INCREMENTAL;
+DROP TABLE IF EXISTS battle_log;
+DROP TABLE IF EXISTS battle_combatants;
 DROP TABLE IF EXISTS meals;
+-- The migrations in sql/migrations build on meals and recreate the tables dropped here, so
+-- they are applied again after a clear
+DROP TABLE IF EXISTS schema_migrations;
 CREATE TABLE meals (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     meal TEXT NOT NULL UNIQUE,
@@ -8,4 +16,4 @@ CREATE TABLE meals (
     battles INTEGER DEFAULT 0,
     wins INTEGER DEFAULT 0,
     deleted BOOLEAN DEFAULT FALSE
-);
\ No newline at end of file
+);
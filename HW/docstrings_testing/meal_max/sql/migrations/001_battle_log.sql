@@ -0,0 +1,8 @@
+-- One row per battle, written in the same transaction as the stats update
+-- (kitchen_model.record_battle_result).
+CREATE TABLE IF NOT EXISTS battle_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    winner_id INTEGER NOT NULL REFERENCES meals(id),
+    loser_id INTEGER NOT NULL REFERENCES meals(id),
+    battled_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+);
@@ -0,0 +1,29 @@
+-- Stores each meal's win percentage in meals.win_pct, kept up to date by SQLite on every
+-- stats update so the leaderboard never recomputes it, and indexes the meals on the
+-- board in board order. SQLite cannot add a STORED generated column with ALTER TABLE,
+-- so meals is rebuilt with it. The rebuild drops the indexes and triggers on meals, so it
+-- runs before every migration that adds them.
+CREATE TABLE meals_new (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    meal TEXT NOT NULL UNIQUE,
+    cuisine TEXT NOT NULL,
+    price REAL NOT NULL,
+    difficulty TEXT CHECK(difficulty IN ('HIGH', 'MED', 'LOW')),
+    battles INTEGER DEFAULT 0,
+    wins INTEGER DEFAULT 0,
+    deleted BOOLEAN DEFAULT FALSE,
+    win_pct REAL GENERATED ALWAYS AS (CASE WHEN battles > 0 THEN wins * 1.0 / battles END) STORED
+);
+INSERT INTO meals_new (id, meal, cuisine, price, difficulty, battles, wins, deleted)
+SELECT id, meal, cuisine, price, difficulty, battles, wins, deleted FROM meals;
+
+-- Keep the AUTOINCREMENT counter, so ids of meals deleted for good are not handed out again
+DELETE FROM sqlite_sequence WHERE name = 'meals_new';
+INSERT INTO sqlite_sequence (name, seq) SELECT 'meals_new', seq FROM sqlite_sequence WHERE name = 'meals';
+
+DROP TABLE meals;
+ALTER TABLE meals_new RENAME TO meals;
+
+-- Leaderboard indexes: only meals that are on the board, already in board order
+CREATE INDEX idx_meals_leaderboard_wins ON meals (wins DESC, id) WHERE deleted = FALSE AND battles > 0;
+CREATE INDEX idx_meals_leaderboard_win_pct ON meals (win_pct DESC, id) WHERE deleted = FALSE AND battles > 0;
@@ -0,0 +1,15 @@
+-- Combatants prepped for the next battle, shared by every worker (COMBATANT_STORE=sqlite).
+-- The create script drops this table, so a clear also clears the combatants.
+CREATE TABLE IF NOT EXISTS battle_combatants (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    meal_id INTEGER NOT NULL REFERENCES meals(id)
+);
+
+-- Bumped on every change to battle_combatants; a battle only commits if it is unchanged.
+-- Never dropped, so the version keeps increasing across clears.
+CREATE TABLE IF NOT EXISTS battle_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO battle_state (id, version) VALUES (1, 0);
+UPDATE battle_state SET version = version + 1 WHERE id = 1;
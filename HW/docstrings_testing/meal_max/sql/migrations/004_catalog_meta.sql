@@ -0,0 +1,23 @@
+-- Version stamp of the catalog, checked by the meal cache of every worker. Bumped whenever
+-- a meal is added, removed or its details change (not on stats updates). Never dropped,
+-- so the stamp keeps increasing across clears; clear_meals applies this migration again,
+-- which bumps it once more for the meals it dropped.
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO catalog_meta (id, version) VALUES (1, 0);
+UPDATE catalog_meta SET version = version + 1 WHERE id = 1;
+
+CREATE TRIGGER IF NOT EXISTS meals_catalog_insert AFTER INSERT ON meals
+BEGIN
+    UPDATE catalog_meta SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS meals_catalog_update AFTER UPDATE OF meal, cuisine, price, difficulty, deleted ON meals
+BEGIN
+    UPDATE catalog_meta SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS meals_catalog_delete AFTER DELETE ON meals
+BEGIN
+    UPDATE catalog_meta SET version = version + 1 WHERE id = 1;
+END;
@@ -0,0 +1,7 @@
+-- Indexes for filtered meal listing (kitchen_model.list_meals). Only meals that are not
+-- deleted are listed, so the indexes leave the deleted ones out. Every index also holds
+-- the id, so an equality match comes back already in id order for keyset pagination.
+CREATE INDEX IF NOT EXISTS idx_meals_cuisine ON meals (cuisine) WHERE deleted = FALSE;
+CREATE INDEX IF NOT EXISTS idx_meals_difficulty ON meals (difficulty) WHERE deleted = FALSE;
+CREATE INDEX IF NOT EXISTS idx_meals_price ON meals (price) WHERE deleted = FALSE;
+CREATE INDEX IF NOT EXISTS idx_meals_battles ON meals (battles) WHERE deleted = FALSE;
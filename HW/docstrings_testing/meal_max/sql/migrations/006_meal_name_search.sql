@@ -0,0 +1,20 @@
+-- Full-text index of meal names (kitchen_model.search_meals). It reads the names from meals
+-- (external content) and is kept in sync by triggers. It is rebuilt here in case it already
+-- exists, since clear_meals drops meals but not this table.
+DROP TABLE IF EXISTS meals_fts;
+CREATE VIRTUAL TABLE meals_fts USING fts5(meal, content='meals', content_rowid='id', prefix='2 3');
+INSERT INTO meals_fts (meals_fts) VALUES ('rebuild');
+
+CREATE TRIGGER IF NOT EXISTS meals_fts_insert AFTER INSERT ON meals
+BEGIN
+    INSERT INTO meals_fts (rowid, meal) VALUES (new.id, new.meal);
+END;
+CREATE TRIGGER IF NOT EXISTS meals_fts_delete AFTER DELETE ON meals
+BEGIN
+    INSERT INTO meals_fts (meals_fts, rowid, meal) VALUES ('delete', old.id, old.meal);
+END;
+CREATE TRIGGER IF NOT EXISTS meals_fts_update AFTER UPDATE OF meal ON meals
+BEGIN
+    INSERT INTO meals_fts (meals_fts, rowid, meal) VALUES ('delete', old.id, old.meal);
+    INSERT INTO meals_fts (rowid, meal) VALUES (new.id, new.meal);
+END;
@@ -0,0 +1,40 @@
+-- Battles per meal per hour and per day, for time-windowed leaderboards. The buckets are
+-- the unix time (UTC) of the start of the hour or day. A trigger on battle_log keeps them
+-- in step with every battle, in the battle's own transaction. They are rebuilt from
+-- battle_log (001_battle_log.sql) here, since clear_meals drops battle_log but not these
+-- tables.
+DROP TABLE IF EXISTS meal_stats_hourly;
+DROP TABLE IF EXISTS meal_stats_daily;
+CREATE TABLE meal_stats_hourly (
+    bucket INTEGER NOT NULL,
+    meal_id INTEGER NOT NULL,
+    battles INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, meal_id)
+) WITHOUT ROWID;
+CREATE TABLE meal_stats_daily (
+    bucket INTEGER NOT NULL,
+    meal_id INTEGER NOT NULL,
+    battles INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, meal_id)
+) WITHOUT ROWID;
+
+INSERT INTO meal_stats_hourly (bucket, meal_id, battles, wins)
+SELECT battled_at / 3600 * 3600, meal_id, COUNT(*), SUM(won) FROM (
+    SELECT battled_at, winner_id AS meal_id, 1 AS won FROM battle_log
+    UNION ALL
+    SELECT battled_at, loser_id, 0 FROM battle_log
+) GROUP BY 1, 2;
+INSERT INTO meal_stats_daily (bucket, meal_id, battles, wins)
+SELECT bucket / 86400 * 86400, meal_id, SUM(battles), SUM(wins) FROM meal_stats_hourly GROUP BY 1, 2;
+
+CREATE TRIGGER IF NOT EXISTS battle_log_rollup AFTER INSERT ON battle_log
+BEGIN
+    INSERT INTO meal_stats_hourly (bucket, meal_id, battles, wins)
+    VALUES (new.battled_at / 3600 * 3600, new.winner_id, 1, 1), (new.battled_at / 3600 * 3600, new.loser_id, 1, 0)
+    ON CONFLICT (bucket, meal_id) DO UPDATE SET battles = battles + excluded.battles, wins = wins + excluded.wins;
+    INSERT INTO meal_stats_daily (bucket, meal_id, battles, wins)
+    VALUES (new.battled_at / 86400 * 86400, new.winner_id, 1, 1), (new.battled_at / 86400 * 86400, new.loser_id, 1, 0)
+    ON CONFLICT (bucket, meal_id) DO UPDATE SET battles = battles + excluded.battles, wins = wins + excluded.wins;
+END;
@@ -0,0 +1,4 @@
+-- Elo rating of each meal (see rating_model). Updated with the stats by every battle and
+-- recomputed from battle_log by rating_model.recompute_ratings. New meals start at 1500.
+ALTER TABLE meals ADD COLUMN rating REAL NOT NULL DEFAULT 1500;
+CREATE INDEX idx_meals_leaderboard_rating ON meals (rating DESC, id) WHERE deleted = FALSE AND battles > 0;
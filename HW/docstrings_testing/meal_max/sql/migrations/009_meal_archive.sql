@@ -0,0 +1,27 @@
+-- Deleted meals moved out of meals by kitchen_model.compact_meals, so the tables and the
+-- indexes of live meals stop growing with every delete. Ids and names stay taken: looking
+-- up an archived meal still reports it as deleted, and a new meal cannot reuse an archived
+-- name, as it could not while the deleted meal was in meals. Rebuilt here since
+-- clear_meals drops meals but not this table.
+DROP TABLE IF EXISTS meals_archive;
+CREATE TABLE meals_archive (
+    id INTEGER PRIMARY KEY,
+    meal TEXT NOT NULL UNIQUE,
+    cuisine TEXT NOT NULL,
+    price REAL NOT NULL,
+    difficulty TEXT,
+    battles INTEGER,
+    wins INTEGER,
+    rating REAL NOT NULL,
+    archived_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+);
+
+-- Raised as the UNIQUE error of meals.meal, so callers see a duplicate name either way
+CREATE TRIGGER meals_archived_name BEFORE INSERT ON meals
+WHEN EXISTS (SELECT 1 FROM meals_archive WHERE meal = new.meal)
+BEGIN
+    SELECT RAISE(ABORT, 'UNIQUE constraint failed: meals.meal');
+END;
+
+-- The deleted meals waiting to be archived, so compaction finds them without a scan
+CREATE INDEX idx_meals_deleted ON meals (id) WHERE deleted = TRUE;
@@ -0,0 +1,34 @@
+import os
+import shutil
+
+import pytest
+
+from meal_max.utils import sql_utils
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """Fixture pointing sql_utils at a fresh database built from the create script and migrations."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "meal_max.db"))
+    sql_utils.set_pool(None)
+    sql_dir = os.path.join(os.path.dirname(__file__), "..", "sql")
+    with open(os.path.join(sql_dir, "create_meal_table.sql")) as fh:
+        script = fh.read()
+    with sql_utils.get_db_connection() as conn:
+        conn.executescript(script)
+        conn.commit()
+    sql_utils.apply_migrations(os.path.join(sql_dir, "migrations"))
+    yield
+    sql_utils.set_pool(None)
+
+@pytest.fixture
+def upgraded_db(tmp_path, monkeypatch):
+    """Fixture pointing sql_utils at a copy of the committed database, brought up to date by the migrations alone."""
+    db_dir = os.path.join(os.path.dirname(__file__), "..", "db")
+    db_path = tmp_path / "meal_max.db"
+    shutil.copyfile(os.path.join(db_dir, "meal_max.db"), db_path)
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(db_path))
+    sql_utils.set_pool(None)
+    sql_utils.apply_migrations(os.path.join(os.path.dirname(__file__), "..", "sql", "migrations"))
+    yield
+    sql_utils.set_pool(None)
@@ -2,12 +2,13 @@ import pytest
 
 from meal_max.models.battle_model import BattleModel
 from meal_max.models.kitchen_model import Meal
+from meal_max.utils.random_utils import SeededRandomProvider
 
 
 @pytest.fixture()
 def battle_model():
-    """Fixture to provide a new instance of BattleModel for each test."""
-    return BattleModel()
+    """Fixture to provide a new instance of BattleModel for each test, with seeded randomness."""
+    return BattleModel(random_provider=SeededRandomProvider(42))
 
 """Fixtures providing sample meals for the tests."""
 @pytest.fixture
@@ -95,4 +96,41 @@ def test_get_combatants(battle_model, sample_meal1, sample_meal2):
     battle_model.prep_combatant(sample_meal1)
     battle_model.prep_combatant(sample_meal2)
     combatants = battle_model.get_combatants()
-    assert combatants == [sample_meal1, sample_meal2]
\ No newline at end of file
+    assert combatants == [sample_meal1, sample_meal2]
+
+##################################################
+# Battle Test Cases
+##################################################
+
+def test_battle_records_result(battle_model, sample_meal1, sample_meal2, mocker):
+    """Test that a battle records the winner and loser in a single call."""
+    mocker.patch.object(battle_model.random_provider, "get_random", return_value=0.0)
+    mock_record = mocker.patch("meal_max.models.combatant_store.record_battle_result")
+    battle_model.prep_combatant(sample_meal1)
+    battle_model.prep_combatant(sample_meal2)
+
+    winner = battle_model.battle()
+
+    # Any positive delta beats a random number of 0, so the first combatant wins
+    assert winner == sample_meal1.meal
+    mock_record.assert_called_once_with(sample_meal1.id, sample_meal2.id)
+    assert battle_model.combatants == [sample_meal1]
+
+def test_battle_not_enough_combatants(battle_model, sample_meal1):
+    """Test that a battle needs two combatants."""
+    battle_model.prep_combatant(sample_meal1)
+    with pytest.raises(ValueError, match="Two combatants must be prepped for a battle."):
+        battle_model.battle()
+
+def test_battle_uses_provider(battle_model, sample_meal1, sample_meal2, mocker):
+    """Test that the seeded provider decides the battle the same way every time."""
+    mocker.patch("meal_max.models.combatant_store.record_battle_result")
+    battle_model.prep_combatant(sample_meal1)
+    battle_model.prep_combatant(sample_meal2)
+
+    # Spaghetti scores 10.5 and Sushi 14.0 (cuisine is a one item list), a delta of 0.035
+    random_number = SeededRandomProvider(42).get_random()
+    expected = sample_meal1.meal if 0.035 > random_number else sample_meal2.meal
+
+    assert battle_model.battle() == expected
+    assert battle_model.random_provider.stats() == {"provider": "seeded", "served": 1}
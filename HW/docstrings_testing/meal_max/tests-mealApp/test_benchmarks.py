@@ -0,0 +1,25 @@
+import pytest
+
+from benchmarks import bench_battle_throughput
+from meal_max.utils import sql_utils
+
+
+@pytest.fixture
+def restore_db_path(monkeypatch):
+    """Fixture undoing the benchmark's change of the module-level database path."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", sql_utils.DB_PATH)
+    yield
+    sql_utils.set_pool(None)
+
+
+##################################################
+# Benchmark Smoke Test Cases
+##################################################
+
+@pytest.mark.parametrize("profile", bench_battle_throughput.PROFILES.values())
+def test_battle_throughput_runs(restore_db_path, tmp_path, profile):
+    """Test that the battle benchmark still runs against the current battle and provider API."""
+    elapsed, stats = bench_battle_throughput.run(str(tmp_path / "meal_max.db"), 5, profile)
+
+    assert elapsed > 0
+    assert stats["created"] >= 1
@@ -0,0 +1,64 @@
+import pytest
+
+from meal_max.utils.cache_utils import LRUCache
+
+
+@pytest.fixture
+def cache():
+    """Fixture for a small cache synced to stamp 1."""
+    cache = LRUCache(max_entries=2, ttl=60)
+    cache.sync(1)
+    return cache
+
+
+def test_get_and_put(cache):
+    """Test a miss, then a hit after the value is cached."""
+    assert cache.get("a") is None
+    cache.put("a", "apple", 1)
+    assert cache.get("a") == "apple"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+def test_least_recently_used_is_evicted(cache):
+    """Test that the entry used longest ago is evicted when the cache is full."""
+    cache.put("a", "apple", 1)
+    cache.put("b", "banana", 1)
+    cache.get("a")
+    cache.put("c", "cherry", 1)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "apple"
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_expire(cache, mocker):
+    """Test that an entry is not served after its TTL."""
+    monotonic = mocker.patch("meal_max.utils.cache_utils.time.monotonic", return_value=100.0)
+    cache.put("a", "apple", 1)
+
+    monotonic.return_value = 161.0
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_new_stamp_drops_entries(cache):
+    """Test that a stamp change drops the entries read under the old one."""
+    cache.put("a", "apple", 1)
+
+    cache.sync(2)
+
+    assert cache.get("a") is None
+    assert cache.stats()["invalidations"] == 1
+
+def test_stale_put_is_ignored(cache):
+    """Test that a value read under an older stamp is not cached."""
+    cache.sync(2)
+    cache.put("a", "apple", 1)
+    assert cache.get("a") is None
+
+def test_disabled_cache():
+    """Test that a cache with no room never stores anything."""
+    cache = LRUCache(max_entries=0)
+    cache.sync(1)
+    cache.put("a", "apple", 1)
+    assert cache.get("a") is None
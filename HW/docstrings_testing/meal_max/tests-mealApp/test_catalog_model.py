@@ -0,0 +1,209 @@
+import csv
+import io
+import json
+import os
+
+import pytest
+
+from meal_max.models import catalog_model
+from meal_max.models.catalog_model import export_meals, import_meals, read_records, validate_record
+from meal_max.models.kitchen_model import clear_meals, compact_meals, create_meal, delete_meal, get_meal_by_name, record_battle_result
+
+
+CSV_CATALOG = """meal,cuisine,price,difficulty
+Spaghetti,Italian,12.5,MED
+Sushi,Japanese,15.0,HIGH
+Tacos,Mexican,-3,LOW
+Curry,Indian,9.5,EASY
+Spaghetti,Italian,11.0,LOW
+"""
+
+
+def ndjson(*records):
+    return io.StringIO("".join(json.dumps(record) + "\n" for record in records))
+
+
+######################################################
+#
+#    Validation
+#
+######################################################
+
+def test_validate_record():
+    """Test that a valid record is converted to the inserted values, stats defaulting to 0."""
+    assert validate_record({"meal": "Pizza", "cuisine": "Italian", "price": "10.5", "difficulty": "LOW"}) == \
+        ("Pizza", "Italian", 10.5, "LOW", 0, 0)
+    assert validate_record({"meal": "Pizza", "cuisine": "Italian", "price": 10.5, "difficulty": "LOW",
+                            "battles": "4", "wins": 3}) == ("Pizza", "Italian", 10.5, "LOW", 4, 3)
+
+@pytest.mark.parametrize("record, message", [
+    ({"meal": "Pizza", "cuisine": "Italian", "price": -1, "difficulty": "LOW"}, "Invalid price: -1. Price must be a positive number."),
+    ({"meal": "Pizza", "cuisine": "Italian", "price": 0, "difficulty": "LOW"}, "Invalid price: 0. Price must be a positive number."),
+    ({"meal": "Pizza", "cuisine": "Italian", "price": "nan", "difficulty": "LOW"}, "Invalid price: nan"),
+    ({"meal": "Pizza", "cuisine": "Italian", "price": "inf", "difficulty": "LOW"}, "Invalid price: inf"),
+    ({"meal": "Pizza", "cuisine": "Italian", "price": 0, "difficulty": "EASY"}, "Invalid price: 0"),
+    ({"meal": "Pizza", "cuisine": "Italian", "price": "abc", "difficulty": "LOW"}, "Invalid price: abc"),
+    ({"meal": "Pizza", "cuisine": "Italian", "price": 10, "difficulty": "EASY"}, "Invalid difficulty level: EASY. Must be 'LOW', 'MED', or 'HIGH'."),
+    ({"meal": "", "cuisine": "Italian", "price": 10, "difficulty": "LOW"}, "Meal name is required."),
+    ({"meal": "Pizza", "price": 10, "difficulty": "LOW"}, "Cuisine is required."),
+    ({"meal": "Pizza", "cuisine": "Italian", "price": 10, "difficulty": "LOW", "battles": -1}, "Invalid battles: -1"),
+    ({"meal": "Pizza", "cuisine": "Italian", "price": 10, "difficulty": "LOW", "battles": 1, "wins": 2}, "Invalid wins: 2"),
+    (["Pizza"], "Each meal must be an object."),
+])
+def test_validate_record_invalid(record, message):
+    """Test that invalid records are rejected with the same messages as create_meal."""
+    with pytest.raises(ValueError, match=message.replace("(", r"\(").replace(")", r"\)").replace(".", r"\.")):
+        validate_record(record)
+
+def test_read_records_invalid_format():
+    """Test that an unknown format is rejected."""
+    with pytest.raises(ValueError, match="Invalid format: xml"):
+        read_records(io.StringIO(""), "xml")
+
+######################################################
+#
+#    Import
+#
+######################################################
+
+def test_import_csv(sqlite_db):
+    """Test a CSV import: valid rows are inserted, invalid and duplicate rows are reported by line."""
+    result = import_meals(read_records(io.StringIO(CSV_CATALOG), "csv"))
+
+    assert result["imported"] == 2
+    assert result["rejected"] == 3
+    assert result["errors"] == [
+        {"line": 4, "error": "Invalid price: -3. Price must be a positive number."},
+        {"line": 5, "error": "Invalid difficulty level: EASY. Must be 'LOW', 'MED', or 'HIGH'."},
+        {"line": 6, "error": "Meal with name 'Spaghetti' already exists"},
+    ]
+    meal = get_meal_by_name("Sushi")
+    assert (meal.cuisine, meal.price, meal.difficulty) == ("Japanese", 15.0, "HIGH")
+
+def test_import_ndjson_skips_existing_meals(sqlite_db):
+    """Test that meals already in the catalog are rejected without stopping the import."""
+    create_meal("Pizza", "Italian", 10.0, "LOW")
+    records = read_records(ndjson(
+        {"meal": "Pizza", "cuisine": "Italian", "price": 12.0, "difficulty": "MED"},
+        {"meal": "Ramen", "cuisine": "Japanese", "price": 11.0, "difficulty": "MED", "battles": 3, "wins": 2},
+    ), "ndjson")
+    records = list(records) + [(3, ValueError("Invalid JSON: bad"))]
+
+    result = import_meals(records)
+
+    assert result["imported"] == 1
+    assert sorted(result["errors"], key=lambda error: error["line"]) == [
+        {"line": 1, "error": "Meal with name 'Pizza' already exists"},
+        {"line": 3, "error": "Invalid JSON: bad"},
+    ]
+    assert get_meal_by_name("Pizza").price == 10.0
+
+def test_import_invalid_json_line(sqlite_db):
+    """Test that a line that is not JSON is reported and the rest are imported."""
+    lines = io.StringIO('{"meal": "Ramen", "cuisine": "Japanese", "price": 11, "difficulty": "MED"}\n\n{oops\n')
+
+    result = import_meals(read_records(lines, "ndjson"))
+
+    assert result["imported"] == 1
+    assert result["errors"][0]["line"] == 3
+    assert result["errors"][0]["error"].startswith("Invalid JSON")
+
+def test_import_skips_archived_meals(sqlite_db):
+    """Test that names of meals archived by compaction are still rejected as existing."""
+    create_meal("Pizza", "Italian", 10.0, "LOW")
+    delete_meal(1)
+    compact_meals(vacuum_pages=0)
+
+    result = import_meals(read_records(ndjson(
+        {"meal": "Pizza", "cuisine": "Italian", "price": 12.0, "difficulty": "MED"},
+        {"meal": "Ramen", "cuisine": "Japanese", "price": 11.0, "difficulty": "MED"},
+    ), "ndjson"))
+
+    assert result == {"imported": 1, "rejected": 1, "errors": [{"line": 1, "error": "Meal with name 'Pizza' already exists"}]}
+
+def test_import_in_chunks(sqlite_db):
+    """Test that rows split over several chunks are all imported, duplicates across chunks included."""
+    records = [(i + 1, {"meal": f"Meal {i}", "cuisine": "Thai", "price": 5 + i, "difficulty": "LOW"})
+               for i in range(25)]
+    records.append((26, {"meal": "Meal 3", "cuisine": "Thai", "price": 5, "difficulty": "LOW"}))
+
+    result = import_meals(records, chunk_size=10)
+
+    assert result == {"imported": 25, "rejected": 1, "errors": [{"line": 26, "error": "Meal with name 'Meal 3' already exists"}]}
+    assert get_meal_by_name("Meal 24").price == 29
+
+def test_import_caps_reported_errors(sqlite_db, monkeypatch):
+    """Test that only the first MAX_REPORTED_ERRORS errors are listed, but all are counted."""
+    monkeypatch.setattr(catalog_model, "MAX_REPORTED_ERRORS", 2)
+    records = [(i, {"meal": f"Meal {i}", "cuisine": "Thai", "price": -1, "difficulty": "LOW"}) for i in range(5)]
+
+    result = import_meals(records)
+
+    assert result["rejected"] == 5
+    assert len(result["errors"]) == 2
+
+def test_import_invalid_chunk_size(sqlite_db):
+    """Test that a non-positive chunk size is rejected."""
+    with pytest.raises(ValueError, match="Invalid chunk size: 0"):
+        import_meals([], chunk_size=0)
+
+######################################################
+#
+#    Export
+#
+######################################################
+
+def test_export_csv_round_trip(sqlite_db, monkeypatch):
+    """Test that an export includes the stats and can be imported into a fresh catalog."""
+    create_meal("Pizza", "Italian", 10.0, "LOW")
+    create_meal("Sushi", "Japanese", 15.0, "HIGH")
+    create_meal("Tacos", "Mexican", 8.0, "MED")
+    record_battle_result(1, 2)
+    delete_meal(3)
+
+    exported = "".join(export_meals("csv"))
+
+    rows = list(csv.DictReader(io.StringIO(exported)))
+    assert [(row["meal"], row["battles"], row["wins"]) for row in rows] == [("Pizza", "1", "1"), ("Sushi", "1", "0")]
+
+    monkeypatch.setenv("SQL_CREATE_TABLE_PATH", os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql"))
+    clear_meals()
+    assert import_meals(read_records(io.StringIO(exported), "csv"))["imported"] == 2
+    assert "".join(export_meals("csv")) == exported
+
+def test_export_ndjson_include_deleted(sqlite_db):
+    """Test an NDJSON export with deleted meals."""
+    create_meal("Pizza", "Italian", 10.0, "LOW")
+    delete_meal(1)
+
+    assert "".join(export_meals("ndjson")) == ""
+    lines = "".join(export_meals("ndjson", include_deleted=True)).splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"id": 1, "meal": "Pizza", "cuisine": "Italian", "price": 10.0, "difficulty": "LOW", "battles": 0, "wins": 0}
+    ]
+
+def test_export_include_deleted_archived(sqlite_db):
+    """Test that archived meals are exported with the deleted ones, in id order."""
+    for name in ("Pizza", "Sushi", "Tacos"):
+        create_meal(name, "Mixed", 10.0, "LOW")
+    delete_meal(1)
+    compact_meals(vacuum_pages=0)
+    delete_meal(3)
+
+    rows = list(csv.DictReader(io.StringIO("".join(export_meals("csv", include_deleted=True)))))
+
+    assert [row["meal"] for row in rows] == ["Pizza", "Sushi", "Tacos"]
+    assert "".join(export_meals("csv")).count("\n") == 2
+
+def test_export_streams_in_batches(sqlite_db):
+    """Test that the export yields one chunk per batch of rows."""
+    import_meals([(i, {"meal": f"Meal {i}", "cuisine": "Thai", "price": 5, "difficulty": "LOW"}) for i in range(7)])
+
+    chunks = list(export_meals("ndjson", batch_size=3))
+
+    assert [chunk.count("\n") for chunk in chunks] == [3, 3, 1]
+
+def test_export_invalid_format():
+    """Test that the format is checked before anything is read."""
+    with pytest.raises(ValueError, match="Invalid format: xml"):
+        export_meals("xml")
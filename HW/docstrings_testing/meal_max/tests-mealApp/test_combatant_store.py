@@ -0,0 +1,208 @@
+import random
+import threading
+
+import pytest
+
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.combatant_store import CombatantStore, MemoryCombatantStore, SQLiteCombatantStore, make_combatant_store
+from meal_max.models.kitchen_model import create_meal, get_meal_by_id
+from meal_max.utils import sql_utils
+from meal_max.utils.random_utils import SeededRandomProvider
+
+
+@pytest.fixture
+def meals(sqlite_db):
+    """Fixture adding four meals to a fresh database."""
+    for i, name in enumerate(["Pizza", "Sushi", "Tacos", "Curry"]):
+        create_meal(meal=name, cuisine="Italian", price=10.0 + 15 * i, difficulty="MED")
+    return [get_meal_by_id(meal_id) for meal_id in range(1, 5)]
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, sqlite_db):
+    """Fixture providing each kind of combatant store."""
+    return make_combatant_store(request.param)
+
+
+##################################################
+# Store Test Cases
+##################################################
+
+def test_combatant_store_is_abstract():
+    """Test that a store must implement every operation but get_combatants."""
+    with pytest.raises(TypeError, match="abstract"):
+        CombatantStore()
+
+def test_prep_and_snapshot(store, meals):
+    """Test that combatants come back in prep order with a new version per change."""
+    version_0, _ = store.snapshot()
+    store.prep(meals[1])
+    store.prep(meals[0])
+
+    version_2, combatants = store.snapshot()
+
+    assert combatants == [meals[1], meals[0]]
+    assert version_2 == version_0 + 2
+
+def test_prep_full(store, meals):
+    """Test that a third combatant is rejected."""
+    store.prep(meals[0])
+    store.prep(meals[1])
+    with pytest.raises(ValueError, match="Combatant list is full"):
+        store.prep(meals[2])
+    assert len(store.get_combatants()) == 2
+
+def test_prep_twice(store, meals):
+    """Test that a meal already prepped is rejected, as it cannot battle itself."""
+    store.prep(meals[0])
+    with pytest.raises(ValueError, match="Meal with ID 1 is already a combatant"):
+        store.prep(meals[0])
+    assert store.get_combatants() == [meals[0]]
+
+def test_clear(store, meals):
+    """Test that clearing removes the combatants and changes the version."""
+    store.prep(meals[0])
+    version, _ = store.snapshot()
+
+    store.clear()
+
+    assert store.snapshot()[1] == []
+    assert store.snapshot()[0] > version
+
+def test_commit_battle(store, meals):
+    """Test that a battle at the current version records the result and removes the loser."""
+    store.prep(meals[0])
+    store.prep(meals[1])
+    version, _ = store.snapshot()
+
+    assert store.commit_battle(version, meals[1], meals[0])
+
+    assert store.get_combatants() == [meals[1]]
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("SELECT winner_id, loser_id FROM battle_log").fetchall() == [(2, 1)]
+
+def test_commit_battle_stale_version(store, meals):
+    """Test that a battle is not committed if the combatants changed since it read them."""
+    store.prep(meals[0])
+    store.prep(meals[1])
+    version, _ = store.snapshot()
+    store.clear()
+    store.prep(meals[2])
+    store.prep(meals[3])
+
+    assert not store.commit_battle(version, meals[1], meals[0])
+
+    assert store.get_combatants() == [meals[2], meals[3]]
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM battle_log").fetchone()[0] == 0
+
+def test_sqlite_store_is_shared(sqlite_db, meals):
+    """Test that two stores on the same database see the same combatants, as two workers would."""
+    first, second = SQLiteCombatantStore(), SQLiteCombatantStore()
+
+    first.prep(meals[0])
+    second.prep(meals[1])
+
+    assert first.get_combatants() == second.get_combatants() == [meals[0], meals[1]]
+
+def test_sqlite_store_on_upgraded_database(upgraded_db):
+    """Test that the migrations alone give a database from before the store its tables."""
+    store = SQLiteCombatantStore()
+    # The committed database holds Sushi (id 2) and Taco (id 3)
+    sushi, taco = get_meal_by_id(2), get_meal_by_id(3)
+    store.prep(sushi)
+    store.prep(taco)
+    version, _ = store.snapshot()
+
+    assert store.commit_battle(version, taco, sushi)
+
+    assert store.get_combatants() == [taco]
+
+def test_battle_retries_on_conflict(meals, mocker):
+    """Test that a battle whose commit loses the race is fought again on a fresh snapshot."""
+    store = MemoryCombatantStore()
+    battle_model = BattleModel(random_provider=SeededRandomProvider(), store=store)
+    battle_model.prep_combatant(meals[0])
+    battle_model.prep_combatant(meals[1])
+    commit = mocker.patch.object(store, "commit_battle", side_effect=[False, True])
+
+    battle_model.battle()
+
+    assert commit.call_count == 2
+
+def test_battle_gives_up_after_max_attempts(meals, mocker):
+    """Test that a battle that never wins the race raises instead of looping forever."""
+    store = MemoryCombatantStore()
+    battle_model = BattleModel(random_provider=SeededRandomProvider(), store=store)
+    battle_model.prep_combatant(meals[0])
+    battle_model.prep_combatant(meals[1])
+    mocker.patch.object(store, "commit_battle", return_value=False)
+
+    with pytest.raises(RuntimeError, match="Battle could not be committed after 5 attempts"):
+        battle_model.battle()
+
+##################################################
+# Concurrency Stress Test Cases
+##################################################
+
+def run_workers(make_battle_model, meals, workers=8, rounds=40):
+    """Runs workers that prep and battle concurrently; returns the successful preps and battles."""
+    totals = {"preps": 0, "battles": 0}
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(workers)
+
+    def worker(index):
+        battle_model = make_battle_model(index)
+        rng = random.Random(index)
+        preps = battles = 0
+        start.wait()
+        try:
+            for _ in range(rounds):
+                try:
+                    battle_model.prep_combatant(rng.choice(meals))
+                    preps += 1
+                except ValueError:
+                    pass
+                try:
+                    battle_model.battle()
+                    battles += 1
+                except (ValueError, RuntimeError):
+                    # Not enough combatants, or other workers kept winning the race
+                    pass
+        except Exception as e:
+            errors.append(e)
+        with lock:
+            totals["preps"] += preps
+            totals["battles"] += battles
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    return totals
+
+def assert_no_lost_or_duplicated_battles(totals, remaining):
+    """Checks the database against the battles and preps the workers saw succeed."""
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM battle_log").fetchone()[0] == totals["battles"]
+        assert conn.execute("SELECT SUM(wins), SUM(battles) FROM meals").fetchone() == (totals["battles"], 2 * totals["battles"])
+    # Every successful prep is either still waiting or was removed as a loser exactly once
+    assert totals["preps"] - totals["battles"] == len(remaining) <= 2
+    assert totals["battles"] > 0
+
+def test_stress_sqlite_store_across_workers(meals):
+    """Test workers with their own models and stores on one database, as separate processes would be."""
+    totals = run_workers(lambda i: BattleModel(random_provider=SeededRandomProvider(i), store=SQLiteCombatantStore()),
+                         meals)
+
+    assert_no_lost_or_duplicated_battles(totals, SQLiteCombatantStore().get_combatants())
+
+def test_stress_memory_store_across_threads(meals):
+    """Test threads sharing one in-process store, as a threaded server would."""
+    store = MemoryCombatantStore()
+    totals = run_workers(lambda i: BattleModel(random_provider=SeededRandomProvider(i), store=store), meals)
+
+    assert_no_lost_or_duplicated_battles(totals, store.get_combatants())
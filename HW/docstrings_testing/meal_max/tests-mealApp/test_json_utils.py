@@ -0,0 +1,188 @@
+import importlib
+import json
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from meal_max.models import kitchen_model
+from meal_max.models.kitchen_model import LEADERBOARD_COLUMNS, create_meal, delete_meal, record_battle_result
+from meal_max.utils import json_utils, sql_utils
+from meal_max.utils.json_utils import (
+    RowEncoder,
+    iter_json_envelope,
+    json_rows_response
+)
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    """Fixture running a test with orjson, when it is installed, and with the stdlib encoder."""
+    if request.param == "orjson":
+        if json_utils.orjson is None:
+            pytest.skip("orjson is not installed")
+    else:
+        monkeypatch.setattr(json_utils, "orjson", None)
+    return request.param
+
+@pytest.fixture
+def rows():
+    """Fixture providing leaderboard rows as they come out of sqlite3."""
+    return [
+        (1, "Spaghetti", "Italian", 12.5, "MED", 4, 3, 75.0, 1531.2),
+        (2, "Crêpe \"Suzette\"", "French", 9.0, "LOW", 2, 1, 50.0, 1500.0),
+        (3, "Sushi", "Japanese", 15.0, None, 1, 0, 0.0, 1484.0),
+    ]
+
+@pytest.fixture
+def encoder():
+    return RowEncoder(LEADERBOARD_COLUMNS)
+
+
+######################################################
+#
+#    Row encoding
+#
+######################################################
+
+def test_encode_row_matches_dict(encoder, rows):
+    """Test that an encoded row decodes to the same dict get_leaderboard would have built."""
+    for row in rows:
+        assert json.loads(encoder.encode(row)) == dict(zip(LEADERBOARD_COLUMNS, row))
+
+def test_encode_many(backend, encoder, rows):
+    """Test encoding a list of rows as a JSON array with either backend."""
+    assert json.loads(encoder.encode_many(rows)) == [dict(zip(LEADERBOARD_COLUMNS, row)) for row in rows]
+    assert encoder.encode_many([]) == "[]"
+
+def test_encode_non_finite_floats():
+    """Test that NaN and infinities are written as json.dumps writes them."""
+    encoder = RowEncoder(("a", "b", "c"))
+    assert encoder.encode((float("nan"), float("inf"), float("-inf"))) == '{"a": NaN, "b": Infinity, "c": -Infinity}'
+
+def test_row_encoder_requires_columns():
+    """Test that a RowEncoder cannot be built without columns."""
+    with pytest.raises(ValueError, match="RowEncoder requires at least one column."):
+        RowEncoder(())
+
+######################################################
+#
+#    Envelope and responses
+#
+######################################################
+
+@pytest.mark.parametrize("num_rows", [0, 1, 501])
+def test_iter_json_envelope(backend, encoder, num_rows):
+    """Test that the streamed chunks join into the expected document for any chunking."""
+    rows = [(i, f"Meal {i}", "Mixed", 10.0, "MED", 2, 1, 50.0, 1500.0) for i in range(num_rows)]
+    body = b"".join(iter_json_envelope({"status": "success"}, "leaderboard", encoder, rows, chunk_size=500))
+    assert json.loads(body) == {"status": "success", "leaderboard": [dict(zip(LEADERBOARD_COLUMNS, row)) for row in rows]}
+
+def test_json_rows_response(encoder, rows):
+    """Test building a buffered and a streamed response."""
+    app = Flask(__name__)
+    with app.test_request_context():
+        buffered = json_rows_response({"status": "success"}, "leaderboard", encoder, rows)
+        streamed = json_rows_response({"status": "success"}, "leaderboard", encoder, iter(rows), stream=True)
+        assert buffered.mimetype == "application/json"
+        assert not buffered.is_streamed
+        assert streamed.is_streamed
+        assert json.loads(b"".join(streamed.response)) == buffered.get_json()
+
+def test_streamed_response_reads_first_row(encoder, rows):
+    """Test that a streamed response reads its first row before returning, and only that one."""
+    read = []
+
+    def failing_rows():
+        raise sqlite3.OperationalError("no such table: meals")
+        yield
+
+    def counted_rows():
+        for row in rows:
+            read.append(row[0])
+            yield row
+
+    app = Flask(__name__)
+    with app.test_request_context():
+        with pytest.raises(sqlite3.OperationalError, match="no such table"):
+            json_rows_response({"status": "success"}, "leaderboard", encoder, failing_rows(), stream=True)
+        response = json_rows_response({"status": "success"}, "leaderboard", encoder, counted_rows(), stream=True)
+        assert read == [1]
+        assert len(json.loads(b"".join(response.response))["leaderboard"]) == 3
+
+######################################################
+#
+#    Routes
+#
+######################################################
+
+@pytest.fixture
+def client(sqlite_db, monkeypatch):
+    """Fixture providing a test client of the app on a fresh database with three meals, one deleted."""
+    # No background compaction in tests
+    monkeypatch.setattr(kitchen_model, "COMPACTION_INTERVAL", 0)
+    app_module = importlib.import_module("app")
+    for name, cuisine in (("Spaghetti", "Italian"), ("Sushi", "Japanese"), ("Tacos", "Mexican")):
+        create_meal(meal=name, cuisine=cuisine, price=10.0, difficulty="MED")
+    record_battle_result(1, 2)
+    record_battle_result(3, 1)
+    delete_meal(3)
+    return app_module.app.test_client()
+
+@pytest.mark.parametrize("stream", ["false", "true"])
+def test_leaderboard_route(client, stream):
+    """Test that the leaderboard route keeps the shape of the jsonify response it replaced."""
+    response = client.get(f"/api/leaderboard?sort=wins&stream={stream}")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    body = response.get_json()
+    assert list(body) == ["status", "leaderboard"]
+    assert body["status"] == "success"
+    assert body["leaderboard"] == [dict(zip(LEADERBOARD_COLUMNS, row)) for row in
+                                   kitchen_model.iter_leaderboard_rows("wins")]
+    assert [meal["meal"] for meal in body["leaderboard"]] == ["Spaghetti", "Sushi"]
+    assert list(body["leaderboard"][0]) == list(LEADERBOARD_COLUMNS)
+
+def test_app_keeps_flask_json_defaults(client):
+    """Test that jsonify in the app still sorts keys and escapes non-ASCII, as Flask does by default."""
+    assert client.application.json.dumps({"b": 1, "a": "é"}) == '{"a": "\\u00e9", "b": 1}'
+
+@pytest.mark.parametrize("path", ["/api/leaderboard?sort=wins&stream=true", "/api/export-meals?format=ndjson"])
+def test_streamed_route_database_error(client, path):
+    """Test that a database error in a streamed route is the usual 500 error, not a cut-short 200."""
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("DROP TABLE meals")
+        conn.commit()
+
+    response = client.get(path)
+
+    assert response.status_code == 500
+    assert "no such table" in response.get_json()["error"]
+
+def test_leaderboard_page_route(client):
+    """Test that the cursor route pages through the same leaderboard."""
+    first = client.get("/api/leaderboard/page?sort=wins&limit=1").get_json()
+    second = client.get(f"/api/leaderboard/page?sort=wins&limit=1&cursor={first['next_cursor']}").get_json()
+
+    assert [meal["meal"] for meal in first["leaderboard"] + second["leaderboard"]] == ["Spaghetti", "Sushi"]
+    assert second["next_cursor"] is None
+    assert client.get("/api/leaderboard/page?cursor=bad").status_code == 400
+
+def test_leaderboard_route_invalid_sort(client):
+    """Test that an invalid sort key is reported as an error object."""
+    response = client.get("/api/leaderboard?sort=price")
+
+    assert response.status_code >= 400
+    assert "Invalid sort_by parameter: price" in response.get_json()["error"]
+
+def test_export_route_ndjson(client):
+    """Test that an NDJSON export is one encoded meal per line, deleted meals left out."""
+    response = client.get("/api/export-meals?format=ndjson")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["meal"] for line in lines] == ["Spaghetti", "Sushi"]
+    assert json.loads(lines[0]) == {"id": 1, "meal": "Spaghetti", "cuisine": "Italian", "price": 10.0,
+                                    "difficulty": "MED", "battles": 2, "wins": 1}
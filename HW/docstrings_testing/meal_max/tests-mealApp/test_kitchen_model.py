@@ -1,4 +1,6 @@
 from contextlib import contextmanager
+import os
+import random
 import re
 import sqlite3
 
@@ -6,12 +8,27 @@ import pytest
 
 from meal_max.models.kitchen_model import (
     Meal,
+    compact_meals,
     create_meal,
     delete_meal,
+    get_catalog_version,
     get_meal_by_id,
+    get_meal_by_id_cached,
+    get_leaderboard,
+    get_leaderboard_page,
     get_meal_by_name,
+    get_meal_by_name_cached,
+    get_meal_rank,
+    parse_window,
+    get_meals_by_names,
+    list_meals,
+    record_battle_result,
+    record_battle_results,
+    search_meals,
     update_meal_stats
 )
+from meal_max.models import kitchen_model
+from meal_max.utils import sql_utils
 
 ######################################################
 #
@@ -219,3 +236,721 @@ def test_update_meal_stats(mock_cursor):
     actual_arguments = mock_cursor.execute.call_args[0][1]
     expected_arguments = (1,)  
     assert actual_arguments == expected_arguments, f"The SQL query arguments did not match. Expected {expected_arguments}, got {actual_arguments}"
+
+######################################################
+#
+#    Record battle result
+#
+######################################################
+
+def test_record_battle_result(mock_cursor):
+    """Test recording a battle updates both meals' stats and ratings and logs it in one transaction."""
+
+    mock_cursor.fetchall.return_value = [(1, False, 1500.0), (2, False, 1500.0)]
+
+    record_battle_result(winner_id=1, loser_id=2)
+
+    executed = [(normalize_whitespace(call[0][0]), call[0][1] if len(call[0]) > 1 else None)
+                for call in mock_cursor.execute.call_args_list]
+    assert executed == [
+        ("BEGIN IMMEDIATE", None),
+        ("SELECT id, deleted, rating FROM meals WHERE id IN (?, ?)", (1, 2)),
+        ("UPDATE meals SET battles = battles + 1, wins = wins + 1, rating = ? WHERE id = ?", (1516.0, 1)),
+        ("UPDATE meals SET battles = battles + 1, rating = ? WHERE id = ?", (1484.0, 2)),
+        ("INSERT INTO battle_log (winner_id, loser_id) VALUES (?, ?)", (1, 2)),
+    ]
+
+def test_record_battle_result_not_found(mock_cursor):
+    """Test error when one of the meals does not exist, before anything is updated."""
+
+    mock_cursor.fetchall.return_value = [(1, False)]
+
+    with pytest.raises(ValueError, match="Meal with ID 2 not found"):
+        record_battle_result(winner_id=1, loser_id=2)
+
+    # BEGIN, the meals and the archive are read; nothing is written
+    statements = [normalize_whitespace(call[0][0]) for call in mock_cursor.execute.call_args_list]
+    assert statements[1:] == [
+        "SELECT id, deleted, rating FROM meals WHERE id IN (?, ?)",
+        "SELECT 1 FROM meals_archive WHERE id = ?",
+    ]
+
+def test_record_battle_result_deleted(mock_cursor):
+    """Test error when one of the meals is marked as deleted."""
+
+    mock_cursor.fetchall.return_value = [(1, True), (2, False)]
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        record_battle_result(winner_id=1, loser_id=2)
+
+def test_record_battle_result_is_atomic(sqlite_db):
+    """Test against a real database that a failed validation leaves no partial update."""
+    create_meal(meal="Pizza", cuisine="Italian", price=10.0, difficulty="MED")
+    create_meal(meal="Sushi", cuisine="Japanese", price=15.0, difficulty="HIGH")
+
+    record_battle_result(1, 2)
+    with pytest.raises(ValueError, match="Meal with ID 3 not found"):
+        record_battle_result(1, 3)
+
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("SELECT battles, wins FROM meals WHERE id = 1").fetchone() == (1, 1)
+        assert conn.execute("SELECT winner_id, loser_id FROM battle_log").fetchall() == [(1, 2)]
+
+def test_record_battle_result_against_itself(mock_cursor):
+    """Test error when a meal is both the winner and the loser, before anything is read or written."""
+
+    with pytest.raises(ValueError, match="meal with ID 1 cannot battle itself"):
+        record_battle_result(winner_id=1, loser_id=1)
+
+    statements = [normalize_whitespace(call[0][0]) for call in mock_cursor.execute.call_args_list]
+    assert statements == ["BEGIN IMMEDIATE"]
+
+def test_record_battle_result_on_upgraded_database(upgraded_db):
+    """Test that the migrations alone give a database from before battle_log everything a battle writes."""
+    # The committed database holds Sushi (id 2) and Taco (id 3)
+    record_battle_result(3, 2)
+
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("SELECT battles, wins FROM meals WHERE id IN (2, 3) ORDER BY id").fetchall() == [(2, 0), (1, 1)]
+        assert conn.execute("SELECT winner_id, loser_id FROM battle_log").fetchall() == [(3, 2)]
+        assert conn.execute("SELECT meal_id, battles, wins FROM meal_stats_daily ORDER BY meal_id").fetchall() == \
+            [(2, 1, 0), (3, 1, 1)]
+
+######################################################
+#
+#    Leaderboard
+#
+######################################################
+
+def test_get_leaderboard(mock_cursor):
+    """Test retrieving the leaderboard sorted by wins."""
+
+    mock_cursor.fetchmany.side_effect = [[(2, "Sushi", "Japanese", 15.0, "HIGH", 4, 3, 75.0, 1531.2)], []]
+
+    result = get_leaderboard("wins")
+
+    assert result == [{"id": 2, "meal": "Sushi", "cuisine": "Japanese", "price": 15.0, "difficulty": "HIGH",
+                       "battles": 4, "wins": 3, "win_pct": 75.0, "rating": 1531.2}]
+    expected_query = normalize_whitespace("""
+        SELECT id, meal, cuisine, price, difficulty, battles, wins, ROUND(win_pct * 100, 1) AS win_pct,
+               ROUND(rating, 1) AS rating
+        FROM meals WHERE deleted = FALSE AND battles > 0
+        ORDER BY meals.wins DESC, id
+    """)
+    assert normalize_whitespace(mock_cursor.execute.call_args[0][0]) == expected_query
+    assert mock_cursor.execute.call_args[0][1] == ()
+
+def test_get_leaderboard_limit_offset(mock_cursor):
+    """Test that limit and offset are passed as query parameters."""
+
+    mock_cursor.fetchmany.return_value = []
+
+    get_leaderboard("win_pct", limit=10, offset=20)
+
+    actual_query = normalize_whitespace(mock_cursor.execute.call_args[0][0])
+    assert actual_query.endswith("ORDER BY meals.win_pct DESC, id LIMIT ? OFFSET ?")
+    assert mock_cursor.execute.call_args[0][1] == (10, 20)
+
+def test_get_leaderboard_invalid_arguments(mock_cursor):
+    """Test errors for an invalid sort key or page."""
+    with pytest.raises(ValueError, match="Invalid sort_by parameter: battles"):
+        get_leaderboard("battles")
+    with pytest.raises(ValueError, match="Invalid limit: -1. Must be a non-negative integer."):
+        get_leaderboard("wins", limit=-1)
+    with pytest.raises(ValueError, match="Invalid offset: -5. Must be a non-negative integer."):
+        get_leaderboard("wins", offset=-5)
+
+def test_get_meal_rank(mock_cursor):
+    """Test that a meal's rank is one more than the number of meals strictly ahead."""
+
+    mock_cursor.fetchone.side_effect = [(7, 10, False), (3,)]
+
+    assert get_meal_rank(1, "wins") == 4
+    assert mock_cursor.execute.call_args[0][1] == (7,)
+
+def test_get_meal_rank_no_battles(mock_cursor):
+    """Test error when the meal has not battled yet."""
+
+    mock_cursor.fetchone.return_value = (None, 0, False)
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has no battles and is not on the leaderboard"):
+        get_meal_rank(1, "win_pct")
+
+def test_get_meal_rank_deleted(mock_cursor):
+    """Test error when the meal is marked as deleted."""
+
+    mock_cursor.fetchone.return_value = (3, 4, True)
+
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        get_meal_rank(1)
+
+def test_leaderboard_is_maintained_and_indexed(sqlite_db):
+    """Test against a real database that win_pct follows the stats and pages come off the index."""
+    for name in ("Pizza", "Sushi", "Tacos"):
+        create_meal(meal=name, cuisine="Mixed", price=10.0, difficulty="MED")
+    record_battle_result(1, 2)
+    record_battle_result(1, 3)
+    record_battle_result(3, 2)
+
+    assert [row["meal"] for row in get_leaderboard("win_pct")] == ["Pizza", "Tacos", "Sushi"]
+    assert [row["win_pct"] for row in get_leaderboard("win_pct")] == [100.0, 50.0, 0.0]
+    assert [row["meal"] for row in get_leaderboard("wins", limit=1, offset=1)] == ["Tacos"]
+    assert get_meal_rank(3, "win_pct") == 2
+    assert get_meal_rank(2, "wins") == 3
+
+    with sql_utils.get_db_connection() as conn:
+        for sort_by in ("wins", "win_pct", "rating"):
+            plan = " ".join(row[-1] for row in conn.execute(
+                "EXPLAIN QUERY PLAN " + normalize_whitespace(kitchen_model._leaderboard_query(sort_by, 10, 0)[0]), (10, 0)))
+            assert f"USING INDEX idx_meals_leaderboard_{sort_by}" in plan
+            assert "TEMP B-TREE" not in plan
+
+def test_leaderboard_keyset_pages(sqlite_db):
+    """Test that walking the cursor pages gives the whole leaderboard, ties included, off the index."""
+    for i in range(7):
+        create_meal(meal=f"Meal {i}", cuisine="Mixed", price=10.0, difficulty="MED")
+    # Meals 1 and 2 tie on wins, 3, 4 and 5 tie on win_pct, 7 never battles
+    for winner_id, loser_id in ((1, 3), (2, 4), (1, 5), (2, 6), (3, 4), (4, 5), (5, 3), (6, 1)):
+        record_battle_result(winner_id, loser_id)
+
+    for sort_by in ("wins", "win_pct", "rating"):
+        pages = []
+        cursor = None
+        while True:
+            page = get_leaderboard_page(sort_by, cursor, limit=2)
+            pages.append(page["leaderboard"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert [len(meals) for meals in pages] == [2, 2, 2]
+        assert [meal for meals in pages for meal in meals] == get_leaderboard(sort_by)
+
+        with sql_utils.get_db_connection() as conn:
+            deep_cursor = "1,6" if sort_by == "wins" else "0.5,6"
+            query, params = kitchen_model._leaderboard_page_query(sort_by, deep_cursor, limit=2)
+            plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+        assert f"SEARCH meals USING INDEX idx_meals_leaderboard_{sort_by} ({sort_by}<?)" in plan
+        assert "TEMP B-TREE" not in plan
+
+def test_get_leaderboard_page_invalid_arguments(sqlite_db):
+    """Test errors for an invalid sort key, cursor or page size."""
+    with pytest.raises(ValueError, match="Invalid sort_by parameter: price"):
+        get_leaderboard_page("price")
+    with pytest.raises(ValueError, match="Invalid cursor: 3"):
+        get_leaderboard_page("wins", cursor="3")
+    with pytest.raises(ValueError, match="Invalid cursor: 0.5,2"):
+        get_leaderboard_page("wins", cursor="0.5,2")
+    with pytest.raises(ValueError, match="Invalid limit: 0. Must be between 1 and 500."):
+        get_leaderboard_page("wins", limit=0)
+
+def test_win_pct_migration_keeps_meals(tmp_path, monkeypatch):
+    """Test that the win_pct rebuild of a populated meals table keeps every id, stat and soft delete."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "meal_max.db"))
+    sql_utils.set_pool(None)
+    sql_dir = os.path.join(os.path.dirname(__file__), "..", "sql")
+    with open(os.path.join(sql_dir, "create_meal_table.sql")) as fh:
+        script = fh.read()
+    columns = "id, meal, cuisine, price, difficulty, battles, wins, deleted"
+    meals = [(1, "Pizza", "Italian", 10.0, "MED", 4, 3, 0), (2, "Sushi", "Japanese", 15.0, "HIGH", 0, 0, 0),
+             (5, "Tacos", "Mexican", 8.5, "LOW", 3, 1, 1), (9, "Ramen", "Japanese", 12.0, None, 2, 2, 0)]
+    with sql_utils.get_db_connection() as conn:
+        conn.executescript(script)
+        conn.executemany(f"INSERT INTO meals ({columns}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", meals)
+        # Meals 10 to 12 were deleted for good
+        conn.execute("UPDATE sqlite_sequence SET seq = 12 WHERE name = 'meals'")
+        conn.commit()
+
+    try:
+        assert "002_meal_win_pct.sql" in sql_utils.apply_migrations(os.path.join(sql_dir, "migrations"))
+
+        with sql_utils.get_db_connection() as conn:
+            assert conn.execute(f"SELECT {columns} FROM meals ORDER BY id").fetchall() == meals
+            assert conn.execute("SELECT id, win_pct FROM meals ORDER BY id").fetchall() == \
+                [(1, 0.75), (2, None), (5, 1 / 3), (9, 1.0)]
+            assert conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'meals'").fetchone() == (12,)
+            assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+        with pytest.raises(ValueError, match="Meal with ID 5 has been deleted"):
+            get_meal_by_id(5)
+        assert [row["id"] for row in get_leaderboard("win_pct")] == [9, 1]
+        create_meal(meal="Curry", cuisine="Indian", price=11.0, difficulty="MED")
+        assert get_meal_by_name("Curry").id == 13
+    finally:
+        sql_utils.set_pool(None)
+
+def test_leaderboard_on_upgraded_database(upgraded_db):
+    """Test that the migrations alone rebuild meals of a database from before win_pct, keeping its meals."""
+    # The committed database holds Spaghetti (id 1, deleted), Sushi (id 2) and Taco (id 3)
+    record_battle_result(3, 2)
+
+    assert [(row["meal"], row["win_pct"]) for row in get_leaderboard("win_pct")] == [("Taco", 100.0), ("Sushi", 0.0)]
+    with pytest.raises(ValueError, match="Meal with ID 1 has been deleted"):
+        get_meal_by_id(1)
+    # AUTOINCREMENT carries on from before the rebuild
+    create_meal(meal="Pizza", cuisine="Italian", price=10.0, difficulty="MED")
+    assert get_meal_by_name("Pizza").id == 4
+
+######################################################
+#
+#    Bulk lookups and results
+#
+######################################################
+
+def test_get_meals_by_names(mock_cursor):
+    """Test retrieving several meals by name, in the order requested."""
+
+    mock_cursor.fetchall.return_value = [(2, "Sushi", "Japanese", 15.0, "HIGH", False),
+                                         (1, "Pizza", "Italian", 10.0, "MED", False)]
+
+    result = get_meals_by_names(["Pizza", "Sushi"])
+
+    assert result == [Meal(1, "Pizza", "Italian", 10.0, "MED"), Meal(2, "Sushi", "Japanese", 15.0, "HIGH")]
+    assert mock_cursor.execute.call_count == 1
+    assert mock_cursor.execute.call_args[0][1] == ["Pizza", "Sushi"]
+
+def test_get_meals_by_names_batches(mock_cursor):
+    """Test that long name lists are looked up in batches."""
+
+    names = [f"Meal {i}" for i in range(kitchen_model.SQL_BATCH_SIZE + 1)]
+    mock_cursor.fetchall.side_effect = [
+        [(i, f"Meal {i}", "Mixed", 10.0, "LOW", False) for i in range(kitchen_model.SQL_BATCH_SIZE)],
+        [(kitchen_model.SQL_BATCH_SIZE, names[-1], "Mixed", 10.0, "LOW", False)],
+    ]
+
+    assert [meal.meal for meal in get_meals_by_names(names)] == names
+    assert mock_cursor.execute.call_count == 2
+
+def test_get_meals_by_names_not_found(mock_cursor):
+    """Test error when one of the names is not in the catalog."""
+
+    mock_cursor.fetchall.return_value = [(1, "Pizza", "Italian", 10.0, "MED", False)]
+
+    with pytest.raises(ValueError, match="Meal with name Sushi not found"):
+        get_meals_by_names(["Pizza", "Sushi"])
+
+def test_record_battle_results(sqlite_db):
+    """Test against a real database that a batch of results is aggregated and logged."""
+    for name in ("Pizza", "Sushi", "Tacos"):
+        create_meal(meal=name, cuisine="Mixed", price=10.0, difficulty="MED")
+
+    assert record_battle_results([(1, 2), (1, 3), (3, 2)]) == 3
+
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("SELECT id, battles, wins FROM meals ORDER BY id").fetchall() == [(1, 2, 2), (2, 2, 0), (3, 2, 1)]
+        assert conn.execute("SELECT COUNT(*) FROM battle_log").fetchone()[0] == 3
+
+def test_record_battle_results_is_atomic(sqlite_db):
+    """Test that one deleted meal rejects the whole batch."""
+    for name in ("Pizza", "Sushi", "Tacos"):
+        create_meal(meal=name, cuisine="Mixed", price=10.0, difficulty="MED")
+    delete_meal(3)
+
+    with pytest.raises(ValueError, match="Meal with ID 3 has been deleted"):
+        record_battle_results([(1, 2), (1, 3)])
+
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("SELECT SUM(battles) FROM meals").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM battle_log").fetchone()[0] == 0
+
+######################################################
+#
+#    Meal cache
+#
+######################################################
+
+@pytest.fixture
+def meal_cache(sqlite_db):
+    """Fixture starting each test with an empty meal cache and one meal in the catalog."""
+    kitchen_model.meal_cache.clear()
+    create_meal(meal="Pizza", cuisine="Italian", price=10.0, difficulty="MED")
+    yield kitchen_model.meal_cache
+    kitchen_model.meal_cache.clear()
+
+def test_meal_cache_hit_by_name_and_id(meal_cache, mocker):
+    """Test that a meal looked up by name is then served by name and by id without querying it."""
+    lookup = mocker.spy(kitchen_model, "get_meal_by_name")
+    pizza = get_meal_by_name_cached("Pizza")
+
+    assert get_meal_by_name_cached("Pizza") is pizza
+    assert get_meal_by_id_cached(1) is pizza
+    assert lookup.call_count == 1
+    stats = meal_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+def test_meal_cache_invalidated_by_delete(meal_cache):
+    """Test that a deleted meal is not served from the cache."""
+    get_meal_by_name_cached("Pizza")
+
+    delete_meal(1)
+
+    with pytest.raises(ValueError, match="Meal with name Pizza has been deleted"):
+        get_meal_by_name_cached("Pizza")
+
+def test_meal_cache_sees_other_workers(meal_cache):
+    """Test that a change written by another process bumps the stamp and drops the cached meal."""
+    get_meal_by_id_cached(1)
+    version = get_catalog_version()
+
+    # Another worker edits the meal directly; the trigger bumps the stamp
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("UPDATE meals SET price = 20.0 WHERE id = 1")
+        conn.commit()
+
+    assert get_catalog_version() == version + 1
+    assert get_meal_by_id_cached(1).price == 20.0
+
+def test_catalog_version_ignores_stats(meal_cache):
+    """Test that battles do not invalidate the cache."""
+    create_meal(meal="Sushi", cuisine="Japanese", price=15.0, difficulty="HIGH")
+    version = get_catalog_version()
+
+    record_battle_result(1, 2)
+
+    assert get_catalog_version() == version
+
+def test_catalog_version_survives_clear(meal_cache, monkeypatch):
+    """Test that clearing the meals moves the stamp forward rather than resetting it."""
+    monkeypatch.setenv("SQL_CREATE_TABLE_PATH", os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql"))
+    version = get_catalog_version()
+
+    kitchen_model.clear_meals()
+
+    assert get_catalog_version() > version
+
+def test_meal_cache_on_upgraded_database(upgraded_db):
+    """Test that the migrations alone give a database from before the cache its version stamp and triggers."""
+    kitchen_model.meal_cache.clear()
+    assert get_meal_by_name_cached("Sushi").id == 2
+    version = get_catalog_version()
+
+    delete_meal(2)
+
+    assert get_catalog_version() == version + 1
+    with pytest.raises(ValueError, match="Meal with name Sushi has been deleted"):
+        get_meal_by_name_cached("Sushi")
+    kitchen_model.meal_cache.clear()
+
+######################################################
+#
+#    Filtering and search
+#
+######################################################
+
+@pytest.fixture
+def catalog(sqlite_db):
+    """Fixture adding twelve meals across three cuisines; meal 12 is deleted and meals 1-3 have battles."""
+    cuisines = ["Italian", "Japanese", "Mexican"]
+    difficulties = ["LOW", "MED", "HIGH"]
+    for i in range(1, 13):
+        create_meal(meal=f"Meal {i}", cuisine=cuisines[i % 3], price=float(20 - i), difficulty=difficulties[i % 2])
+    create_meal(meal="Spaghetti Bolognese", cuisine="Italian", price=14.0, difficulty="MED")
+    create_meal(meal="Spaghetti Carbonara", cuisine="Italian", price=13.0, difficulty="MED")
+    record_battle_result(1, 2)
+    record_battle_result(1, 3)
+    record_battle_result(2, 3)
+    delete_meal(12)
+
+def test_list_meals_filters(catalog):
+    """Test that every filter narrows the listing and deleted meals are left out."""
+    assert [meal["id"] for meal in list_meals(cuisine="Mexican")["meals"]] == [2, 5, 8, 11]
+    assert [meal["id"] for meal in list_meals(cuisine="Italian", difficulty="LOW")["meals"]] == [6]
+    assert [meal["id"] for meal in list_meals(min_price=9, max_price=11)["meals"]] == [9, 10, 11]
+    assert [meal["id"] for meal in list_meals(min_battles=2)["meals"]] == [1, 2, 3]
+    assert list_meals(cuisine="Thai") == {"meals": [], "next_cursor": None}
+    assert list_meals(min_price=12, max_price=12)["meals"] == [
+        {"id": 8, "meal": "Meal 8", "cuisine": "Mexican", "price": 12.0, "difficulty": "LOW", "battles": 0, "wins": 0}
+    ]
+    assert list_meals(min_price=8, max_price=8)["meals"] == []
+
+def test_list_meals_keyset_pages(catalog):
+    """Test that following next_cursor walks every meal once, in order, for each sort key."""
+    for sort, key in (("id", lambda meal: meal["id"]),
+                      ("price", lambda meal: (meal["price"], meal["id"])),
+                      ("battles", lambda meal: (meal["battles"], meal["id"]))):
+        seen = []
+        cursor = None
+        while True:
+            page = list_meals(sort=sort, cursor=cursor, limit=5)
+            seen.extend(page["meals"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert len(seen) == 13
+        assert seen == sorted(seen, key=key)
+        assert len({meal["id"] for meal in seen}) == 13
+
+def test_list_meals_invalid_arguments(catalog):
+    """Test that invalid filters, sorts, cursors and limits are rejected."""
+    with pytest.raises(ValueError, match="Invalid sort: wins"):
+        list_meals(sort="wins")
+    with pytest.raises(ValueError, match="Invalid difficulty level: EASY"):
+        list_meals(difficulty="EASY")
+    with pytest.raises(ValueError, match="Invalid limit: 0"):
+        list_meals(limit=0)
+    with pytest.raises(ValueError, match="Invalid price range: 10 to 5"):
+        list_meals(min_price=10, max_price=5)
+    with pytest.raises(ValueError, match="Invalid cursor: abc"):
+        list_meals(sort="price", cursor="abc")
+
+@pytest.mark.parametrize("filters, index", [
+    ({"cuisine": "Italian"}, "idx_meals_cuisine"),
+    ({"difficulty": "LOW", "cursor": "3"}, "idx_meals_difficulty"),
+    ({"cuisine": "Italian", "min_price": 5.0}, "idx_meals_cuisine"),
+    ({"min_price": 5.0, "max_price": 10.0, "sort": "price"}, "idx_meals_price"),
+    ({"min_price": 5.0, "sort": "price", "cursor": "6.0,4"}, "idx_meals_price"),
+    ({"min_battles": 1, "sort": "battles"}, "idx_meals_battles"),
+    ({"sort": "battles", "cursor": "0,7"}, "idx_meals_battles"),
+])
+def test_list_meals_query_plans(catalog, filters, index):
+    """Test that filtered pages are read off an index in page order, without scanning or sorting meals."""
+    query, params = kitchen_model._list_meals_query(**filters)
+    with sql_utils.get_db_connection() as conn:
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + normalize_whitespace(query), params))
+    assert f"USING INDEX {index}" in plan
+    assert "SCAN meals" not in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_migrations_survive_clear(catalog, monkeypatch):
+    """Test that clearing the meals puts the indexes and search triggers back."""
+    monkeypatch.setenv("SQL_CREATE_TABLE_PATH", os.path.join(os.path.dirname(__file__), "..", "sql", "create_meal_table.sql"))
+
+    kitchen_model.clear_meals()
+    create_meal(meal="Spaghetti Aglio", cuisine="Italian", price=9.0, difficulty="LOW")
+
+    assert [meal["meal"] for meal in search_meals("spaghetti")] == ["Spaghetti Aglio"]
+    with sql_utils.get_db_connection() as conn:
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_meals_cuisine", "idx_meals_difficulty", "idx_meals_price", "idx_meals_battles"} <= indexes
+
+def test_search_meals(catalog):
+    """Test prefix, multi-word and case-insensitive name search."""
+    assert [meal["meal"] for meal in search_meals("spag")] == ["Spaghetti Bolognese", "Spaghetti Carbonara"]
+    assert [meal["meal"] for meal in search_meals("CARB spag")] == ["Spaghetti Carbonara"]
+    assert [meal["meal"] for meal in search_meals("spag", limit=1)] == ["Spaghetti Bolognese"]
+    assert search_meals("lasagna") == []
+
+def test_search_meals_follows_changes(catalog):
+    """Test that renamed and deleted meals are found by their current state only."""
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("UPDATE meals SET meal = 'Penne Arrabbiata' WHERE meal = 'Spaghetti Carbonara'")
+        conn.commit()
+    delete_meal(13)
+
+    assert search_meals("spaghetti") == []
+    assert [meal["meal"] for meal in search_meals("penne")] == ["Penne Arrabbiata"]
+    assert search_meals("Meal 12") == []
+
+def test_search_meals_ignores_operators(catalog):
+    """Test that FTS5 syntax in the query is treated as plain words."""
+    # Every word is required, so no name matches all of spaghetti, OR and meal
+    assert search_meals('spaghetti" OR "meal') == []
+    assert [meal["meal"] for meal in search_meals('"carbonara')] == ["Spaghetti Carbonara"]
+    with pytest.raises(ValueError, match="Search query must contain at least one letter or digit"):
+        search_meals("*")
+
+def test_search_meals_query_plan(catalog):
+    """Test that a search looks meals up by id from the full-text index."""
+    with sql_utils.get_db_connection() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN " + normalize_whitespace(kitchen_model._SEARCH_MEALS_QUERY), ('"spag"*', 10)))
+    assert "VIRTUAL TABLE INDEX" in plan
+    assert "SEARCH meals USING INTEGER PRIMARY KEY (rowid=?)" in plan
+
+######################################################
+#
+#    Windowed leaderboards
+#
+######################################################
+
+HOUR = 3600
+DAY = 24 * HOUR
+# A fixed "now", 30 minutes into an hour and 13.5 hours into a day
+NOW = 100 * DAY + 13 * HOUR + 1800
+
+def log_battle(winner_id, loser_id, battled_at):
+    """Records a battle at a given time through the same statements as write_battle_result."""
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("UPDATE meals SET battles = battles + 1, wins = wins + 1 WHERE id = ?", (winner_id,))
+        conn.execute("UPDATE meals SET battles = battles + 1 WHERE id = ?", (loser_id,))
+        conn.execute("INSERT INTO battle_log (winner_id, loser_id, battled_at) VALUES (?, ?, ?)",
+                     (winner_id, loser_id, battled_at))
+        conn.commit()
+
+@pytest.fixture
+def three_meals(sqlite_db):
+    """Fixture adding three meals to a fresh database."""
+    for name in ("Pizza", "Sushi", "Tacos"):
+        create_meal(meal=name, cuisine="Mixed", price=10.0, difficulty="MED")
+
+def test_parse_window():
+    """Test parsing windows in hours and days."""
+    assert parse_window("1h") == HOUR
+    assert parse_window("7d") == 7 * DAY
+    for window in ("0h", "24", "1w", "-1d", "", "1.5h"):
+        with pytest.raises(ValueError, match="Invalid window"):
+            parse_window(window)
+
+def test_window_buckets():
+    """Test that whole days come from the daily rollup and the partial days at each end from the hourly one."""
+    assert kitchen_model._window_buckets(2 * HOUR, NOW) == [("meal_stats_hourly", NOW - 1800 - 2 * HOUR, NOW - 1800 + HOUR)]
+    assert kitchen_model._window_buckets(3 * DAY, NOW) == [
+        ("meal_stats_hourly", 97 * DAY + 13 * HOUR, 98 * DAY),
+        ("meal_stats_daily", 98 * DAY, 100 * DAY),
+        ("meal_stats_hourly", 100 * DAY, 100 * DAY + 14 * HOUR),
+    ]
+    # Windows starting on a day boundary need no leading hourly range
+    assert kitchen_model._window_buckets(DAY + 13 * HOUR + 1800, NOW)[0] == ("meal_stats_daily", 99 * DAY, 100 * DAY)
+
+def test_windowed_leaderboard(three_meals):
+    """Test that only the battles in the window count, while the all-time leaderboard counts all of them."""
+    log_battle(1, 2, NOW - 10 * DAY)
+    log_battle(1, 3, NOW - 10 * DAY)
+    log_battle(2, 3, NOW - 2 * DAY)
+    log_battle(3, 2, NOW - 1 * HOUR)
+    log_battle(3, 1, NOW - 60)
+
+    assert [(row["meal"], row["battles"], row["wins"]) for row in get_leaderboard(window="24h", now=NOW)] == [
+        ("Tacos", 2, 2), ("Pizza", 1, 0), ("Sushi", 1, 0)]
+    assert [(row["meal"], row["win_pct"]) for row in get_leaderboard("win_pct", window="3d", now=NOW)] == [
+        ("Tacos", 66.7), ("Sushi", 50.0), ("Pizza", 0.0)]
+    assert [row["meal"] for row in get_leaderboard(window="30d", now=NOW, limit=1, offset=1)] == ["Tacos"]
+    assert [row["meal"] for row in get_leaderboard()] == ["Pizza", "Tacos", "Sushi"]
+    assert get_leaderboard(window="1h", now=NOW - 5 * DAY) == []
+
+def test_windowed_leaderboard_follows_battles(three_meals):
+    """Test that battles recorded through the model show up in the current window."""
+    record_battle_result(2, 1)
+    record_battle_results([(2, 3), (3, 1)])
+    delete_meal(3)
+
+    assert [(row["meal"], row["wins"]) for row in get_leaderboard(window="1h")] == [("Sushi", 2), ("Pizza", 0)]
+
+def test_windowed_leaderboard_matches_battle_log(three_meals):
+    """Test random battles over two weeks against sums computed straight from battle_log."""
+    rng = random.Random(7)
+    for _ in range(300):
+        winner, loser = rng.sample([1, 2, 3], 2)
+        log_battle(winner, loser, NOW - rng.randrange(14 * DAY))
+
+    with sql_utils.get_db_connection() as conn:
+        for window in ("1h", "5h", "24h", "36h", "3d", "10d"):
+            start = (NOW - parse_window(window)) // HOUR * HOUR
+            expected = {}
+            for meal_id in (1, 2, 3):
+                wins, losses = conn.execute("""
+                    SELECT SUM(winner_id = ?), SUM(loser_id = ?) FROM battle_log WHERE battled_at >= ?
+                """, (meal_id, meal_id, start)).fetchone()
+                if wins or losses:
+                    expected[meal_id] = (wins + losses, wins)
+            rows = get_leaderboard(window=window, now=NOW)
+            assert {row["id"]: (row["battles"], row["wins"]) for row in rows} == expected
+
+def test_rollups_rebuilt_from_battle_log(three_meals):
+    """Test that re-running the rollup migration backfills the rollups from battle_log."""
+    log_battle(1, 2, NOW - HOUR)
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("DELETE FROM schema_migrations WHERE name = '007_battle_rollups.sql'")
+        conn.commit()
+
+    sql_utils.apply_migrations(os.path.join(os.path.dirname(__file__), "..", "sql", "migrations"))
+    log_battle(2, 1, NOW)
+
+    assert [(row["meal"], row["battles"], row["wins"]) for row in get_leaderboard(window="2h", now=NOW)] == [
+        ("Pizza", 2, 1), ("Sushi", 2, 1)]
+
+def test_windowed_leaderboard_query_plan(three_meals):
+    """Test that each bucket range is a primary key range search, never a scan of battle_log."""
+    query, params = kitchen_model._windowed_leaderboard_query("wins", 30 * DAY, NOW, 10, 0)
+    with sql_utils.get_db_connection() as conn:
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + normalize_whitespace(query), params))
+    assert "SEARCH meal_stats_hourly USING PRIMARY KEY (bucket>? AND bucket<?)" in plan
+    assert "SEARCH meal_stats_daily USING PRIMARY KEY (bucket>? AND bucket<?)" in plan
+    assert "battle_log" not in plan
+    assert "SCAN meal_stats" not in plan
+
+
+
+######################################################
+#
+#    Compaction
+#
+######################################################
+
+def table_ids(table):
+    with sql_utils.get_db_connection() as conn:
+        return [row[0] for row in conn.execute(f"SELECT id FROM {table} ORDER BY id")]
+
+def test_compact_meals_keeps_deleted_errors(three_meals):
+    """Test that archived meals are gone from meals but still reported as deleted, not missing."""
+    record_battle_result(1, 2)
+    delete_meal(2)
+
+    assert compact_meals()["archived"] == 1
+
+    assert table_ids("meals") == [1, 3]
+    assert table_ids("meals_archive") == [2]
+    for lookup in (lambda: get_meal_by_id(2), lambda: get_meal_by_id_cached(2), lambda: delete_meal(2),
+                   lambda: update_meal_stats(2, "win"), lambda: record_battle_result(1, 2),
+                   lambda: record_battle_results([(1, 3), (2, 3)]), lambda: get_meal_rank(2)):
+        with pytest.raises(ValueError, match="Meal with ID 2 has been deleted"):
+            lookup()
+    for lookup in (lambda: get_meal_by_name("Sushi"), lambda: get_meals_by_names(["Pizza", "Sushi"])):
+        with pytest.raises(ValueError, match="Meal with name Sushi has been deleted"):
+            lookup()
+    with pytest.raises(ValueError, match="Meal with ID 4 not found"):
+        get_meal_by_id(4)
+    with pytest.raises(ValueError, match="Meal with name 'Sushi' already exists"):
+        create_meal("Sushi", "Japanese", 12.0, "LOW")
+
+    # The archived meal's battle still counts for the winner
+    assert [(row["meal"], row["battles"], row["wins"]) for row in get_leaderboard()] == [("Pizza", 1, 1)]
+    assert search_meals("sushi") == []
+
+def test_compact_meals_in_batches_skips_combatants(sqlite_db):
+    """Test that every deleted meal is archived batch by batch, except those still waiting to battle."""
+    for i in range(7):
+        create_meal(f"Meal {i}", "Thai", 5.0, "LOW")
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("INSERT INTO battle_combatants (meal_id) VALUES (4)")
+        conn.commit()
+    for meal_id in range(1, 7):
+        delete_meal(meal_id)
+
+    assert compact_meals(batch_size=2, vacuum_pages=0) == {"archived": 5, "freed_pages": 0}
+    assert compact_meals(batch_size=2, vacuum_pages=0)["archived"] == 0
+
+    assert table_ids("meals") == [4, 7]
+    assert table_ids("meals_archive") == [1, 2, 3, 5, 6]
+
+def test_compact_meals_frees_pages(sqlite_db):
+    """Test that compaction gives back at most vacuum_pages per call, on a database already in incremental auto-vacuum."""
+    def create_and_delete(start):
+        for i in range(start, start + 200):
+            create_meal(f"Meal {i} " + "x" * 500, "Thai", 5.0, "LOW")
+            delete_meal(i + 1)
+
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    create_and_delete(0)
+    first = compact_meals()
+    create_and_delete(200)
+    second = compact_meals(vacuum_pages=5)
+    third = compact_meals()
+
+    assert first["archived"] == 200 and first["freed_pages"] > 0
+    assert second == {"archived": 200, "freed_pages": 5}
+    assert third["archived"] == 0 and third["freed_pages"] > 0
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+def test_compact_meals_invalid_batch_size(sqlite_db):
+    """Test that a non-positive batch size is rejected."""
+    with pytest.raises(ValueError, match="Invalid batch size: 0"):
+        compact_meals(batch_size=0)
+
+def test_compaction_query_plan(sqlite_db):
+    """Test that deleted meals are found through their partial index, which holds no live meal."""
+    with sql_utils.get_db_connection() as conn:
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + kitchen_model._COMPACTION_QUERY, (10,)))
+    assert "SCAN meals USING INDEX idx_meals_deleted" in plan
+    assert "TEMP B-TREE" not in plan
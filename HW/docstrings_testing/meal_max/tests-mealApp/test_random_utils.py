@@ -1,7 +1,20 @@
+import threading
+import time
+
 import pytest
 import requests
 
-from meal_max.utils.random_utils import get_random
+from meal_max.utils import random_utils
+from meal_max.utils.random_utils import (
+    LocalRandomProvider,
+    RandomOrgProvider,
+    RandomProvider,
+    SeededRandomProvider,
+    get_random,
+    get_random_batch,
+    get_random_provider,
+    set_random_provider
+)
 
 
 RANDOM_NUMBER = 42
@@ -46,4 +59,143 @@ def test_get_random_invalid_response(mock_random_org):
     mock_random_org.text = "invalid_response"
 
     with pytest.raises(ValueError, match="Invalid response from random.org: invalid_response"):
-        get_random()
\ No newline at end of file
+        get_random()
+
+def test_get_random_batch(mock_random_org):
+    """Test retrieving several random numbers in one request."""
+    mock_random_org.text = "0.25\n0.5\n0.75\n"
+
+    assert get_random_batch(3) == [0.25, 0.5, 0.75]
+    requests.get.assert_called_once_with("https://www.random.org/decimal-fractions/?num=3&dec=2&col=1&format=plain&rnd=new", timeout=5)
+
+def test_get_random_batch_splits_requests(mocker, mock_random_org):
+    """Test that large batches are split into requests random.org accepts."""
+    mocker.patch.object(random_utils, "RANDOM_ORG_MAX_BATCH", 2)
+    responses = [mocker.Mock(text="0.1\n0.2\n"), mocker.Mock(text="0.3\n")]
+    requests.get.side_effect = responses
+
+    assert get_random_batch(3) == [0.1, 0.2, 0.3]
+    assert requests.get.call_count == 2
+
+def test_get_random_batch_short_response(mock_random_org):
+    """Simulate random.org returning fewer numbers than requested."""
+    mock_random_org.text = "0.25\n"
+
+    with pytest.raises(RuntimeError, match="Expected 2 numbers from random.org, got 1"):
+        get_random_batch(2)
+
+######################################################
+#
+#    Providers
+#
+######################################################
+
+def wait_until(condition, timeout=2.0):
+    """Polls a condition set by a background thread."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.001)
+
+@pytest.fixture
+def fake_fetch():
+    """Fixture for a random.org stand-in that records the batch sizes it was asked for."""
+    calls = []
+    def fetch(count):
+        calls.append(count)
+        return [0.5] * count
+    fetch.calls = calls
+    return fetch
+
+def test_random_provider_is_abstract():
+    """Test that a provider must implement _draw."""
+    with pytest.raises(TypeError, match="_draw"):
+        RandomProvider()
+
+def test_local_provider_values():
+    """Test that the local provider draws two-decimal fractions in [0, 1)."""
+    numbers = LocalRandomProvider().get_random_batch(1000)
+    assert all(0 <= number < 1 and round(number, 2) == number for number in numbers)
+
+def test_seeded_provider_is_repeatable():
+    """Test that the same seed gives the same sequence."""
+    assert SeededRandomProvider(3).get_random_batch(20) == SeededRandomProvider(3).get_random_batch(20)
+    assert SeededRandomProvider(3).get_random_batch(20) != SeededRandomProvider(4).get_random_batch(20)
+
+def test_random_org_provider_prefetches(fake_fetch):
+    """Test that numbers are served from the prefetched pool, one request per batch."""
+    provider = RandomOrgProvider(batch_size=10, low_water=2, fallback=SeededRandomProvider(), fetch=fake_fetch)
+    wait_until(lambda: provider.stats()["pooled"] == 10)
+
+    assert [provider.get_random() for _ in range(7)] == [0.5] * 7
+    assert fake_fetch.calls == [10]
+
+def test_random_org_provider_refills_at_low_water(fake_fetch):
+    """Test that a refill starts once the pool drops to the low-water mark."""
+    provider = RandomOrgProvider(batch_size=10, low_water=2, fallback=SeededRandomProvider(), fetch=fake_fetch)
+    wait_until(lambda: provider.stats()["pooled"] == 10)
+
+    provider.get_random_batch(8)
+
+    wait_until(lambda: provider.stats()["refills"] == 2)
+    assert provider.stats()["pooled"] == 12
+    assert fake_fetch.calls == [10, 10]
+
+def test_random_org_provider_fails_over_when_slow():
+    """Test that a caller does not wait on a slow random.org longer than wait_timeout."""
+    release = threading.Event()
+    def slow_fetch(count):
+        release.wait(2)
+        return [0.5] * count
+
+    fallback = SeededRandomProvider(1)
+    provider = RandomOrgProvider(batch_size=10, low_water=2, wait_timeout=0.01, fallback=fallback,
+                                 fetch=slow_fetch)
+    start = time.monotonic()
+    number = provider.get_random()
+    release.set()
+
+    assert time.monotonic() - start < 1
+    assert number == SeededRandomProvider(1).get_random()
+    assert provider.stats()["failovers"] == 1
+    assert provider.stats()["served_by_fallback"] == 1
+
+def test_random_org_provider_backs_off_after_failure():
+    """Test that a failed refill is not retried before retry_after and numbers come from the fallback."""
+    calls = []
+    def failing_fetch(count):
+        calls.append(count)
+        raise RuntimeError("Request to random.org timed out.")
+
+    provider = RandomOrgProvider(batch_size=10, low_water=2, retry_after=60, fallback=SeededRandomProvider(),
+                                 fetch=failing_fetch)
+    wait_until(lambda: provider.stats()["refill_failures"] == 1)
+
+    assert len(provider.get_random_batch(5)) == 5
+    stats = provider.stats()
+    assert calls == [10]
+    assert stats["served_by_fallback"] == 5
+    assert stats["served"] == 5
+
+def test_random_org_provider_fetches_large_batches_directly(fake_fetch):
+    """Test that a batch bigger than the pool is fetched in one request instead of failing over."""
+    provider = RandomOrgProvider(batch_size=10, low_water=2, fallback=SeededRandomProvider(), fetch=fake_fetch,
+                                 prefetch=False)
+
+    assert provider.get_random_batch(25) == [0.5] * 25
+    assert 25 in fake_fetch.calls
+    assert provider.stats()["failovers"] == 0
+
+def test_get_random_provider_from_settings(mocker):
+    """Test that the process-wide provider follows RANDOM_PROVIDER and can be replaced."""
+    mocker.patch.object(random_utils, "RANDOM_PROVIDER", "local")
+    set_random_provider(None)
+    try:
+        assert isinstance(get_random_provider(), LocalRandomProvider)
+        assert get_random_provider() is get_random_provider()
+
+        seeded = SeededRandomProvider()
+        set_random_provider(seeded)
+        assert get_random_provider() is seeded
+    finally:
+        set_random_provider(None)
@@ -0,0 +1,154 @@
+import os
+import random
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from meal_max.models import kitchen_model, rating_model
+from meal_max.models.kitchen_model import compact_meals, create_meal, delete_meal, get_leaderboard, get_meal_rank, record_battle_result, record_battle_results
+from meal_max.models.rating_model import elo_update, expected_score, recompute_ratings, replay_ratings, replay_steps
+from meal_max.utils import sql_utils
+
+
+@pytest.fixture
+def meals(sqlite_db):
+    """Fixture adding six meals to a fresh database."""
+    for i in range(6):
+        create_meal(meal=f"Meal {i + 1}", cuisine="Mixed", price=10.0, difficulty="MED")
+    return list(range(1, 7))
+
+def stored_ratings():
+    with sql_utils.get_db_connection() as conn:
+        return [row[0] for row in conn.execute("SELECT rating FROM meals ORDER BY id")]
+
+def random_history(meal_count, battles, seed):
+    rng = np.random.default_rng(seed)
+    winners = rng.integers(0, meal_count, size=battles)
+    losers = (winners + rng.integers(1, meal_count, size=battles)) % meal_count
+    return winners, losers
+
+def scalar_replay(winners, losers, meal_count):
+    ratings = [rating_model.INITIAL_RATING] * meal_count
+    for winner, loser in zip(winners.tolist(), losers.tolist()):
+        ratings[winner], ratings[loser] = elo_update(ratings[winner], ratings[loser])
+    return ratings
+
+
+##################################################
+# Elo Test Cases
+##################################################
+
+def test_elo_update():
+    """Test that an even battle moves both ratings by K / 2 and an upset by more."""
+    assert elo_update(1500.0, 1500.0) == (1516.0, 1484.0)
+    assert expected_score(1500.0, 1500.0) == 0.5
+
+    favourite, underdog = 1700.0, 1300.0
+    expected_win = elo_update(favourite, underdog)
+    upset = elo_update(underdog, favourite)
+    assert 0 < expected_win[0] - favourite < 16 < upset[0] - underdog
+    assert sum(upset) == pytest.approx(favourite + underdog)
+
+def test_kitchen_model_loads_without_numpy():
+    """Test that recording battles and the CLI do not need NumPy, which only the replay uses."""
+    code = "import sys; sys.modules['numpy'] = None; import meal_max.models.kitchen_model, meal_max.cli"
+    meal_max_dir = os.path.join(os.path.dirname(__file__), "..")
+    subprocess.run([sys.executable, "-c", code], cwd=meal_max_dir, check=True)
+
+def test_replay_steps():
+    """Test that battles in a step share no meal and follow every earlier battle of their meals."""
+    winners, losers = random_history(10, 500, seed=1)
+
+    steps = replay_steps(winners, losers, 10)
+
+    last = [-1] * 10
+    for winner, loser, step in zip(winners, losers, steps):
+        assert step > last[winner] and step > last[loser]
+        last[winner] = last[loser] = step
+    for step in np.unique(steps):
+        in_step = steps == step
+        meals = np.concatenate([winners[in_step], losers[in_step]])
+        assert len(np.unique(meals)) == len(meals)
+
+@pytest.mark.parametrize("meal_count, min_vector_step", [(400, 1), (400, 10 ** 9), (3, 1), (3, 10 ** 9)])
+def test_replay_ratings_matches_one_by_one(monkeypatch, meal_count, min_vector_step):
+    """Test that both the vectorized and the one-by-one replay give the sequential ratings."""
+    monkeypatch.setattr(rating_model, "MIN_VECTOR_STEP", min_vector_step)
+    winners, losers = random_history(meal_count, 5000, seed=2)
+
+    ratings = replay_ratings(winners, losers, meal_count)
+
+    np.testing.assert_allclose(ratings, scalar_replay(winners, losers, meal_count), rtol=0, atol=1e-9)
+    assert ratings.sum() == pytest.approx(rating_model.INITIAL_RATING * meal_count)
+
+def test_replay_ratings_no_battles():
+    """Test that meals without battles keep the initial rating."""
+    empty = np.empty(0, dtype=np.int64)
+    assert replay_ratings(empty, empty, 3).tolist() == [rating_model.INITIAL_RATING] * 3
+
+
+##################################################
+# Stored Rating Test Cases
+##################################################
+
+def test_battles_update_ratings_incrementally(meals):
+    """Test that recorded battles, one at a time or in batches, leave the ratings a full replay gives."""
+    rng = random.Random(3)
+    for _ in range(40):
+        winner, loser = rng.sample(meals, 2)
+        record_battle_result(winner, loser)
+    record_battle_results([tuple(rng.sample(meals, 2)) for _ in range(40)])
+    incremental = stored_ratings()
+
+    assert recompute_ratings() == 80
+
+    assert stored_ratings() == pytest.approx(incremental, abs=1e-9)
+    assert sum(incremental) == pytest.approx(rating_model.INITIAL_RATING * len(meals))
+
+def test_recompute_ratings_resets_meals_without_battles(meals):
+    """Test that a recompute overwrites ratings that drifted from the log."""
+    record_battle_result(1, 2)
+    with sql_utils.get_db_connection() as conn:
+        conn.execute("UPDATE meals SET rating = 9999")
+        conn.commit()
+
+    recompute_ratings()
+
+    assert stored_ratings() == [1516.0, 1484.0] + [rating_model.INITIAL_RATING] * 4
+
+def test_recompute_ratings_with_archived_meals(meals):
+    """Test that battles of archived meals are still replayed into the ratings of their opponents."""
+    record_battle_result(2, 1)
+    record_battle_result(2, 3)
+    record_battle_result(3, 4)
+    delete_meal(2)
+    compact_meals(vacuum_pages=0)
+    incremental = stored_ratings()
+
+    assert recompute_ratings() == 3
+
+    assert stored_ratings() == pytest.approx(incremental, abs=1e-9)
+
+def test_rating_leaderboard(meals):
+    """Test that sort=rating ranks an upset winner above a meal with more, easier wins."""
+    # Meal 1 beats the weak meal 3 twice; meal 2 beats meal 1 once it is rated higher
+    record_battle_result(1, 3)
+    record_battle_result(1, 3)
+    record_battle_result(2, 1)
+
+    leaderboard = get_leaderboard("rating")
+
+    assert [row["meal"] for row in leaderboard] == ["Meal 2", "Meal 1", "Meal 3"]
+    assert [row["meal"] for row in get_leaderboard("wins")][0] == "Meal 1"
+    assert leaderboard[0]["rating"] == round(stored_ratings()[1], 1)
+    assert get_meal_rank(1, "rating") == 2
+
+def test_rating_leaderboard_query_plan(meals):
+    """Test that the rating leaderboard is read off its index."""
+    query, params = kitchen_model._leaderboard_query("rating", 10, 0)
+    with sql_utils.get_db_connection() as conn:
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+    assert "USING INDEX idx_meals_leaderboard_rating" in plan
+    assert "TEMP B-TREE" not in plan
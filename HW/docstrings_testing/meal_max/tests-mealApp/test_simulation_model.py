@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from meal_max.models.battle_model import BattleModel
+from meal_max.models.kitchen_model import Meal, create_meal, delete_meal, get_leaderboard
+from meal_max.models.simulation_model import (
+    combatant_1_win_pct,
+    load_meal_scores,
+    score_meals,
+    simulate_battles,
+    simulate_leaderboard,
+    simulate_pair,
+    win_probability
+)
+
+
+@pytest.fixture
+def sample_meals():
+    """Fixture for a few Meal instances with different scores."""
+    return [
+        Meal(id=1, meal="Spaghetti", cuisine="Italian", price=12.5, difficulty="MED"),
+        Meal(id=2, meal="Sushi", cuisine="Japanese", price=15.0, difficulty="HIGH"),
+        Meal(id=3, meal="Tacos", cuisine="Mexican", price=8.0, difficulty="LOW"),
+    ]
+
+@pytest.fixture
+def catalog(sqlite_db, sample_meals):
+    """Fixture adding the sample meals to a fresh database."""
+    for meal in sample_meals:
+        create_meal(meal=meal.meal, cuisine=meal.cuisine, price=meal.price, difficulty=meal.difficulty)
+    return sample_meals
+
+
+##################################################
+# Scoring Test Cases
+##################################################
+
+def test_score_meals_matches_battle_model(sample_meals):
+    """Test that the vectorized scores are the ones BattleModel computes."""
+    battle_model = BattleModel()
+
+    meal_scores = score_meals(sample_meals)
+
+    assert meal_scores.meals == ["Spaghetti", "Sushi", "Tacos"]
+    assert meal_scores.scores.tolist() == [battle_model.get_battle_score(meal) for meal in sample_meals]
+
+def test_load_meal_scores(catalog):
+    """Test scoring the catalog in one query, skipping deleted meals."""
+    delete_meal(2)
+
+    meal_scores = load_meal_scores()
+
+    assert meal_scores.ids.tolist() == [1, 3]
+    assert meal_scores.scores.tolist() == score_meals([catalog[0], catalog[2]]).scores.tolist()
+
+##################################################
+# Win Probability Test Cases
+##################################################
+
+def test_win_probability_matches_battle_rule():
+    """Test the exact probability against every random number random.org can return."""
+    for score_1, score_2 in [(85.5, 117.0), (10.0, 10.0), (0.0, 250.0), (40.0, 39.99), (12.0, 22.0)]:
+        delta = abs(score_1 - score_2) / 100
+        expected = sum(delta > k / 100 for k in range(100)) / 100
+        assert win_probability(score_1, score_2) == expected
+
+def test_win_probability_elementwise():
+    """Test that array arguments give an array of probabilities."""
+    result = win_probability(np.array([0.0, 0.0]), np.array([50.0, 10.0]))
+    assert result.tolist() == [0.5, 0.1]
+
+def test_simulate_pair_converges(sample_meals):
+    """Test that the Monte-Carlo estimate is close to the exact probability."""
+    score_1, score_2 = score_meals(sample_meals[:2]).scores
+
+    estimate = simulate_pair(score_1, score_2, 200000, seed=7)
+
+    assert estimate == pytest.approx(win_probability(score_1, score_2), abs=0.01)
+    assert simulate_pair(score_1, score_2, 1000, seed=7) == simulate_pair(score_1, score_2, 1000, seed=7)
+
+def test_simulate_pair_invalid_count():
+    """Test error for a number of simulations out of range."""
+    with pytest.raises(ValueError, match="Invalid number of battles: 0"):
+        simulate_pair(1.0, 2.0, 0)
+
+##################################################
+# Leaderboard Simulation Test Cases
+##################################################
+
+def test_simulate_battles_counts(sample_meals):
+    """Test that every simulated battle has one winner and two participants."""
+    results = simulate_battles(score_meals(sample_meals), 30001, seed=1)
+
+    assert results["battles"].sum() == 2 * 30001
+    assert results["wins"].sum() == 30001
+
+def test_simulate_battles_win_rates(sample_meals):
+    """Test that with the order drawn at random every meal's win rate approaches 50%."""
+    results = simulate_battles(score_meals(sample_meals), 500000, seed=3)
+
+    np.testing.assert_allclose(results["wins"] / results["battles"], 0.5, atol=0.01)
+
+def test_combatant_1_win_pct(sample_meals):
+    """Test the exact win rate as combatant 1 against the pairwise probabilities."""
+    meal_scores = score_meals(sample_meals)
+    scores = meal_scores.scores.tolist()
+
+    expected = [sum(win_probability(scores[i], scores[j]) for j in range(3) if j != i) / 2 for i in range(3)]
+
+    np.testing.assert_allclose(combatant_1_win_pct(meal_scores), expected)
+
+def test_simulate_battles_not_enough_meals(sample_meals):
+    """Test error when fewer than two meals are given."""
+    with pytest.raises(ValueError, match="At least two meals are needed to simulate battles."):
+        simulate_battles(score_meals(sample_meals[:1]), 10)
+
+def test_simulate_leaderboard_leaves_stats_untouched(catalog):
+    """Test that the simulated leaderboard is sorted and nothing is written."""
+    leaderboard = simulate_leaderboard(10000, seed=5)
+
+    assert sorted(row["meal"] for row in leaderboard) == ["Spaghetti", "Sushi", "Tacos"]
+    assert [row["wins"] for row in leaderboard] == sorted((row["wins"] for row in leaderboard), reverse=True)
+    assert {row["meal"]: row["combatant_1_win_pct"] for row in leaderboard} == {"Spaghetti": 33.5, "Sushi": 50.0, "Tacos": 49.5}
+    assert get_leaderboard() == []
@@ -0,0 +1,197 @@
+import sqlite3
+import threading
+
+import pytest
+
+from meal_max.utils import sql_utils
+from meal_max.utils.sql_utils import ConnectionPool, get_db_connection
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Fixture providing the path of an empty database file."""
+    return str(tmp_path / "meal_max.db")
+
+@pytest.fixture
+def pool(db_path):
+    pool = ConnectionPool(db_path, max_size=2)
+    yield pool
+    pool.close_all()
+
+@pytest.fixture
+def global_pool(db_path, monkeypatch):
+    """Fixture pointing the module-level pool at a temporary database."""
+    monkeypatch.setattr(sql_utils, "DB_PATH", db_path)
+    sql_utils.set_pool(None)
+    yield
+    sql_utils.set_pool(None)
+
+
+##################################################
+# Connection Pool Test Cases
+##################################################
+
+def test_connection_is_reused(pool):
+    """Test that a released connection is handed out again."""
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    stats = pool.stats()
+    assert stats["created"] == 1
+    assert stats["reused"] == 1
+    assert stats["in_use"] == 1
+
+def test_pragmas_are_applied(pool):
+    """Test that new connections use WAL, synchronous=NORMAL and the busy timeout."""
+    conn = pool.acquire()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == pool.busy_timeout_ms
+    pool.release(conn)
+
+def test_release_rolls_back_uncommitted_work(pool):
+    """Test that an uncommitted transaction does not leak to the next borrower."""
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    pool.release(conn)
+
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    pool.release(conn)
+
+def test_pool_keeps_at_most_max_size_idle(pool):
+    """Test that connections beyond max_size are closed on release."""
+    conns = [pool.acquire() for _ in range(3)]
+    assert pool.stats()["peak_in_use"] == 3
+    for conn in conns:
+        pool.release(conn)
+    stats = pool.stats()
+    assert stats["idle"] == 2
+    assert stats["closed"] == 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        conns[2].execute("SELECT 1")
+
+def test_pool_size_zero_disables_reuse(db_path):
+    """Test that a pool of size 0 opens a new connection every time."""
+    pool = ConnectionPool(db_path, max_size=0)
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+    pool.release(second)
+    assert first is not second
+    assert pool.stats()["created"] == 2
+
+def test_read_stamp_sees_other_connections(pool):
+    """Test that the dedicated stamp connection sees writes committed on pooled connections."""
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE meta (version INTEGER)")
+    conn.execute("INSERT INTO meta VALUES (1)")
+    conn.commit()
+
+    assert pool.read_stamp("SELECT version FROM meta") == 1
+
+    conn.execute("UPDATE meta SET version = 2")
+    conn.commit()
+    pool.release(conn)
+
+    assert pool.read_stamp("SELECT version FROM meta") == 2
+    assert pool.read_stamp("SELECT version FROM meta WHERE version > 5") is None
+    assert pool.stats()["in_use"] == 0
+
+def test_concurrent_acquire(pool):
+    """Test that threads sharing the pool never hold the same connection at once."""
+    held = set()
+    lock = threading.Lock()
+    errors = []
+
+    def worker():
+        for _ in range(50):
+            conn = pool.acquire()
+            with lock:
+                if id(conn) in held:
+                    errors.append("connection handed out twice")
+                held.add(id(conn))
+            conn.execute("SELECT 1")
+            with lock:
+                held.discard(id(conn))
+            pool.release(conn)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert pool.stats()["in_use"] == 0
+
+##################################################
+# get_db_connection Test Cases
+##################################################
+
+def test_get_db_connection_uses_pool(global_pool):
+    """Test that consecutive get_db_connection calls share one connection."""
+    with get_db_connection() as first:
+        pass
+    with get_db_connection() as second:
+        pass
+    assert first is second
+    assert sql_utils.get_pool_stats()["reused"] == 1
+
+def test_get_db_connection_rebuilds_pool_on_new_path(global_pool, tmp_path, monkeypatch):
+    """Test that changing DB_PATH switches to a pool on the new database."""
+    old_pool = sql_utils.get_pool()
+    monkeypatch.setattr(sql_utils, "DB_PATH", str(tmp_path / "other.db"))
+    assert sql_utils.get_pool() is not old_pool
+    assert sql_utils.get_pool().db_path == str(tmp_path / "other.db")
+
+
+##################################################
+# Migration Test Cases
+##################################################
+
+def test_apply_migrations(global_pool, tmp_path):
+    """Test that migrations run once each, in name order, and are recorded."""
+    migrations = tmp_path / "migrations"
+    migrations.mkdir()
+    (migrations / "002_add_column.sql").write_text("ALTER TABLE things ADD COLUMN size INTEGER;")
+    (migrations / "001_create.sql").write_text("CREATE TABLE things (id INTEGER PRIMARY KEY);")
+    (migrations / "README.md").write_text("not a migration")
+
+    assert sql_utils.apply_migrations(str(migrations)) == ["001_create.sql", "002_add_column.sql"]
+    assert sql_utils.apply_migrations(str(migrations)) == []
+
+    with get_db_connection() as conn:
+        assert [row[1] for row in conn.execute("PRAGMA table_info(things)")] == ["id", "size"]
+        assert [row[0] for row in conn.execute("SELECT name FROM schema_migrations ORDER BY name")] == \
+            ["001_create.sql", "002_add_column.sql"]
+
+def test_apply_migrations_enables_incremental_vacuum(global_pool, db_path, tmp_path):
+    """Test that an existing database is switched to incremental auto-vacuum once, its rows kept."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE things (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.executemany("INSERT INTO things (name) VALUES (?)", [("a",), ("b",)])
+    migrations = tmp_path / "migrations"
+    migrations.mkdir()
+
+    sql_utils.apply_migrations(str(migrations))
+
+    with get_db_connection() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert conn.execute("SELECT name FROM things ORDER BY id").fetchall() == [("a",), ("b",)]
+        assert not sql_utils.enable_incremental_vacuum(conn)
+
+def test_failed_migration_is_rolled_back(global_pool, tmp_path):
+    """Test that a failing migration leaves no partial changes and is not recorded."""
+    migrations = tmp_path / "migrations"
+    migrations.mkdir()
+    (migrations / "001_broken.sql").write_text("CREATE TABLE things (id INTEGER PRIMARY KEY);\nINSERT INTO nowhere VALUES (1);")
+
+    with pytest.raises(sqlite3.OperationalError, match="no such table: nowhere"):
+        sql_utils.apply_migrations(str(migrations))
+
+    with get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'things'").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM schema_migrations").fetchone()[0] == 0
@@ -0,0 +1,144 @@
+import pytest
+
+from meal_max.models.kitchen_model import create_meal, delete_meal, get_leaderboard
+from meal_max.models.tournament_model import TournamentModel, combatant_1_wins
+from meal_max.utils import sql_utils
+from meal_max.utils.random_utils import SeededRandomProvider
+
+
+@pytest.fixture
+def random_provider():
+    """Fixture for a seeded random provider, so every tournament is repeatable."""
+    return SeededRandomProvider(42)
+
+@pytest.fixture()
+def tournament_model(random_provider):
+    """Fixture to provide a new instance of TournamentModel for each test."""
+    return TournamentModel(random_provider=random_provider)
+
+@pytest.fixture
+def meals(sqlite_db):
+    """Fixture adding five meals to a fresh database; Pizza scores highest, Salad lowest."""
+    names = ["Pizza", "Sushi", "Tacos", "Curry", "Salad"]
+    for i, name in enumerate(names):
+        create_meal(meal=name, cuisine="Italian", price=50.0 - 10 * i, difficulty="MED")
+    return names
+
+@pytest.fixture
+def mock_random_batch(mocker, random_provider):
+    """Fixture making every battle go to the higher score (random number 0)."""
+    return mocker.patch.object(random_provider, "get_random_batch", side_effect=lambda count: [0.0] * count)
+
+
+def test_combatant_1_wins():
+    """Test the battle rule: combatant 1 wins when the normalized delta beats the random number."""
+    assert combatant_1_wins(60.0, 10.0, 0.49)
+    assert not combatant_1_wins(60.0, 10.0, 0.5)
+    assert not combatant_1_wins(10.0, 10.0, 0.0)
+
+##################################################
+# Single Elimination Test Cases
+##################################################
+
+def test_single_elimination_with_byes(tournament_model, meals, mock_random_batch):
+    """Test a five meal bracket: three byes, then a four meal bracket."""
+    result = tournament_model.run(meals, "single_elimination")
+
+    mock_random_batch.assert_called_once_with(4)
+    assert result["champion"] == "Pizza"
+    assert result["battles"] == 4
+    assert result["rounds"][0] == {
+        "round": 1,
+        "byes": ["Pizza", "Sushi", "Tacos"],
+        "matches": [{"meal_1": "Curry", "meal_2": "Salad", "winner": "Curry"}],
+    }
+    assert result["rounds"][1]["matches"] == [
+        {"meal_1": "Pizza", "meal_2": "Curry", "winner": "Pizza"},
+        {"meal_1": "Sushi", "meal_2": "Tacos", "winner": "Sushi"},
+    ]
+    assert result["rounds"][2]["matches"] == [{"meal_1": "Pizza", "meal_2": "Sushi", "winner": "Pizza"}]
+    assert [(row["meal"], row["rank"], row["wins"]) for row in result["standings"]] == [
+        ("Pizza", 1, 2), ("Sushi", 2, 1), ("Curry", 2, 1), ("Tacos", 4, 0), ("Salad", 4, 0)
+    ]
+
+def test_single_elimination_upset(tournament_model, meals, random_provider, mocker):
+    """Test that combatant 2 wins when the random number is at least the delta."""
+    mocker.patch.object(random_provider, "get_random_batch", return_value=[0.0, 0.0, 0.0, 0.99])
+
+    result = tournament_model.run(meals)
+
+    assert result["champion"] == "Sushi"
+
+def test_seeded_tournament_is_repeatable(meals):
+    """Test that the same seed plays out the same bracket."""
+    first = TournamentModel(random_provider=SeededRandomProvider(7)).run(meals)
+    second = TournamentModel(random_provider=SeededRandomProvider(7)).run(meals)
+
+    assert first["rounds"] == second["rounds"]
+
+def test_tournament_records_results(tournament_model, meals, mock_random_batch):
+    """Test that every battle is written to the meals stats and the battle log."""
+    tournament_model.run(meals, "single_elimination")
+
+    leaderboard = {row["meal"]: (row["battles"], row["wins"]) for row in get_leaderboard()}
+    assert leaderboard == {"Pizza": (2, 2), "Sushi": (2, 1), "Curry": (2, 1), "Tacos": (1, 0), "Salad": (1, 0)}
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM battle_log").fetchone()[0] == 4
+
+##################################################
+# Round Robin Test Cases
+##################################################
+
+def test_round_robin(tournament_model, meals, mock_random_batch):
+    """Test that every meal plays every other meal once."""
+    result = tournament_model.run(meals, "round_robin")
+
+    mock_random_batch.assert_called_once_with(10)
+    assert result["battles"] == 10
+    assert "rounds" not in result
+    assert [(row["meal"], row["wins"], row["losses"]) for row in result["standings"]] == [
+        ("Pizza", 4, 0), ("Sushi", 3, 1), ("Tacos", 2, 2), ("Curry", 1, 3), ("Salad", 0, 4)
+    ]
+
+def test_round_robin_scales(tournament_model, sqlite_db, random_provider, mocker):
+    """Test a round robin of 200 meals (19,900 battles) in one batch and one transaction."""
+    names = [f"Meal {i}" for i in range(200)]
+    with sql_utils.get_db_connection() as conn:
+        conn.executemany("INSERT INTO meals (meal, cuisine, price, difficulty) VALUES (?, 'Mixed', ?, 'LOW')",
+                         [(name, 1.0 + i) for i, name in enumerate(names)])
+        conn.commit()
+    mock_random_batch = mocker.patch.object(random_provider, "get_random_batch", side_effect=lambda count: [0.5] * count)
+
+    result = tournament_model.run(names, "round_robin")
+
+    assert mock_random_batch.call_count == 1
+    assert result["battles"] == 200 * 199 // 2
+    with sql_utils.get_db_connection() as conn:
+        assert conn.execute("SELECT SUM(battles), SUM(wins) FROM meals").fetchone() == (200 * 199, 200 * 199 // 2)
+
+##################################################
+# Validation Test Cases
+##################################################
+
+def test_tournament_invalid_format(tournament_model):
+    """Test error for an unknown tournament format."""
+    with pytest.raises(ValueError, match="Invalid tournament format: swiss"):
+        tournament_model.run(["Pizza", "Sushi"], "swiss")
+
+def test_tournament_not_enough_meals(tournament_model):
+    """Test error when fewer than two meals enter."""
+    with pytest.raises(ValueError, match="A tournament needs at least two meals."):
+        tournament_model.run(["Pizza"])
+
+def test_tournament_duplicate_meals(tournament_model):
+    """Test error when a meal enters twice."""
+    with pytest.raises(ValueError, match="Each meal can only enter a tournament once."):
+        tournament_model.run(["Pizza", "Pizza"])
+
+def test_tournament_deleted_meal(tournament_model, meals, mock_random_batch):
+    """Test that a deleted meal is rejected before any battle is fought."""
+    delete_meal(5)
+
+    with pytest.raises(ValueError, match="Meal with name Salad has been deleted"):
+        tournament_model.run(meals)
+    mock_random_batch.assert_not_called()
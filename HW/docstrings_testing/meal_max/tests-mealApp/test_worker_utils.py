@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from meal_max.utils.worker_utils import PeriodicWorker
+
+
+def test_run_once_records_result():
+    """Test that a run on the calling thread returns and records the task's result."""
+    worker = PeriodicWorker("test-worker", lambda: {"archived": 3}, 60)
+
+    assert worker.run_once() == {"archived": 3}
+
+    stats = worker.stats()
+    assert (stats["runs"], stats["failures"], stats["last_result"], stats["running"]) == (1, 0, {"archived": 3}, False)
+
+def test_run_once_failure():
+    """Test that a failing run is counted and re-raised."""
+    def task():
+        raise RuntimeError("database is locked")
+    worker = PeriodicWorker("test-worker", task, 60)
+
+    with pytest.raises(RuntimeError, match="database is locked"):
+        worker.run_once()
+    assert worker.stats()["failures"] == 1
+
+def test_worker_keeps_running_after_failures():
+    """Test that the background thread carries on after a failed run, until stopped."""
+    calls = []
+    done = threading.Event()
+    def task():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        done.set()
+    worker = PeriodicWorker("test-worker", task, 0.01)
+
+    worker.start()
+    assert done.wait(5)
+    worker.stop(5)
+
+    stats = worker.stats()
+    assert stats["running"] is False
+    assert stats["failures"] == 1 and stats["runs"] >= 1
+
+def test_invalid_interval():
+    """Test that a non-positive interval is rejected."""
+    with pytest.raises(ValueError, match="Invalid interval: 0"):
+        PeriodicWorker("test-worker", lambda: None, 0)
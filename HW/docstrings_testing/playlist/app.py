@@ -3,16 +3,42 @@ from flask import Flask, jsonify, make_response, Response, request
 
 from music_collection.models import song_model
 from music_collection.models.playlist_model import PlaylistModel
+from music_collection.utils.compression import init_compression
+from music_collection.utils.json_utils import RowEncoder, json_rows_response
 from music_collection.utils.sql_utils import check_database_connection, check_table_exists
+from music_collection.utils.worker_utils import PeriodicWorker
 
 
 # Load environment variables from .env file
 load_dotenv()
 
 app = Flask(__name__)
+# Large responses are gzip/brotli compressed when the client accepts it
+init_compression(app)
+
+# Catalog rows are encoded straight from the database tuples
+catalog_encoder = RowEncoder(song_model.CATALOG_COLUMNS)
 
 playlist_model = PlaylistModel()
 
+# Databases created before compaction existed have no songs_archive; compaction retries if this fails
+try:
+    song_model.ensure_archive()
+except Exception as e:
+    app.logger.error(f"Error creating the songs archive: {e}")
+
+# They also need one full VACUUM to use incremental auto-vacuum, which compaction relies on
+try:
+    song_model.enable_incremental_vacuum()
+except Exception as e:
+    app.logger.error(f"Error enabling incremental auto-vacuum: {e}")
+
+# Archive deleted songs in the background, one short write transaction per batch
+compaction_worker = None
+if song_model.COMPACTION_INTERVAL > 0:
+    compaction_worker = PeriodicWorker("song-compaction", song_model.compact_songs, song_model.COMPACTION_INTERVAL)
+    compaction_worker.start()
+
 
 ####################################################
 #
@@ -121,6 +147,41 @@ def delete_song(song_id: int) -> Response:
         return make_response(jsonify({'error': str(e)}), 500)
 
 
+@app.route('/api/compact-songs', methods=['POST'])
+def compact_songs() -> Response:
+    """
+    Route to archive the songs marked as deleted and free their disk space now.
+
+    The same job runs in the background every COMPACTION_INTERVAL seconds.
+
+    Returns:
+        JSON response with the number of songs archived and of pages freed.
+    Raises:
+        500 error if there is an issue compacting the songs.
+    """
+    try:
+        app.logger.info("Compacting deleted songs")
+        if compaction_worker is not None:
+            result = compaction_worker.run_once()
+        else:
+            result = song_model.compact_songs()
+        return make_response(jsonify({'status': 'success', **result}), 200)
+    except Exception as e:
+        app.logger.error(f"Error compacting songs: {e}")
+        return make_response(jsonify({'error': str(e)}), 500)
+
+@app.route('/api/compaction-stats', methods=['GET'])
+def compaction_stats() -> Response:
+    """
+    Route to report the metrics of the background compaction job.
+
+    Returns:
+        JSON response with the job's run and failure counts and last result, or null if it is off.
+    """
+    app.logger.info('Reporting compaction stats')
+    stats = compaction_worker.stats() if compaction_worker is not None else None
+    return make_response(jsonify({'status': 'success', 'compaction': stats}), 200)
+
 @app.route('/api/get-all-songs-from-catalog', methods=['GET'])
 def get_all_songs() -> Response:
     """
@@ -128,6 +189,7 @@ def get_all_songs() -> Response:
 
     Query Parameter:
         - sort_by_play_count (bool, optional): If true, sort songs by play count.
+        - stream (bool, optional): If true, the response body is streamed as the rows are read.
 
     Returns:
         JSON response with the list of songs or error message.
@@ -135,11 +197,12 @@ def get_all_songs() -> Response:
     try:
         # Extract query parameter for sorting by play count
         sort_by_play_count = request.args.get('sort_by_play_count', 'false').lower() == 'true'
+        stream = request.args.get('stream', 'false').lower() == 'true'
 
         app.logger.info("Retrieving all songs from the catalog, sort_by_play_count=%s", sort_by_play_count)
-        songs = song_model.get_all_songs(sort_by_play_count=sort_by_play_count)
+        rows = song_model.iter_all_song_rows(sort_by_play_count=sort_by_play_count)
 
-        return make_response(jsonify({'status': 'success', 'songs': songs}), 200)
+        return json_rows_response({'status': 'success'}, 'songs', catalog_encoder, rows, 200, stream=stream)
     except Exception as e:
         app.logger.error(f"Error retrieving songs: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
@@ -703,8 +766,8 @@ def get_song_leaderboard() -> Response:
     """
     try:
         app.logger.info("Generating song leaderboard sorted")
-        leaderboard_data = song_model.get_all_songs(sort_by_play_count=True)
-        return make_response(jsonify({'status': 'success', 'leaderboard': leaderboard_data}), 200)
+        rows = song_model.iter_all_song_rows(sort_by_play_count=True)
+        return json_rows_response({'status': 'success'}, 'leaderboard', catalog_encoder, rows, 200)
     except Exception as e:
         app.logger.error(f"Error generating leaderboard: {e}")
         return make_response(jsonify({'error': str(e)}), 500)
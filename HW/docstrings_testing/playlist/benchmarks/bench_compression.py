@@ -0,0 +1,66 @@
+"""Benchmark of the bandwidth/CPU tradeoff of compressing catalog responses.
+
+For each codec and level it reports the compressed size, the time to compress and the
+total time to deliver the body (compression plus transfer) at a given link speed. Brotli
+rows only appear when the brotli package is installed.
+
+Run from the playlist directory:
+
+    python -m benchmarks.bench_compression --rows 10000 --mbps 20
+"""
+import argparse
+import gzip
+import timeit
+
+from music_collection.models.song_model import CATALOG_COLUMNS
+from music_collection.utils.compression import CompressionCache, body_version
+from music_collection.utils.json_utils import RowEncoder, iter_json_envelope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_body(count):
+    rows = [(i, f"Artist {i % 500}", f"Title {i}", 1950 + i % 70, ("Rock", "Pop", "Jazz")[i % 3], 120 + i % 300, i % 1000)
+            for i in range(count)]
+    return b"".join(iter_json_envelope({"status": "success"}, "songs", RowEncoder(CATALOG_COLUMNS), rows))
+
+
+def codecs():
+    for level in (1, 6, 9):
+        yield f"gzip -{level}", lambda data, level=level: gzip.compress(data, compresslevel=level)
+    if brotli is not None:
+        for quality in (1, 5, 11):
+            yield f"br q{quality}", lambda data, quality=quality: brotli.compress(data, quality=quality)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-r', '--rows', type=int, default=10000, help='number of catalog rows in the body')
+    parser.add_argument('-m', '--mbps', type=float, default=20.0, help='link speed in megabits per second')
+    parser.add_argument('-n', '--repeat', type=int, default=5, help='timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    body = make_body(args.rows)
+    bytes_per_second = args.mbps * 1_000_000 / 8
+    print(f"{args.rows} rows, {len(body):,} bytes uncompressed, {args.mbps} Mbit/s link")
+    print(f"  {'codec':<10} {'bytes':>12} {'ratio':>7} {'cpu ms':>9} {'MB/s':>8} {'total ms':>9}")
+    print(f"  {'identity':<10} {len(body):>12,} {1.0:>7.2f} {0.0:>9.2f} {'-':>8} {len(body) / bytes_per_second * 1000:>9.1f}")
+    for name, codec in codecs():
+        compressed = codec(body)
+        cpu = min(timeit.repeat(lambda: codec(body), number=1, repeat=args.repeat))
+        total = cpu + len(compressed) / bytes_per_second
+        print(f"  {name:<10} {len(compressed):>12,} {len(body) / len(compressed):>7.2f} {cpu * 1000:>9.2f} "
+              f"{len(body) / cpu / 1e6:>8.1f} {total * 1000:>9.1f}")
+
+    # A cache hit costs one digest of the body instead of a compression
+    cache = CompressionCache()
+    cache.put(body_version(body), "gzip", gzip.compress(body))
+    hit = min(timeit.repeat(lambda: cache.get(body_version(body), "gzip"), number=1, repeat=args.repeat))
+    print(f"  cache hit (digest + lookup): {hit * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
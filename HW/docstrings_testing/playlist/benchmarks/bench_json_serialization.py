@@ -0,0 +1,65 @@
+"""Micro-benchmark for serializing the song catalog.
+
+Compares the old path (a dict per row, then json.dumps as jsonify does) with RowEncoder,
+buffered and streamed. RowEncoder uses orjson when it is installed; run the benchmark with
+and without it to compare the two backends.
+
+Run from the playlist directory:
+
+    python -m benchmarks.bench_json_serialization --rows 100000
+"""
+import argparse
+import json
+import timeit
+
+from music_collection.models.song_model import CATALOG_COLUMNS
+from music_collection.utils.json_utils import RowEncoder, backend_name, iter_json_envelope
+
+
+def make_rows(count):
+    return [(i, f"Artist {i % 500}", f"Title {i}", 1950 + i % 70, "Rock", 120 + i % 300, i % 1000)
+            for i in range(count)]
+
+
+def dict_per_row(rows):
+    songs = [dict(zip(CATALOG_COLUMNS, row)) for row in rows]
+    return json.dumps({"status": "success", "songs": songs}).encode("utf-8")
+
+
+def row_encoder_buffered(encoder, rows):
+    return b"".join(iter_json_envelope({"status": "success"}, "songs", encoder, rows))
+
+
+def row_encoder_streamed(encoder, rows):
+    # Only the largest chunk is alive at any time, which is what a streamed response holds
+    size = 0
+    for chunk in iter_json_envelope({"status": "success"}, "songs", encoder, iter(rows)):
+        size += len(chunk)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-r', '--rows', type=int, default=100000, help='number of catalog rows to serialize')
+    parser.add_argument('-n', '--repeat', type=int, default=5, help='timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    encoder = RowEncoder(CATALOG_COLUMNS)
+    assert json.loads(dict_per_row(rows)) == json.loads(row_encoder_buffered(encoder, rows))
+
+    cases = {
+        'dict per row + json.dumps': lambda: dict_per_row(rows),
+        'RowEncoder (buffered)': lambda: row_encoder_buffered(encoder, rows),
+        'RowEncoder (streamed)': lambda: row_encoder_streamed(encoder, rows),
+    }
+    print(f"{args.rows} rows, backend={backend_name()}")
+    baseline = None
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f"  {name:<28} {best * 1000:9.1f} ms  {args.rows / best:12,.0f} rows/s  x{baseline / best:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 import logging
+import os
 import sqlite3
-from typing import Any
+from typing import Any, Iterator
 
 from music_collection.utils.logger import configure_logger
 from music_collection.utils.random_utils import get_random
@@ -12,6 +13,17 @@ logger = logging.getLogger(__name__)
 configure_logger(logger)
 
 
+# Column order of the rows returned by get_all_songs and iter_all_song_rows
+CATALOG_COLUMNS = ("id", "artist", "title", "year", "genre", "duration", "play_count")
+
+# Deleted songs are moved to songs_archive by compact_songs, COMPACTION_BATCH_SIZE per
+# transaction, every COMPACTION_INTERVAL seconds (0 turns the background job off). Each
+# pass then gives back at most COMPACTION_VACUUM_PAGES free pages to the file system.
+COMPACTION_INTERVAL = float(os.getenv("COMPACTION_INTERVAL", "3600"))
+COMPACTION_BATCH_SIZE = int(os.getenv("COMPACTION_BATCH_SIZE", "500"))
+COMPACTION_VACUUM_PAGES = int(os.getenv("COMPACTION_VACUUM_PAGES", "2000"))
+
+
 @dataclass
 class Song:
     id: int
@@ -93,6 +105,9 @@ def delete_song(song_id: int) -> None:
                     logger.info("Song with ID %s has already been deleted", song_id)
                     raise ValueError(f"Song with ID {song_id} has already been deleted")
             except TypeError:
+                if _is_archived(cursor, song_id):
+                    logger.info("Song with ID %s has already been deleted", song_id)
+                    raise ValueError(f"Song with ID {song_id} has already been deleted")
                 logger.info("Song with ID %s not found", song_id)
                 raise ValueError(f"Song with ID {song_id} not found")
 
@@ -106,6 +121,159 @@ def delete_song(song_id: int) -> None:
         logger.error("Database error while deleting song: %s", str(e))
         raise e
 
+# Deleted songs moved out of songs by compact_songs. Ids and compound keys stay taken: looking
+# up an archived song still reports it as deleted, and a new song cannot reuse an archived
+# (artist, title, year), as it could not while the deleted song was in songs. The trigger is
+# raised as the UNIQUE error of songs, so callers see a duplicate song either way.
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS songs_archive (
+    id INTEGER PRIMARY KEY,
+    artist TEXT NOT NULL,
+    title TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    genre TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    play_count INTEGER,
+    archived_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+    UNIQUE(artist, title, year)
+);
+
+CREATE TRIGGER IF NOT EXISTS songs_archived_key BEFORE INSERT ON songs
+WHEN EXISTS (SELECT 1 FROM songs_archive WHERE artist = new.artist AND title = new.title AND year = new.year)
+BEGIN
+    SELECT RAISE(ABORT, 'UNIQUE constraint failed: songs.artist, songs.title, songs.year');
+END;
+"""
+
+
+def ensure_archive() -> None:
+    """
+    Creates songs_archive and its trigger if the database does not have them yet.
+
+    Databases created before compaction existed have neither; this is run when the app
+    starts and before each compaction, and does nothing once they exist.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    try:
+        with get_db_connection() as conn:
+            conn.executescript(ARCHIVE_SCHEMA)
+
+    except sqlite3.Error as e:
+        logger.error("Database error while creating the songs archive: %s", str(e))
+        raise e
+
+def enable_incremental_vacuum() -> bool:
+    """
+    Switches the database to incremental auto-vacuum, if it is not using it already.
+
+    compact_songs only runs PRAGMA incremental_vacuum. A database created by
+    create_song_table.sql starts in this mode; an older one needs a full VACUUM, which
+    rewrites the whole file, so it is done once when the app starts rather than by compaction.
+
+    Returns:
+        bool: True if the database was switched by this call.
+
+    Raises:
+        sqlite3.Error: If any database error occurs.
+    """
+    try:
+        with get_db_connection() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            logger.info("Switching the database to incremental auto-vacuum")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return True
+
+    except sqlite3.Error as e:
+        logger.error("Database error while enabling incremental auto-vacuum: %s", str(e))
+        raise e
+
+def _query_archive(cursor: sqlite3.Cursor, query: str, params: tuple) -> bool:
+    try:
+        cursor.execute(query, params)
+    except sqlite3.OperationalError as e:
+        # Nothing can have been archived before ensure_archive ran
+        if "no such table" in str(e):
+            return False
+        raise
+    return cursor.fetchone() is not None
+
+def _is_archived(cursor: sqlite3.Cursor, song_id: int) -> bool:
+    """Checks whether a song id missing from songs was archived by compact_songs, i.e. deleted."""
+    return _query_archive(cursor, "SELECT 1 FROM songs_archive WHERE id = ?", (song_id,))
+
+def _is_archived_key(cursor: sqlite3.Cursor, artist: str, title: str, year: int) -> bool:
+    """Checks whether a compound key missing from songs was archived by compact_songs, i.e. deleted."""
+    return _query_archive(cursor, "SELECT 1 FROM songs_archive WHERE artist = ? AND title = ? AND year = ?",
+                          (artist, title, year))
+
+def compact_songs(batch_size: int = COMPACTION_BATCH_SIZE, vacuum_pages: int = COMPACTION_VACUUM_PAGES) -> dict[str, int]:
+    """
+    Moves the songs marked as deleted from songs to songs_archive, then frees disk space.
+
+    Songs are moved batch_size at a time, each batch in a short write transaction of its
+    own. Archived songs keep their id and compound key, so lookups keep reporting them as
+    deleted.
+
+    Deleting rows leaves free pages in the file; at most vacuum_pages of them are given
+    back per call with an incremental vacuum, on a database that enable_incremental_vacuum
+    has switched to incremental auto-vacuum. No call runs a full VACUUM.
+
+    Args:
+        batch_size (int): The number of songs archived per transaction.
+        vacuum_pages (int): The most free pages released by this call; 0 skips the vacuum.
+
+    Returns:
+        dict[str, int]: The number of songs 'archived' and of 'freed_pages'.
+
+    Raises:
+        ValueError: If the batch size is not positive.
+        sqlite3.Error: If any database error occurs.
+    """
+    if batch_size <= 0:
+        raise ValueError(f"Invalid batch size: {batch_size}. Must be a positive integer.")
+
+    ensure_archive()
+
+    archived = 0
+    freed_pages = 0
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            while True:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("SELECT id FROM songs WHERE deleted = TRUE ORDER BY id LIMIT ?", (batch_size,))
+                song_ids = [row[0] for row in cursor.fetchall()]
+                if not song_ids:
+                    conn.commit()
+                    break
+
+                placeholders = ", ".join("?" * len(song_ids))
+                cursor.execute(f"""
+                    INSERT INTO songs_archive (id, artist, title, year, genre, duration, play_count)
+                    SELECT id, artist, title, year, genre, duration, play_count
+                    FROM songs WHERE id IN ({placeholders})
+                """, song_ids)
+                cursor.execute(f"DELETE FROM songs WHERE id IN ({placeholders})", song_ids)
+                conn.commit()
+                archived += len(song_ids)
+
+            if vacuum_pages > 0:
+                pages_before = cursor.execute("PRAGMA page_count").fetchone()[0]
+                # executescript steps the pragma to the end; execute would free a single page
+                conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+                freed_pages = pages_before - cursor.execute("PRAGMA page_count").fetchone()[0]
+
+    except sqlite3.Error as e:
+        logger.error("Database error while compacting songs: %s", str(e))
+        raise e
+
+    logger.info("Archived %d deleted songs and freed %d pages", archived, freed_pages)
+    return {"archived": archived, "freed_pages": freed_pages}
+
 def get_song_by_id(song_id: int) -> Song:
     """
     Retrieves a song from the catalog by its song ID.
@@ -136,6 +304,9 @@ def get_song_by_id(song_id: int) -> Song:
                     raise ValueError(f"Song with ID {song_id} has been deleted")
                 logger.info("Song with ID %s found", song_id)
                 return Song(id=row[0], artist=row[1], title=row[2], year=row[3], genre=row[4], duration=row[5])
+            elif _is_archived(cursor, song_id):
+                logger.info("Song with ID %s has been deleted", song_id)
+                raise ValueError(f"Song with ID {song_id} has been deleted")
             else:
                 logger.info("Song with ID %s not found", song_id)
                 raise ValueError(f"Song with ID {song_id} not found")
@@ -176,6 +347,9 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
                     raise ValueError(f"Song with artist '{artist}', title '{title}', and year {year} has been deleted")
                 logger.info("Song with artist '%s', title '%s', and year %d found", artist, title, year)
                 return Song(id=row[0], artist=row[1], title=row[2], year=row[3], genre=row[4], duration=row[5])
+            elif _is_archived_key(cursor, artist, title, year):
+                logger.info("Song with artist '%s', title '%s', and year %d has been deleted", artist, title, year)
+                raise ValueError(f"Song with artist '{artist}', title '{title}', and year {year} has been deleted")
             else:
                 logger.info("Song with artist '%s', title '%s', and year %d not found", artist, title, year)
                 raise ValueError(f"Song with artist '{artist}', title '{title}', and year {year} not found")
@@ -184,6 +358,17 @@ def get_song_by_compound_key(artist: str, title: str, year: int) -> Song:
         logger.error("Database error while retrieving song by compound key (artist '%s', title '%s', year %d): %s", artist, title, year, str(e))
         raise e
 
+def _all_songs_query(sort_by_play_count: bool) -> str:
+    """Builds the query for all non-deleted songs, optionally sorted by play count."""
+    query = """
+        SELECT id, artist, title, year, genre, duration, play_count
+        FROM songs
+        WHERE deleted = FALSE
+    """
+    if sort_by_play_count:
+        query += " ORDER BY play_count DESC"
+    return query
+
 def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
     """
     Retrieves all songs that are not marked as deleted from the catalog.
@@ -203,15 +388,7 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
             logger.info("Attempting to retrieve all non-deleted songs from the catalog")
 
             # Determine the sort order based on the 'sort_by_play_count' flag
-            query = """
-                SELECT id, artist, title, year, genre, duration, play_count
-                FROM songs
-                WHERE deleted = FALSE
-            """
-            if sort_by_play_count:
-                query += " ORDER BY play_count DESC"
-
-            cursor.execute(query)
+            cursor.execute(_all_songs_query(sort_by_play_count))
             rows = cursor.fetchall()
 
             if not rows:
@@ -237,6 +414,36 @@ def get_all_songs(sort_by_play_count: bool = False) -> list[dict]:
         logger.error("Database error while retrieving all songs: %s", str(e))
         raise e
 
+def iter_all_song_rows(sort_by_play_count: bool = False, batch_size: int = 1000) -> Iterator[tuple]:
+    """
+    Yields all non-deleted songs as raw row tuples, in CATALOG_COLUMNS order.
+
+    Rows are fetched in batches and never converted to dicts, so large catalogs can be
+    serialized or streamed without holding every row in memory. The connection stays
+    open until the generator is exhausted or closed.
+
+    Args:
+        sort_by_play_count (bool): If True, sort the songs by play count in descending order.
+        batch_size (int): The number of rows fetched from the cursor at a time.
+
+    Yields:
+        tuple: One (id, artist, title, year, genre, duration, play_count) row per song.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            logger.info("Streaming all non-deleted songs from the catalog")
+            cursor.execute(_all_songs_query(sort_by_play_count))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+
+    except sqlite3.Error as e:
+        logger.error("Database error while streaming all songs: %s", str(e))
+        raise e
+
 def get_random_song() -> Song:
     """
     Retrieves a random song from the catalog.
@@ -297,6 +504,9 @@ def update_play_count(song_id: int) -> None:
                     logger.info("Song with ID %d has been deleted", song_id)
                     raise ValueError(f"Song with ID {song_id} has been deleted")
             except TypeError:
+                if _is_archived(cursor, song_id):
+                    logger.info("Song with ID %d has been deleted", song_id)
+                    raise ValueError(f"Song with ID {song_id} has been deleted")
                 logger.info("Song with ID %d not found", song_id)
                 raise ValueError(f"Song with ID {song_id} not found")
 
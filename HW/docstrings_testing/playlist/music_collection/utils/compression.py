@@ -0,0 +1,259 @@
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import threading
+from typing import Iterable, Iterator, Optional
+import zlib
+
+from flask import Flask, Request, Response, request
+
+from music_collection.utils.logger import configure_logger
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - exercised only when brotli is installed
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Bodies smaller than this are sent as-is; the headers alone would eat most of the saving
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+COMPRESS_CACHE_SIZE = int(os.getenv("COMPRESS_CACHE_SIZE", "128"))
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/plain", "text/html", "application/x-ndjson"}
+
+
+def supported_encodings() -> list[str]:
+    """Returns the content codings this server can produce, most preferred first."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def choose_encoding(req: Request) -> Optional[str]:
+    """
+    Picks a content coding from the request's Accept-Encoding header.
+
+    Args:
+        req (Request): The incoming request.
+
+    Returns:
+        Optional[str]: 'br' or 'gzip', or None if the client accepts neither.
+    """
+    return req.accept_encodings.best_match(supported_encodings())
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Compresses a whole body with the given content coding.
+
+    Args:
+        data (bytes): The body to compress.
+        encoding (str): 'br' or 'gzip'.
+
+    Returns:
+        bytes: The compressed body.
+
+    Raises:
+        ValueError: If the encoding is not supported.
+    """
+    if encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def iter_compressed(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """
+    Compresses a streamed body chunk by chunk.
+
+    Each input chunk is flushed so the client can decode what it has received so far,
+    which keeps streamed responses incremental at a small cost in ratio.
+
+    Args:
+        chunks (Iterable[bytes]): The body chunks, as produced by the view.
+        encoding (str): 'br' or 'gzip'.
+
+    Yields:
+        bytes: The compressed chunks.
+
+    Raises:
+        ValueError: If the encoding is not supported.
+    """
+    if encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            out = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if out:
+                yield out
+        yield compressor.flush()
+    elif encoding == "br" and brotli is not None:
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            out = compressor.process(chunk) + compressor.flush()
+            if out:
+                yield out
+        yield compressor.finish()
+    else:
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+class CompressionCache:
+    """
+    A bounded LRU cache of compressed bodies keyed by (version, encoding).
+
+    The version identifies the uncompressed body, so an entry can never be served for a
+    different payload. Compressing is what costs CPU; looking up a body that has not
+    changed since the last request skips it.
+
+    Attributes:
+        max_entries (int): The maximum number of compressed bodies kept.
+        hits (int): The number of lookups that found a body.
+        misses (int): The number of lookups that did not.
+    """
+
+    def __init__(self, max_entries: int = COMPRESS_CACHE_SIZE):
+        """
+        Initializes an empty CompressionCache.
+
+        Args:
+            max_entries (int): The maximum number of compressed bodies kept.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: str, encoding: str) -> Optional[bytes]:
+        """Returns the cached compressed body, or None."""
+        with self._lock:
+            body = self._entries.get((version, encoding))
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((version, encoding))
+            self.hits += 1
+            return body
+
+    def put(self, version: str, encoding: str, body: bytes) -> None:
+        """Stores a compressed body, evicting the least recently used one if full."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(version, encoding)] = body
+            self._entries.move_to_end((version, encoding))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes every cached body and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Returns the entry count, byte size and hit counters of the cache."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(len(body) for body in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def body_version(body: bytes) -> str:
+    """Returns a short digest identifying an uncompressed body."""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def _is_cacheable(response: Response) -> bool:
+    cache_control = response.headers.get("Cache-Control", "")
+    return request.method == "GET" and response.status_code == 200 and "no-store" not in cache_control
+
+
+def compress_response(response: Response, cache: Optional[CompressionCache] = None,
+                      min_size: Optional[int] = None) -> Response:
+    """
+    Compresses a response in place if the client accepts it and it is worth it.
+
+    Streamed responses are always compressed on the fly. Buffered responses are
+    compressed when their body reaches min_size; cacheable ones (successful GETs) are
+    looked up in the cache by a digest of their body first.
+
+    Args:
+        response (Response): The response returned by the view.
+        cache (Optional[CompressionCache]): The cache for compressed bodies, if any.
+        min_size (Optional[int]): The smallest body that is compressed. Defaults to COMPRESS_MIN_SIZE.
+
+    Returns:
+        Response: The same response object.
+    """
+    if min_size is None:
+        min_size = COMPRESS_MIN_SIZE
+
+    if (response.direct_passthrough or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.status_code < 200 or response.status_code in (204, 304)):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = choose_encoding(request)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = iter_compressed(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    compressed = None
+    if cache is not None and _is_cacheable(response):
+        version = body_version(body)
+        compressed = cache.get(version, encoding)
+        if compressed is None:
+            compressed = compress(body, encoding)
+            cache.put(version, encoding, compressed)
+    if compressed is None:
+        compressed = compress(body, encoding)
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    logger.debug("Compressed %s response from %d to %d bytes with %s", request.path, len(body), len(compressed), encoding)
+    return response
+
+
+def init_compression(app: Flask, min_size: Optional[int] = None,
+                     cache: Optional[CompressionCache] = None) -> CompressionCache:
+    """
+    Registers response compression on a Flask app.
+
+    Args:
+        app (Flask): The app whose responses should be compressed.
+        min_size (Optional[int]): The smallest body that is compressed. Defaults to COMPRESS_MIN_SIZE.
+        cache (Optional[CompressionCache]): The cache to use. A new one is created if not given.
+
+    Returns:
+        CompressionCache: The cache the app uses, so its stats can be reported.
+    """
+    if cache is None:
+        cache = CompressionCache()
+
+    @app.after_request
+    def _compress(response: Response) -> Response:
+        return compress_response(response, cache, min_size)
+
+    return cache
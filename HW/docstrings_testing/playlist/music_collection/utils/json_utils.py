@@ -0,0 +1,241 @@
+import dataclasses
+from datetime import date
+from decimal import Decimal
+from itertools import chain, islice
+import json
+from json.encoder import encode_basestring
+import logging
+from typing import Any, Iterable, Iterator, Sequence
+import uuid
+
+from flask import Response
+
+from music_collection.utils.logger import configure_logger
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only when orjson is installed
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+# Row payloads keep the ", " / ": " separators of json.dumps so clients that grep the
+# responses (see smoketest.sh) see the same text as from jsonify in debug mode
+_row_encoder = json.JSONEncoder(ensure_ascii=False)
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for types the JSON backends do not handle natively.
+
+    Mirrors flask.json.provider._default so responses look the same whichever backend is used.
+    """
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, (Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def backend_name() -> str:
+    """Returns the name of the JSON backend in use ('orjson' or 'json')."""
+    return "orjson" if orjson is not None else "json"
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serializes an object to compact UTF-8 JSON using the fastest available backend.
+
+    Args:
+        obj (Any): The object to serialize.
+
+    Returns:
+        bytes: The encoded JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _encode_float(value: float) -> str:
+    # json.dumps writes the non-finite floats as bare identifiers; keep that behaviour
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "Infinity" if value > 0 else "-Infinity"
+    return float.__repr__(value)
+
+
+# Column values coming out of sqlite3 are almost always one of these types, so they are
+# encoded without going through a full encoder call
+_SCALAR_ENCODERS = {
+    str: encode_basestring,
+    int: int.__repr__,
+    float: _encode_float,
+    bool: lambda value: "true" if value else "false",
+    type(None): lambda value: "null",
+}
+
+
+def encode_value(value: Any) -> str:
+    """Encodes a single column value as a JSON fragment."""
+    encoder = _SCALAR_ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+    return dumps(value).decode("utf-8")
+
+
+class RowEncoder:
+    """
+    Encodes database row tuples as JSON objects.
+
+    Without orjson, each row is formatted from its tuple through a template whose keys
+    were encoded once when the encoder was built, so no dict is built per row. With orjson,
+    rows are zipped into short-lived dicts per chunk instead, because its C encoder is still
+    faster than any per-value formatting done in Python.
+
+    Attributes:
+        columns (tuple[str, ...]): The column names, in the order they appear in each row.
+    """
+
+    def __init__(self, columns: Sequence[str]):
+        """
+        Initializes the RowEncoder with the column names of the rows it will encode.
+
+        Args:
+            columns (Sequence[str]): The column names, in row order.
+        """
+        if not columns:
+            raise ValueError("RowEncoder requires at least one column.")
+        self.columns = tuple(columns)
+        self._template = "{" + ", ".join(
+            _row_encoder.encode(column).replace("%", "%%") + ": %s" for column in self.columns
+        ) + "}"
+
+    def encode(self, row: Sequence[Any]) -> str:
+        """
+        Encodes one row tuple as a JSON object.
+
+        Args:
+            row (Sequence[Any]): The column values, in the same order as the columns.
+
+        Returns:
+            str: The row as a JSON object.
+        """
+        return self._template % tuple([encode_value(value) for value in row])
+
+    def encode_chunk(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        """
+        Encodes a chunk of rows as the comma-separated members of a JSON array.
+
+        Args:
+            rows (Sequence[Sequence[Any]]): The rows to encode.
+
+        Returns:
+            bytes: The encoded rows, without the enclosing brackets.
+        """
+        if orjson is not None:
+            columns = self.columns
+            return orjson.dumps([dict(zip(columns, row)) for row in rows], default=_default)[1:-1]
+        template = self._template
+        get = _SCALAR_ENCODERS.get
+        return ", ".join([
+            template % tuple([(get(type(value)) or encode_value)(value) for value in row])
+            for row in rows
+        ]).encode("utf-8")
+
+    def encode_many(self, rows: Iterable[Sequence[Any]]) -> str:
+        """
+        Encodes a sequence of row tuples as a JSON array.
+
+        Args:
+            rows (Iterable[Sequence[Any]]): The rows to encode.
+
+        Returns:
+            str: The rows as a JSON array of objects.
+        """
+        return "[" + self.encode_chunk(list(rows)).decode("utf-8") + "]"
+
+
+def iter_json_envelope(envelope: dict, key: str, encoder: RowEncoder, rows: Iterable[Sequence[Any]],
+                       chunk_size: int = 500) -> Iterator[bytes]:
+    """
+    Streams a JSON object whose `key` member is the array of encoded rows.
+
+    The envelope members are written first and the rows are flushed in chunks, so large
+    result sets never have to be held in memory as a single string.
+
+    Args:
+        envelope (dict): The other members of the response object (e.g. {'status': 'success'}).
+        key (str): The member name that holds the rows.
+        encoder (RowEncoder): The encoder for the rows.
+        rows (Iterable[Sequence[Any]]): The rows to stream, e.g. a sqlite3 cursor.
+        chunk_size (int): The number of rows encoded per yielded chunk.
+
+    Yields:
+        bytes: Consecutive pieces of the JSON document.
+    """
+    head = _row_encoder.encode(envelope)[:-1]
+    if envelope:
+        head += ", "
+    yield (head + _row_encoder.encode(key) + ": [").encode("utf-8")
+
+    rows = iter(rows)
+    separator = b""
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        yield separator + encoder.encode_chunk(chunk)
+        separator = b", "
+    yield b"]}\n"
+
+
+def prefetch(items: Iterable[Any]) -> Iterator[Any]:
+    """
+    Advances an iterable to its first item now and returns an iterator over all of its items.
+
+    A database generator only runs its query when it is first advanced, which for a streamed
+    response is after the route has returned, when an error can only cut a 200 body short.
+    Prefetching raises the error inside the route instead, where it becomes the usual error response.
+
+    Args:
+        items (Iterable[Any]): The items, e.g. a generator of rows or chunks.
+
+    Returns:
+        Iterator[Any]: The same items, the first one already read.
+    """
+    items = iter(items)
+    first = list(islice(items, 1))
+    return chain(first, items)
+
+
+def json_rows_response(envelope: dict, key: str, encoder: RowEncoder, rows: Iterable[Sequence[Any]],
+                       status: int = 200, stream: bool = False) -> Response:
+    """
+    Builds a JSON response for a list of rows, optionally streaming it.
+
+    Args:
+        envelope (dict): The other members of the response object.
+        key (str): The member name that holds the rows.
+        encoder (RowEncoder): The encoder for the rows.
+        rows (Iterable[Sequence[Any]]): The rows to send.
+        status (int): The HTTP status code.
+        stream (bool): If True, the body is generated lazily while it is sent. The first row
+            is still read before returning, so a failing query raises here.
+
+    Returns:
+        Response: A Flask response with an application/json body.
+    """
+    if stream:
+        rows = prefetch(rows)
+    body = iter_json_envelope(envelope, key, encoder, rows)
+    if not stream:
+        body = b"".join(body)
+    return Response(body, status=status, mimetype="application/json")
@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from music_collection.utils.logger import configure_logger
+
+
+logger = logging.getLogger(__name__)
+configure_logger(logger)
+
+
+class PeriodicWorker:
+    """
+    Runs a task on a daemon thread every interval seconds until stopped.
+
+    A failing run is logged and counted, and the worker carries on with the next one, so a
+    locked or briefly unavailable database does not end the job.
+
+    Attributes:
+        name (str): The thread name, also used in the logs.
+        interval (float): The seconds between the end of one run and the start of the next.
+    """
+
+    def __init__(self, name: str, task: Callable[[], Any], interval: float):
+        """
+        Initializes a stopped worker.
+
+        Args:
+            name (str): The thread name.
+            task (Callable[[], Any]): The function run on every pass.
+            interval (float): The seconds between runs.
+
+        Raises:
+            ValueError: If the interval is not positive.
+        """
+        if interval <= 0:
+            raise ValueError(f"Invalid interval: {interval}. Must be a positive number.")
+        self.name = name
+        self.interval = interval
+        self._task = task
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._failures = 0
+        self._last_result: Any = None
+        self._last_run_ms: Optional[float] = None
+
+    def start(self) -> None:
+        """Starts the thread; the first run happens one interval later. Does nothing if already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+        logger.info("Started %s, running every %.0f seconds", self.name, self.interval)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Asks the thread to stop and waits for the current run to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> Any:
+        """
+        Runs the task now, on the calling thread, and records the outcome.
+
+        Returns:
+            Any: The task's result.
+
+        Raises:
+            Exception: Whatever the task raises.
+        """
+        start = time.perf_counter()
+        try:
+            result = self._task()
+        except Exception:
+            with self._lock:
+                self._failures += 1
+            raise
+        with self._lock:
+            self._runs += 1
+            self._last_result = result
+            self._last_run_ms = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("%s failed: %s", self.name, e)
+
+    def stats(self) -> dict:
+        """Returns whether the worker is running, its run and failure counts and the last result."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "running": self._thread is not None and self._thread.is_alive(),
+                "interval": self.interval,
+                "runs": self._runs,
+                "failures": self._failures,
+                "last_result": self._last_result,
+                "last_run_ms": self._last_run_ms,
+            }
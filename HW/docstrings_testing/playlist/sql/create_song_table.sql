@@ -1,4 +1,8 @@
+-- Free pages are given back a few at a time by song_model.compact_songs. Only takes effect
+-- on a new database file; the app switches older ones over when it starts.
+PRAGMA auto_vacuum = INCREMENTAL;
 DROP TABLE IF EXISTS songs;
+DROP TABLE IF EXISTS songs_archive;
 CREATE TABLE songs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     artist TEXT NOT NULL,
@@ -9,4 +13,12 @@ CREATE TABLE songs (
     play_count INTEGER DEFAULT 0,
     deleted BOOLEAN DEFAULT FALSE,
     UNIQUE(artist, title, year)
-);
\ No newline at end of file
+);
+
+-- The catalog sorted by play count (get_all_songs and the leaderboard), without the deleted songs
+CREATE INDEX idx_songs_play_count ON songs (play_count DESC) WHERE deleted = FALSE;
+-- The deleted songs waiting to be archived, so compaction finds them without a scan
+CREATE INDEX idx_songs_deleted ON songs (id) WHERE deleted = TRUE;
+
+-- songs_archive and its trigger are created by song_model.ensure_archive when the app starts,
+-- so databases made before compaction existed get them too
@@ -0,0 +1,143 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from flask import Flask, Response, jsonify, request
+
+from music_collection.utils.compression import (
+    CompressionCache,
+    choose_encoding,
+    compress,
+    init_compression,
+    iter_compressed
+)
+
+
+PAYLOAD = {"status": "success", "songs": [{"id": i, "artist": "Artist", "title": f"Song {i}"} for i in range(200)]}
+
+
+@pytest.fixture
+def cache():
+    return CompressionCache(max_entries=2)
+
+@pytest.fixture
+def client(cache):
+    """Fixture providing a test client for an app with compression enabled."""
+    app = Flask(__name__)
+    init_compression(app, min_size=256, cache=cache)
+
+    @app.route('/big')
+    def big():
+        return jsonify(PAYLOAD)
+
+    @app.route('/small')
+    def small():
+        return jsonify({"status": "success"})
+
+    @app.route('/stream')
+    def stream():
+        return Response((json.dumps(song).encode() + b"\n" for song in PAYLOAD["songs"]),
+                        mimetype="application/x-ndjson")
+
+    @app.route('/big', methods=['POST'])
+    def big_post():
+        return jsonify(PAYLOAD)
+
+    return app.test_client()
+
+
+######################################################
+#
+#    Negotiation
+#
+######################################################
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("deflate", None),
+    ("gzip;q=0", None),
+    ("", None),
+])
+def test_choose_encoding(header, expected):
+    """Test picking an encoding from Accept-Encoding."""
+    app = Flask(__name__)
+    with app.test_request_context(headers={"Accept-Encoding": header}):
+        assert choose_encoding(request) == expected
+
+def test_compress_unsupported_encoding():
+    """Test that an unknown encoding is rejected."""
+    with pytest.raises(ValueError, match="Unsupported content encoding: zstd"):
+        compress(b"data", "zstd")
+
+######################################################
+#
+#    Responses
+#
+######################################################
+
+def test_large_response_is_compressed(client):
+    """Test that a body above the threshold is gzipped when accepted."""
+    response = client.get('/big', headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert json.loads(gzip.decompress(response.data)) == PAYLOAD
+
+def test_not_accepted_is_not_compressed(client):
+    """Test that the body is left alone when the client does not accept gzip."""
+    response = client.get('/big')
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == PAYLOAD
+
+def test_small_response_is_not_compressed(client):
+    """Test that bodies below the size threshold are sent uncompressed."""
+    response = client.get('/small', headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == {"status": "success"}
+
+def test_streamed_response_is_compressed(client):
+    """Test that streamed bodies are compressed on the fly."""
+    response = client.get('/stream', headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    lines = gzip.decompress(response.data).splitlines()
+    assert [json.loads(line) for line in lines] == PAYLOAD["songs"]
+
+def test_iter_compressed_chunks_are_decodable():
+    """Test that every flushed prefix of the stream can be decoded."""
+    decoder = zlib.decompressobj(31)
+    chunks = [b"a" * 100, b"b" * 100, b"c" * 100]
+    received = b""
+    for out, expected in zip(iter_compressed(chunks, "gzip"), [b"a" * 100, b"a" * 100 + b"b" * 100]):
+        received += decoder.decompress(out)
+        assert received == expected
+
+######################################################
+#
+#    Cache
+#
+######################################################
+
+def test_compressed_body_is_cached(client, cache):
+    """Test that the second identical GET is served from the cache."""
+    first = client.get('/big', headers={"Accept-Encoding": "gzip"})
+    second = client.get('/big', headers={"Accept-Encoding": "gzip"})
+    assert first.data == second.data
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_post_response_is_not_cached(client, cache):
+    """Test that only GET responses go through the cache."""
+    response = client.post('/big', headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert cache.stats()["entries"] == 0
+
+def test_cache_evicts_least_recently_used(cache):
+    """Test that the cache keeps at most max_entries bodies."""
+    cache.put("v1", "gzip", b"one")
+    cache.put("v2", "gzip", b"two")
+    assert cache.get("v1", "gzip") == b"one"
+    cache.put("v3", "gzip", b"three")
+    assert cache.get("v2", "gzip") is None
+    assert cache.get("v1", "gzip") == b"one"
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,115 @@
+import json
+import sqlite3
+
+import pytest
+from flask import Flask
+
+from music_collection.models.song_model import CATALOG_COLUMNS
+from music_collection.utils.json_utils import (
+    RowEncoder,
+    iter_json_envelope,
+    json_rows_response
+)
+
+
+@pytest.fixture
+def rows():
+    """Fixture providing catalog rows as they come out of sqlite3."""
+    return [
+        (1, "Artist A", "Song A", 2020, "Rock", 210, 10),
+        (2, "Artist \"B\"", "Canción B", 2021, "Pop", 180, 0),
+        (3, "Artist C", None, 2022, "Jazz", 200, 5),
+    ]
+
+@pytest.fixture
+def encoder():
+    return RowEncoder(CATALOG_COLUMNS)
+
+
+######################################################
+#
+#    Row encoding
+#
+######################################################
+
+def test_encode_row_matches_dict(encoder, rows):
+    """Test that an encoded row decodes to the same dict jsonify would have produced."""
+    for row in rows:
+        assert json.loads(encoder.encode(row)) == dict(zip(CATALOG_COLUMNS, row))
+
+def test_encode_many(encoder, rows):
+    """Test encoding a list of rows as a JSON array."""
+    assert json.loads(encoder.encode_many(rows)) == [dict(zip(CATALOG_COLUMNS, row)) for row in rows]
+    assert encoder.encode_many([]) == "[]"
+
+def test_encode_non_scalar_and_float_values():
+    """Test that floats, booleans and nested values round-trip."""
+    encoder = RowEncoder(("a", "b", "c", "d"))
+    decoded = json.loads(encoder.encode((1.5, True, [1, 2], {"x": None})))
+    assert decoded == {"a": 1.5, "b": True, "c": [1, 2], "d": {"x": None}}
+
+def test_row_encoder_requires_columns():
+    """Test that a RowEncoder cannot be built without columns."""
+    with pytest.raises(ValueError, match="RowEncoder requires at least one column."):
+        RowEncoder(())
+
+######################################################
+#
+#    Envelope and responses
+#
+######################################################
+
+@pytest.mark.parametrize("num_rows", [0, 1, 3, 1001])
+def test_iter_json_envelope(encoder, num_rows):
+    """Test that the streamed chunks join into the expected document for any chunking."""
+    rows = [(i, "Artist", "Title", 2000, "Pop", 100, i) for i in range(num_rows)]
+    body = b"".join(iter_json_envelope({"status": "success"}, "songs", encoder, rows, chunk_size=500))
+    assert json.loads(body) == {"status": "success", "songs": [dict(zip(CATALOG_COLUMNS, row)) for row in rows]}
+    assert b'"status": "success"' in body
+
+def test_iter_json_envelope_is_lazy(encoder):
+    """Test that rows are only consumed as the body is read."""
+    consumed = []
+
+    def rows():
+        for i in range(3):
+            consumed.append(i)
+            yield (i, "Artist", "Title", 2000, "Pop", 100, 0)
+
+    chunks = iter_json_envelope({}, "songs", encoder, rows(), chunk_size=1)
+    assert next(chunks) == b'{"songs": ['
+    assert consumed == []
+    next(chunks)
+    assert consumed == [0]
+
+def test_json_rows_response(encoder, rows):
+    """Test building a buffered and a streamed response."""
+    app = Flask(__name__)
+    with app.test_request_context():
+        buffered = json_rows_response({"status": "success"}, "songs", encoder, rows)
+        streamed = json_rows_response({"status": "success"}, "songs", encoder, iter(rows), stream=True)
+        assert buffered.mimetype == "application/json"
+        assert not buffered.is_streamed
+        assert streamed.is_streamed
+        assert json.loads(b"".join(streamed.response)) == buffered.get_json()
+
+def test_streamed_response_reads_first_row(encoder, rows):
+    """Test that a streamed response reads its first row before returning, and only that one."""
+    read = []
+
+    def failing_rows():
+        raise sqlite3.OperationalError("no such table: songs")
+        yield
+
+    def counted_rows():
+        for row in rows:
+            read.append(row[0])
+            yield row
+
+    app = Flask(__name__)
+    with app.test_request_context():
+        with pytest.raises(sqlite3.OperationalError, match="no such table"):
+            json_rows_response({"status": "success"}, "songs", encoder, failing_rows(), stream=True)
+        response = json_rows_response({"status": "success"}, "songs", encoder, counted_rows(), stream=True)
+        assert read == [1]
+        assert len(json.loads(b"".join(response.response))["songs"]) == len(rows)
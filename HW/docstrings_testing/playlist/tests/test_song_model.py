@@ -1,4 +1,5 @@
 from contextlib import contextmanager
+import os
 import re
 import sqlite3
 
@@ -6,8 +7,11 @@ import pytest
 
 from music_collection.models.song_model import (
     Song,
+    compact_songs,
     create_song,
     delete_song,
+    enable_incremental_vacuum,
+    ensure_archive,
     get_song_by_id,
     get_song_by_compound_key,
     get_all_songs,
@@ -45,6 +49,18 @@ def mock_cursor(mocker):
 
     return mock_cursor  # Return the mock cursor so we can set expectations per test
 
+# A real database file built from the create script, for compaction
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "song_catalog.db")
+    monkeypatch.setattr("music_collection.utils.sql_utils.DB_PATH", db_path)
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_song_table.sql")) as fh:
+        script = fh.read()
+    conn = sqlite3.connect(db_path)
+    conn.executescript(script)
+    conn.close()
+    return db_path
+
 ######################################################
 #
 #    Add and delete
@@ -405,3 +421,112 @@ def test_update_play_count_deleted_song(mock_cursor):
 
     # Ensure that no SQL query for updating play count was executed
     mock_cursor.execute.assert_called_once_with("SELECT deleted FROM songs WHERE id = ?", (1,))
+
+######################################################
+#
+#    Compaction
+#
+######################################################
+
+def test_get_song_by_id_archived(mock_cursor):
+    """Test that a song archived by compaction is reported as deleted, not missing."""
+    mock_cursor.fetchone.side_effect = [None, (1,)]
+
+    with pytest.raises(ValueError, match="Song with ID 1 has been deleted"):
+        get_song_by_id(1)
+
+    assert normalize_whitespace(mock_cursor.execute.call_args[0][0]) == "SELECT 1 FROM songs_archive WHERE id = ?"
+
+def test_compact_songs_keeps_deleted_errors(sqlite_db):
+    """Test that archived songs are gone from songs but still reported as deleted, not missing."""
+    create_song("Artist", "Kept", 2001, "Pop", 180)
+    create_song("Artist", "Gone", 2002, "Pop", 200)
+    delete_song(2)
+
+    assert compact_songs()["archived"] == 1
+
+    with sqlite3.connect(sqlite_db) as conn:
+        assert conn.execute("SELECT id FROM songs").fetchall() == [(1,)]
+        assert conn.execute("SELECT id, title FROM songs_archive").fetchall() == [(2, "Gone")]
+    with pytest.raises(ValueError, match="Song with ID 2 has been deleted"):
+        get_song_by_id(2)
+    with pytest.raises(ValueError, match="Song with ID 2 has been deleted"):
+        update_play_count(2)
+    with pytest.raises(ValueError, match="Song with ID 2 has already been deleted"):
+        delete_song(2)
+    with pytest.raises(ValueError, match="Song with artist 'Artist', title 'Gone', and year 2002 has been deleted"):
+        get_song_by_compound_key("Artist", "Gone", 2002)
+    with pytest.raises(ValueError, match="Song with ID 3 not found"):
+        get_song_by_id(3)
+    with pytest.raises(ValueError, match="Song with artist 'Artist', title 'Gone', and year 2002 already exists"):
+        create_song("Artist", "Gone", 2002, "Pop", 200)
+    assert [song["title"] for song in get_all_songs(sort_by_play_count=True)] == ["Kept"]
+
+def test_lookups_before_archive_exists(sqlite_db):
+    """Test that a database without songs_archive reports missing songs as not found until compaction creates it."""
+    with sqlite3.connect(sqlite_db) as conn:
+        assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'songs_archive'").fetchone() is None
+
+    with pytest.raises(ValueError, match="Song with ID 42 not found"):
+        get_song_by_id(42)
+    with pytest.raises(ValueError, match="Song with ID 42 not found"):
+        update_play_count(42)
+    with pytest.raises(ValueError, match="Song with ID 42 not found"):
+        delete_song(42)
+    with pytest.raises(ValueError, match="Song with artist 'Artist', title 'Gone', and year 2002 not found"):
+        get_song_by_compound_key("Artist", "Gone", 2002)
+
+    create_song("Artist", "Gone", 2002, "Pop", 200)
+    delete_song(1)
+    assert compact_songs()["archived"] == 1
+    with pytest.raises(ValueError, match="Song with ID 1 has been deleted"):
+        get_song_by_id(1)
+
+def test_ensure_archive_is_idempotent(sqlite_db):
+    """Test that creating the archive again keeps the songs already archived."""
+    create_song("Artist", "Gone", 2002, "Pop", 200)
+    delete_song(1)
+    compact_songs()
+
+    ensure_archive()
+
+    with sqlite3.connect(sqlite_db) as conn:
+        assert conn.execute("SELECT id FROM songs_archive").fetchall() == [(1,)]
+    with pytest.raises(ValueError, match="Song with artist 'Artist', title 'Gone', and year 2002 already exists"):
+        create_song("Artist", "Gone", 2002, "Pop", 200)
+
+def test_enable_incremental_vacuum(tmp_path, monkeypatch):
+    """Test that a database made without incremental auto-vacuum is switched once, its songs kept."""
+    db_path = str(tmp_path / "song_catalog.db")
+    monkeypatch.setattr("music_collection.utils.sql_utils.DB_PATH", db_path)
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_song_table.sql")) as fh:
+        script = fh.read().replace("PRAGMA auto_vacuum = INCREMENTAL;", "")
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(script)
+    create_song("Artist", "Kept", 2001, "Pop", 200)
+
+    assert enable_incremental_vacuum()
+    assert not enable_incremental_vacuum()
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert get_song_by_id(1).title == "Kept"
+
+def test_compact_songs_frees_pages(sqlite_db):
+    """Test that deleted songs are archived batch by batch and their pages given back."""
+    for i in range(300):
+        create_song("Artist " + "x" * 500, f"Song {i}", 2000, "Pop", 180)
+        delete_song(i + 1)
+
+    first = compact_songs(batch_size=40, vacuum_pages=5)
+    second = compact_songs()
+
+    assert first == {"archived": 300, "freed_pages": 5}
+    assert second["archived"] == 0 and second["freed_pages"] > 0
+    with sqlite3.connect(sqlite_db) as conn:
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+def test_compact_songs_invalid_batch_size():
+    """Test that a non-positive batch size is rejected."""
+    with pytest.raises(ValueError, match="Invalid batch size: 0"):
+        compact_songs(batch_size=0)
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from music_collection.models.song_model import compact_songs
+from music_collection.utils.worker_utils import PeriodicWorker
+
+
+def test_run_once_records_result():
+    """Test that a run on the calling thread returns and records the task's result."""
+    worker = PeriodicWorker("test-worker", lambda: {"archived": 3}, 60)
+
+    assert worker.run_once() == {"archived": 3}
+
+    stats = worker.stats()
+    assert (stats["runs"], stats["failures"], stats["last_result"], stats["running"]) == (1, 0, {"archived": 3}, False)
+
+def test_compaction_failure_is_recorded(tmp_path, monkeypatch):
+    """Test that a failed song compaction is counted and re-raised, and the next run recovers."""
+    db_dir = tmp_path / "db"
+    monkeypatch.setattr("music_collection.utils.sql_utils.DB_PATH", str(db_dir / "song_catalog.db"))
+    worker = PeriodicWorker("song-compaction", compact_songs, 60)
+
+    with pytest.raises(sqlite3.OperationalError, match="unable to open database file"):
+        worker.run_once()
+    stats = worker.stats()
+    assert (stats["runs"], stats["failures"], stats["last_result"]) == (0, 1, None)
+
+    db_dir.mkdir()
+    with open(os.path.join(os.path.dirname(__file__), "..", "sql", "create_song_table.sql")) as fh:
+        script = fh.read()
+    with sqlite3.connect(db_dir / "song_catalog.db") as conn:
+        conn.executescript(script)
+
+    assert worker.run_once()["archived"] == 0
+    stats = worker.stats()
+    assert (stats["runs"], stats["failures"]) == (1, 1)
+
+def test_worker_keeps_running_after_failures():
+    """Test that the background thread carries on after a failed run, until stopped."""
+    calls = []
+    done = threading.Event()
+    def task():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        done.set()
+    worker = PeriodicWorker("test-worker", task, 0.01)
+
+    worker.start()
+    assert done.wait(5)
+    worker.stop(5)
+
+    stats = worker.stats()
+    assert stats["running"] is False
+    assert stats["failures"] == 1 and stats["runs"] >= 1
+
+def test_invalid_interval():
+    """Test that a non-positive interval is rejected."""
+    with pytest.raises(ValueError, match="Invalid interval: 0"):
+        PeriodicWorker("test-worker", lambda: None, 0)
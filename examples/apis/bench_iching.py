@@ -0,0 +1,53 @@
+"""Benchmark of casting readings one at a time against in a batch
+
+Casts the same number of readings three ways, all with local randomness so no request is made:
+one at a time with the stalk trace written to stderr, as iching.py always did; in a batch with
+the trace; and in a batch with --quiet. Prints readings per second and how many random.org
+requests each way would have taken. Then renders the batch's readings with format_throws and
+with the precomputed reading table.
+
+Run from this directory, with stderr thrown away:
+
+    python bench_iching.py --count 20000 2>/dev/null
+"""
+import argparse
+import math
+import time
+
+import iching
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--count', type=int, default=20000)
+    args = parser.parse_args()
+
+    runs = {
+        'one at a time': lambda coins: [list(iching.build_lines(iching.throw_coins(True) if coins else iching.throw_stalks(True)))
+                                        for _ in range(args.count)],
+        'batch': lambda coins: list(iching.cast(args.count, coins, 'local')),
+        'batch, quiet': lambda coins: list(iching.cast(args.count, coins, 'local', quiet=True)),
+    }
+    batch_requests = math.ceil(args.count * iching.THROWS_PER_READING / iching.RANDOM_ORG_MAX)
+    print('{:<16}{:>14}{:>14}{:>20}'.format('', 'stalks/s', 'coins/s', 'random.org requests'))
+    for name, run in runs.items():
+        rates = []
+        for coins in (False, True):
+            start = time.perf_counter()
+            readings = run(coins)
+            rates.append(len(readings) / (time.perf_counter() - start))
+        requests = args.count if name == 'one at a time' else batch_requests
+        print('{:<16}{:>14,.0f}{:>14,.0f}{:>20,}'.format(name, rates[0], rates[1], requests))
+
+    casts = list(iching.cast(args.count, True, 'local'))
+    iching.reading(casts[0])
+    print()
+    for name, render in (('format_throws', iching.format_throws), ('reading table', lambda lines: iching.reading(lines)['text'])):
+        start = time.perf_counter()
+        for lines in casts:
+            render(lines)
+        print('{:<16}{:>14,.0f} renders/s'.format(name, len(casts) / (time.perf_counter() - start)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,77 +1,175 @@
 import argparse
 from datetime import datetime
+import io
+import itertools
+import json
+import os
 import random
 import requests
 import sys
 
 
-def print_fingers(fingers):
+THROWS_PER_READING = 18
+# random.org returns at most this many numbers per request
+RANDOM_ORG_MAX = 10000
+LINE_VALUES = (6, 7, 8, 9)
+
+# The trigrams, and their lines from the bottom as bits: bit 0 is the bottom line, 1 is yang
+TRIGRAMS = ('Qian', 'Zhen', 'Kan', 'Gen', 'Kun', 'Xun', 'Li', 'Dui')
+TRIGRAM_BITS = (0b111, 0b001, 0b010, 0b100, 0b000, 0b110, 0b101, 0b011)
+# The King Wen number of each hexagram: a row per lower trigram, a column per upper, both in TRIGRAMS order
+KING_WEN = (
+    (1, 34, 5, 26, 11, 9, 14, 43),
+    (25, 51, 3, 27, 24, 42, 21, 17),
+    (6, 40, 29, 4, 7, 59, 64, 47),
+    (33, 62, 39, 52, 15, 53, 56, 31),
+    (12, 16, 8, 23, 2, 20, 35, 45),
+    (44, 32, 48, 18, 46, 57, 50, 28),
+    (13, 55, 63, 22, 36, 37, 30, 49),
+    (10, 54, 60, 41, 19, 61, 38, 58),
+)
+# The names of the hexagrams 1 to 64, as Wilhelm translates them
+HEXAGRAM_NAMES = (
+    'The Creative', 'The Receptive', 'Difficulty at the Beginning', 'Youthful Folly',
+    'Waiting (Nourishment)', 'Conflict', 'The Army', 'Holding Together (Union)',
+    'The Taming Power of the Small', 'Treading (Conduct)', 'Peace', 'Standstill (Stagnation)',
+    'Fellowship with Men', 'Possession in Great Measure', 'Modesty', 'Enthusiasm',
+    'Following', 'Work on What Has Been Spoiled (Decay)', 'Approach', 'Contemplation (View)',
+    'Biting Through', 'Grace', 'Splitting Apart', 'Return (The Turning Point)',
+    'Innocence (The Unexpected)', 'The Taming Power of the Great', 'The Corners of the Mouth (Providing Nourishment)', 'Preponderance of the Great',
+    'The Abysmal (Water)', 'The Clinging, Fire', 'Influence (Wooing)', 'Duration',
+    'Retreat', 'The Power of the Great', 'Progress', 'Darkening of the Light',
+    'The Family (The Clan)', 'Opposition', 'Obstruction', 'Deliverance',
+    'Decrease', 'Increase', 'Break-through (Resoluteness)', 'Coming to Meet',
+    'Gathering Together (Massing)', 'Pushing Upward', 'Oppression (Exhaustion)', 'The Well',
+    'Revolution (Molting)', 'The Caldron', 'The Arousing (Shock, Thunder)', 'Keeping Still, Mountain',
+    'Development (Gradual Progress)', 'The Marrying Maiden', 'Abundance (Fullness)', 'The Wanderer',
+    'The Gentle (The Penetrating, Wind)', 'The Joyous, Lake', 'Dispersion (Dissolution)', 'Limitation',
+    'Inner Truth', 'Preponderance of the Small', 'After Completion', 'Before Completion',
+)
+# The King Wen number of each of the 64 hexagrams, by its lines as bits from the bottom
+HEXAGRAM_NUMBERS = tuple(
+    KING_WEN[TRIGRAM_BITS.index(bits & 0b111)][TRIGRAM_BITS.index(bits >> 3)] for bits in range(64)
+)
+
+
+def print_fingers(fingers, out=None):
     """Prints what's "in your hands" to stderr to make it as much like actually throwing the stalks as you can
 
     Args:
         fingers ([int, int, int]): An array containing how many stalks are between your fingers
+        out (file): Where to print instead of stderr
     """
-    sys.stderr.write(' | '.join([str(finger_stalks) for finger_stalks in fingers]))
-    sys.stderr.write('\n')
+    out = out or sys.stderr
+    out.write(' | '.join([str(finger_stalks) for finger_stalks in fingers]))
+    out.write('\n')
 
-def get_coins():
+def get_coins(num=THROWS_PER_READING, session=None):
     """Curls random.org to get the coin flips
 
+    Asks for RANDOM_ORG_MAX at a time, so a batch of readings takes one request per 10000 flips
+    instead of one per reading
+
+    Args:
+        num (int): How many flips
+        session (requests.Session): Reused for every request if given
+
     Returns:
         An array of coin flips
     """
-    url = 'https://www.random.org/integers/?format=plain&num=18&min=2&max=3&col=18&base=10'
-    r = requests.get(url)
-    text = r.text
-    return [int(x) for x in text.strip().split('\t')]
+    url = 'https://www.random.org/integers/?format=plain&num={}&min=2&max=3&col=18&base=10'
+    coins = []
+    for start in range(0, num, RANDOM_ORG_MAX):
+        r = (session or requests).get(url.format(min(RANDOM_ORG_MAX, num - start)))
+        r.raise_for_status()
+        coins.extend(int(x) for x in r.text.split())
+    return coins
 
-def get_stalks():
+def get_stalks(num=THROWS_PER_READING, session=None):
     """Curls random.org to get the number of stalks
 
+    Asks for RANDOM_ORG_MAX at a time, like get_coins
+
+    Args:
+        num (int): How many splits
+        session (requests.Session): Reused for every request if given
+
     Returns:
         The array of stalk splits
     """
-    r = requests.get('https://www.random.org/decimal-fractions/?num=18&dec=2&col=18&format=plain&rnd=new')
-    text = r.text
-    return [float(x) for x in text.strip().split('\t')]
+    url = 'https://www.random.org/decimal-fractions/?num={}&dec=2&col=18&format=plain&rnd=new'
+    stalks = []
+    for start in range(0, num, RANDOM_ORG_MAX):
+        r = (session or requests).get(url.format(min(RANDOM_ORG_MAX, num - start)))
+        r.raise_for_status()
+        stalks.extend(float(x) for x in r.text.split())
+    return stalks
+
+def get_entropy(coins, num, source):
+    """Gets the randomness for num throws in one go
+
+    Args:
+        coins (Bool): Coin flips (2 or 3) if true, stalk splits (0 to 1) if not
+        num (int): How many throws
+        source (str): 'random.org', 'local' for the OS's CSPRNG, or 'test' for the random module
+
+    Returns:
+        ([int] or [float]) The coin flips or the stalk splits
+    """
+    if source == 'random.org':
+        with requests.Session() as session:
+            return get_coins(num, session) if coins else get_stalks(num, session)
+    if source == 'local':
+        # One read of the OS's CSPRNG for the whole batch: a byte per flip, 8 bytes per split
+        if coins:
+            return [2 + (byte & 1) for byte in os.urandom(num)]
+        return [(bits >> 11) * 2 ** -53 for bits in memoryview(os.urandom(8 * num)).cast('Q')]
+    if coins:
+        return [random.randint(2, 3) for _ in range(num)]
+    return [random.random() for _ in range(num)]
 
-def throw_stalks(test):
+def throw_stalks(test, splits=None, quiet=False):
     """Attempt to capture the spirit of the traditional yarrow stalk method. It's
     supposed to be like this, trust me
 
     Args:
         test (Bool): If true, then don't curl random.org
+        splits ([float]): The splits to use instead of getting new ones
+        quiet (Bool): If true, then don't write the throws to stderr. If not, they are
+            written once the stalks are all thrown, in one go
 
     Returns:
         ([int]) The results of the throws
     """
-    if test:
-        splits = [random.random() for _ in range(18)]
-    else:
-        splits = get_stalks()
+    if splits is None:
+        splits = get_entropy(False, THROWS_PER_READING, 'test' if test else 'random.org')
+    splits = list(splits)
+    trace = io.StringIO()
+    write = (lambda text: None) if quiet else trace.write
     throws = []
     for _ in range(6):
-        sys.stderr.write('\n----------\n')
+        write('\n----------\n')
         stalks = 50
         for _ in range(3):
             # 1. Remove a yarrow stalk, and put it in front of you, in a direction
             # parallel to your body. This is the observer stalk
             stalks -= 1
-            sys.stderr.write('\n    -    \n')
+            write('\n    -    \n')
             # 2. Randomly divide the remaining sticks into 2 piles, with one
             # hand holding each pile. Put the 2 piles on both sides of you,
             # pointing away from you, in a direction perpendicular to your body
             split = splits.pop()
             left = int(split * stalks)
             right = stalks - left
-            sys.stderr.write('--  |  --\n')
-            sys.stderr.write('{:02d}  |  {:02d}\n\n'.format(left, right))
+            write('--  |  --\n')
+            write('{:02d}  |  {:02d}\n\n'.format(left, right))
             # 3. Pick up a yarrow stalk from the pile on the RIGHT, and put
             # it between the little finger and the ring finger of the LEFT
             # hand. This is the 2nd stalk.
             right -= 1
             fingers = [1, 0, 0]
-            print_fingers(fingers)
+            if not quiet:
+                print_fingers(fingers, trace)
             # 4. Pick up the remaining yarrow stalks from the pile on the LEFT
             # with your LEFT hand.
             # 5. Remove 4 stalks at a time from the LEFT hand, and put them on
@@ -80,53 +178,68 @@ def throw_stalks(test):
             # stalks held on the LEFT hand between the ring finger and the
             # middle finger of the LEFT hand.
             fingers[1] = 4 if left % 4 == 0 else left % 4
-            print_fingers(fingers)
+            if not quiet:
+                print_fingers(fingers, trace)
             # 6. Now, pick up the RIGHT hand heap, and sort it by fours in the
             # same way, placing the remainder into the next gap between your
             # fingers.
             fingers[2] = 4 if right % 4 == 0 else right % 4
-            print_fingers(fingers)
+            if not quiet:
+                print_fingers(fingers, trace)
             throw = sum(fingers)
             throws.append(2 if throw > 6 else 3)
-            sys.stderr.write('\n    {}    '.format(throw))
-            sys.stderr.write('\n')
+            write('\n    {}    '.format(throw))
+            write('\n')
             stalks -= throw
             stalks += 1
-            sys.stderr.write('   \n')
+            write('   \n')
+    if not quiet:
+        sys.stderr.write(trace.getvalue())
     return throws
 
-def throw_coins(test):
+def throw_coins(test, throws=None):
     """Throw coins
 
     Args:
         test (Bool): If true, then don't curl random.org
+        throws ([int]): The flips to use instead of getting new ones
 
     Returns:
         ([int]) The results of the throws
     """
-    if test:
-        throws = [random.randint(2, 3) for _ in range(18)]
-    else:
-        throws = get_coins()
-    return throws
+    if throws is None:
+        throws = get_entropy(True, THROWS_PER_READING, 'test' if test else 'random.org')
+    return list(throws)
+
+def cast(count, coins, source, quiet=False):
+    """Casts count readings with the randomness for all of them fetched at once
+
+    Args:
+        count (int): How many readings
+        coins (Bool): Throw the coins if true, the stalks if not
+        source (str): Where the randomness comes from, see get_entropy
+        quiet (Bool): If true, then don't write the stalk throws to stderr
+
+    Yields:
+        ([int]) The six lines of each reading, 6-9, from the bottom
+    """
+    entropy = get_entropy(coins, count * THROWS_PER_READING, source)
+    test = source != 'random.org'
+    for start in range(0, len(entropy), THROWS_PER_READING):
+        chunk = entropy[start:start + THROWS_PER_READING]
+        throws = throw_coins(test, chunk) if coins else throw_stalks(test, chunk, quiet)
+        yield build_lines(throws)
 
 def build_lines(throws):
     """Convert each throw into a "line" eg a number 6-9
 
-    I'm writing these comments years later. I don't remember why this is a generator. Seems like a weird choice
-
     Args:
         throws ([int]): The results of the throws
 
-    Yields:
-        (int) the throw converted to a number
+    Returns:
+        ([int]) the throws converted to numbers, three throws to a line
     """
-    line = []
-    for throw in throws:
-        line.append(throw)
-        if len(line) == 3:
-            yield sum(line)
-            line = []
+    return [sum(throws[start:start + 3]) for start in range(0, len(throws), 3)]
 
 def format_line(throw):
     """Converts the line number into a string and a flag for whether it's floating
@@ -176,28 +289,106 @@ def format_throws(throws):
     return '\n'.join(['   {}'.format(line) for line in reversed(reversed_output)])
 
 
+def hexagram(lines, secondary=False):
+    """Looks up the King Wen number and name of the hexagram of six lines
+
+    Args:
+        lines ([int]): The six lines, 6-9, from the bottom
+        secondary (Bool): If true, the hexagram with the changing lines (6 and 9) changed
+
+    Returns:
+        (int, str) The number, 1-64, and the name
+    """
+    yang = (6, 7) if secondary else (7, 9)
+    number = HEXAGRAM_NUMBERS[sum(1 << index for index, line in enumerate(lines) if line in yang)]
+    return number, HEXAGRAM_NAMES[number - 1]
+
+def _build_readings():
+    readings = {}
+    for lines in itertools.product(LINE_VALUES, repeat=6):
+        primary = hexagram(lines)
+        secondary = hexagram(lines, secondary=True) if 6 in lines or 9 in lines else None
+        names = '{}. {}'.format(*primary)
+        if secondary:
+            names += ' -> {}. {}'.format(*secondary)
+        readings[lines] = {
+            'text': format_throws(lines),
+            'names': names,
+            'primary': primary,
+            'secondary': secondary,
+        }
+    return readings
+
+_READINGS = None
+
+def reading(lines):
+    """Looks up everything about a cast: its rendering and its hexagrams
+
+    There are only 4 ** 6 = 4096 possible casts, so the first call renders all of them and
+    every call after that is a dict lookup
+
+    Args:
+        lines ([int]): The six lines, 6-9, from the bottom
+
+    Returns:
+        (dict) 'text': format_throws of the lines; 'names': the hexagram numbers and names, on one line;
+        'primary' and 'secondary': the (number, name) of each hexagram, secondary None without changing lines
+    """
+    global _READINGS
+    if _READINGS is None:
+        _READINGS = _build_readings()
+    return _READINGS[tuple(lines)]
+
+
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
+    if sys.argv[1:2] == ['simulate']:
+        # The Monte-Carlo check of the methods, which needs NumPy
+        import iching_sim
+        iching_sim.main(sys.argv[2:])
+        sys.exit()
+
+    parser = argparse.ArgumentParser(epilog='Run "iching.py simulate --help" to check the methods\' distributions')
     parser.add_argument('-t', '--test', action='store_true')
     parser.add_argument('-c', '--coins', action='store_true', help='Throw the coins not the yarrow stalks')
     parser.add_argument('-f', '--file', help='file to append results to')
+    parser.add_argument('-n', '--count', type=int, default=1, help='How many readings to cast, with one fetch of randomness')
+    parser.add_argument('-l', '--local', action='store_true', help="Use the OS's random number generator, not random.org")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Don't write the stalk throws to stderr")
+    parser.add_argument('--ndjson', action='store_true', help='Write each reading as a line of JSON')
     args = parser.parse_args()
+    if args.count < 1:
+        parser.error('--count must be at least 1')
 
-    method = throw_coins if args.coins else throw_stalks
-    throw = build_lines(method(args.test))
-    formatted_results = '''
+    source = 'test' if args.test else 'local' if args.local else 'random.org'
+    method_name = 'The Coins' if args.coins else 'The Stalks'
+    fh = open(args.file, 'a') if args.file else None
+    try:
+        for lines in cast(args.count, args.coins, source, args.quiet):
+            date = datetime.today().strftime('%Y-%m-%d %H:%M:%S')
+            cast_reading = reading(lines)
+            if args.ndjson:
+                hexagrams = {key: cast_reading[key] and {'number': cast_reading[key][0], 'name': cast_reading[key][1]}
+                             for key in ('primary', 'secondary')}
+                results = json.dumps({'date': date, 'method': 'coins' if args.coins else 'stalks',
+                                      'source': source, 'lines': lines, **hexagrams}) + '\n'
+            else:
+                results = """
 ----------------
 {date}
 
 {formatted_throw}
 
+{names}
+
 {method_name}{test_run}
-'''.format(method_name='The Coins' if args.coins else 'The Stalks',
-                           formatted_throw=format_throws(throw),
-                           test_run=' (test run)' if args.test else '',
-                           date=datetime.today().strftime('%Y-%m-%d %H:%M:%S'))
-
-    if args.file:
-        with open(args.file, 'a') as fh:
-            fh.write(formatted_results)
-    print(formatted_results)
+""".format(method_name=method_name,
+           formatted_throw=cast_reading['text'],
+           names=cast_reading['names'],
+           test_run=' (test run)' if args.test else '',
+           date=date)
+            if fh:
+                fh.write(results)
+            sys.stdout.write(results if args.ndjson else results + '\n')
+    finally:
+        if fh:
+            fh.close()
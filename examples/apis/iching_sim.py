@@ -0,0 +1,208 @@
+"""Monte-Carlo check of the line and hexagram distributions of the casting methods in iching.py
+
+Casts millions of readings at once with NumPy, following throw_stalks and throw_coins step for
+step, counts the line values (6-9) and the hexagrams, and compares them with what each method
+should give. For the stalks there are two expectations: the traditional yarrow-stalk
+probabilities, and the exact probabilities of the procedure as throw_stalks codes it, worked out
+by going through every possible split. They differ a little, as a split that leaves a multiple of
+4 in the left hand comes up 13 times in 49 rather than 1 in 4, and a big enough run shows it.
+
+Run through iching.py, or on its own:
+
+    python iching.py simulate --casts 10000000 --seed 1
+    python iching_sim.py --method coins --casts 1000000
+"""
+import argparse
+from fractions import Fraction
+import time
+
+import numpy as np
+
+
+LINE_VALUES = (6, 7, 8, 9)
+HEXAGRAMS = 64
+# The traditional probabilities of 6, 7, 8 and 9
+TRADITIONAL = {
+    'stalks': (Fraction(1, 16), Fraction(5, 16), Fraction(7, 16), Fraction(3, 16)),
+    'coins': (Fraction(1, 8), Fraction(3, 8), Fraction(3, 8), Fraction(1, 8)),
+}
+# Readings cast per batch of NumPy calls: keeps memory flat whatever the number of casts
+CHUNK = 1000000
+
+
+def stalk_throw(left, stalks):
+    """What is left between your fingers after one division of the stalks, as throw_stalks counts it
+
+    Args:
+        left (int or np.ndarray): The stalks in the left pile
+        stalks (int or np.ndarray): The stalks divided
+
+    Returns:
+        (int or np.ndarray) The stalks set aside: the one from the right pile and the two remainders
+    """
+    right = stalks - left - 1
+    left_rest = left % 4
+    right_rest = right % 4
+    # A remainder of 0 is a full 4
+    left_rest = left_rest + 4 * (left_rest == 0)
+    right_rest = right_rest + 4 * (right_rest == 0)
+    return 1 + left_rest + right_rest
+
+def simulate_lines(rng, count, method, decimals=None):
+    """Casts count lines at once
+
+    Args:
+        rng (np.random.Generator): The random numbers
+        count (int): How many lines
+        method (str): 'stalks' or 'coins'
+        decimals (int): Round the stalk splits down to this many decimals, as random.org's are
+
+    Returns:
+        (np.ndarray) The line values, 6-9
+    """
+    if method == 'coins':
+        return rng.integers(2, 4, size=(count, 3), dtype=np.int8).sum(axis=1, dtype=np.int8)
+    stalks = np.full(count, 50, dtype=np.int16)
+    lines = np.zeros(count, dtype=np.int8)
+    for _ in range(3):
+        stalks -= 1
+        splits = rng.random(count)
+        if decimals is not None:
+            splits = np.floor(splits * 10 ** decimals) / 10 ** decimals
+        throw = stalk_throw((splits * stalks).astype(np.int16), stalks)
+        lines += np.where(throw > 6, 2, 3).astype(np.int8)
+        stalks -= throw - 1
+    return lines
+
+def simulate(casts, method, seed=None, decimals=None):
+    """Casts readings in chunks and counts the line values and hexagrams
+
+    With a seed, the same arguments always give the same counts.
+
+    Args:
+        casts (int): How many readings, of six lines each
+        method (str): 'stalks' or 'coins'
+        seed (int): The seed of the random numbers, random if not given
+        decimals (int): See simulate_lines
+
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray) The count of each line value 6-9, and of each
+        primary and secondary hexagram, numbered with the bottom line as bit 0 and yang as 1
+    """
+    rng = np.random.default_rng(seed)
+    line_counts = np.zeros(len(LINE_VALUES), dtype=np.int64)
+    primary_counts = np.zeros(HEXAGRAMS, dtype=np.int64)
+    secondary_counts = np.zeros(HEXAGRAMS, dtype=np.int64)
+    weights = 1 << np.arange(6)
+    for start in range(0, casts, CHUNK):
+        readings = min(CHUNK, casts - start)
+        lines = simulate_lines(rng, readings * 6, method, decimals).reshape(readings, 6)
+        line_counts += np.bincount(lines.ravel() - 6, minlength=len(LINE_VALUES))
+        # 7 and 9 are yang; 6 and 9 change, so 6 and 7 are yang in the secondary
+        primary_counts += np.bincount(((lines & 1) * weights).sum(axis=1), minlength=HEXAGRAMS)
+        secondary_counts += np.bincount(((lines <= 7) * weights).sum(axis=1), minlength=HEXAGRAMS)
+    return line_counts, primary_counts, secondary_counts
+
+def stalk_probabilities(decimals=None):
+    """The exact probabilities of 6, 7, 8 and 9 from throw_stalks, going through every split
+
+    Args:
+        decimals (int): The splits are multiples of 10 ** -decimals if given, uniform from 0 to 1 if not
+
+    Returns:
+        ((Fraction, Fraction, Fraction, Fraction)) The probability of each line value
+    """
+    def divisions(stalks):
+        # The probability of each size of the left pile
+        if decimals is None:
+            return {left: Fraction(1, stalks) for left in range(stalks)}
+        steps = 10 ** decimals
+        sizes = {}
+        for step in range(steps):
+            left = int(float('{:.{}f}'.format(step / steps, decimals)) * stalks)
+            sizes[left] = sizes.get(left, 0) + Fraction(1, steps)
+        return sizes
+
+    # Probability of each (stalks, line so far) after every division
+    states = {(50, 0): Fraction(1)}
+    for _ in range(3):
+        after = {}
+        for (stalks, line), probability in states.items():
+            stalks -= 1
+            for left, chance in divisions(stalks).items():
+                throw = stalk_throw(left, stalks)
+                state = (stalks - throw + 1, line + (2 if throw > 6 else 3))
+                after[state] = after.get(state, 0) + probability * chance
+        states = after
+    totals = dict.fromkeys(LINE_VALUES, Fraction(0))
+    for (_, line), probability in states.items():
+        totals[line] += probability
+    return tuple(totals[value] for value in LINE_VALUES)
+
+def hexagram_probabilities(line_probabilities, secondary=False):
+    """The probability of each hexagram when every line is cast independently
+
+    Args:
+        line_probabilities ([float]): The probabilities of 6, 7, 8 and 9
+        secondary (Bool): For the secondary hexagram, the changing lines changed
+
+    Returns:
+        (np.ndarray) The probability of each of the 64 hexagrams
+    """
+    p6, p7, p8, p9 = (float(p) for p in line_probabilities)
+    yang = p6 + p7 if secondary else p7 + p9
+    bits = (np.arange(HEXAGRAMS)[:, None] >> np.arange(6)) & 1
+    return np.where(bits == 1, yang, 1 - yang).prod(axis=1)
+
+def z_scores(counts, probabilities):
+    """How many standard errors each observed frequency is from its probability"""
+    total = counts.sum()
+    probabilities = np.asarray(probabilities, dtype=float)
+    return (counts - total * probabilities) / np.sqrt(total * probabilities * (1 - probabilities))
+
+def chi_square(counts, probabilities):
+    """Pearson's chi-square statistic of the counts against the probabilities"""
+    expected = counts.sum() * np.asarray(probabilities, dtype=float)
+    return float(((counts - expected) ** 2 / expected).sum())
+
+def report(method, casts, seed, decimals):
+    """Simulates one method and prints its distributions against the expected ones"""
+    start = time.perf_counter()
+    line_counts, primary_counts, secondary_counts = simulate(casts, method, seed, decimals)
+    seconds = time.perf_counter() - start
+
+    traditional = TRADITIONAL[method]
+    expected = stalk_probabilities(decimals) if method == 'stalks' else traditional
+    print('The {}: {:,} readings in {:.2f}s, {:,.0f} readings/s'.format(
+        method.capitalize(), casts, seconds, casts / seconds))
+    print('  line   observed     expected   traditional      z')
+    for value, count, p, tradition, z in zip(LINE_VALUES, line_counts, expected, traditional,
+                                             z_scores(line_counts, expected)):
+        print('  {}     {:.6f}     {:.6f}     {:.6f}   {:+6.2f}'.format(
+            value, count / line_counts.sum(), float(p), float(tradition), z))
+    print('  line chi-square against traditional: {:.1f} (3 degrees of freedom)'.format(
+        chi_square(line_counts, traditional)))
+    for name, counts, secondary in (('primary', primary_counts, False), ('secondary', secondary_counts, True)):
+        probabilities = hexagram_probabilities(expected, secondary)
+        z = z_scores(counts, probabilities)
+        print('  {} hexagrams: chi-square {:.1f} (63 degrees of freedom), largest |z| {:.2f} for hexagram {:06b} (top line first)'.format(
+            name, chi_square(counts, probabilities), np.abs(z).max(), int(np.abs(z).argmax())))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='iching.py simulate', description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--casts', type=int, default=10000000, help='How many readings to cast')
+    parser.add_argument('-m', '--method', choices=('stalks', 'coins', 'both'), default='both')
+    parser.add_argument('-s', '--seed', type=int, help='Seed for a reproducible run')
+    parser.add_argument('-d', '--decimals', type=int,
+                        help="Round the stalk splits to this many decimals: 2 is what random.org gives iching.py")
+    args = parser.parse_args(argv)
+    if args.casts < 1:
+        parser.error('--casts must be at least 1')
+
+    methods = ('stalks', 'coins') if args.method == 'both' else (args.method,)
+    for method in methods:
+        report(method, args.casts, args.seed, args.decimals)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark of per-key Redis round trips against MGET/MSET and pipelines
+
+Writes and reads the same keys three ways: one SET and one GET per key, MSET and MGET, and a
+pipeline of SETs with an expiry. Runs against FakeRedis with a simulated round-trip time by
+default, so no server is needed, or against a real server with --redis.
+
+    python bench_redis.py --keys 1000 --rtt-ms 0.2
+    python bench_redis.py --redis localhost:6379
+"""
+import argparse
+import time
+
+from redis_example import redis_read_many, redis_write_many
+from utils import FakeRedis
+
+
+def per_key(conn, mapping):
+    for key, value in mapping.items():
+        conn.set(key, value)
+    return [conn.get(key) for key in mapping]
+
+def batched(conn, mapping):
+    redis_write_many(conn, mapping)
+    return redis_read_many(conn, list(mapping))
+
+def pipelined(conn, mapping):
+    redis_write_many(conn, mapping, ex=60)
+    with conn.pipeline(transaction=False) as pipe:
+        for key in mapping:
+            pipe.get(key)
+        return pipe.execute()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keys', type=int, default=1000)
+    parser.add_argument('--rtt-ms', type=float, default=0.2, help='Round-trip time of the stand-in')
+    parser.add_argument('--redis', help='host:port of a real server to use instead')
+    args = parser.parse_args()
+
+    if args.redis:
+        import redis
+        host, port = args.redis.split(':')
+        conn = redis.Redis(host=host, port=int(port))
+    else:
+        conn = FakeRedis(latency=args.rtt_ms / 1000)
+    mapping = {'bench:{}'.format(i): 'value {}'.format(i) for i in range(args.keys)}
+
+    print('{:<12}{:>12}{:>14}{:>14}'.format('', 'seconds', 'keys/s', 'round trips'))
+    baseline = None
+    for name, run in (('per key', per_key), ('mget/mset', batched), ('pipeline', pipelined)):
+        trips = getattr(conn, 'round_trips', None)
+        start = time.perf_counter()
+        run(conn, mapping)
+        seconds = time.perf_counter() - start
+        trips = '' if trips is None else conn.round_trips - trips
+        baseline = baseline or seconds
+        print('{:<12}{:>12.4f}{:>14,.0f}{:>14}   {:.0f}x'.format(name, seconds, 2 * args.keys / seconds, trips, baseline / seconds))
+    conn.delete(*mapping)
+
+
+if __name__ == '__main__':
+    main()
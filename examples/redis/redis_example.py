@@ -1,10 +1,14 @@
+import argparse
 from contextlib import contextmanager
 import json
 
-import redis
 import requests
 
-from utils import timer
+from utils import cached, FakeRedis, timer, timer_report
+
+
+# Seconds a word fetched from the API is reused
+WORD_TTL = 300
 
 
 @timer
@@ -19,14 +23,35 @@ def request(env):
             print(word)
             return word
     except Exception as e:
-        print(r)
+        print(e)
+
+# One connection pool per server, shared by every redis_connect, so each context borrows an
+# open connection instead of connecting again; the fakes are shared the same way, like a server
+_pools = {}
+
+
+def connection_pool(host, port, db=0, fake=False):
+    key = (host, port, db, fake)
+    if key not in _pools:
+        if fake:
+            _pools[key] = FakeRedis()
+        else:
+            import redis
+            _pools[key] = redis.ConnectionPool(host=host, port=port, db=db)
+    return _pools[key]
 
 @contextmanager
-def redis_connect(env):
-    conn = redis.Redis(host=env["redis_host"], port=env["redis_port"], db=0)
+def redis_connect(env, fake=False):
+    pool = connection_pool(env.get("redis_host"), env.get("redis_port"), fake=fake)
+    if fake:
+        conn = pool
+    else:
+        import redis
+        conn = redis.Redis(connection_pool=pool)
     try:
         yield conn
     finally:
+        # Gives the connection back to the pool; the pool itself stays open
         conn.close()
 
 @timer
@@ -38,12 +63,47 @@ def redis_read(conn):
     value = conn.get('content')
     print(value.decode("UTF-8"))
 
+@timer
+def redis_write_many(conn, mapping, ex=None):
+    """Writes every key in one round trip: MSET, or a pipeline of SETs when they expire"""
+    if ex is None:
+        return conn.mset(mapping)
+    with conn.pipeline(transaction=False) as pipe:
+        for key, value in mapping.items():
+            pipe.set(key, value, ex=ex)
+        return pipe.execute()
+
+@timer
+def redis_read_many(conn, keys):
+    """Reads every key in one round trip with MGET, None for the missing ones"""
+    return [None if value is None else value.decode("UTF-8") for value in conn.mget(keys)]
+
 
 if __name__ == "__main__":
-    with open("env.json", "r") as fh:
-        env = json.load(fh)
-    content = request(env)
-    with redis_connect(env) as conn:
-        redis_write(conn, content)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fake', action='store_true', help='Use an in-process stand-in for Redis and the API')
+    args = parser.parse_args()
+
+    if args.fake:
+        env = {"api_url": "fake"}
+        fetch = timer(lambda env: "serendipity", name="request")
+    else:
+        with open("env.json", "r") as fh:
+            env = json.load(fh)
+        fetch = request
+    with redis_connect(env, args.fake) as conn:
+        # The API is called once; the repeats come from the in-process LRU, or Redis in another process.
+        # The key is the URL: env holds the API key, which must not end up in Redis
+        word = cached(conn, ttl=WORD_TTL, key=lambda env: env["api_url"])(fetch)
         for _ in range(10):
-            redis_read(conn)
+            content = word(env)
+        if content is None:
+            # request() printed why; None is not cached, so the next run asks again
+            raise SystemExit('No word to store')
+        redis_write(conn, content)
+        redis_read(conn)
+        print(word.cache_stats())
+        letters = {'content:{}'.format(i): letter for i, letter in enumerate(content)}
+        redis_write_many(conn, letters, ex=WORD_TTL)
+        print(''.join(redis_read_many(conn, list(letters))))
+    print(timer_report())
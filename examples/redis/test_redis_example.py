@@ -0,0 +1,47 @@
+"""Tests of the batched reads and writes of the redis example, on FakeRedis
+
+    python -m pytest -q test_redis_example.py
+"""
+from redis_example import redis_read_many, redis_write_many
+from utils import FakeRedis
+
+
+class Clock:
+    """A clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_write_and_read_many():
+    conn = FakeRedis()
+    mapping = {'word:first': 'alpha', 'word:second': 'beta'}
+
+    assert redis_write_many(conn, mapping) is True
+    assert redis_read_many(conn, ['word:first', 'word:missing', 'word:second']) == ['alpha', None, 'beta']
+    # One round trip each way
+    assert conn.round_trips == 2
+
+
+def test_write_many_with_expiry():
+    clock = Clock()
+    conn = FakeRedis(clock=clock)
+    mapping = {'word:first': 'alpha', 'word:second': 'beta'}
+
+    assert redis_write_many(conn, mapping, ex=60) == [True, True]
+    assert conn.round_trips == 1
+    assert conn.ttl('word:first') == 60 and conn.ttl('word:second') == 60
+
+    clock.now = 59
+    assert redis_read_many(conn, list(mapping)) == ['alpha', 'beta']
+    clock.now = 60
+    assert redis_read_many(conn, list(mapping)) == [None, None]
+
+
+def test_read_many_of_nothing():
+    conn = FakeRedis()
+
+    assert redis_read_many(conn, ['word:missing']) == [None]
@@ -0,0 +1,222 @@
+"""Tests of the cached decorator and the FakeRedis stand-in it runs on
+
+    python -m pytest -q test_utils.py
+"""
+import json
+import threading
+import time
+
+import pytest
+
+from utils import RELEASE_LOCK_SCRIPT, FakeRedis, cached
+
+
+class Clock:
+    """A clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def cache_key(func, *args):
+    return 'cache:{}:{}'.format(func.__qualname__, ':'.join(map(str, args)))
+
+
+def test_release_lock_script():
+    conn = FakeRedis()
+    conn.set('lock', 'mine', px=10000)
+
+    assert conn.eval(RELEASE_LOCK_SCRIPT, 1, 'lock', 'theirs') == 0
+    assert conn.exists('lock') == 1
+    assert conn.eval(RELEASE_LOCK_SCRIPT, 1, 'lock', 'mine') == 1
+    assert conn.exists('lock') == 0
+    assert conn.eval(RELEASE_LOCK_SCRIPT, 1, 'lock', 'mine') == 0
+    with pytest.raises(ValueError, match='no equivalent'):
+        conn.eval("return redis.call('flushall')", 0)
+
+
+def test_fake_redis_expiry():
+    clock = Clock()
+    conn = FakeRedis(clock=clock)
+    conn.set('short', 1, ex=10)
+    conn.set('long', 2)
+
+    clock.now = 9.5
+    assert conn.mget('short', 'long') == [b'1', b'2']
+    assert conn.ttl('short') == 0 and conn.ttl('long') == -1
+    clock.now = 10
+    assert conn.get('short') is None
+    assert conn.ttl('short') == -2
+
+
+def test_mget_keys():
+    conn = FakeRedis()
+    conn.mset({'ab': 1, 'cd': 2})
+
+    # A str is one key, as in redis-py, whether it comes alone, first, or in a list
+    assert conn.mget('ab') == [b'1']
+    assert conn.mget('ab', 'cd') == [b'1', b'2']
+    assert conn.mget(['ab', 'missing', 'cd']) == [b'1', None, b'2']
+    with conn.pipeline() as pipe:
+        assert pipe.mget('ab', 'cd').mget(['cd']).execute() == [[b'1', b'2'], [b'2']]
+
+
+def test_single_flight_in_process():
+    conn = FakeRedis()
+    calls = []
+
+    @cached(conn, ttl=60, key=str)
+    def slow(n):
+        calls.append(n)
+        time.sleep(0.2)
+        return n * 2
+
+    barrier = threading.Barrier(8)
+    results = []
+
+    def call():
+        barrier.wait()
+        results.append(slow(21))
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [42] * 8
+    assert calls == [21]
+    stats = slow.cache_stats()
+    assert (stats['misses'], stats['waits']) == (1, 7)
+    assert conn.exists(cache_key(slow, 21) + ':lock') == 0
+
+
+def test_waits_for_another_process():
+    conn = FakeRedis()
+    calls = []
+
+    @cached(conn, ttl=60, key=str, poll_interval=0.01)
+    def lookup(n):
+        calls.append(n)
+        return 'computed'
+
+    # Another process holds the lock, and stores its value a little later
+    name = cache_key(lookup, 1)
+    conn.set(name + ':lock', 'theirs', px=10000, nx=True)
+    timer = threading.Timer(0.1, conn.set, (name, json.dumps('theirs')))
+    timer.start()
+
+    assert lookup(1) == 'theirs'
+    timer.join()
+    assert calls == []
+    assert lookup.cache_stats()['waits'] == 1
+    assert conn.get(name + ':lock') == b'theirs'
+
+
+def test_computes_after_waiting_too_long():
+    conn = FakeRedis()
+
+    @cached(conn, ttl=60, key=str, lock_wait=0.05, poll_interval=0.01)
+    def lookup(n):
+        return n + 1
+
+    name = cache_key(lookup, 1)
+    conn.set(name + ':lock', 'theirs', px=10000, nx=True)
+
+    assert lookup(1) == 2
+    assert conn.get(name) == b'2'
+    # The lock is not ours to release
+    assert conn.get(name + ':lock') == b'theirs'
+
+
+def test_keeps_a_lock_taken_over_by_another_process():
+    conn = FakeRedis()
+
+    @cached(conn, ttl=60, key=str)
+    def lookup(n):
+        # Our lock expires during the call and another process takes it
+        conn.set(cache_key(lookup, n) + ':lock', 'theirs', px=10000)
+        return n
+
+    assert lookup(1) == 1
+    assert conn.get(cache_key(lookup, 1) + ':lock') == b'theirs'
+
+
+def test_redis_down():
+    def connect():
+        raise ConnectionError('Redis is down')
+    calls = []
+
+    @cached(connect, ttl=60, key=str)
+    def lookup(n):
+        calls.append(n)
+        return n * 2
+
+    assert lookup(2) == 4
+    assert lookup(2) == 4
+
+    assert calls == [2]
+    stats = lookup.cache_stats()
+    assert (stats['misses'], stats['local_hits']) == (1, 1)
+    assert stats['redis_errors'] == 3
+
+
+def test_value_not_json_is_a_miss():
+    conn = FakeRedis()
+
+    @cached(conn, ttl=60, key=str)
+    def lookup(n):
+        return [n]
+
+    conn.set(cache_key(lookup, 1), 'not json')
+
+    assert lookup(1) == [1]
+    assert conn.get(cache_key(lookup, 1)) == b'[1]'
+    stats = lookup.cache_stats()
+    assert (stats['misses'], stats['redis_errors']) == (1, 1)
+
+
+def test_none_is_not_cached():
+    conn = FakeRedis()
+    calls = []
+
+    @cached(conn, ttl=60, key=str)
+    def lookup(n):
+        calls.append(n)
+        return None
+
+    assert lookup(1) is None
+    assert lookup(1) is None
+
+    assert calls == [1, 1]
+    assert conn.exists(cache_key(lookup, 1)) == 0
+    assert lookup.cache_stats()['local_size'] == 0
+
+
+def test_ttl_expiry():
+    clock = Clock()
+    conn = FakeRedis(clock=clock)
+    calls = []
+
+    @cached(conn, ttl=10, key=str, local_ttl=5, clock=clock)
+    def lookup(n):
+        calls.append(n)
+        return {'n': n}
+
+    assert lookup(1) == {'n': 1}
+    clock.now = 4
+    assert lookup(1) == {'n': 1}
+    # Gone from the process, still in Redis
+    clock.now = 6
+    assert lookup(1) == {'n': 1}
+    assert calls == [1]
+    # Gone from both
+    clock.now = 11
+    assert lookup(1) == {'n': 1}
+    assert calls == [1, 1]
+
+    stats = lookup.cache_stats()
+    assert (stats['local_hits'], stats['redis_hits'], stats['misses']) == (1, 1, 2)
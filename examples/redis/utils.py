@@ -0,0 +1,470 @@
+from collections import OrderedDict
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+
+
+logger = logging.getLogger(__name__)
+
+
+# Upper bounds of the timer histogram buckets, in milliseconds; the last bucket is everything above
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """Counts durations into fixed buckets, keeping the count, total, min and max
+
+    Percentiles are estimated from the buckets, so they are as precise as BUCKETS_MS
+    """
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def add(self, ms):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+            self.count += 1
+            self.total += ms
+            self.min = ms if self.min is None else min(self.min, ms)
+            self.max = ms if self.max is None else max(self.max, ms)
+
+    def percentile(self, p):
+        """The upper bound of the bucket the p-th percentile falls in, or the max for the last bucket"""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = p / 100 * self.count
+            seen = 0
+            for bound, count in zip(self.buckets, self.counts):
+                seen += count
+                if seen >= rank:
+                    return min(bound, self.max)
+            return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 3) if self.count else None,
+            'min_ms': self.min,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max,
+            'buckets': {('<={}'.format(bound) if i < len(self.buckets) else '>{}'.format(self.buckets[-1])): count
+                        for i, (bound, count) in enumerate(zip(self.buckets + (None,), self.counts)) if count},
+        }
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def histogram(name):
+    """The histogram of the timer called name, created if new"""
+    with _histograms_lock:
+        if name not in _histograms:
+            _histograms[name] = Histogram()
+        return _histograms[name]
+
+
+def timer(func=None, *, name=None):
+    """Records how long every call of the function takes in its histogram, failed calls included
+
+    Use as @timer or @timer(name='...'); the name defaults to the function's qualified name
+
+    Args:
+        func (callable): The function to time
+        name (str): The histogram to record into
+    """
+    if func is None:
+        return functools.partial(timer, name=name)
+    hist = histogram(name or func.__qualname__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            hist.add((time.perf_counter() - start) * 1000)
+    wrapper.histogram = hist
+    return wrapper
+
+
+def timings():
+    """The summary of every timer's histogram, by name"""
+    with _histograms_lock:
+        histograms = dict(_histograms)
+    return {name: hist.summary() for name, hist in histograms.items()}
+
+
+def timer_report():
+    """The timers' counts and latencies as a table"""
+    lines = ['{:<32}{:>8}{:>10}{:>10}{:>10}{:>10}'.format('timer', 'calls', 'mean ms', 'p50 ms', 'p99 ms', 'max ms')]
+    for name, summary in sorted(timings().items()):
+        if summary['count']:
+            lines.append('{:<32}{:>8}{:>10.3f}{:>10.3f}{:>10.3f}{:>10.3f}'.format(
+                name, summary['count'], summary['mean_ms'], summary['p50_ms'], summary['p99_ms'], summary['max_ms']))
+    return '\n'.join(lines)
+
+
+# Deletes a lock only if it still holds the caller's token, in one step: a GET then a DELETE
+# could delete a lock that expired in between and was taken by another process
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+else
+    return 0
+end
+"""
+
+
+def _list_or_args(keys, args):
+    # As redis-py: a single key may be given alone, and a str or bytes is one key, not a list of them
+    if isinstance(keys, (str, bytes)):
+        return [keys, *args]
+    return [*keys, *args]
+
+
+class FakeRedis:
+    """An in-process stand-in for redis.Redis, for running and testing without a server
+
+    Covers get, set (with ex, px and nx), mget, mset, delete, exists, ttl, pipeline, and eval of
+    RELEASE_LOCK_SCRIPT. Values come back as bytes, as from Redis, and keys expire on the given
+    clock. Every command, and every pipeline as a whole, sleeps for latency seconds first, to
+    stand in for the network round trip to a real server
+    """
+
+    def __init__(self, clock=time.monotonic, latency=0.0):
+        self._data = {}
+        self._expires = {}
+        self._clock = clock
+        self.latency = latency
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode('utf-8')
+
+    def _alive(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= self._clock():
+            del self._data[key]
+            del self._expires[key]
+        return key in self._data
+
+    def get(self, name):
+        self._round_trip()
+        return self._get(name)
+
+    def set(self, name, value, ex=None, px=None, nx=False):
+        self._round_trip()
+        return self._set(name, value, ex, px, nx)
+
+    def mget(self, keys, *args):
+        self._round_trip()
+        return [self._get(name) for name in _list_or_args(keys, args)]
+
+    def mset(self, mapping):
+        self._round_trip()
+        for name, value in mapping.items():
+            self._set(name, value)
+        return True
+
+    def delete(self, *names):
+        self._round_trip()
+        with self._lock:
+            deleted = 0
+            for name in names:
+                if self._alive(name):
+                    del self._data[name]
+                    self._expires.pop(name, None)
+                    deleted += 1
+            return deleted
+
+    def exists(self, *names):
+        self._round_trip()
+        with self._lock:
+            return sum(1 for name in names if self._alive(name))
+
+    def ttl(self, name):
+        self._round_trip()
+        with self._lock:
+            if not self._alive(name):
+                return -2
+            expires = self._expires.get(name)
+            return -1 if expires is None else max(0, round(expires - self._clock()))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def eval(self, script, numkeys, *keys_and_args):
+        """Runs a Lua script this stand-in has a Python equivalent of, atomically as Redis does"""
+        self._round_trip()
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        if script == RELEASE_LOCK_SCRIPT:
+            with self._lock:
+                if self._alive(keys[0]) and self._data[keys[0]] == self._encode(args[0]):
+                    del self._data[keys[0]]
+                    self._expires.pop(keys[0], None)
+                    return 1
+                return 0
+        raise ValueError('FakeRedis has no equivalent of this script')
+
+    def _get(self, name):
+        with self._lock:
+            return self._data[name] if self._alive(name) else None
+
+    def _set(self, name, value, ex=None, px=None, nx=False):
+        with self._lock:
+            if nx and self._alive(name):
+                return None
+            self._data[name] = self._encode(value)
+            self._expires.pop(name, None)
+            if ex is not None or px is not None:
+                self._expires[name] = self._clock() + (ex if ex is not None else px / 1000)
+            return True
+
+    def close(self):
+        pass
+
+
+class FakePipeline:
+    """Queues get, set, mget and mset on a FakeRedis and runs them in one round trip on execute()"""
+
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.reset()
+
+    def get(self, name):
+        self._commands.append((self._redis._get, (name,)))
+        return self
+
+    def set(self, name, value, ex=None, px=None, nx=False):
+        self._commands.append((self._redis._set, (name, value, ex, px, nx)))
+        return self
+
+    def mget(self, keys, *args):
+        self._commands.append((lambda names: [self._redis._get(name) for name in names], (_list_or_args(keys, args),)))
+        return self
+
+    def mset(self, mapping):
+        self._commands.append((lambda mapping: all(self._redis._set(*item) for item in mapping.items()), (mapping,)))
+        return self
+
+    def execute(self):
+        self._redis._round_trip()
+        results = [command(*args) for command, args in self._commands]
+        self.reset()
+        return results
+
+    def reset(self):
+        self._commands = []
+
+
+class LRUCache:
+    """A thread-safe least-recently-used cache whose entries also expire after ttl seconds"""
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires <= self._clock():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, self._clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_MISSING = object()
+
+
+def cached(conn, ttl, key=None, prefix='cache', local_size=128, local_ttl=None,
+           lock_ttl=10, lock_wait=10, poll_interval=0.05, clock=time.monotonic):
+    """Caches the function's results in process and in Redis, computing each at most once at a time
+
+    A call looks in the in-process LRU, then in Redis; on a miss it computes the value and stores
+    it in both. Misses of the same key are single-flight: within the process, one thread computes
+    while the others wait for its result, and across processes, the one that gets the Redis lock
+    (SET NX with lock_ttl) computes while the others poll Redis for the value for up to lock_wait
+    seconds, then compute it themselves. A result of None is not cached, and if Redis fails the
+    call goes on without it. Values are stored as JSON
+
+    Args:
+        conn: A redis.Redis, a FakeRedis, or a callable returning one when first needed
+        ttl (float): Seconds a value is kept in Redis
+        key (callable): Builds the cache key from the call's arguments; the default uses their repr,
+            so pass one if an argument holds a secret
+        prefix (str): Put before every key, with the function's name
+        local_size (int): How many values the in-process LRU holds
+        local_ttl (float): Seconds a value is kept in process, ttl if not given
+        lock_ttl (float): Seconds before a lock whose holder died is released by Redis
+        lock_wait (float): Seconds to wait for another process's value before computing it
+        poll_interval (float): Seconds between two looks for that value
+        clock (callable): The clock the in-process values expire on
+
+    Returns:
+        The decorator. The wrapped function has cache_stats() and cache_clear(), which empties the LRU
+    """
+    def decorator(func):
+        namespace = '{}:{}'.format(prefix, func.__qualname__)
+        local = LRUCache(local_size, ttl if local_ttl is None else local_ttl, clock)
+        flights = {}
+        flights_lock = threading.Lock()
+        stats = dict.fromkeys(('local_hits', 'redis_hits', 'misses', 'waits', 'redis_errors'), 0)
+        stats_lock = threading.Lock()
+
+        def count(name):
+            with stats_lock:
+                stats[name] += 1
+
+        def client():
+            return conn() if callable(conn) else conn
+
+        def redis_get(name):
+            # A value that is not JSON, such as one left by an older version, is a miss too
+            try:
+                value = client().get(name)
+                return _MISSING if value is None else json.loads(value)
+            except Exception as e:
+                count('redis_errors')
+                logger.warning('Redis get of %s failed: %s', name, e)
+                return _MISSING
+
+        def redis_call(method, *args, **kwargs):
+            # _MISSING if Redis failed, to tell it from a None answer
+            try:
+                return getattr(client(), method)(*args, **kwargs)
+            except Exception as e:
+                count('redis_errors')
+                logger.warning('Redis %s of %s failed: %s', method, args[0], e)
+                return _MISSING
+
+        def release(lock_name, token):
+            # Only our own lock: it may have expired and been taken by another process
+            try:
+                client().eval(RELEASE_LOCK_SCRIPT, 1, lock_name, token)
+            except Exception as e:
+                count('redis_errors')
+                logger.warning('Redis release of %s failed: %s', lock_name, e)
+
+        def compute(name, args, kwargs):
+            # Across processes: whoever gets the lock computes, the others wait for its value
+            lock_name = name + ':lock'
+            token = uuid.uuid4().hex
+            locked = redis_call('set', lock_name, token, px=int(lock_ttl * 1000), nx=True)
+            if locked is _MISSING:
+                # Redis is down: nobody can share the value anyway
+                token = None
+            elif not locked:
+                count('waits')
+                deadline = time.monotonic() + lock_wait
+                while time.monotonic() < deadline:
+                    time.sleep(poll_interval)
+                    value = redis_get(name)
+                    if value is not _MISSING:
+                        return value
+                token = None
+            try:
+                count('misses')
+                value = func(*args, **kwargs)
+                if value is not None:
+                    redis_call('set', name, json.dumps(value), px=int(ttl * 1000))
+                return value
+            finally:
+                if token is not None:
+                    release(lock_name, token)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            name = '{}:{}'.format(namespace, key(*args, **kwargs) if key else repr((args, sorted(kwargs.items()))))
+            value = local.get(name, _MISSING)
+            if value is not _MISSING:
+                count('local_hits')
+                return value
+            value = redis_get(name)
+            if value is not _MISSING:
+                count('redis_hits')
+                local.set(name, value)
+                return value
+
+            # Within the process: the first thread to miss computes, the others wait on its event
+            with flights_lock:
+                flight = flights.get(name)
+                leader = flight is None
+                if leader:
+                    flight = flights[name] = {'done': threading.Event()}
+            if not leader:
+                count('waits')
+                flight['done'].wait()
+                if 'error' in flight:
+                    raise flight['error']
+                return flight['value']
+            try:
+                value = flight['value'] = compute(name, args, kwargs)
+                if value is not None:
+                    local.set(name, value)
+                return value
+            except Exception as e:
+                flight['error'] = e
+                raise
+            finally:
+                with flights_lock:
+                    del flights[name]
+                flight['done'].set()
+
+        def cache_stats():
+            with stats_lock:
+                return dict(stats, local_size=len(local))
+
+        wrapper.cache_stats = cache_stats
+        wrapper.cache_clear = local.clear
+        return wrapper
+    return decorator